@@ -6,10 +6,12 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 
 class ConfigDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, values: dict = None):
         super().__init__(parent)
         self.setWindowTitle("Configuraciones")
         self._build_ui()
+        if values:
+            self.set_values(values)
 
     def _build_ui(self):
         # Layout principal
@@ -31,6 +33,25 @@ class ConfigDialog(QDialog):
         self.default_dir_edit.setPlaceholderText("Ruta por defecto")
         form.addRow("Carpeta por defecto:", self.default_dir_edit)
 
+        # Servidor de teselas del mapa base (plantilla XYZ)
+        self.tile_url_edit = QLineEdit()
+        self.tile_url_edit.setPlaceholderText("https://tile.openstreetmap.org/{z}/{x}/{y}.png")
+        form.addRow("URL de teselas (mapa base):", self.tile_url_edit)
+
+        # Presupuesto de memoria del historial de deshacer
+        self.undo_budget_edit = QLineEdit()
+        self.undo_budget_edit.setPlaceholderText("Ej. 64")
+        form.addRow("Memoria para deshacer (MB):", self.undo_budget_edit)
+
+        # Ajuste de vértices cercanos al importar (vacío = desactivado)
+        self.snap_tolerance_edit = QLineEdit()
+        self.snap_tolerance_edit.setPlaceholderText("Ej. 0.5 (vacío = no ajustar)")
+        form.addRow("Tolerancia de ajuste al importar (m):", self.snap_tolerance_edit)
+
+        # Validación de polígonos (autointersecciones, duplicados) antes de exportar
+        self.validate_checkbox = QCheckBox()
+        form.addRow("Validar polígonos antes de exportar:", self.validate_checkbox)
+
         layout.addLayout(form)
 
         # Botones Aceptar / Cancelar
@@ -50,5 +71,22 @@ class ConfigDialog(QDialog):
         return {
             "dark_mode":   self.theme_checkbox.isChecked(),
             "precision":   self.precision_edit.text().strip(),
-            "default_dir": self.default_dir_edit.text().strip()
+            "default_dir": self.default_dir_edit.text().strip(),
+            "tile_url":    self.tile_url_edit.text().strip(),
+            "undo_budget_mb": self.undo_budget_edit.text().strip(),
+            "snap_tolerance": self.snap_tolerance_edit.text().strip(),
+            "validate_before_export": self.validate_checkbox.isChecked()
         }
+
+    def set_values(self, values: dict):
+        """
+        Rellena el formulario con los valores actuales
+        (mismas claves que get_values).
+        """
+        self.theme_checkbox.setChecked(bool(values.get("dark_mode", False)))
+        self.precision_edit.setText(str(values.get("precision", "")))
+        self.default_dir_edit.setText(values.get("default_dir", ""))
+        self.tile_url_edit.setText(values.get("tile_url", ""))
+        self.undo_budget_edit.setText(str(values.get("undo_budget_mb", "")))
+        self.snap_tolerance_edit.setText(str(values.get("snap_tolerance", "")))
+        self.validate_checkbox.setChecked(bool(values.get("validate_before_export", False)))
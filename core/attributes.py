@@ -0,0 +1,314 @@
+# core/attributes.py
+"""
+Atributos de los features (columnas extra de un CSV, ExtendedData de KML)
+guardados en columnas tipadas en lugar de un dict por feature.
+
+Tipos inferidos a partir del texto de cada columna:
+    "int":   int64 + máscara de valores presentes.
+    "float": float64; NaN = nulo.
+    "date":  datetime64[D]; NaT = nulo. Se reconocen AAAA-MM-DD y DD/MM/AAAA.
+    "str":   códigos int32 sobre un diccionario de valores únicos; -1 = nulo.
+
+Una celda vacía es un nulo y no impide inferir el tipo. Los números con
+ceros a la izquierda ("007") se conservan como texto.
+
+La fila i de una AttributeTable corresponde al feature i de la lista que la
+acompaña (importadores y exportadores reciben ambas por separado).
+"""
+import re
+
+import numpy as np
+
+INT = "int"
+FLOAT = "float"
+DATE = "date"
+STR = "str"
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DMY_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+
+
+class AttributeColumn:
+    """Una columna tipada (ver el docstring del módulo)."""
+    __slots__ = ("kind", "data", "valid", "categories")
+
+    def __init__(self, kind: str, data, valid=None, categories=None):
+        self.kind = kind
+        self.data = data
+        self.valid = valid            # solo "int"
+        self.categories = categories  # solo "str"
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self) -> int:
+        n = self.data.nbytes + (self.valid.nbytes if self.valid is not None else 0)
+        if self.categories is not None:
+            n += sum(len(c) for c in self.categories) + 56 * len(self.categories)
+        return n
+
+    def null_mask(self) -> np.ndarray:
+        if self.kind == INT:
+            return ~self.valid
+        if self.kind == FLOAT:
+            return np.isnan(self.data)
+        if self.kind == DATE:
+            return np.isnat(self.data)
+        return self.data < 0
+
+    def take(self, indices) -> "AttributeColumn":
+        """Filas `indices` (int); un índice negativo da una fila nula."""
+        idx = np.asarray(indices, dtype=np.int64)
+        null = idx < 0
+        if not len(self.data):
+            return AttributeColumn.nulls(self.kind, len(idx))
+        safe = np.where(null, 0, idx)
+        if self.kind == INT:
+            return AttributeColumn(INT, self.data[safe], self.valid[safe] & ~null)
+        data = self.data[safe]
+        if self.kind == FLOAT:
+            data[null] = np.nan
+        elif self.kind == DATE:
+            data[null] = np.datetime64("NaT")
+        else:
+            data[null] = -1
+        return AttributeColumn(self.kind, data, categories=self.categories)
+
+    @staticmethod
+    def nulls(kind: str, n: int) -> "AttributeColumn":
+        if kind == INT:
+            return AttributeColumn(INT, np.zeros(n, dtype=np.int64), np.zeros(n, dtype=bool))
+        if kind == FLOAT:
+            return AttributeColumn(FLOAT, np.full(n, np.nan))
+        if kind == DATE:
+            return AttributeColumn(DATE, np.full(n, np.datetime64("NaT"), dtype="datetime64[D]"))
+        return AttributeColumn(STR, np.full(n, -1, dtype=np.int32), categories=[])
+
+    def to_list(self) -> list:
+        """Valores como objetos de Python (int, float, str, datetime.date); None para los nulos."""
+        if self.kind == STR:
+            lookup = self.categories + [None]  # el código -1 apunta al último
+            return [lookup[c] for c in self.data.tolist()]
+        values = self.data.astype(object) if self.kind == DATE else self.data.tolist()
+        values = list(values)
+        for i in np.flatnonzero(self.null_mask()).tolist():
+            values[i] = None
+        return values
+
+    def to_text(self) -> list:
+        """Valores como texto (fechas en ISO 8601); None para los nulos."""
+        return [None if v is None else (v.isoformat() if self.kind == DATE else str(v))
+                for v in self.to_list()]
+
+
+def _is_int_text(v: str) -> bool:
+    digits = v[1:] if v[0] in "+-" else v
+    return digits.isdigit() and (len(digits) == 1 or digits[0] != "0")
+
+
+def _has_leading_zero(v: str) -> bool:
+    digits = v[1:] if v[0] in "+-" else v
+    return (len(digits) > 1 and digits[0] == "0" and digits[1].isdigit()
+            and digits.replace(".", "", 1).isdigit())
+
+
+def _typed_uniques(uniques: list):
+    """(tipo, array) para los valores únicos no vacíos de una columna, o (STR, None)."""
+    if any(_has_leading_zero(v) for v in uniques):
+        return STR, None
+    if all(_is_int_text(v) for v in uniques):
+        try:
+            return INT, np.array([int(v) for v in uniques], dtype=np.int64)
+        except OverflowError:
+            pass
+    if all(v[-1].isdigit() or v[-1] == "." for v in uniques):
+        try:
+            parsed = np.array([float(v) for v in uniques], dtype=np.float64)
+            if np.isfinite(parsed).all():
+                return FLOAT, parsed
+        except ValueError:
+            pass
+    iso = None
+    if all(_ISO_DATE.fullmatch(v) for v in uniques):
+        iso = uniques
+    elif all(_DMY_DATE.fullmatch(v) for v in uniques):
+        iso = [f"{y}-{int(m):02d}-{int(d):02d}" for d, m, y in (_DMY_DATE.fullmatch(v).groups() for v in uniques)]
+    if iso is not None:
+        try:
+            return DATE, np.array(iso, dtype="datetime64[D]")
+        except ValueError:
+            pass  # p. ej. 31/02/2024: se queda como texto
+    return STR, None
+
+
+def _numeric_column(values: list):
+    """Columna int/float si todos los valores son números finitos; None si no."""
+    try:
+        parsed = np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        return None
+    if not np.isfinite(parsed).all() or any(_has_leading_zero(v.strip()) for v in values):
+        return None
+    if all(_is_int_text(v.strip()) for v in values):
+        try:
+            data = np.fromiter(map(int, values), dtype=np.int64, count=len(values))
+        except OverflowError:
+            return AttributeColumn(FLOAT, parsed)
+        return AttributeColumn(INT, data, np.ones(len(values), dtype=bool))
+    if all(v.strip()[-1].isdigit() or v.strip()[-1] == "." for v in values):
+        return AttributeColumn(FLOAT, parsed)
+    return None
+
+
+def infer_column(values: list) -> AttributeColumn:
+    """
+    Columna tipada a partir de los textos de una columna (ver tipos en el módulo).
+
+    Primero se codifica la columna contra un diccionario de valores únicos y
+    el tipo se infiere y se convierte solo sobre esos valores; las columnas
+    repetitivas (categorías, fechas) cuestan casi lo mismo que recorrerlas.
+    Las columnas numéricas sin celdas vacías (IDs, medidas) se convierten
+    directamente, sin diccionario.
+    """
+    n = len(values)
+    column = _numeric_column(values) if n else None
+    if column is not None:
+        return column
+
+    mapping = {}
+    codes = np.fromiter((mapping.setdefault(v.strip() if v else "", len(mapping)) for v in values),
+                        dtype=np.int32, count=n)
+    empty = mapping.pop("", None)
+    if empty is not None:
+        # Las celdas vacías pasan a -1 y los códigos posteriores bajan uno
+        null = codes == empty
+        codes[codes > empty] -= 1
+        codes[null] = -1
+    uniques = list(mapping)
+    del mapping
+    kind, typed = _typed_uniques(uniques) if uniques else (STR, None)
+    if kind == STR:
+        return AttributeColumn(STR, codes, categories=uniques)
+
+    null = codes < 0
+    safe = np.where(null, 0, codes)
+    data = typed[safe]
+    if kind == INT:
+        return AttributeColumn(INT, data, ~null)
+    data[null] = np.nan if kind == FLOAT else np.datetime64("NaT")
+    return AttributeColumn(kind, data)
+
+
+class AttributeTable:
+    """
+    Columnas tipadas con nombre, todas de la misma longitud (una fila por feature).
+    """
+
+    def __init__(self, columns: dict = None, length: int = 0):
+        self.columns = dict(columns or {})
+        lengths = {len(c) for c in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Las columnas de atributos deben tener la misma longitud.")
+        self._length = lengths.pop() if lengths else length
+
+    @classmethod
+    def from_text_columns(cls, columns: dict, length: int = 0) -> "AttributeTable":
+        """Infiere el tipo de cada columna {nombre: [texto, ...]}."""
+        return cls({name: infer_column(values) for name, values in columns.items()}, length)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def names(self) -> list:
+        return list(self.columns)
+
+    def kinds(self) -> dict:
+        return {name: col.kind for name, col in self.columns.items()}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.columns.values())
+
+    def take(self, indices) -> "AttributeTable":
+        """Tabla con las filas `indices`; un índice negativo da una fila con todos los valores nulos."""
+        indices = np.asarray(indices, dtype=np.int64)
+        return AttributeTable({name: col.take(indices) for name, col in self.columns.items()}, len(indices))
+
+    def to_pylists(self) -> list:
+        """Una lista de valores de Python por columna (en el orden de `names`)."""
+        return [col.to_list() for col in self.columns.values()]
+
+    def row(self, i: int) -> dict:
+        return {name: col.take([i]).to_list()[0] for name, col in self.columns.items()}
+
+
+class AttributeBuilder:
+    """
+    Acumula en texto los atributos de los features a medida que un
+    importador los acepta (una fila por feature) y al final infiere los tipos.
+    Se pasa a los importadores igual que un colector de diagnósticos.
+    """
+
+    def __init__(self):
+        self._columns = {}
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    def add_row(self, values: dict = None):
+        """Añade la fila del siguiente feature; las columnas que falten quedan nulas."""
+        columns = self._columns
+        for name, value in (values or {}).items():
+            col = columns.get(name)
+            if col is None:
+                col = columns[name] = [""] * self._rows
+            if len(col) == self._rows:
+                col.append("" if value is None else str(value))
+        self._rows += 1
+        for col in columns.values():
+            if len(col) < self._rows:
+                col.append("")
+
+    def extend(self, other: "AttributeBuilder"):
+        """Añade las filas de otro builder (p. ej. de otro archivo de un lote); las columnas que falten quedan nulas."""
+        columns = self._columns
+        for name, values in other._columns.items():
+            col = columns.get(name)
+            if col is None:
+                col = columns[name] = [""] * self._rows
+            col.extend(values)
+        self._rows += other._rows
+        for col in columns.values():
+            if len(col) < self._rows:
+                col.extend([""] * (self._rows - len(col)))
+
+    def build(self) -> AttributeTable:
+        return AttributeTable.from_text_columns(self._columns, self._rows)
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import sys
+    import time
+
+    n = 1_000_000
+    rng = np.random.default_rng(5)
+    raw = {
+        "parcela": [str(i + 1) for i in range(n)],
+        "area_m2": [f"{a:.2f}" for a in rng.uniform(100, 5000, n).tolist()],
+        "uso": rng.choice(["agrícola", "urbano", "forestal", "baldío", ""], n).tolist(),
+        "fecha": [f"{d:02d}/{m:02d}/2023" for d, m in zip(rng.integers(1, 29, n).tolist(), rng.integers(1, 13, n).tolist())],
+        "codigo": [f"{c:05d}" for c in rng.integers(0, 99999, n).tolist()],
+    }
+    raw_bytes = sum(len(v.encode("utf-8")) + 1 for col in raw.values() for v in col)
+    t0 = time.perf_counter()
+    table = AttributeTable.from_text_columns(raw)
+    print(f"{n} filas, {len(raw)} columnas inferidas en {time.perf_counter() - t0:.2f} s: {table.kinds()}")
+    py_bytes = sum(sys.getsizeof(v) for col in raw.values() for v in col) + sum(sys.getsizeof(col) for col in raw.values())
+    print(f"Texto crudo: {raw_bytes / 1e6:.1f} MB; columnas tipadas: {table.nbytes / 1e6:.1f} MB; "
+          f"listas de str de Python: {py_bytes / 1e6:.1f} MB")
+    subset = table.take([0, -1, 2])
+    print("Filas 0, nula y 2:", list(zip(*subset.to_pylists())))
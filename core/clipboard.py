@@ -0,0 +1,70 @@
+# core/clipboard.py
+"""
+Conversión entre el texto del portapapeles y columnas de coordenadas X/Y,
+pensada para pegar o copiar decenas de miles de filas de una vez.
+"""
+import numpy as np
+
+
+def _split_line(ln: str):
+    """
+    Separa 'x,y' o 'x<TAB>y'. Con tabulador (p. ej. celdas copiadas de Excel)
+    la coma se interpreta como separador decimal.
+    """
+    pts = ln.split("\t") if "\t" in ln else ln.split(",")
+    if len(pts) < 2:
+        return None
+    return pts[0].strip().replace(",", "."), pts[1].strip().replace(",", ".")
+
+
+def parse_coordinate_text(text: str):
+    """
+    Interpreta el texto pegado (una coordenada por línea) en una sola pasada.
+
+    Returns:
+        (xs, ys, invalid): listas de textos X e Y normalizados (punto decimal),
+        y la lista de líneas no vacías que no contienen un par X,Y numérico.
+    """
+    xs, ys, source, invalid = [], [], [], []
+    for ln in text.splitlines():
+        if not ln.strip():
+            continue
+        pair = _split_line(ln)
+        if pair is None:
+            invalid.append(ln)
+            continue
+        xs.append(pair[0])
+        ys.append(pair[1])
+        source.append(ln)
+
+    if not xs:
+        return xs, ys, invalid
+
+    # Validación numérica vectorizada; solo si falla se busca línea a línea
+    try:
+        np.array([xs, ys]).astype(np.float64)
+        return xs, ys, invalid
+    except ValueError:
+        pass
+
+    keep_x, keep_y = [], []
+    for x, y, ln in zip(xs, ys, source):
+        try:
+            float(x)
+            float(y)
+        except ValueError:
+            invalid.append(ln)
+            continue
+        keep_x.append(x)
+        keep_y.append(y)
+    return keep_x, keep_y, invalid
+
+
+def format_tsv(columns) -> str:
+    """
+    Texto TSV (una fila por línea, terminado en salto de línea) a partir de
+    columnas de texto de igual longitud, construido con un único join.
+    """
+    if not columns or not len(columns[0]):
+        return ""
+    return "\n".join(map("\t".join, zip(*columns))) + "\n"
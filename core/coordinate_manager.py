@@ -1,21 +1,477 @@
 # core/coordinate_manager.py
+from itertools import chain
+
+import numpy as np
+
+from core.fixed_point import FixedPointXY
+from core.reprojection import WGS84_EPSG, default_cache, utm_epsg
 
 class GeometryType:
     PUNTO = "Punto"
     POLILINEA = "Polilínea"
     POLIGONO = "Polígono"
     VALID_TYPES = [PUNTO, POLILINEA, POLIGONO]
+    # Códigos compactos para el almacenamiento columnar (FeatureArrays)
+    CODES = {PUNTO: 0, POLILINEA: 1, POLIGONO: 2}
+    FROM_CODE = {0: PUNTO, 1: POLILINEA, 2: POLIGONO}
+
+class FeatureArrays:
+    """
+    Representación columnar de un conjunto de features:
+
+        xy:      float64 (N, 2) con todos los vértices concatenados.
+        offsets: int64 (F + 1); los vértices del feature i son xy[offsets[i]:offsets[i+1]].
+        types:   uint8 (F) con GeometryType.CODES.
+        ids:     int64 (F).
+
+    Geometrías multiparte y polígonos con huecos usan además tres niveles de
+    offsets (None cuando todos los features tienen una parte y un anillo):
+
+        geom_offsets: int64 (F + 1); partes del feature i: geom_offsets[i]:geom_offsets[i+1].
+        part_offsets: int64 (P + 1); anillos de la parte p: part_offsets[p]:part_offsets[p+1].
+        ring_offsets: int64 (R + 1); vértices del anillo r: xy[ring_offsets[r]:ring_offsets[r+1]].
+
+    En un polígono el primer anillo de cada parte es el exterior y los demás
+    son huecos. Los anillos no repiten el vértice de cierre.
+
+    Los arrays pueden ser vistas de solo lectura (p. ej. sobre un mmap), por lo
+    que no deben modificarse in situ.
+    """
+    __slots__ = ("xy", "offsets", "types", "ids", "geom_offsets", "part_offsets", "ring_offsets")
+
+    def __init__(self, xy, offsets, types, ids, geom_offsets=None, part_offsets=None, ring_offsets=None):
+        self.xy = xy
+        self.offsets = offsets
+        self.types = types
+        self.ids = ids
+        self.geom_offsets = geom_offsets
+        self.part_offsets = part_offsets
+        self.ring_offsets = ring_offsets
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def n_vertices(self) -> int:
+        return len(self.xy)
+
+    @property
+    def has_rings(self) -> bool:
+        """True si algún feature tiene varias partes o huecos."""
+        return self.ring_offsets is not None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.xy, self.offsets, self.types, self.ids,
+                                      self.geom_offsets, self.part_offsets, self.ring_offsets)
+                   if a is not None)
+
+    def rings(self):
+        """
+        (geom_offsets, part_offsets, ring_offsets), creando los triviales (una
+        parte y un anillo por feature) si el conjunto no tiene multipartes.
+        """
+        if self.has_rings:
+            return self.geom_offsets, self.part_offsets, self.ring_offsets
+        trivial = np.arange(len(self.ids) + 1, dtype=np.int64)
+        return trivial, trivial, np.asarray(self.offsets, dtype=np.int64)
+
+    def with_ids(self, ids) -> "FeatureArrays":
+        """Mismo conjunto (mismos buffers) con otros IDs."""
+        return FeatureArrays(self.xy, self.offsets, self.types, ids,
+                             self.geom_offsets, self.part_offsets, self.ring_offsets)
+
+    def feature_range(self, start: int, stop: int) -> "FeatureArrays":
+        """
+        Features [start, stop) como un FeatureArrays propio: los vértices, tipos
+        e IDs son vistas sin copia; solo los offsets se rebasan (se copian).
+        """
+        offsets = np.asarray(self.offsets, dtype=np.int64)
+        v0, v1 = int(offsets[start]), int(offsets[stop])
+        xy = self.xy[v0:v1]
+        if not self.has_rings:
+            return FeatureArrays(xy, offsets[start:stop + 1] - v0, self.types[start:stop], self.ids[start:stop])
+        geoms, parts, rings = self.geom_offsets, self.part_offsets, self.ring_offsets
+        p0, p1 = int(geoms[start]), int(geoms[stop])
+        r0, r1 = int(parts[p0]), int(parts[p1])
+        return FeatureArrays(xy, offsets[start:stop + 1] - v0, self.types[start:stop], self.ids[start:stop],
+                             geoms[start:stop + 1] - p0, parts[p0:p1 + 1] - r0, rings[r0:r1 + 1] - v0)
+
+    @classmethod
+    def concatenate(cls, items: list) -> "FeatureArrays":
+        """Une varios FeatureArrays en uno (los offsets se desplazan; los IDs no se tocan)."""
+        if not items:
+            return cls(np.zeros((0, 2)), np.zeros(1, dtype=np.int64),
+                       np.zeros(0, dtype=np.uint8), np.zeros(0, dtype=np.int64))
+
+        def chain_offsets(arrays, bases):
+            return np.concatenate([[0]] + [np.asarray(a[1:], dtype=np.int64) + base
+                                           for a, base in zip(arrays, bases)]).astype(np.int64)
+
+        vertex_base = np.cumsum([0] + [a.n_vertices for a in items[:-1]])
+        xy = np.concatenate([a.xy for a in items])
+        offsets = chain_offsets([a.offsets for a in items], vertex_base)
+        types = np.concatenate([a.types for a in items])
+        ids = np.concatenate([a.ids for a in items])
+        if not any(a.has_rings for a in items):
+            return cls(xy, offsets, types, ids)
+
+        levels = [a.rings() for a in items]
+        geoms = [lv[0] for lv in levels]
+        parts = [lv[1] for lv in levels]
+        rings = [lv[2] for lv in levels]
+        part_base = np.cumsum([0] + [g[-1] for g in geoms[:-1]])
+        ring_base = np.cumsum([0] + [p[-1] for p in parts[:-1]])
+        return cls(xy, offsets, types, ids,
+                   chain_offsets(geoms, part_base),
+                   chain_offsets(parts, ring_base),
+                   chain_offsets(rings, vertex_base))
+
+    def validate(self):
+        """Comprueba la coherencia de formas y offsets. Lanza ValueError si no es coherente."""
+        n_feat = len(self.ids)
+        if self.xy.ndim != 2 or self.xy.shape[1] != 2:
+            raise ValueError(f"xy debe tener forma (N, 2); tiene {self.xy.shape}.")
+        if len(self.types) != n_feat or len(self.offsets) != n_feat + 1:
+            raise ValueError("Longitudes de types/offsets no coinciden con el número de features.")
+        if n_feat and (self.offsets[0] != 0 or self.offsets[-1] != len(self.xy)
+                       or np.any(np.diff(self.offsets) < 1)):
+            raise ValueError("Offsets de vértices no válidos.")
+        if n_feat and not np.isin(self.types, list(GeometryType.FROM_CODE)).all():
+            raise ValueError("Códigos de tipo de geometría no válidos.")
+        levels = (self.geom_offsets, self.part_offsets, self.ring_offsets)
+        if any(a is not None for a in levels):
+            if any(a is None for a in levels):
+                raise ValueError("geom_offsets, part_offsets y ring_offsets deben indicarse juntos.")
+            geoms, parts, rings = levels
+            if len(geoms) != n_feat + 1 or len(parts) != geoms[-1] + 1 or len(rings) != parts[-1] + 1:
+                raise ValueError("Longitudes de los offsets de partes/anillos no coherentes.")
+            for a in levels:
+                if a[0] != 0 or np.any(np.diff(a) < 1):
+                    raise ValueError("Offsets de partes/anillos no válidos.")
+            if rings[-1] != len(self.xy) or not np.array_equal(rings[parts[geoms]], self.offsets):
+                raise ValueError("Offsets de anillos no coinciden con los offsets de vértices.")
+
+    @classmethod
+    def from_features(cls, features: list[dict]) -> "FeatureArrays":
+        if any(f.get("parts") for f in features):
+            builder = FeatureArraysBuilder()
+            for f in features:
+                try:
+                    code = GeometryType.CODES[f["type"]]
+                except KeyError as e:
+                    raise ValueError(f"Tipo de geometría {e} no válido para almacenamiento columnar.")
+                try:
+                    fid = int(f["id"])
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Los IDs de los features deben ser enteros: {e}")
+                builder.add(fid, code, f.get("parts") or [[f["coords"]]])
+            return builder.build()
+
+        n_feat = len(features)
+        counts = np.fromiter((len(f["coords"]) for f in features), dtype=np.int64, count=n_feat)
+        offsets = np.zeros(n_feat + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        n_vert = int(offsets[-1])
+        flat = chain.from_iterable(chain.from_iterable(f["coords"] for f in features))
+        xy = np.fromiter(flat, dtype=np.float64, count=2 * n_vert).reshape(n_vert, 2)
+        try:
+            types = np.fromiter((GeometryType.CODES[f["type"]] for f in features), dtype=np.uint8, count=n_feat)
+        except KeyError as e:
+            raise ValueError(f"Tipo de geometría {e} no válido para almacenamiento columnar.")
+        try:
+            ids = np.fromiter((int(f["id"]) for f in features), dtype=np.int64, count=n_feat)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Los IDs de los features deben ser enteros: {e}")
+        return cls(xy, offsets, types, ids)
+
+    def to_features(self) -> list[dict]:
+        """
+        Materializa la lista de dicts {id, type, coords} que usa el resto de la aplicación.
+        Los features multiparte o con huecos llevan además "parts" (partes -> anillos
+        -> coordenadas); su "coords" es el anillo exterior de la primera parte.
+        """
+        flat = self.xy.tolist()
+        bounds = self.offsets.tolist()
+        features = [
+            {
+                "id": fid,
+                "type": GeometryType.FROM_CODE[code],
+                "coords": [tuple(p) for p in flat[bounds[i]:bounds[i + 1]]]
+            }
+            for i, (fid, code) in enumerate(zip(self.ids.tolist(), self.types.tolist()))
+        ]
+        if not self.has_rings:
+            return features
+
+        geoms, parts, rings = (a.tolist() for a in self.rings())
+        for i, feat in enumerate(features):
+            p0, p1 = geoms[i], geoms[i + 1]
+            if p1 - p0 == 1 and parts[p0 + 1] - parts[p0] == 1:
+                continue
+            feat["parts"] = [
+                [[tuple(v) for v in flat[rings[r]:rings[r + 1]]] for r in range(parts[p], parts[p + 1])]
+                for p in range(p0, p1)
+            ]
+            feat["coords"] = feat["parts"][0][0]
+        return features
+
+
+class FeatureArraysBuilder:
+    """
+    Construye un FeatureArrays feature a feature sin pasar por listas de tuplas.
+
+    Los anillos se acumulan como arrays numpy y se consolidan por lotes; si se
+    indica `transform` (función (x, y) -> (x, y) sobre arrays, p. ej. un
+    Transformer de pyproj) se aplica a cada lote, de modo que la reproyección
+    también se hace por lotes.
+    """
+    BATCH_VERTICES = 100_000
+
+    def __init__(self, transform=None):
+        self.transform = transform
+        self._chunks = []           # lotes consolidados (y transformados)
+        self._pending = []          # anillos del lote actual
+        self._pending_count = 0
+        self._ring_counts = []
+        self._part_rings = []       # anillos por parte
+        self._geom_parts = []       # partes por feature
+        self._types = []
+        self._ids = []
+        self._complex = False
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, fid: int, code: int, parts):
+        """
+        Añade un feature. `parts` es una lista de partes; cada parte, una lista
+        de anillos (arrays (n, 2) o secuencias de pares x, y).
+        """
+        for part in parts:
+            for ring in part:
+                xy = np.asarray(ring, dtype=np.float64).reshape(-1, 2)
+                self._pending.append(xy)
+                self._pending_count += len(xy)
+                self._ring_counts.append(len(xy))
+            self._part_rings.append(len(part))
+            if len(part) != 1:
+                self._complex = True
+        self._geom_parts.append(len(parts))
+        if len(parts) != 1:
+            self._complex = True
+        self._types.append(code)
+        self._ids.append(fid)
+        if self._pending_count >= self.BATCH_VERTICES:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        xy = np.concatenate(self._pending)
+        if self.transform is not None:
+            x, y = self.transform(xy[:, 0], xy[:, 1])
+            xy = np.column_stack([x, y])
+        self._chunks.append(xy)
+        self._pending, self._pending_count = [], 0
+
+    def build(self) -> FeatureArrays:
+        self._flush()
+        xy = np.concatenate(self._chunks) if self._chunks else np.zeros((0, 2))
+
+        def offsets_from(counts):
+            out = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(np.asarray(counts, dtype=np.int64), out=out[1:])
+            return out
+
+        rings = offsets_from(self._ring_counts)
+        parts = offsets_from(self._part_rings)
+        geoms = offsets_from(self._geom_parts)
+        types = np.asarray(self._types, dtype=np.uint8)
+        ids = np.asarray(self._ids, dtype=np.int64)
+        if not self._complex:
+            return FeatureArrays(xy, rings, types, ids)
+        return FeatureArrays(xy, rings[parts[geoms]], types, ids, geoms, parts, rings)
+
+# Features por bloque en el almacenamiento en lista de CoordinateManager
+CHUNK_FEATURES = 1024
+
 
 class CoordinateManager:
-    def __init__(self, hemisphere: str, zone: int):
+    """
+    Features de un proyecto en una zona UTM.
+
+    Los features (dicts {id, type, coords}) se guardan en bloques de
+    CHUNK_FEATURES con copia en escritura: snapshot() devuelve en O(1) una
+    vista inmutable que comparte los bloques, y la primera modificación
+    posterior copia solo la lista de bloques y el bloque que cambia. Las
+    instantáneas pueden leerse desde otros hilos mientras el manager se sigue
+    editando en el suyo. Los dicts de get_features() no deben modificarse.
+    """
+
+    def __init__(self, hemisphere: str, zone: int, precision: int = None):
         self.hemisphere = hemisphere
         self.zone       = zone
-        # lista de features: cada uno es dict con { id, type, coords }
-        self.features   = []
+        # decimales de la rejilla de coordenadas (None = floats sin redondear)
+        self.precision  = precision
+        # bloques (listas) de features: cada uno es dict con { id, type, coords }.
+        # Puede ser None si el manager se creó desde arrays y aún no se materializó.
+        self._chunks    = []
+        self._count     = 0
+        # lista plana cacheada para get_features(); nunca se modifica in situ
+        self._flat      = None
+        # True si una instantánea comparte la lista de bloques actual
+        self._shared    = False
+        # índices de bloques copiados (propios) desde la última instantánea
+        self._owned     = set()
+        # vista columnar cacheada (FeatureArrays) válida para self.revision
+        self._arrays    = None
+        # vértices en punto fijo (FixedPointXY) cuando el manager está cuantizado;
+        # entonces self._arrays guarda solo offsets/tipos/IDs (su xy es None)
+        self._fixed     = None
+        # última reproyección: ((revisión, EPSG origen, EPSG destino), FeatureArrays)
+        self._reprojected = None
+        # se incrementa en cada modificación
+        self.revision   = 0
+
+    @classmethod
+    def from_arrays(cls, hemisphere: str, zone: int, arrays: FeatureArrays,
+                    precision: int = None) -> "CoordinateManager":
+        """
+        Crea un manager respaldado directamente por arrays (sin copiarlos).
+        La lista de dicts solo se construye si alguien llama a get_features().
+        Con `precision` los vértices se guardan en punto fijo (ver quantize()).
+        """
+        arrays.validate()
+        mgr = cls(hemisphere, zone)
+        mgr._chunks = None
+        mgr._count = len(arrays)
+        mgr._arrays = arrays
+        if precision is not None:
+            mgr.quantize(precision)
+        return mgr
+
+    def quantize(self, precision: int):
+        """
+        Pasa el almacenamiento a punto fijo: enteros int32/int64 desplazados
+        desde un origen del proyecto, a `precision` decimales (ver
+        core.fixed_point). Los vértices se redondean a esa rejilla, la lista de
+        dicts se descarta y to_arrays() decodifica los floats bajo demanda.
+        Cuenta como una modificación: sube la revisión e invalida la
+        reproyección cacheada.
+        Una modificación posterior (add_feature, clear) vuelve al almacenamiento
+        en lista; los vértices nuevos se siguen redondeando a la precisión.
+
+        Raises:
+            ValueError: Si la precisión no es un entero entre 0 y 9.
+        """
+        arrays = self.to_arrays()
+        fixed = FixedPointXY.from_float(arrays.xy, precision)
+        # Los vértices cambian (se redondean): nueva revisión, sin reproyección cacheada
+        self._touch()
+        self._fixed = fixed
+        self.precision = fixed.precision
+        self._arrays = FeatureArrays(None, arrays.offsets, arrays.types, arrays.ids,
+                                     arrays.geom_offsets, arrays.part_offsets, arrays.ring_offsets)
+        self._chunks = None
+        self._flat = None
+
+    @property
+    def is_quantized(self) -> bool:
+        return self._fixed is not None
+
+    def fixed_xy(self) -> FixedPointXY:
+        """
+        Vértices en punto fijo a la precisión del manager (sin copia si ya está
+        cuantizado). Útil para comparaciones y deduplicación exactas.
+
+        Raises:
+            ValueError: Si el manager no tiene precisión.
+        """
+        if self._fixed is not None:
+            return self._fixed
+        if self.precision is None:
+            raise ValueError("El manager no tiene una precisión de coordenadas definida.")
+        return FixedPointXY.from_float(self.to_arrays().xy, self.precision)
+
+    @property
+    def features(self) -> list[dict]:
+        if self._flat is None:
+            if self._chunks is None:
+                self._set_features(self.to_arrays().to_features())
+            self._flat = list(chain.from_iterable(self._chunks))
+        return self._flat
+
+    def _set_features(self, features: list):
+        """Reemplaza el almacenamiento por `features`, en bloques propios."""
+        self._chunks = [features[i:i + CHUNK_FEATURES] for i in range(0, len(features), CHUNK_FEATURES)]
+        self._count = len(features)
+        self._owned = set(range(len(self._chunks)))
+        self._shared = False
+
+    def _writable_chunks(self) -> list:
+        """Lista de bloques modificable (la copia si la comparte una instantánea)."""
+        if self._chunks is None:
+            self._set_features(self.to_arrays().to_features())
+        elif self._shared:
+            self._chunks = list(self._chunks)
+            self._owned = set()
+            self._shared = False
+        return self._chunks
+
+    def _writable_chunk(self, i: int) -> list:
+        """Bloque `i` modificable (copiado la primera vez tras una instantánea)."""
+        chunks = self._writable_chunks()
+        if i not in self._owned:
+            chunks[i] = list(chunks[i])
+            self._owned.add(i)
+        return chunks[i]
+
+    def _touch(self):
+        self.revision += 1
+        self._arrays = None
+        self._fixed = None
+        self._reprojected = None
+        self._flat = None
+
+    def snapshot(self) -> "CoordinateSnapshot":
+        """
+        Vista inmutable del estado actual, en O(1): comparte los bloques de
+        features y los arrays cacheados con el manager. Tiene la interfaz de
+        lectura de CoordinateManager (get_features, to_arrays, reprojected...)
+        y puede pasarse a exportadores o a otros hilos; las modificaciones
+        posteriores del manager no la afectan.
+
+        Debe llamarse desde el hilo que modifica el manager.
+        """
+        snap = CoordinateSnapshot.__new__(CoordinateSnapshot)
+        snap.__dict__.update(self.__dict__)
+        snap._owned = frozenset()
+        self._shared = True
+        return snap
+
+    def reprojected(self, dst_epsg: int = WGS84_EPSG) -> FeatureArrays:
+        """
+        Los mismos features con los vértices reproyectados de la zona UTM del
+        manager a `dst_epsg` (WGS84 por defecto), en una sola transformación.
+
+        El resultado se memoriza por (revisión, CRS de origen, CRS de destino),
+        así que una edición o un cambio de hemisferio/zona lo invalida, y pasa
+        por la caché compartida de core.reprojection: otro manager con el mismo
+        contenido (p. ej. reconstruido desde la tabla) tampoco reproyecta.
+        """
+        key = (self.revision, utm_epsg(self.hemisphere, self.zone), dst_epsg)
+        if self._reprojected is not None and self._reprojected[0] == key:
+            return self._reprojected[1]
+        a = self.to_arrays()
+        xy = default_cache.transform(a.xy, key[1], dst_epsg)
+        arrays = FeatureArrays(xy, a.offsets, a.types, a.ids, a.geom_offsets, a.part_offsets, a.ring_offsets)
+        self._reprojected = (key, arrays)
+        return arrays
 
     def add_feature(self, fid: int, geom_type: str, coords: list[tuple[float,float]]):
         """
-        Añade un feature a la lista, validando los datos de entrada.
+        Añade un feature al final, validando los datos de entrada.
 
         Args:
             fid: ID del feature.
@@ -29,6 +485,22 @@ class CoordinateManager:
             TypeError: Si 'coords' no es una lista, o si algún elemento de 'coords'
                        no es una tupla/lista.
         """
+        feature = self._validated(fid, geom_type, coords)
+        chunks = self._chunks
+        last = len(chunks) - 1 if chunks else -1
+        if last >= 0 and not self._shared and last in self._owned and len(chunks[last]) < CHUNK_FEATURES:
+            chunks[last].append(feature)
+        else:
+            chunks = self._writable_chunks()
+            if not chunks or len(chunks[-1]) >= CHUNK_FEATURES:
+                chunks.append([])
+                self._owned.add(len(chunks) - 1)
+            self._writable_chunk(len(chunks) - 1).append(feature)
+        self._count += 1
+        self._touch()
+
+    def _validated(self, fid: int, geom_type: str, coords: list) -> dict:
+        """Dict del feature tras validar sus datos (ver add_feature)."""
         # Validación del tipo de geometría
         if geom_type not in GeometryType.VALID_TYPES:
             raise ValueError(
@@ -73,15 +545,130 @@ class CoordinateManager:
                     f"Geometría '{GeometryType.POLIGONO}' debe tener al menos 3 coordenadas base (sin cierre explícito aquí). Se encontraron: {len(coords)}"
                 )
 
-        # Si todas las validaciones pasan
-        self.features.append({
+        # Con precisión, los vértices se ajustan a la rejilla para que las
+        # comparaciones posteriores sean exactas. Sin ella la lista se copia
+        # igualmente: el feature puede quedar compartido con una instantánea.
+        if self.precision is not None:
+            coords = [(round(float(x), self.precision), round(float(y), self.precision)) for x, y in coords]
+        else:
+            coords = list(coords)
+        return {
             "id":   fid,
             "type": geom_type,
             "coords": coords
-        })
+        }
+
+    def replace_feature(self, index: int, fid: int, geom_type: str, coords: list[tuple[float,float]]):
+        """
+        Reemplaza el feature en la posición `index` (mismas validaciones que
+        add_feature). Solo se copia el bloque que lo contiene.
+
+        Raises:
+            IndexError: Si `index` está fuera de rango.
+            ValueError, TypeError: Como en add_feature.
+        """
+        if not -self._count <= index < self._count:
+            raise IndexError(f"Índice de feature fuera de rango: {index} (hay {self._count}).")
+        feature = self._validated(fid, geom_type, coords)
+        index %= self._count
+        self._writable_chunk(index // CHUNK_FEATURES)[index % CHUNK_FEATURES] = feature
+        self._touch()
 
     def clear(self):
-        self.features.clear()
+        self._chunks = []
+        self._count = 0
+        self._owned = set()
+        self._shared = False
+        self._touch()
 
     def get_features(self):
         return self.features
+
+    def feature_count(self) -> int:
+        return self._count
+
+    def to_arrays(self) -> FeatureArrays:
+        """
+        Vista columnar de todos los features (cacheada hasta la próxima
+        modificación). Si el manager está cuantizado, los vértices float se
+        decodifican en cada llamada y no se cachean.
+        """
+        if self._fixed is not None:
+            a = self._arrays
+            return FeatureArrays(self._fixed.to_float(), a.offsets, a.types, a.ids,
+                                 a.geom_offsets, a.part_offsets, a.ring_offsets)
+        if self._arrays is None:
+            self._arrays = FeatureArrays.from_features(self.features)
+        return self._arrays
+
+
+class CoordinateSnapshot(CoordinateManager):
+    """
+    Estado de un CoordinateManager en una revisión (ver CoordinateManager.snapshot()).
+    Solo admite lecturas; add_feature, replace_feature, clear y quantize
+    lanzan RuntimeError.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise RuntimeError("La instantánea de un CoordinateManager es de solo lectura.")
+
+    add_feature = replace_feature = clear = quantize = _read_only
+
+    def snapshot(self) -> "CoordinateSnapshot":
+        return self
+
+
+# Benchmark (opcional, para testing directo): instantáneas frente a copia profunda
+if __name__ == '__main__':
+    import copy
+    import threading
+    import time
+
+    n = 500_000
+    rng = np.random.default_rng(11)
+    xy = rng.uniform((400000, 4000000), (500000, 4100000), (n, 2)).tolist()
+    mgr = CoordinateManager("Norte", 18)
+    t0 = time.perf_counter()
+    for i, (x, y) in enumerate(xy):
+        mgr.add_feature(i + 1, GeometryType.PUNTO, [(x, y)])
+    print(f"{n} puntos añadidos en {time.perf_counter() - t0:.2f} s")
+
+    t0 = time.perf_counter()
+    deep = copy.deepcopy(mgr)
+    print(f"Copia profunda:      {(time.perf_counter() - t0) * 1000:9.1f} ms")
+    del deep
+    t0 = time.perf_counter()
+    snap = mgr.snapshot()
+    print(f"Instantánea:         {(time.perf_counter() - t0) * 1000:9.3f} ms")
+    t0 = time.perf_counter()
+    mgr.replace_feature(n // 2, n // 2 + 1, GeometryType.PUNTO, [(0.0, 0.0)])
+    print(f"Primera edición:     {(time.perf_counter() - t0) * 1000:9.3f} ms (copia la lista de bloques y un bloque)")
+    t0 = time.perf_counter()
+    mgr.replace_feature(n // 2 + 1, n // 2 + 2, GeometryType.PUNTO, [(0.0, 0.0)])
+    print(f"Edición siguiente:   {(time.perf_counter() - t0) * 1000:9.3f} ms")
+
+    # Un hilo exporta/mide sobre instantáneas mientras el principal sigue editando
+    results = []
+
+    def worker(s):
+        arrays = s.to_arrays()
+        results.append((s.revision, len(arrays), float(arrays.xy[:, 0].sum())))
+
+    threads = []
+    for k in range(5):
+        s = mgr.snapshot()
+        th = threading.Thread(target=worker, args=(s,))
+        th.start()
+        threads.append((s, th))
+        for j in range(2000):
+            mgr.add_feature(n + k * 2000 + j + 1, GeometryType.PUNTO, [(1.0, 1.0)])
+            mgr.replace_feature(j, j + 1, GeometryType.PUNTO, [(2.0, 2.0)])
+    for s, th in threads:
+        th.join()
+        expected = float(np.array([f["coords"][0][0] for f in s.get_features()]).sum())
+        assert abs(next(r for r in results if r[0] == s.revision)[2] - expected) < 1e-3
+    print(f"{len(threads)} instantáneas leídas en otro hilo durante 20000 ediciones, todas coherentes:")
+    for revision, count, _ in sorted(results):
+        print(f"  revisión {revision}: {count} features")
+    print(f"Instantánea inicial intacta: {snap.feature_count()} features, "
+          f"feature {n // 2}: {snap.get_features()[n // 2]['coords']}")
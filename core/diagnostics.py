@@ -0,0 +1,148 @@
+# core/diagnostics.py
+"""
+Canal de diagnósticos compartido por importadores y exportadores.
+
+En lugar de escribir una línea en la consola por cada vértice o feature
+omitido, los avisos se registran en un `Diagnostics` con un código tipado
+(ver `DiagnosticCode`). Por cada código se guardan el número de avisos y unos
+pocos IDs de ejemplo, y solo los primeros `echo_limit` se escriben en la
+consola; el resto se cuenta sin formatear ningún mensaje. La GUI muestra al
+final un único resumen (`summary()`).
+"""
+import threading
+
+
+class DiagnosticCode:
+    SIN_COORDENADAS = "sin_coordenadas"
+    COORDENADAS_INSUFICIENTES = "coordenadas_insuficientes"
+    COORDENADA_INVALIDA = "coordenada_invalida"
+    ERROR_TRANSFORMACION = "error_transformacion"
+    TIPO_NO_SOPORTADO = "tipo_no_soportado"
+    ID_NO_ENTERO = "id_no_entero"
+    DESCRIPCION_OMITIDA = "descripcion_omitida"
+    SIN_GEOMETRIA = "sin_geometria"
+    GEOMETRIA_MIXTA = "geometria_mixta"
+    HUECO_OMITIDO = "hueco_omitido"
+    ARCHIVO_NO_ESCRITO = "archivo_no_escrito"
+
+    # Descripción de cada código para los mensajes y el resumen
+    DESCRIPTIONS = {
+        SIN_COORDENADAS: "Features sin coordenadas (omitidos)",
+        COORDENADAS_INSUFICIENTES: "Geometrías o partes con menos vértices de los necesarios (omitidas)",
+        COORDENADA_INVALIDA: "Coordenadas malformadas o no numéricas (omitidas)",
+        ERROR_TRANSFORMACION: "Coordenadas que no se pudieron reproyectar (omitidas)",
+        TIPO_NO_SOPORTADO: "Tipos de geometría no soportados (omitidos)",
+        ID_NO_ENTERO: "IDs que no son enteros (reemplazados)",
+        DESCRIPCION_OMITIDA: "Descripciones UTM omitidas",
+        SIN_GEOMETRIA: "Elementos sin geometría soportada (omitidos)",
+        GEOMETRIA_MIXTA: "MultiGeometry con tipos mezclados (geometrías de otro tipo omitidas)",
+        HUECO_OMITIDO: "Huecos con menos de 3 vértices (omitidos)",
+        ARCHIVO_NO_ESCRITO: "Archivos que no se pudieron escribir",
+    }
+
+
+class Diagnostics:
+    """
+    Colector de avisos con conteo por código, IDs de ejemplo y límite de
+    líneas en consola. Es seguro usarlo desde varios hilos (la exportación
+    múltiple comparte uno entre formatos).
+
+    Args:
+        echo_limit: Avisos de cada código que se escriben en la consola
+                    (0 = ninguno); a partir de ahí solo se cuentan.
+        max_examples: IDs de ejemplo que se guardan por código.
+    """
+
+    def __init__(self, echo_limit: int = 3, max_examples: int = 5):
+        self.echo_limit = echo_limit
+        self.max_examples = max_examples
+        self._counts = {}
+        self._examples = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Se envía entre procesos (p. ej. desde los trabajos de BatchImporter) sin el lock
+        with self._lock:
+            state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def warn(self, code: str, feature_id=None, detail: str = ""):
+        """
+        Registra un aviso. `detail` solo se usa en la línea de consola, así que
+        conviene pasar textos ya disponibles (el formateo caro se evita igual:
+        la mayoría de los avisos no se escriben).
+        """
+        with self._lock:
+            count = self._counts.get(code, 0) + 1
+            self._counts[code] = count
+            if feature_id is not None:
+                examples = self._examples.setdefault(code, [])
+                if len(examples) < self.max_examples and feature_id not in examples:
+                    examples.append(feature_id)
+        if count <= self.echo_limit:
+            where = f" (Feature ID {feature_id})" if feature_id is not None else ""
+            extra = f": {detail}" if detail else ""
+            print(f"Advertencia: {DiagnosticCode.DESCRIPTIONS.get(code, code)}{where}{extra}")
+            if count == self.echo_limit:
+                print(f"Advertencia: Se omitirán más avisos de '{code}' en la consola (se siguen contando).")
+
+    def count(self, code: str = None) -> int:
+        """Avisos registrados con `code` (o en total, si no se indica)."""
+        with self._lock:
+            return self._counts.get(code, 0) if code is not None else sum(self._counts.values())
+
+    def examples(self, code: str) -> list:
+        with self._lock:
+            return list(self._examples.get(code, ()))
+
+    def __bool__(self):
+        return bool(self._counts)
+
+    def merge(self, other: "Diagnostics"):
+        """Suma los avisos de otro colector (p. ej. de un archivo de un lote)."""
+        with other._lock:
+            counts = dict(other._counts)
+            examples = {code: list(ids) for code, ids in other._examples.items()}
+        with self._lock:
+            for code, n in counts.items():
+                self._counts[code] = self._counts.get(code, 0) + n
+                mine = self._examples.setdefault(code, [])
+                for fid in examples.get(code, ()):
+                    if len(mine) < self.max_examples and fid not in mine:
+                        mine.append(fid)
+
+    def as_dict(self) -> dict:
+        """{código: {"cantidad", "ejemplos"}}, en el orden en que aparecieron."""
+        with self._lock:
+            return {code: {"cantidad": n, "ejemplos": list(self._examples.get(code, ()))}
+                    for code, n in self._counts.items()}
+
+    def summary(self) -> str:
+        """Resumen de una línea por código, para mostrar al usuario ("" si no hay avisos)."""
+        lines = []
+        for code, info in self.as_dict().items():
+            line = f"- {DiagnosticCode.DESCRIPTIONS.get(code, code)}: {info['cantidad']}"
+            if info["ejemplos"]:
+                more = ", ..." if info["cantidad"] > len(info["ejemplos"]) else ""
+                line += f" (IDs: {', '.join(str(fid) for fid in info['ejemplos'])}{more})"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import time
+
+    diagnostics = Diagnostics()
+    t0 = time.perf_counter()
+    for i in range(200_000):
+        diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, i, "Polilínea con 1 vértice")
+        if i % 10 == 0:
+            diagnostics.warn(DiagnosticCode.ID_NO_ENTERO, f"p{i}")
+    print(f"\n{diagnostics.count()} avisos en {(time.perf_counter() - t0) * 1000:.0f} ms")
+    print(diagnostics.summary())
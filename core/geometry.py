@@ -8,36 +8,56 @@ class GeometryBuilder:
     de la lista de features que devuelve CoordinateManager.
     """
 
+    # Nombres de tipo de la aplicación (CoordinateManager) y sus equivalentes en inglés
+    _POINT_TYPES = ("Punto", "Point")
+    _POLYGON_TYPES = ("Polígono", "Polygon")
+
+    @staticmethod
+    def _add_ring(path: QPainterPath, pts, close: bool):
+        path.moveTo(QPointF(*pts[0]))
+        for x,y in pts[1:]:
+            path.lineTo(x,y)
+        if close:
+            path.closeSubpath()
+
     @staticmethod
     def paths_from_features(features: list[dict]):
         """
         Devuelve lista de tuplas (path: QPainterPath, pen: QPen)
         para cada feature.
+
+        Las partes de un feature multiparte y los huecos de los polígonos
+        ("parts") se añaden como subtrayectos del mismo path; el relleno
+        par-impar hace que los huecos queden vacíos.
         """
         result = []
         from PySide6.QtGui import QPen
         from PySide6.QtCore import Qt
 
         for feat in features:
-            pts = feat["coords"]
             typ = feat["type"]
+            if typ in GeometryBuilder._POINT_TYPES:
+                # en GUI dibujaremos un pequeño círculo, no via path
+                continue
 
-            # cerrar anillo solo en Polygon
-            if typ == "Polygon":
-                pts = pts + [pts[0]]
-            path = QPainterPath(QPointF(*pts[0]))
-            for x,y in pts[1:]:
-                path.lineTo(x,y)
+            is_polygon = typ in GeometryBuilder._POLYGON_TYPES
+            parts = feat.get("parts") or [[feat["coords"]]]
+            path = QPainterPath()
+            path.setFillRule(Qt.OddEvenFill)
+            for rings in parts:
+                for pts in rings:
+                    if pts:
+                        # cerrar anillo solo en Polygon
+                        GeometryBuilder._add_ring(path, pts, close=is_polygon)
+            if path.isEmpty():
+                continue
 
             # definir estilo
-            if typ == "Point":
-                # en GUI dibujaremos un pequeño círculo, no via path
-                continue
-            elif typ == "LineString":
-                pen = QPen(Qt.blue, 2)
-            else:  # Polygon
+            if is_polygon:
                 pen = QPen(Qt.green, 1)
                 pen.setStyle(Qt.SolidLine)
+            else:  # LineString
+                pen = QPen(Qt.blue, 2)
 
             result.append((path, pen))
         return result
@@ -0,0 +1,392 @@
+# core/history.py
+"""
+Historial de deshacer/rehacer basado en comandos que guardan solo deltas
+(celdas editadas, filas insertadas/eliminadas, rangos importados), nunca
+copias completas de la tabla salvo cuando la propia acción reemplaza todo.
+
+Los comandos no dependen de Qt: operan sobre un "target" que expone
+  get_rows(start, count) -> RowBlock
+  set_cell(row, col, text)
+  write_rows(start, block)          (sobrescribe filas existentes)
+  insert_rows(start, block)
+  remove_rows(start, count)
+  replace_all(block)
+de modo que cada paso cuesta O(filas cambiadas).
+"""
+from collections import deque
+from contextlib import contextmanager
+
+_SEP = "\n"
+
+
+class RowBlock:
+    """
+    Bloque compacto de filas (ID, X, Y) como texto.
+
+    En lugar de una tupla de strings por fila, cada columna se guarda como un
+    único string unido por saltos de línea: un millón de filas ocupa unos
+    pocos MB en vez de decenas.
+    """
+    __slots__ = ("_cols", "_count")
+
+    def __init__(self, ids, xs, ys):
+        ids, xs, ys = list(ids), list(xs), list(ys)
+        if not (len(ids) == len(xs) == len(ys)):
+            raise ValueError("Las columnas de un RowBlock deben tener la misma longitud.")
+        self._count = len(ids)
+        self._cols = tuple(_SEP.join(col) for col in (ids, xs, ys))
+
+    @classmethod
+    def from_text_columns(cls, ids: str, xs: str, ys: str, count: int) -> "RowBlock":
+        """Bloque a partir de columnas ya unidas por saltos de línea (sin copiar ni validar)."""
+        block = cls.__new__(cls)
+        block._count = count
+        block._cols = (ids, xs, ys) if count else ("", "", "")
+        return block
+
+    @classmethod
+    def from_rows(cls, rows):
+        rows = list(rows)
+        return cls((r[0] for r in rows), (r[1] for r in rows), (r[2] for r in rows))
+
+    def __len__(self):
+        return self._count
+
+    def column(self, col: int) -> list[str]:
+        if self._count == 0:
+            return []
+        return self._cols[col].split(_SEP)
+
+    def rows(self):
+        """Itera las filas como tuplas (id, x, y)."""
+        if self._count == 0:
+            return iter(())
+        return zip(*(c.split(_SEP) for c in self._cols))
+
+    def text_columns(self) -> tuple[str, str, str]:
+        """Columnas (ids, xs, ys) unidas por saltos de línea, sin copiarlas."""
+        return self._cols
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(c) for c in self._cols) + 64
+
+
+class Command:
+    """Cambio reversible sobre el target."""
+
+    def redo(self, target):
+        raise NotImplementedError
+
+    def undo(self, target):
+        raise NotImplementedError
+
+    @property
+    def nbytes(self) -> int:
+        return 64
+
+
+class CellEditCommand(Command):
+    __slots__ = ("row", "col", "old", "new")
+
+    def __init__(self, row: int, col: int, old: str, new: str):
+        self.row, self.col, self.old, self.new = row, col, old, new
+
+    def redo(self, target):
+        target.set_cell(self.row, self.col, self.new)
+
+    def undo(self, target):
+        target.set_cell(self.row, self.col, self.old)
+
+    @property
+    def nbytes(self) -> int:
+        return 96 + len(self.old) + len(self.new)
+
+
+class InsertRowsCommand(Command):
+    def __init__(self, start: int, block: RowBlock):
+        self.start, self.block = start, block
+
+    def redo(self, target):
+        target.insert_rows(self.start, self.block)
+
+    def undo(self, target):
+        target.remove_rows(self.start, len(self.block))
+
+    @property
+    def nbytes(self) -> int:
+        return 64 + self.block.nbytes
+
+
+class DeleteRowsCommand(Command):
+    def __init__(self, start: int, block: RowBlock):
+        self.start, self.block = start, block
+
+    def redo(self, target):
+        target.remove_rows(self.start, len(self.block))
+
+    def undo(self, target):
+        target.insert_rows(self.start, self.block)
+
+    @property
+    def nbytes(self) -> int:
+        return 64 + self.block.nbytes
+
+
+class WriteRangeCommand(Command):
+    """
+    Escritura de un rango contiguo (p. ej. pegar): sobrescribe `len(old)` filas
+    existentes desde `start` y añade al final las restantes de `new`.
+    """
+
+    def __init__(self, start: int, old: RowBlock, new: RowBlock):
+        if len(new) < len(old):
+            raise ValueError("El bloque nuevo no puede ser más corto que el sobrescrito.")
+        self.start, self.old, self.new = start, old, new
+
+    def _split_new(self):
+        n_old = len(self.old)
+        if n_old == len(self.new):
+            return self.new, None
+        rows = list(self.new.rows())
+        return RowBlock.from_rows(rows[:n_old]), RowBlock.from_rows(rows[n_old:])
+
+    def redo(self, target):
+        overwritten, appended = self._split_new()
+        if len(overwritten):
+            target.write_rows(self.start, overwritten)
+        if appended is not None:
+            target.insert_rows(self.start + len(overwritten), appended)
+
+    def undo(self, target):
+        n_added = len(self.new) - len(self.old)
+        if n_added:
+            target.remove_rows(self.start + len(self.old), n_added)
+        if len(self.old):
+            target.write_rows(self.start, self.old)
+
+    @property
+    def nbytes(self) -> int:
+        return 64 + self.old.nbytes + self.new.nbytes
+
+
+class ReplaceAllCommand(Command):
+    """Reemplazo de toda la tabla (importar, nuevo proyecto)."""
+
+    def __init__(self, old: RowBlock, new: RowBlock):
+        self.old, self.new = old, new
+
+    def redo(self, target):
+        target.replace_all(self.new)
+
+    def undo(self, target):
+        target.replace_all(self.old)
+
+    @property
+    def nbytes(self) -> int:
+        return 64 + self.old.nbytes + self.new.nbytes
+
+
+class CompoundCommand(Command):
+    """Varios comandos que se deshacen/rehacen como una sola acción."""
+
+    def __init__(self, commands: list[Command]):
+        self.commands = commands
+
+    def redo(self, target):
+        for cmd in self.commands:
+            cmd.redo(target)
+
+    def undo(self, target):
+        for cmd in reversed(self.commands):
+            cmd.undo(target)
+
+    @property
+    def nbytes(self) -> int:
+        return 64 + sum(c.nbytes for c in self.commands)
+
+
+class CommandHistory:
+    """
+    Pilas de deshacer/rehacer con presupuesto de memoria.
+
+    Cuando la suma de `nbytes` de los comandos guardados supera `max_bytes`
+    (o hay más de `max_entries`), se descartan los más antiguos. Un comando
+    que por sí solo excede el presupuesto no se guarda y el historial se vacía,
+    porque deshacer lo anterior ya no tendría sentido.
+    """
+
+    def __init__(self, target, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 1000):
+        self.target = target
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0
+        self._group_depth = 0
+        self._group = []
+        self._applying = False
+        self.on_change = None  # callback opcional sin argumentos
+        self.on_apply = None   # callback opcional (comando, deshecho: bool) tras undo/redo
+
+    # ---- consulta ----
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    @property
+    def memory_used(self) -> int:
+        return self._bytes
+
+    @property
+    def is_applying(self) -> bool:
+        """True mientras se ejecuta un undo/redo (no se deben registrar comandos)."""
+        return self._applying
+
+    # ---- registro ----
+
+    def push(self, command: Command) -> bool:
+        """
+        Registra un comando ya aplicado. Devuelve False si no se pudo guardar
+        por exceder el presupuesto de memoria; en ese caso el historial queda
+        vacío y es quien llama el que debe avisar al usuario.
+        """
+        if self._applying:
+            return True
+        if self._group_depth:
+            self._group.append(command)
+            return True
+
+        self._bytes -= sum(c.nbytes for c in self._redo)
+        self._redo.clear()
+
+        size = command.nbytes
+        if size > self.max_bytes:
+            self.clear()
+            return False
+
+        self._undo.append(command)
+        self._bytes += size
+        while self._undo and (self._bytes > self.max_bytes or len(self._undo) > self.max_entries):
+            self._bytes -= self._undo.popleft().nbytes
+        self._notify()
+        return True
+
+    @contextmanager
+    def group(self):
+        """Agrupa los comandos registrados dentro del bloque en uno solo."""
+        self._group_depth += 1
+        try:
+            yield
+        finally:
+            self._group_depth -= 1
+            if self._group_depth == 0:
+                commands, self._group = self._group, []
+                if len(commands) == 1:
+                    self.push(commands[0])
+                elif commands:
+                    self.push(CompoundCommand(commands))
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+        self._notify()
+
+    # ---- ejecución ----
+
+    def undo(self) -> bool:
+        if not self._undo:
+            return False
+        command = self._undo.pop()
+        self._run(command.undo)
+        self._redo.append(command)
+        self._applied(command, True)
+        self._notify()
+        return True
+
+    def redo(self) -> bool:
+        if not self._redo:
+            return False
+        command = self._redo.pop()
+        self._run(command.redo)
+        self._undo.append(command)
+        self._applied(command, False)
+        self._notify()
+        return True
+
+    def _run(self, fn):
+        self._applying = True
+        try:
+            fn(self.target)
+        finally:
+            self._applying = False
+
+    def _applied(self, command, undone):
+        if self.on_apply is not None:
+            self.on_apply(command, undone)
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change()
+
+
+if __name__ == '__main__':
+    import time
+
+    class ListTarget:
+        """Target mínimo sobre una lista de filas, para pruebas directas."""
+
+        def __init__(self, rows):
+            self.rows = [list(r) for r in rows]
+
+        def get_rows(self, start, count):
+            return RowBlock.from_rows(self.rows[start:start + count])
+
+        def set_cell(self, row, col, text):
+            self.rows[row][col] = text
+
+        def write_rows(self, start, block):
+            for i, r in enumerate(block.rows()):
+                self.rows[start + i] = list(r)
+
+        def insert_rows(self, start, block):
+            self.rows[start:start] = [list(r) for r in block.rows()]
+
+        def remove_rows(self, start, count):
+            del self.rows[start:start + count]
+
+        def replace_all(self, block):
+            self.rows = [list(r) for r in block.rows()]
+
+    target = ListTarget([("1", "500000", "4000000"), ("2", "500010", "4000010")])
+    history = CommandHistory(target, max_bytes=1024)
+
+    target.set_cell(0, 1, "500001")
+    history.push(CellEditCommand(0, 1, "500000", "500001"))
+    block = RowBlock.from_rows([("3", "1", "2"), ("4", "3", "4")])
+    target.insert_rows(2, block)
+    history.push(InsertRowsCommand(2, block))
+    print("Tras editar e insertar:", target.rows)
+    history.undo(); history.undo()
+    print("Tras dos deshacer:     ", target.rows)
+    history.redo()
+    print("Tras rehacer:          ", target.rows)
+
+    # Presupuesto: un reemplazo enorme no cabe y vacía el historial
+    n = 1_000_000
+    big = RowBlock((str(i) for i in range(n)), (f"{500000 + i}.00" for i in range(n)), (f"{4000000 + i}.00" for i in range(n)))
+    print(f"RowBlock de {n} filas: {big.nbytes / 1e6:.1f} MB")
+    print("push dentro de presupuesto:", history.push(ReplaceAllCommand(RowBlock([], [], []), big)))
+    print("can_undo:", history.can_undo())
+
+    history = CommandHistory(ListTarget([]), max_bytes=256 * 1024 * 1024)
+    t0 = time.perf_counter()
+    history.target.replace_all(big)
+    history.push(ReplaceAllCommand(RowBlock([], [], []), big))
+    history.undo()
+    history.redo()
+    print(f"Deshacer+rehacer de {n} filas: {time.perf_counter() - t0:.2f} s, memoria historial {history.memory_used / 1e6:.1f} MB")
@@ -0,0 +1,608 @@
+# core/journal.py
+"""
+Autoguardado de la tabla con un diario binario de solo-anexar.
+
+Cada acción registrada en el historial (ver core/history.py) se reduce a las
+operaciones primitivas del target (set_cell, write_rows, insert_rows,
+remove_rows, replace_all) y se anexa al diario como un registro
+
+    [longitud (uint32)][tipo (uint8)][datos][crc32 (uint32)]
+
+de modo que autoguardar una edición cuesta O(tamaño de la edición), no
+O(tamaño del proyecto). Un hilo de fondo escribe los registros en lote y
+hace fsync; la GUI solo codifica unos pocos bytes por edición.
+
+Cuando el diario crece más que la última instantánea, se compacta: se escribe
+una instantánea completa de la tabla (archivo temporal + os.replace) y el
+diario vuelve a empezar vacío. Como eso solo ocurre tras acumular tantos
+bytes de ediciones como ocupa el proyecto, el costo amortizado sigue siendo
+proporcional a las ediciones.
+
+La instantánea y el diario llevan un número de generación: un diario que no
+corresponde a la instantánea (caída justo después de compactar) se ignora,
+porque sus ediciones ya están en ella. Al recuperar, la lectura se detiene en
+el primer registro incompleto o con CRC inválido (escritura cortada).
+
+Cada sesión (cada ventana) escribe sus propios archivos,
+sesion-<id>.gws/.gwj, y mantiene bloqueado sesion-<id>.lock mientras está
+abierta (flock en POSIX, msvcrt.locking en Windows). El sistema libera el
+bloqueo si el proceso muere, así que una sesión con archivos pero sin
+bloqueo es una caída: claim_orphan() solo ofrece esas, nunca la de otra
+ventana en uso, y la bloquea mientras se decide qué hacer con ella.
+"""
+import json
+import os
+import queue
+import re
+import struct
+import threading
+import uuid
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from core.history import RowBlock
+
+AUTOSAVE_DIR = os.path.join(os.path.expanduser("~"), ".geowizard", "autosave")
+JOURNAL_NAME = "sesion-{}.gwj"
+SNAPSHOT_NAME = "sesion-{}.gws"
+LOCK_NAME = "sesion-{}.lock"
+_SESSION_FILE = re.compile(r"^sesion-([0-9a-f-]+)\.(?:gwj|gws|lock)$")
+
+_JOURNAL_MAGIC = b"GWJRNL\x00\x01"
+_SNAPSHOT_MAGIC = b"GWSNAP\x00\x01"
+_GENERATION = struct.Struct("<Q")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_CELL = struct.Struct("<qB")
+_REMOVE = struct.Struct("<qq")
+
+# Tipos de registro
+_SET_CELL = 1
+_WRITE_ROWS = 2
+_INSERT_ROWS = 3
+_REMOVE_ROWS = 4
+_REPLACE_ALL = 5
+_STATE = 6
+
+
+def _pack_str(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return _U32.pack(len(data)) + data
+
+
+def _pack_block(block: RowBlock) -> bytes:
+    return _I64.pack(len(block)) + b"".join(_pack_str(col) for col in block.text_columns())
+
+
+def _record(kind: int, payload: bytes) -> bytes:
+    body = bytes((kind,)) + payload
+    return _U32.pack(len(body)) + body + _U32.pack(zlib.crc32(body))
+
+
+class _SessionLock:
+    """Bloqueo exclusivo del archivo .lock de una sesión (se libera si el proceso muere)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Intenta bloquear sin esperar; False si lo tiene otra sesión en curso."""
+        f = open(self.path, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self, remove: bool = False):
+        if self._file is None:
+            return
+        if remove:
+            # Antes de soltar el bloqueo: nadie puede tomarlo mientras se borra
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass  # Windows no borra un archivo abierto; queda vacío y libre
+        f, self._file = self._file, None
+        f.close()  # cerrar el archivo suelta el bloqueo
+
+
+class OrphanSession:
+    """
+    Sesión de otra ejecución que terminó sin cerrarse (ver Journal.claim_orphan).
+    Su bloqueo queda tomado hasta discard() o release().
+    """
+
+    def __init__(self, directory: str, session: str, lock: _SessionLock):
+        self.directory = directory
+        self.session = session
+        self._lock = lock
+
+    def recover(self) -> "Recovery":
+        """Ver Journal.recover."""
+        return Journal.recover(self.directory, self.session)
+
+    def discard(self):
+        """Borra sus archivos y suelta el bloqueo."""
+        Journal.discard(self.directory, self.session)
+        self._lock.release(remove=True)
+
+    def release(self):
+        """Suelta el bloqueo sin borrar nada (se volverá a ofrecer)."""
+        self._lock.release()
+
+
+class _Reader:
+    """Lectura secuencial de un buffer; lanza ValueError si se acaba antes de tiempo."""
+
+    def __init__(self, data, pos: int = 0):
+        self.data, self.pos = data, pos
+
+    def take(self, n: int):
+        if self.pos + n > len(self.data):
+            raise ValueError("Registro incompleto.")
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def unpack(self, fmt: struct.Struct):
+        return fmt.unpack(self.take(fmt.size))
+
+    def str(self) -> str:
+        (n,) = self.unpack(_U32)
+        return bytes(self.take(n)).decode("utf-8")
+
+    def block(self) -> RowBlock:
+        (count,) = self.unpack(_I64)
+        ids, xs, ys = self.str(), self.str(), self.str()
+        return RowBlock.from_text_columns(ids, xs, ys, count)
+
+
+class _Recorder:
+    """
+    Target falso que convierte las operaciones de un comando en registros.
+    Así el diario no depende de los tipos de comando: basta con ejecutar su
+    redo/undo sobre el recorder.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def get_rows(self, start, count):
+        raise RuntimeError("El diario no puede leer filas de la tabla.")
+
+    def set_cell(self, row, col, text):
+        self.records.append(_record(_SET_CELL, _CELL.pack(row, col) + _pack_str(text)))
+
+    def write_rows(self, start, block):
+        self.records.append(_record(_WRITE_ROWS, _I64.pack(start) + _pack_block(block)))
+
+    def insert_rows(self, start, block):
+        self.records.append(_record(_INSERT_ROWS, _I64.pack(start) + _pack_block(block)))
+
+    def remove_rows(self, start, count):
+        self.records.append(_record(_REMOVE_ROWS, _REMOVE.pack(start, count)))
+
+    def replace_all(self, block):
+        self.records.append(_record(_REPLACE_ALL, _pack_block(block)))
+
+
+class Recovery:
+    """
+    Sesión recuperada: instantánea + ediciones posteriores del diario.
+
+    Atributos:
+        block: RowBlock de la última instantánea.
+        state: Estado de la GUI (dict) más reciente.
+        operations: Lista de (método del target, argumentos) a reaplicar.
+        truncated: True si el diario terminaba en un registro cortado o dañado.
+        modified: Fecha (epoch) de la última escritura.
+    """
+
+    def __init__(self, block, state, operations, truncated, modified):
+        self.block = block
+        self.state = state
+        self.operations = operations
+        self.truncated = truncated
+        self.modified = modified
+
+    def apply(self, target):
+        """Reconstruye la tabla sobre un target de CommandHistory."""
+        target.replace_all(self.block)
+        for name, args in self.operations:
+            getattr(target, name)(*args)
+
+
+class Journal:
+    """
+    Diario de autoguardado de una sesión.
+
+    Uso:
+        journal = Journal()
+        journal.open(bloque_inicial, estado)   # bloquea la sesión e inicia su instantánea
+        journal.record(comando)                # tras cada acción del historial
+        if journal.needs_compaction:
+            journal.compact(bloque_actual, estado)
+        journal.close()                        # cierre limpio: borra los archivos
+
+    Args:
+        directory: Carpeta de los archivos de autoguardado.
+        compact_min_bytes: Bytes de diario a partir de los cuales se permite
+                           compactar aunque la instantánea sea más chica.
+    """
+
+    def __init__(self, directory: str = None, compact_min_bytes: int = 1024 * 1024):
+        self.directory = directory or AUTOSAVE_DIR
+        self.compact_min_bytes = compact_min_bytes
+        self.session = f"{os.getpid():x}-{uuid.uuid4().hex[:12]}"
+        self.journal_path, self.snapshot_path = self.paths(self.directory, self.session)
+        self._lock = _SessionLock(os.path.join(self.directory, LOCK_NAME.format(self.session)))
+        self._queue = queue.Queue()
+        self._thread = None
+        self._generation = 0
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+        self._state = None
+        self._failed = False
+
+    @staticmethod
+    def paths(directory: str, session: str) -> tuple[str, str]:
+        directory = directory or AUTOSAVE_DIR
+        return (os.path.join(directory, JOURNAL_NAME.format(session)),
+                os.path.join(directory, SNAPSHOT_NAME.format(session)))
+
+    # ---- recuperación ----
+
+    @staticmethod
+    def sessions(directory: str = None) -> list:
+        """IDs de las sesiones con archivos en `directory`, la más reciente primero."""
+        directory = directory or AUTOSAVE_DIR
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        newest = {}
+        for name in names:
+            match = _SESSION_FILE.match(name)
+            if match:
+                try:
+                    mtime = os.path.getmtime(os.path.join(directory, name))
+                except OSError:
+                    continue
+                newest[match.group(1)] = max(mtime, newest.get(match.group(1), mtime))
+        return sorted(newest, key=newest.get, reverse=True)
+
+    @classmethod
+    def claim_orphan(cls, directory: str = None):
+        """
+        La sesión interrumpida más reciente (archivos sin bloqueo), ya
+        bloqueada por quien la pide, o None. Los restos sin instantánea
+        (caída antes de la primera escritura) se borran por el camino.
+        """
+        directory = directory or AUTOSAVE_DIR
+        for session in cls.sessions(directory):
+            lock = _SessionLock(os.path.join(directory, LOCK_NAME.format(session)))
+            try:
+                if not lock.acquire():
+                    continue  # otra ventana la tiene abierta
+            except OSError:
+                continue
+            orphan = OrphanSession(directory, session, lock)
+            if os.path.exists(cls.paths(directory, session)[1]):
+                return orphan
+            orphan.discard()
+        return None
+
+    @classmethod
+    def pending(cls, directory: str = None) -> bool:
+        """True si quedó alguna sesión interrumpida (sin tomarla)."""
+        orphan = cls.claim_orphan(directory)
+        if orphan is None:
+            return False
+        orphan.release()
+        return True
+
+    @classmethod
+    def discard(cls, directory: str, session: str):
+        """Borra la instantánea y el diario de una sesión (no su bloqueo)."""
+        for path in cls.paths(directory, session):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def recover(cls, directory: str, session: str) -> Recovery:
+        """
+        Lee la instantánea y reaplica el diario hasta el primer registro dañado.
+        Quien llama debe tener bloqueada la sesión (ver claim_orphan).
+
+        Raises:
+            RuntimeError: Si la instantánea no existe o está dañada.
+        """
+        journal_path, snapshot_path = cls.paths(directory, session)
+        try:
+            with open(snapshot_path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            raise RuntimeError(f"No se pudo leer la instantánea de autoguardado: {e}")
+        if (len(data) < len(_SNAPSHOT_MAGIC) + _GENERATION.size + _U32.size
+                or not data.startswith(_SNAPSHOT_MAGIC)
+                or _U32.unpack(data[-_U32.size:])[0] != zlib.crc32(data[:-_U32.size])):
+            raise RuntimeError("La instantánea de autoguardado está dañada.")
+        reader = _Reader(memoryview(data)[:-_U32.size], len(_SNAPSHOT_MAGIC))
+        (generation,) = reader.unpack(_GENERATION)
+        state = json.loads(reader.str())
+        block = reader.block()
+        modified = os.path.getmtime(snapshot_path)
+
+        operations = []
+        truncated = False
+        try:
+            with open(journal_path, "rb") as f:
+                data = f.read()
+            modified = max(modified, os.path.getmtime(journal_path))
+        except OSError:
+            data = b""
+        header = len(_JOURNAL_MAGIC) + _GENERATION.size
+        if (len(data) >= header and data.startswith(_JOURNAL_MAGIC)
+                and _GENERATION.unpack_from(data, len(_JOURNAL_MAGIC))[0] == generation):
+            view = memoryview(data)
+            pos = header
+            while pos < len(data):
+                try:
+                    (size,) = _U32.unpack_from(view, pos)
+                    body = view[pos + _U32.size:pos + _U32.size + size]
+                    end = pos + _U32.size + size + _U32.size
+                    if size == 0 or end > len(data) or _U32.unpack_from(view, end - _U32.size)[0] != zlib.crc32(body):
+                        raise ValueError("Registro dañado.")
+                    kind, rec = body[0], _Reader(body, 1)
+                    if kind == _SET_CELL:
+                        row, col = rec.unpack(_CELL)
+                        operations.append(("set_cell", (row, col, rec.str())))
+                    elif kind == _WRITE_ROWS:
+                        (start,) = rec.unpack(_I64)
+                        operations.append(("write_rows", (start, rec.block())))
+                    elif kind == _INSERT_ROWS:
+                        (start,) = rec.unpack(_I64)
+                        operations.append(("insert_rows", (start, rec.block())))
+                    elif kind == _REMOVE_ROWS:
+                        operations.append(("remove_rows", rec.unpack(_REMOVE)))
+                    elif kind == _REPLACE_ALL:
+                        operations = [("replace_all", (rec.block(),))]
+                    elif kind == _STATE:
+                        state = json.loads(rec.str())
+                    else:
+                        raise ValueError(f"Tipo de registro desconocido: {kind}")
+                except (ValueError, struct.error, UnicodeDecodeError):
+                    truncated = True
+                    break
+                pos = end
+        return Recovery(block, state, operations, truncated, modified)
+
+    # ---- escritura ----
+
+    def open(self, block: RowBlock, state: dict):
+        """
+        Bloquea la sesión e inicia su diario con una instantánea base.
+
+        Raises:
+            OSError: Si no se puede crear la carpeta o bloquear la sesión.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if not self._lock.acquire():
+            raise OSError(f"La sesión de autoguardado {self.session} ya está en uso.")
+        self._thread = threading.Thread(target=self._writer, name="autoguardado", daemon=True)
+        self._thread.start()
+        self.compact(block, state)
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and not self._failed
+
+    def record(self, command, undo: bool = False) -> int:
+        """
+        Anexa un comando ya aplicado (o deshecho, si `undo`). Devuelve los
+        bytes encolados.
+        """
+        if not self.active:
+            return 0
+        recorder = _Recorder()
+        if undo:
+            command.undo(recorder)
+        else:
+            command.redo(recorder)
+        data = b"".join(recorder.records)
+        self._journal_bytes += len(data)
+        self._queue.put(("append", data))
+        return len(data)
+
+    def record_state(self, state: dict):
+        """Anexa el estado de la GUI si cambió desde el último registrado."""
+        if not self.active or state == self._state:
+            return
+        self._state = dict(state)
+        data = _record(_STATE, _pack_str(json.dumps(state)))
+        self._journal_bytes += len(data)
+        self._queue.put(("append", data))
+
+    @property
+    def needs_compaction(self) -> bool:
+        """True cuando el diario ya ocupa más que la instantánea (y que compact_min_bytes)."""
+        return self.active and self._journal_bytes > max(self.compact_min_bytes, self._snapshot_bytes)
+
+    def compact(self, block: RowBlock, state: dict):
+        """
+        Encola una instantánea completa y el reinicio del diario. La
+        serialización y la escritura se hacen en el hilo de fondo.
+        """
+        if not self.active:
+            return
+        self._generation += 1
+        self._state = dict(state)
+        self._journal_bytes = 0
+        self._snapshot_bytes = block.nbytes
+        self._queue.put(("snapshot", (self._generation, block, self._state)))
+
+    def flush(self):
+        """Espera a que el hilo de fondo escriba todo lo encolado."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, discard: bool = True):
+        """Termina el hilo de fondo. Con `discard` (cierre limpio) borra los archivos."""
+        if self._thread is None:
+            return
+        self._queue.put(("stop", None))
+        self._thread.join()
+        self._thread = None
+        if discard:
+            self.discard(self.directory, self.session)
+        self._lock.release(remove=discard)
+
+    # ---- hilo de fondo ----
+
+    def _write_snapshot(self, generation: int, block: RowBlock, state: dict):
+        data = (_SNAPSHOT_MAGIC + _GENERATION.pack(generation)
+                + _pack_str(json.dumps(state)) + _pack_block(block))
+        self._replace(self.snapshot_path, data + _U32.pack(zlib.crc32(data)))
+        # El diario viejo (otra generación) queda invalidado aunque se corte aquí
+        self._replace(self.journal_path, _JOURNAL_MAGIC + _GENERATION.pack(generation))
+        return open(self.journal_path, "ab")
+
+    @staticmethod
+    def _replace(path: str, data: bytes):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _writer(self):
+        f = None
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            try:
+                for kind, payload in batch:
+                    if self._failed:
+                        continue
+                    if kind == "append":
+                        if f is not None:
+                            f.write(payload)
+                    elif kind == "snapshot":
+                        if f is not None:
+                            f.close()
+                        f = self._write_snapshot(*payload)
+                    elif kind == "stop":
+                        stop = True
+                if f is not None and not self._failed:
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"Advertencia: Autoguardado desactivado por un error de escritura: {e}")
+                self._failed = True
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                if f is not None:
+                    f.close()
+                return
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    from core.history import CellEditCommand, InsertRowsCommand
+
+    class ListTarget:
+        """Target mínimo sobre una lista de filas, para pruebas directas."""
+
+        def __init__(self, rows):
+            self.rows = [list(r) for r in rows]
+
+        def set_cell(self, row, col, text):
+            self.rows[row][col] = text
+
+        def write_rows(self, start, block):
+            for i, r in enumerate(block.rows()):
+                self.rows[start + i] = list(r)
+
+        def insert_rows(self, start, block):
+            self.rows[start:start] = [list(r) for r in block.rows()]
+
+        def remove_rows(self, start, count):
+            del self.rows[start:start + count]
+
+        def replace_all(self, block):
+            self.rows = [list(r) for r in block.rows()]
+
+    n = 1_000_000
+    base = RowBlock((str(i + 1) for i in range(n)), (f"{500000 + i * 0.01:.2f}" for i in range(n)),
+                    (f"{4000000 + i * 0.01:.2f}" for i in range(n)))
+    target = ListTarget(base.rows())
+    directory = tempfile.mkdtemp(prefix="geowizard_autosave_")
+    journal = Journal(directory)
+    state = {"nombre": "demo", "hemisferio": "Norte", "zona": 18}
+
+    t0 = time.perf_counter()
+    journal.open(base, state)
+    journal.flush()
+    print(f"Instantánea de {n} filas: {time.perf_counter() - t0:.2f} s, "
+          f"{os.path.getsize(journal.snapshot_path) / 1e6:.1f} MB")
+
+    edits = 10_000
+    t0 = time.perf_counter()
+    queued = 0
+    for i in range(edits):
+        row = (i * 7919) % n
+        old = target.rows[row][1]
+        target.set_cell(row, 1, f"{600000 + i}.00")
+        queued += journal.record(CellEditCommand(row, 1, old, target.rows[row][1]))
+    t_record = time.perf_counter() - t0
+    new_row = RowBlock([str(n + 1)], ["700000.00"], ["4100000.00"])
+    target.insert_rows(n, new_row)
+    journal.record(InsertRowsCommand(n, new_row))
+    journal.flush()
+    print(f"{edits} ediciones anexadas: {t_record * 1e6 / edits:.1f} µs y {queued / edits:.0f} bytes por edición "
+          f"(diario: {os.path.getsize(journal.journal_path) / 1e3:.0f} KB), compactar: {journal.needs_compaction}")
+
+    # Caída simulada: el último registro quedó a medias
+    with open(journal.journal_path, "ab") as f:
+        f.write(_record(_SET_CELL, _CELL.pack(0, 1) + _pack_str("999"))[:-3])
+    # Mientras la sesión sigue abierta no es recuperable por otra ventana
+    print("Sesión abierta ofrecida a otra ventana:", Journal.claim_orphan(directory) is not None)
+    journal.close(discard=False)  # el proceso "muere": se suelta el bloqueo, quedan los archivos
+    orphan = Journal.claim_orphan(directory)
+    print("Sesión interrumpida encontrada:", orphan is not None and orphan.session == journal.session)
+
+    t0 = time.perf_counter()
+    recovery = orphan.recover()
+    restored = ListTarget([])
+    recovery.apply(restored)
+    print(f"Recuperación: {len(recovery.operations)} operaciones en {time.perf_counter() - t0:.2f} s, "
+          f"registro cortado descartado: {recovery.truncated}, tabla idéntica: {restored.rows == target.rows}")
+    orphan.discard()
+    print("Archivos tras descartarla:", os.listdir(directory))
+    os.rmdir(directory)
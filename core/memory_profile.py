@@ -0,0 +1,218 @@
+# core/memory_profile.py
+"""
+Perfil de memoria por etapas (opcional) para las cadenas de importación y
+exportación.
+
+Cada etapa se envuelve en MemoryProfiler.stage(nombre). Mientras el perfil
+está activo se registra, por etapa: memoria asignada por Python (tracemalloc)
+al salir y pico dentro de la etapa, y RSS del proceso antes/después. Con
+`detail=True` se añaden las líneas de código que más memoria retienen en cada
+etapa (comparando snapshots de tracemalloc, lo que con millones de objetos
+vivos tarda segundos por etapa). Con el perfil inactivo stage() no hace nada,
+así que puede dejarse en el código sin coste.
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import psutil  # opcional: RSS portable (Windows/macOS)
+except ImportError:
+    psutil = None
+
+# Archivos cuyas asignaciones no interesan en el informe (tracemalloc, importlib).
+# Se descartan de las estadísticas ya agrupadas: filtrar los snapshots con
+# Snapshot.filter_traces es mucho más lento.
+_IGNORED_FILES = {tracemalloc.__file__, "<unknown>"}
+
+
+def current_rss():
+    """RSS actual del proceso en bytes, o None si no se puede medir en esta plataforma."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _mb(n) -> str:
+    return "   n/d" if n is None else f"{n / (1024 * 1024):6.1f}"
+
+
+class MemoryProfiler:
+    """
+    Registra un informe de memoria por etapa.
+
+    Las etapas pueden anidarse (p. ej. "importar KML" contiene "construir
+    geometrías"); el pico de la etapa exterior incluye el de las interiores.
+    """
+    def __init__(self, detail: bool = False, top: int = 5, frames: int = 1):
+        self.detail = detail
+        self.top = top
+        self.frames = frames
+        self.stages = []
+        self._stack = []            # picos acumulados de las etapas abiertas
+        self._active = False
+        self._started_tracing = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._active
+
+    def start(self):
+        """Activa el perfil y borra el informe anterior."""
+        self.stages = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._active = True
+
+    def stop(self):
+        """Desactiva el perfil (el informe se conserva)."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._active = False
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self._active or not tracemalloc.is_tracing():
+            yield
+            return
+
+        # El pico global se reinicia en cada etapa: guardar el de la etapa
+        # exterior antes de perderlo.
+        if self._stack:
+            parent = self._stack[-1]
+            parent["peak"] = max(parent["peak"], tracemalloc.get_traced_memory()[1])
+        depth = len(self._stack)
+        before = tracemalloc.take_snapshot() if self.detail else None
+        traced_before = tracemalloc.get_traced_memory()[0]
+        rss_before = current_rss()
+        tracemalloc.reset_peak()
+        frame = {"peak": 0, "children": {}}
+        self._stack.append(frame)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            traced_after, peak = tracemalloc.get_traced_memory()
+            self._stack.pop()
+            peak = max(peak, frame["peak"])
+            rss_after = current_rss()
+            entry = {
+                "etapa": name,
+                "nivel": depth,
+                "veces": 1,
+                "segundos": round(elapsed, 4),
+                "retenido_bytes": traced_after - traced_before,
+                "pico_bytes": peak - traced_before,
+                "rss_antes_bytes": rss_before,
+                "rss_despues_bytes": rss_after,
+                "rss_delta_bytes": None if rss_before is None or rss_after is None else rss_after - rss_before,
+                "top": self._top_lines(before) if before is not None else [],
+            }
+            # El informe va en preorden (etapa y luego sus subetapas)
+            records = [entry] + [e for e in frame["children"].values()]
+            if self._stack:
+                parent = self._stack[-1]
+                parent["peak"] = max(parent["peak"], peak)
+                self._merge(parent["children"], records)
+            else:
+                self.stages.extend(records)
+
+    @staticmethod
+    def _merge(children: dict, records: list):
+        """
+        Acumula subetapas repetidas dentro de la misma etapa (p. ej. un
+        redibujado por cada celda escrita) en una sola entrada con "veces".
+        """
+        for rec in records:
+            key = (rec["nivel"], rec["etapa"])
+            prev = children.get(key)
+            if prev is None:
+                children[key] = dict(rec)
+                continue
+            prev["veces"] += rec["veces"]
+            prev["segundos"] = round(prev["segundos"] + rec["segundos"], 4)
+            prev["retenido_bytes"] += rec["retenido_bytes"]
+            prev["pico_bytes"] = max(prev["pico_bytes"], rec["pico_bytes"])
+            prev["rss_despues_bytes"] = rec["rss_despues_bytes"]
+            if prev["rss_delta_bytes"] is not None and rec["rss_delta_bytes"] is not None:
+                prev["rss_delta_bytes"] += rec["rss_delta_bytes"]
+            if sum(t["bytes"] for t in rec["top"]) > sum(t["bytes"] for t in prev["top"]):
+                prev["top"] = rec["top"]
+
+    def _top_lines(self, before) -> list:
+        top = []
+        for stat in tracemalloc.take_snapshot().compare_to(before, "lineno"):
+            if len(top) >= self.top:
+                break
+            if stat.size_diff < 1024:
+                continue
+            frame = stat.traceback[0]
+            if frame.filename in _IGNORED_FILES or frame.filename.startswith("<frozen"):
+                continue
+            top.append({"linea": str(frame), "bytes": stat.size_diff, "bloques": stat.count_diff})
+        return top
+
+    def clear(self):
+        self.stages = []
+
+    def format_report(self) -> str:
+        """Informe de texto: una línea por etapa (en orden de finalización) y sus líneas con más memoria."""
+        if not self.stages:
+            return "No se registraron etapas."
+        lines = [f"{'Etapa':<42} {'veces':>5}  MB retenidos  MB pico  RSS Δ MB  RSS MB       s"]
+        for s in self.stages:
+            name = "  " * s["nivel"] + s["etapa"]
+            if len(name) > 42:
+                name = name[:41] + "…"
+            lines.append(f"{name:<42} {s['veces']:>5}  {_mb(s['retenido_bytes']):>12}  {_mb(s['pico_bytes']):>7}"
+                         f"  {_mb(s['rss_delta_bytes']):>8}  {_mb(s['rss_despues_bytes']):>6}  {s['segundos']:6.2f}")
+            for entry in s["top"]:
+                lines.append(f"{'':6}{entry['bytes'] / 1024:10.1f} KiB  {entry['linea']}")
+        return "\n".join(lines)
+
+    def dump_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"etapas": self.stages}, f, ensure_ascii=False, indent=2)
+
+
+def profiled_stage(name: str):
+    """
+    Decorador de métodos: ejecuta el método dentro de
+    self._memory_profiler.stage(name).
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._memory_profiler.stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import numpy as np
+
+    profiler = MemoryProfiler(detail=True)
+    profiler.start()
+    with profiler.stage("importar"):
+        with profiler.stage("features (dicts)"):
+            features = [{"id": i, "type": "Punto", "coords": [(float(i), float(i))]} for i in range(50_000)]
+        with profiler.stage("arrays"):
+            xy = np.array([f["coords"][0] for f in features])
+        del features
+    with profiler.stage("exportar"):
+        text = "\n".join(f"{x:.2f},{y:.2f}" for x, y in xy.tolist())
+    profiler.stop()
+    print(profiler.format_report())
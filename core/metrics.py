@@ -0,0 +1,297 @@
+# core/metrics.py
+"""
+Métricas geométricas vectorizadas (longitud, perímetro, área, centroide y bbox)
+sobre todos los features de un FeatureArrays a la vez.
+
+Todas las funciones trabajan sobre el buffer de vértices concatenados y los
+offsets por feature con operaciones numpy (reduceat), sin bucles en Python.
+Las coordenadas se expresan relativas al primer vértice de cada feature antes
+de multiplicar, para no perder precisión con valores UTM grandes.
+"""
+import numpy as np
+
+from core.coordinate_manager import FeatureArrays, GeometryType
+
+_POLIGONO = GeometryType.CODES[GeometryType.POLIGONO]
+_POLILINEA = GeometryType.CODES[GeometryType.POLILINEA]
+
+
+class FeatureMetrics:
+    """
+    Resultado de compute_metrics(); un valor por feature (arrays de longitud F).
+
+        length:    longitud del trazo abierto (vértice a vértice).
+        perimeter: longitud cerrando el anillo en polígonos; igual a length en polilíneas.
+        area:      área (m²) de polígonos; 0 en el resto.
+        centroid:  (F, 2) centroide (de área en polígonos, de longitud en polilíneas).
+        bbox:      (F, 4) con minx, miny, maxx, maxy.
+    """
+    __slots__ = ("length", "perimeter", "area", "centroid", "bbox")
+
+    def __init__(self, length, perimeter, area, centroid, bbox):
+        self.length = length
+        self.perimeter = perimeter
+        self.area = area
+        self.centroid = centroid
+        self.bbox = bbox
+
+    def __len__(self):
+        return len(self.length)
+
+
+def _layout(arrays: FeatureArrays):
+    """Inicio y conteo de vértices de cada feature (int64)."""
+    offsets = np.asarray(arrays.offsets, dtype=np.int64)
+    return offsets[:-1], np.diff(offsets)
+
+
+def _ring_layout(arrays: FeatureArrays):
+    """
+    Inicio, último vértice, feature y signo (+1 exterior, -1 hueco) de cada anillo.
+    Sin multipartes, cada feature es un único anillo exterior.
+    """
+    geoms, parts, rings = arrays.rings()
+    rings = np.asarray(rings, dtype=np.int64)
+    starts = rings[:-1]
+    last = rings[1:] - 1
+    n_rings = len(starts)
+    ring_part = np.repeat(np.arange(len(parts) - 1), np.diff(parts))
+    ring_feature = np.repeat(np.arange(len(geoms) - 1), np.diff(geoms))[ring_part]
+    sign = np.full(n_rings, -1.0)
+    sign[np.asarray(parts[:-1], dtype=np.int64)] = 1.0
+    return starts, last, ring_feature, sign
+
+
+def _local_columns(arrays: FeatureArrays, starts, counts):
+    """Columnas x, y contiguas, relativas al primer vértice de su feature."""
+    xy = np.asarray(arrays.xy, dtype=np.float64)
+    x = xy[:, 0] - np.repeat(xy[starts, 0], counts)
+    y = xy[:, 1] - np.repeat(xy[starts, 1], counts)
+    return x, y
+
+
+def _next_values(v, starts, last):
+    """Valor del vértice siguiente dentro del mismo anillo, cerrando el anillo."""
+    vn = np.empty_like(v)
+    vn[:-1] = v[1:]
+    vn[last] = v[starts]
+    return vn
+
+
+def _segment_sums(values, starts, n_features):
+    """Suma por feature (o anillo) de un valor por vértice (vacío si no hay vértices)."""
+    if len(values) == 0:
+        return np.zeros(n_features)
+    return np.add.reduceat(values, starts)
+
+
+def _to_features(ring_values, ring_feature, n_feat):
+    """Suma por feature de un valor por anillo."""
+    return np.bincount(ring_feature, weights=ring_values, minlength=n_feat)
+
+
+def bboxes(arrays: FeatureArrays) -> np.ndarray:
+    """(F, 4) con minx, miny, maxx, maxy de cada feature."""
+    if len(arrays) == 0:
+        return np.zeros((0, 4))
+    xy = np.asarray(arrays.xy, dtype=np.float64)
+    starts = np.asarray(arrays.offsets[:-1], dtype=np.int64)
+    mins = np.minimum.reduceat(xy, starts, axis=0)
+    maxs = np.maximum.reduceat(xy, starts, axis=0)
+    return np.hstack([mins, maxs])
+
+
+def compute_metrics(arrays: FeatureArrays) -> FeatureMetrics:
+    """
+    Calcula todas las métricas para todos los features en una pasada vectorizada.
+
+    Las sumas se hacen por anillo y luego se agregan por feature: en polígonos
+    con huecos el área de los huecos se resta y su borde cuenta en el perímetro;
+    en polilíneas multiparte se suman las longitudes de las partes.
+    """
+    n_feat = len(arrays)
+    if n_feat == 0:
+        empty = np.zeros(0)
+        return FeatureMetrics(empty, empty, empty, np.zeros((0, 2)), np.zeros((0, 4)))
+
+    starts, counts = _layout(arrays)
+    r_starts, r_last, ring_feature, sign = _ring_layout(arrays)
+    n_rings = len(r_starts)
+    x, y = _local_columns(arrays, starts, counts)
+    xn, yn = _next_values(x, r_starts, r_last), _next_values(y, r_starts, r_last)
+    types = np.asarray(arrays.types)
+    is_poly = types == _POLIGONO
+    ring_is_poly = is_poly[ring_feature]
+
+    # Longitud de cada segmento i -> siguiente. El último segmento de cada anillo
+    # es el de cierre; solo cuenta para el perímetro de polígonos.
+    seg = np.hypot(xn - x, yn - y)
+    closing_len = seg[r_last]
+    open_seg = seg
+    open_seg[r_last] = 0.0
+
+    ring_length = _segment_sums(open_seg, r_starts, n_rings)
+    length = _to_features(ring_length, ring_feature, n_feat)
+    perimeter = np.where(is_poly, length + _to_features(closing_len, ring_feature, n_feat), length)
+
+    # Área y centroide por la fórmula del polígono (shoelace) sobre coordenadas locales.
+    # Cada anillo aporta su área con signo +1 (exterior) o -1 (hueco), sea cual sea su orientación.
+    cross = x * yn - xn * y
+    ring_area2 = _segment_sums(cross, r_starts, n_rings)
+    orient = np.where(ring_is_poly, sign * np.sign(ring_area2), 0.0)
+    area2 = _to_features(orient * ring_area2, ring_feature, n_feat)
+    area = np.where(is_poly, area2 * 0.5, 0.0)
+
+    sx, sy = x + xn, y + yn
+    cx_poly = _to_features(orient * _segment_sums(sx * cross, r_starts, n_rings), ring_feature, n_feat)
+    cy_poly = _to_features(orient * _segment_sums(sy * cross, r_starts, n_rings), ring_feature, n_feat)
+    # Centroide de longitud (puntos medios de segmentos ponderados) para polilíneas
+    cx_line = _segment_sums(sx * open_seg, starts, n_feat) * 0.5
+    cy_line = _segment_sums(sy * open_seg, starts, n_feat) * 0.5
+    # Promedio de vértices como respaldo (puntos y geometrías degeneradas)
+    cx_mean = _segment_sums(x, starts, n_feat) / counts
+    cy_mean = _segment_sums(y, starts, n_feat) / counts
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        poly_ok = is_poly & (area2 != 0)
+        line_ok = ~is_poly & (length > 0)
+        cx = np.where(poly_ok, cx_poly / (3.0 * area2),
+                      np.where(line_ok, cx_line / length, cx_mean))
+        cy = np.where(poly_ok, cy_poly / (3.0 * area2),
+                      np.where(line_ok, cy_line / length, cy_mean))
+
+    origin = np.asarray(arrays.xy, dtype=np.float64)[starts]
+    centroid = np.column_stack([cx, cy]) + origin
+    return FeatureMetrics(length, perimeter, area, centroid, bboxes(arrays))
+
+
+def _metrics_task(inputs, outputs, start: int, stop: int) -> int:
+    """
+    Tarea de un proceso de compute_metrics_parallel: métricas de los features
+    [start, stop) escritas directamente en los buffers compartidos de salida.
+    """
+    from core.shared_arrays import attach, attach_arrays
+    metrics = compute_metrics(attach(inputs).feature_range(start, stop))
+    out = attach_arrays(outputs, writable=True)
+    for name in FeatureMetrics.__slots__:
+        out[name][start:stop] = getattr(metrics, name)
+    return stop - start
+
+
+def compute_metrics_parallel(arrays: FeatureArrays, pool=None, max_workers: int = None,
+                             tasks_per_worker: int = 4) -> FeatureMetrics:
+    """
+    compute_metrics repartido entre procesos. Los vértices y offsets se
+    publican una vez en memoria compartida (core.shared_arrays) y cada
+    proceso escribe su rango de features en buffers de salida también
+    compartidos: a los procesos solo viajan handles y límites de rango.
+
+    Args:
+        arrays: Features a medir.
+        pool: ProcessPoolExecutor a reutilizar; si se omite se crea uno
+              con `max_workers` procesos y se cierra al terminar.
+        tasks_per_worker: Rangos por proceso (con tamaños por número de vértices).
+
+    Raises:
+        RuntimeError: Si la plataforma no tiene memoria compartida.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from core.shared_arrays import SharedSegments
+
+    n_feat = len(arrays)
+    if n_feat == 0:
+        return compute_metrics(arrays)
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    workers = getattr(pool, "_max_workers", None) or max_workers or 1
+    try:
+        with SharedSegments() as shared:
+            inputs = shared.publish(arrays)
+            outputs, views = shared.empty({
+                "length": ((n_feat,), np.float64),
+                "perimeter": ((n_feat,), np.float64),
+                "area": ((n_feat,), np.float64),
+                "centroid": ((n_feat, 2), np.float64),
+                "bbox": ((n_feat, 4), np.float64),
+            })
+            # Rangos con una cantidad de vértices parecida
+            n_tasks = min(n_feat, max(1, workers * tasks_per_worker))
+            targets = np.linspace(0, arrays.n_vertices, n_tasks + 1)[1:-1]
+            bounds = np.unique(np.concatenate([[0], np.searchsorted(arrays.offsets, targets), [n_feat]]))
+            futures = [pool.submit(_metrics_task, inputs, outputs, int(a), int(b))
+                       for a, b in zip(bounds[:-1], bounds[1:])]
+            for future in futures:
+                future.result()
+            result = FeatureMetrics(*(views[name].copy() for name in FeatureMetrics.__slots__))
+            views.clear()
+    finally:
+        if own_pool:
+            pool.shutdown()
+    return result
+
+
+def single_geometry_arrays(coords, closed: bool, fid: int = 1) -> FeatureArrays:
+    """FeatureArrays de un único feature (polígono si `closed`, si no polilínea)."""
+    xy = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    return FeatureArrays(
+        xy,
+        np.array([0, len(xy)], dtype=np.int64),
+        np.array([_POLIGONO if closed else _POLILINEA], dtype=np.uint8),
+        np.array([fid], dtype=np.int64)
+    )
+
+
+if __name__ == '__main__':
+    import math
+    import time
+
+    # Comprobación rápida: cuadrado de 100 m de lado en UTM
+    sq = single_geometry_arrays([(500000, 4000000), (500100, 4000000), (500100, 4000100), (500000, 4000100)], closed=True)
+    m = compute_metrics(sq)
+    print(f"Cuadrado: perímetro={m.perimeter[0]:.2f} área={m.area[0]:.2f} centroide={m.centroid[0]} bbox={m.bbox[0]}")
+
+    # El mismo cuadrado con un hueco de 20x20 y una segunda parte de 10x10
+    holed = FeatureArrays.from_features([{"id": 1, "type": "Polígono", "coords": [], "parts": [
+        [[(500000, 4000000), (500100, 4000000), (500100, 4000100), (500000, 4000100)],
+         [(500010, 4000010), (500010, 4000030), (500030, 4000030), (500030, 4000010)]],
+        [[(500200, 4000000), (500210, 4000000), (500210, 4000010), (500200, 4000010)]],
+    ]}])
+    m = compute_metrics(holed)
+    print(f"Con hueco y 2 partes: perímetro={m.perimeter[0]:.2f} (esperado 520) área={m.area[0]:.2f} (esperado 9700)")
+
+    # Benchmark: 100k polígonos de 20 vértices
+    n_polys, verts = 100_000, 20
+    rng = np.random.default_rng(42)
+    ang = np.linspace(0, 2 * np.pi, verts, endpoint=False)
+    radii = rng.uniform(10, 500, n_polys)[:, None]
+    centers = np.column_stack([rng.uniform(300000, 700000, n_polys), rng.uniform(4000000, 4500000, n_polys)])
+    xs = centers[:, :1] + radii * np.cos(ang)
+    ys = centers[:, 1:] + radii * np.sin(ang)
+    arrays = FeatureArrays(np.column_stack([xs.ravel(), ys.ravel()]),
+                           np.arange(0, n_polys * verts + 1, verts, dtype=np.int64),
+                           np.full(n_polys, _POLIGONO, dtype=np.uint8),
+                           np.arange(1, n_polys + 1, dtype=np.int64))
+
+    t0 = time.perf_counter()
+    m = compute_metrics(arrays)
+    t_vec = time.perf_counter() - t0
+
+    # Referencia: el cálculo con bucles de Python que usaba la GUI, por feature
+    features = arrays.to_features()
+    t0 = time.perf_counter()
+    ref_perim, ref_area = [], []
+    for f in features:
+        c = f["coords"]
+        p = sum(math.dist(c[i], c[i + 1]) for i in range(len(c) - 1)) + math.dist(c[-1], c[0])
+        a = 0.5 * abs(sum(c[i][0] * c[i + 1][1] - c[i + 1][0] * c[i][1] for i in range(-1, len(c) - 1)))
+        ref_perim.append(p)
+        ref_area.append(a)
+    t_loop = time.perf_counter() - t0
+
+    print(f"{n_polys} polígonos x {verts} vértices:")
+    print(f"  vectorizado (todas las métricas): {t_vec * 1000:.1f} ms")
+    print(f"  bucles Python (perímetro + área): {t_loop * 1000:.1f} ms  ({t_loop / t_vec:.1f}x)")
+    print(f"  máx. diferencia perímetro: {np.max(np.abs(m.perimeter - ref_perim)):.2e} m")
+    print(f"  máx. diferencia relativa área: {np.max(np.abs(m.area - ref_area) / m.area):.2e}")
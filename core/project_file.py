@@ -0,0 +1,202 @@
+# core/project_file.py
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from core.coordinate_manager import CoordinateManager, FeatureArrays
+
+PROJECT_EXTENSION = ".gwp"
+
+_MAGIC = b"GWPROJ\x00\x01"
+# Versión 2: offsets de partes/anillos opcionales. Los proyectos sin
+# multipartes ni huecos se siguen escribiendo como versión 1.
+_VERSION = 2
+_ALIGN = 64
+# magic (8 bytes) + versión (uint32) + longitud del encabezado JSON (uint32)
+_PREAMBLE = struct.Struct("<8sII")
+
+# Arrays guardados y su dtype en disco (little-endian explícito)
+_ARRAY_DTYPES = {
+    "xy":      "<f8",
+    "offsets": "<i8",
+    "types":   "|u1",
+    "ids":     "<i8",
+}
+# Solo presentes si hay geometrías multiparte o con huecos (versión 2)
+_RING_DTYPES = {
+    "geom_offsets": "<i8",
+    "part_offsets": "<i8",
+    "ring_offsets": "<i8",
+}
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class ProjectFile:
+    """
+    Formato binario nativo de proyecto (.gwp).
+
+    Estructura:
+        [preámbulo: magic, versión, longitud del encabezado]
+        [encabezado JSON: hemisferio, zona, metadatos y tabla de arrays]
+        [buffers crudos de cada array, alineados a 64 bytes]
+
+    Al abrir, los buffers se mapean con mmap y se envuelven con numpy sin
+    copiarlos, de modo que abrir un proyecto de millones de vértices cuesta
+    lo mismo que leer el encabezado.
+    """
+
+    @staticmethod
+    def save(manager: CoordinateManager, filename: str, metadata: dict = None):
+        """
+        Guarda el manager en formato .gwp.
+
+        Args:
+            manager: CoordinateManager a guardar.
+            filename: Ruta de salida (debe terminar en .gwp).
+            metadata: Dict opcional serializable a JSON (p. ej. estado de la GUI).
+
+        Raises:
+            ValueError: Si el nombre de archivo o los datos no son válidos.
+            RuntimeError: Si ocurre un error al escribir el archivo.
+        """
+        if not filename.lower().endswith(PROJECT_EXTENSION):
+            raise ValueError(f"El nombre de archivo debe terminar en {PROJECT_EXTENSION}")
+
+        arrays = manager.to_arrays()
+        dtypes = dict(_ARRAY_DTYPES, **_RING_DTYPES) if arrays.has_rings else _ARRAY_DTYPES
+        buffers = {name: np.ascontiguousarray(getattr(arrays, name), dtype=dtype)
+                   for name, dtype in dtypes.items()}
+
+        header = {
+            "hemisphere": manager.hemisphere,
+            "zone": int(manager.zone),
+            "n_features": len(arrays),
+            "n_vertices": arrays.n_vertices,
+            "metadata": metadata or {},
+            "arrays": {},
+        }
+        # Los buffers empiezan tras el encabezado; si el JSON no cabe en el
+        # espacio reservado se amplía y se recalculan los offsets.
+        data_start = _align(_PREAMBLE.size + 512)
+        while True:
+            offset = data_start
+            for name, buf in buffers.items():
+                header["arrays"][name] = {
+                    "offset": offset,
+                    "dtype": dtypes[name],
+                    "shape": list(buf.shape),
+                }
+                offset = _align(offset + buf.nbytes)
+            header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            if _PREAMBLE.size + len(header_bytes) <= data_start:
+                break
+            data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+        tmp_filename = filename + ".tmp"
+        try:
+            with open(tmp_filename, "wb") as f:
+                f.write(_PREAMBLE.pack(_MAGIC, _VERSION if arrays.has_rings else 1, len(header_bytes)))
+                f.write(header_bytes)
+                for name, buf in buffers.items():
+                    f.seek(header["arrays"][name]["offset"])
+                    buf.tofile(f)
+                f.truncate()
+            os.replace(tmp_filename, filename)
+        except OSError as e:
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+            raise RuntimeError(f"Error al escribir el proyecto '{filename}': {e}")
+
+    @staticmethod
+    def read_header(filename: str) -> dict:
+        """Lee solo el encabezado (sin tocar los buffers)."""
+        try:
+            with open(filename, "rb") as f:
+                preamble = f.read(_PREAMBLE.size)
+                if len(preamble) < _PREAMBLE.size:
+                    raise ValueError("Archivo demasiado corto.")
+                magic, version, header_len = _PREAMBLE.unpack(preamble)
+                if magic != _MAGIC:
+                    raise ValueError("No es un archivo de proyecto GeoWizard.")
+                if version > _VERSION:
+                    raise ValueError(f"Versión de proyecto {version} no soportada (máxima {_VERSION}).")
+                return json.loads(f.read(header_len).decode("utf-8"))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo no encontrado: {filename}")
+        except (ValueError, UnicodeDecodeError) as e:
+            raise RuntimeError(f"Proyecto '{filename}' no válido: {e}")
+
+    @staticmethod
+    def load(filename: str) -> tuple[CoordinateManager, dict]:
+        """
+        Abre un proyecto .gwp mapeándolo en memoria.
+
+        Returns:
+            (manager, metadata). Los arrays del manager son vistas de solo
+            lectura sobre el archivo mapeado; el mapeo vive mientras existan.
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe.
+            RuntimeError: Si el archivo está corrupto o no es un proyecto válido.
+        """
+        header = ProjectFile.read_header(filename)
+        try:
+            with open(filename, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            views = {}
+            dtypes = dict(_ARRAY_DTYPES)
+            if "ring_offsets" in header["arrays"]:
+                dtypes.update(_RING_DTYPES)
+            for name, dtype in dtypes.items():
+                spec = header["arrays"][name]
+                if np.dtype(spec["dtype"]) != np.dtype(dtype):
+                    raise ValueError(f"dtype inesperado para '{name}': {spec['dtype']}")
+                shape = tuple(spec["shape"])
+                count = int(np.prod(shape)) if shape else 0
+                nbytes = count * np.dtype(dtype).itemsize
+                if spec["offset"] + nbytes > size:
+                    raise ValueError(f"El buffer '{name}' excede el tamaño del archivo.")
+                views[name] = np.frombuffer(mm, dtype=dtype, count=count, offset=spec["offset"]).reshape(shape)
+
+            arrays = FeatureArrays(views["xy"], views["offsets"], views["types"], views["ids"],
+                                   views.get("geom_offsets"), views.get("part_offsets"), views.get("ring_offsets"))
+            manager = CoordinateManager.from_arrays(header["hemisphere"], header["zone"], arrays)
+        except (KeyError, TypeError, ValueError) as e:
+            raise RuntimeError(f"Proyecto '{filename}' no válido: {e}")
+        return manager, header.get("metadata", {})
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    n_polys, verts = 500_000, 10  # 5M vértices
+    xy = np.column_stack([rng.uniform(300000, 700000, n_polys * verts),
+                          rng.uniform(4000000, 4500000, n_polys * verts)])
+    arrays = FeatureArrays(xy,
+                           np.arange(0, n_polys * verts + 1, verts, dtype=np.int64),
+                           np.full(n_polys, 2, dtype=np.uint8),
+                           np.arange(1, n_polys + 1, dtype=np.int64))
+    mgr = CoordinateManager.from_arrays("Norte", 18, arrays)
+
+    path = os.path.join(tempfile.gettempdir(), "test_proyecto.gwp")
+    t0 = time.perf_counter()
+    ProjectFile.save(mgr, path, {"nombre": "prueba"})
+    t1 = time.perf_counter()
+    loaded, meta = ProjectFile.load(path)
+    t2 = time.perf_counter()
+    print(f"Guardar {arrays.n_vertices} vértices: {t1 - t0:.3f} s ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"Abrir (mmap): {(t2 - t1) * 1000:.2f} ms, metadata={meta}, features={loaded.feature_count()}")
+    print("Datos idénticos:", np.array_equal(loaded.to_arrays().xy, xy))
+    print("Primer feature:", loaded.get_features()[0]["id"], loaded.get_features()[0]["type"])
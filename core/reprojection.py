@@ -0,0 +1,207 @@
+# core/reprojection.py
+"""
+Reproyección UTM -> geográficas con caché de resultados.
+
+Los exportadores geográficos (KML, KMZ) reproyectan todos los vértices en
+cada exportación. La caché guarda el resultado de cada reproyección indexado
+por (EPSG de origen, EPSG de destino, huella del contenido de los vértices):
+volver a exportar un proyecto sin cambios, aunque sea a otro formato o con
+otro nombre de archivo, no llama a pyproj. Como la clave depende del
+contenido, cualquier edición de la tabla o cambio de zona produce una clave
+nueva y el resultado anterior deja de usarse (y acaba expulsado por LRU).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from pyproj import Transformer
+
+from core.diagnostics import DiagnosticCode, Diagnostics
+
+WGS84_EPSG = 4326
+
+# Transformadores cacheados por (origen, destino). Por hilo, porque los
+# objetos Transformer de pyproj no deben compartirse entre hilos.
+_transformers = threading.local()
+
+
+def get_transformer(src_epsg: int, dst_epsg: int) -> Transformer:
+    cache = getattr(_transformers, "by_pair", None)
+    if cache is None:
+        cache = _transformers.by_pair = {}
+    transformer = cache.get((src_epsg, dst_epsg))
+    if transformer is None:
+        transformer = cache[(src_epsg, dst_epsg)] = Transformer.from_crs(
+            f"EPSG:{src_epsg}", f"EPSG:{dst_epsg}", always_xy=True)
+    return transformer
+
+
+def utm_epsg(hemisphere: str, zone) -> int:
+    """Código EPSG WGS84/UTM (326zz/327zz). Lanza ValueError si la zona o el hemisferio no son válidos."""
+    try:
+        zone_int = int(zone)
+    except (TypeError, ValueError):
+        raise ValueError(f"Zona UTM inválida: '{zone}'. Debe ser un número entero.")
+    if not (1 <= zone_int <= 60):
+        raise ValueError(f"Zona UTM '{zone}' inválida. Debe estar entre 1 y 60.")
+    if hemisphere.lower() == 'norte':
+        return 32600 + zone_int
+    if hemisphere.lower() == 'sur':
+        return 32700 + zone_int
+    raise ValueError(f"Hemisferio '{hemisphere}' no reconocido. Use 'Norte' o 'Sur'.")
+
+
+class ReprojectionCache:
+    """
+    Caché LRU de arrays reproyectados, limitada por memoria.
+
+    Los arrays devueltos son de solo lectura: se comparten entre exportaciones.
+    `transform_calls` cuenta las llamadas reales a pyproj (útil para comprobar
+    que una reexportación no reproyecta nada).
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.transform_calls = 0
+
+    @staticmethod
+    def _digest(xy: np.ndarray) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(np.int64(len(xy)).tobytes())
+        h.update(np.ascontiguousarray(xy, dtype=np.float64).tobytes())
+        return h.digest()
+
+    def transform(self, xy, src_epsg: int, dst_epsg: int = WGS84_EPSG) -> np.ndarray:
+        """
+        Vértices (N, 2) reproyectados de src_epsg a dst_epsg, en una sola
+        llamada vectorizada si no están en caché. Los vértices que pyproj no
+        puede transformar quedan como inf.
+        """
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        key = (src_epsg, dst_epsg, self._digest(xy))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        if len(xy):
+            x, y = get_transformer(src_epsg, dst_epsg).transform(xy[:, 0], xy[:, 1])
+            out = np.column_stack([x, y])
+            with self._lock:
+                self.transform_calls += 1
+        else:
+            out = np.zeros((0, 2))
+        out.setflags(write=False)
+
+        with self._lock:
+            if out.nbytes <= self.max_bytes and key not in self._entries:
+                self._entries[key] = out
+                self._bytes += out.nbytes
+                while self._bytes > self.max_bytes:
+                    _, old = self._entries.popitem(last=False)
+                    self._bytes -= old.nbytes
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+
+# Caché compartida por los exportadores y CoordinateManager.reprojected()
+default_cache = ReprojectionCache()
+
+
+def feature_vertices(feat: dict, diagnostics: Diagnostics = None):
+    """
+    Vértices (n, 2) de un feature en el orden en que los recorren los
+    exportadores: todos los anillos de "parts" seguidos o, si no hay partes,
+    "coords". Los pares mal formados se omiten (con un aviso en `diagnostics`,
+    si se indica).
+    Devuelve None si el feature no tiene ningún par válido.
+    """
+    rings = [ring for rings in feat["parts"] for ring in rings] if feat.get("parts") else [feat.get("coords") or []]
+    # Caso normal: todos los pares bien formados, conversión directa con numpy
+    try:
+        xy = np.asarray([pair for ring in rings for pair in ring], dtype=np.float64)
+        if xy.ndim == 2 and xy.shape[1] == 2 and len(xy) and np.isfinite(xy).all():
+            return xy
+    except (TypeError, ValueError):
+        pass
+
+    pairs = []
+    for ring in rings:
+        for pair in ring:
+            if isinstance(pair, (list, tuple)) and len(pair) == 2:
+                try:
+                    pairs.append((float(pair[0]), float(pair[1])))
+                    continue
+                except (TypeError, ValueError):
+                    pass
+            if diagnostics is not None:
+                diagnostics.warn(DiagnosticCode.COORDENADA_INVALIDA, feat.get("id", "N/A"), f"par {pair}")
+    if not pairs:
+        return None
+    return np.asarray(pairs, dtype=np.float64)
+
+
+def reproject_features(features: list[dict], src_epsg: int, dst_epsg: int = WGS84_EPSG,
+                       cache: ReprojectionCache = None, diagnostics: Diagnostics = None) -> list:
+    """
+    Reproyecta los vértices de todos los features con una única consulta a la
+    caché (y como mucho una llamada a pyproj). Los pares mal formados se
+    registran en `diagnostics`.
+
+    Returns:
+        Lista alineada con `features`: array (n, 2) de solo lectura con los
+        vértices válidos del feature (ver feature_vertices), o None.
+    """
+    cache = default_cache if cache is None else cache
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    vertices = [feature_vertices(f, diagnostics) for f in features]
+    valid = [v for v in vertices if v is not None]
+    if not valid:
+        return vertices
+    out = cache.transform(np.concatenate(valid), src_epsg, dst_epsg)
+    result = []
+    start = 0
+    for v in vertices:
+        if v is None:
+            result.append(None)
+            continue
+        result.append(out[start:start + len(v)])
+        start += len(v)
+    return result
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(3)
+    features = [{"id": i, "type": "Polilínea",
+                 "coords": [tuple(p) for p in rng.uniform((400000, 4000000), (600000, 4200000), (50, 2))]}
+                for i in range(10_000)]
+    cache = ReprojectionCache()
+    for label in ("primera exportación", "reexportación sin cambios"):
+        t0 = time.perf_counter()
+        result = reproject_features(features, utm_epsg("Norte", 18), cache=cache)
+        print(f"{label}: {(time.perf_counter() - t0) * 1000:.0f} ms, llamadas a pyproj: {cache.transform_calls}")
+    features[0]["coords"][0] = (500000.0, 4100000.0)
+    reproject_features(features, utm_epsg("Norte", 18), cache=cache)
+    print("tras editar un vértice, llamadas a pyproj:", cache.transform_calls)
+    reproject_features(features, utm_epsg("Norte", 19), cache=cache)
+    print("tras cambiar de zona, llamadas a pyproj:", cache.transform_calls)
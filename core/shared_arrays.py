@@ -0,0 +1,261 @@
+# core/shared_arrays.py
+"""
+Entrega de los buffers de un FeatureArrays (vértices y offsets) a procesos
+de trabajo por memoria compartida (multiprocessing.shared_memory), sin
+serializarlos.
+
+El proceso principal copia una vez cada array a un segmento propio con
+SharedSegments.publish() y a los procesos solo les envía un
+SharedArraysHandle: nombres de segmento, dtypes y formas, unos cientos de
+bytes sea cual sea el tamaño del proyecto. Cada proceso se adjunta con
+attach() y envuelve los segmentos con numpy sin copiarlos; lo adjuntado se
+conserva entre tareas (hasta _MAX_ATTACHED publicaciones por proceso).
+
+SharedSegments es el dueño de los segmentos: close() (o salir del bloque
+with) los cierra y los elimina del sistema. Si no se llama, se hace al
+recolectar el objeto o al terminar el intérprete, para no dejar segmentos
+huérfanos en /dev/shm.
+
+Requiere Python 3.8+ (multiprocessing.shared_memory).
+"""
+import uuid
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7
+    shared_memory = None
+
+from core.coordinate_manager import FeatureArrays
+
+# Publicaciones adjuntas en este proceso: token -> ({nombre: array}, [segmentos])
+_ATTACHED = OrderedDict()
+_MAX_ATTACHED = 4
+
+
+class SharedArraysHandle:
+    """
+    Descripción serializable de arrays publicados con SharedSegments.
+
+    Atributos:
+        token: Identificador único de la publicación.
+        specs: {nombre: (segmento, dtype, forma)}; None para arrays ausentes
+               (p. ej. los offsets de anillos de un conjunto sin multipartes).
+    """
+    __slots__ = ("token", "specs")
+
+    def __init__(self, token: str, specs: dict):
+        self.token = token
+        self.specs = specs
+
+    @property
+    def nbytes(self) -> int:
+        return sum(int(np.prod(spec[2])) * np.dtype(spec[1]).itemsize
+                   for spec in self.specs.values() if spec is not None)
+
+
+def _require():
+    if shared_memory is None:
+        raise RuntimeError("La memoria compartida entre procesos requiere Python 3.8 o posterior.")
+
+
+def _open_segment(name: str):
+    """Adjunta un segmento existente sin registrarlo para borrarlo al salir (lo borra su dueño)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: sin el parámetro track
+        return shared_memory.SharedMemory(name=name)
+
+
+def _close(segments, unlink: bool):
+    for shm in segments:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # quedan vistas numpy vivas: la memoria se libera cuando desaparezcan
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedSegments:
+    """
+    Segmentos de memoria compartida creados por este proceso.
+
+    Uso típico:
+        with SharedSegments() as shared:
+            handle = shared.publish(mgr.to_arrays())
+            pool.map(trabajo, repeat(handle), rangos)
+
+    Raises:
+        RuntimeError: Si la plataforma no tiene multiprocessing.shared_memory.
+    """
+
+    def __init__(self):
+        _require()
+        self._segments = []
+        self._finalizer = weakref.finalize(self, _close, self._segments, True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._segments)
+
+    def _allocate(self, shape, dtype):
+        """(spec, array) de un segmento nuevo con la forma y el dtype pedidos."""
+        if not self._finalizer.alive:
+            raise RuntimeError("Los segmentos compartidos ya se cerraron.")
+        dtype = np.dtype(dtype)
+        shape = tuple(int(n) for n in shape)
+        size = int(np.prod(shape)) * dtype.itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self._segments.append(shm)
+        return (shm.name, dtype.str, shape), np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    def publish_arrays(self, arrays: dict) -> SharedArraysHandle:
+        """Copia cada array de {nombre: array o None} a su propio segmento."""
+        specs = {}
+        for name, array in arrays.items():
+            if array is None:
+                specs[name] = None
+                continue
+            array = np.asarray(array)
+            specs[name], view = self._allocate(array.shape, array.dtype)
+            view[...] = array
+        return SharedArraysHandle(uuid.uuid4().hex, specs)
+
+    def publish(self, arrays: FeatureArrays) -> SharedArraysHandle:
+        """Publica los buffers de un FeatureArrays (una copia); ver attach()."""
+        return self.publish_arrays({name: getattr(arrays, name) for name in FeatureArrays.__slots__})
+
+    def empty(self, layout: dict):
+        """
+        Buffers de salida sin inicializar para que los procesos escriban en
+        ellos: {nombre: (forma, dtype)} -> (handle, {nombre: array}). Los
+        procesos los obtienen con attach_arrays(handle, writable=True).
+        """
+        specs, views = {}, {}
+        for name, (shape, dtype) in layout.items():
+            specs[name], views[name] = self._allocate(shape, dtype)
+        return SharedArraysHandle(uuid.uuid4().hex, specs), views
+
+    def close(self):
+        """Cierra y elimina todos los segmentos (idempotente)."""
+        self._finalizer()
+
+
+def attach_arrays(handle: SharedArraysHandle, writable: bool = False) -> dict:
+    """
+    {nombre: array} sobre los segmentos de `handle`, sin copiar. Salvo con
+    `writable`, los arrays son de solo lectura.
+    """
+    _require()
+    cached = _ATTACHED.get(handle.token)
+    if cached is None:
+        segments, arrays = [], {}
+        try:
+            for name, spec in handle.specs.items():
+                if spec is None:
+                    arrays[name] = None
+                    continue
+                segment, dtype, shape = spec
+                shm = _open_segment(segment)
+                segments.append(shm)
+                arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        except FileNotFoundError:
+            arrays.clear()
+            _close(segments, unlink=False)
+            raise RuntimeError("Los segmentos compartidos ya no existen (¿se cerró la publicación?).")
+        cached = _ATTACHED[handle.token] = (arrays, segments)
+        while len(_ATTACHED) > _MAX_ATTACHED:
+            _, (old_arrays, old_segments) = _ATTACHED.popitem(last=False)
+            old_arrays.clear()
+            _close(old_segments, unlink=False)
+    else:
+        _ATTACHED.move_to_end(handle.token)
+
+    views = {}
+    for name, array in cached[0].items():
+        if array is not None and not writable:
+            array = array.view()
+            array.flags.writeable = False
+        views[name] = array
+    return views
+
+
+def attach(handle: SharedArraysHandle) -> FeatureArrays:
+    """FeatureArrays de solo lectura sobre una publicación de SharedSegments.publish()."""
+    arrays = attach_arrays(handle)
+    return FeatureArrays(*(arrays.get(name) for name in FeatureArrays.__slots__))
+
+
+# Benchmark (opcional, para testing directo): métricas de 10M vértices repartidas entre procesos
+if __name__ == '__main__':
+    import os
+    import pickle
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+
+    from core.metrics import compute_metrics, compute_metrics_parallel
+
+    n_polys, verts = 1_250_000, 8
+    rng = np.random.default_rng(42)
+    ang = np.linspace(0, 2 * np.pi, verts, endpoint=False)
+    radii = rng.uniform(10, 500, n_polys)[:, None]
+    centers = np.column_stack([rng.uniform(300000, 700000, n_polys), rng.uniform(4000000, 4500000, n_polys)])
+    arrays = FeatureArrays(
+        np.column_stack([(centers[:, :1] + radii * np.cos(ang)).ravel(),
+                         (centers[:, 1:] + radii * np.sin(ang)).ravel()]),
+        np.arange(0, n_polys * verts + 1, verts, dtype=np.int64),
+        np.full(n_polys, 2, dtype=np.uint8),
+        np.arange(1, n_polys + 1, dtype=np.int64))
+    del centers, radii
+    print(f"{n_polys} polígonos x {verts} = {arrays.n_vertices} vértices ({arrays.nbytes / 1e6:.0f} MB en arrays)")
+
+    # Lo que cuesta entregar los datos a un proceso de trabajo
+    sample = arrays.feature_range(0, n_polys // 10).to_features()  # 1M de vértices
+    t0 = time.perf_counter()
+    blob = pickle.dumps(sample, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.loads(blob)
+    t_dicts = (time.perf_counter() - t0) * 10
+    size_dicts = len(blob) * 10
+    del sample, blob
+    t0 = time.perf_counter()
+    blob = pickle.dumps(arrays, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.loads(blob)
+    t_numpy = time.perf_counter() - t0
+    size_numpy = len(blob)
+    del blob
+    with SharedSegments() as shared:
+        t0 = time.perf_counter()
+        handle = shared.publish(arrays)
+        t_publish = time.perf_counter() - t0
+        size_handle = len(pickle.dumps(handle))
+    print("Entrega a cada proceso (serializar + deserializar):")
+    print(f"  lista de dicts de tuplas: {t_dicts:7.2f} s  {size_dicts / 1e6:8.1f} MB  (estimado x10 desde 1M de vértices)")
+    print(f"  arrays numpy con pickle:  {t_numpy:7.2f} s  {size_numpy / 1e6:8.1f} MB")
+    print(f"  handle de memoria compartida: {size_handle} bytes (publicar una vez: {t_publish:.2f} s)")
+
+    t0 = time.perf_counter()
+    reference = compute_metrics(arrays)
+    t_single = time.perf_counter() - t0
+    print(f"\nMétricas en el proceso principal: {t_single:.2f} s")
+    print(f"Procesos disponibles: {os.cpu_count()}")
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            compute_metrics_parallel(arrays.feature_range(0, 1000), pool=pool)  # arrancar los procesos
+            t0 = time.perf_counter()
+            result = compute_metrics_parallel(arrays, pool=pool)
+            elapsed = time.perf_counter() - t0
+        assert np.allclose(result.area, reference.area) and np.allclose(result.centroid, reference.centroid)
+        print(f"  {workers} proceso(s): {elapsed:6.2f} s  (x{t_single / elapsed:.2f} frente al proceso principal)")
@@ -0,0 +1,244 @@
+# core/snapping.py
+"""
+Ajuste (snapping) de vértices cercanos y eliminación de duplicados con una
+rejilla hash espacial.
+
+Los vértices se recorren en orden y cada uno se une al primer vértice
+"semilla" a menos de `tolerancia` metros; si no hay ninguno, pasa a ser
+semilla. Las semillas se guardan en un dict indexado por la celda
+(floor(x / tol), floor(y / tol)), así que cada vértice solo se compara con
+las semillas de las 9 celdas vecinas: O(n) en la práctica. Los duplicados
+exactos (frecuentes en datos GPS) se agrupan antes con numpy y no pasan por
+el bucle.
+
+Tras el ajuste:
+    - en líneas y anillos se eliminan los vértices consecutivos que quedaron
+      en la misma posición (y el cierre repetido de los anillos),
+    - opcionalmente, los puntos que coinciden con un punto anterior se eliminan.
+
+Un anillo que quedaría con menos vértices de los necesarios (2 en líneas, 3
+en polígonos) se conserva sin modificar.
+"""
+import numpy as np
+
+from core.coordinate_manager import CoordinateManager, FeatureArrays, GeometryType
+
+
+def snap_clusters(xy, tolerance: float) -> np.ndarray:
+    """
+    Índice del vértice semilla de cada vértice (int64 (N,)); las semillas se
+    apuntan a sí mismas. Con tolerancia 0 solo se unen duplicados exactos.
+
+    Raises:
+        ValueError: Si la tolerancia es negativa o no es un número finito.
+    """
+    tolerance = float(tolerance)
+    if not np.isfinite(tolerance) or tolerance < 0:
+        raise ValueError(f"Tolerancia inválida: {tolerance}. Debe ser un número de metros >= 0.")
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    if not len(xy):
+        return np.zeros(0, dtype=np.int64)
+
+    # Duplicados exactos: el bucle solo ve la primera aparición de cada posición
+    _, first, inverse = np.unique(xy, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    if tolerance == 0:
+        return first[inverse].astype(np.int64)
+
+    order = np.sort(first)
+    xs = xy[order, 0].tolist()
+    ys = xy[order, 1].tolist()
+    cells = np.floor(xy[order] / tolerance).astype(np.int64)
+    cx = cells[:, 0].tolist()
+    cy = cells[:, 1].tolist()
+    tol2 = tolerance * tolerance
+
+    grid = {}
+    seed_of = [0] * len(order)      # semilla (posición en `order`) de cada vértice único
+    for i in range(len(order)):
+        x = xs[i]
+        y = ys[i]
+        gx = cx[i]
+        gy = cy[i]
+        best = -1
+        best_d = tol2
+        for key in ((gx - 1, gy - 1), (gx, gy - 1), (gx + 1, gy - 1),
+                    (gx - 1, gy), (gx, gy), (gx + 1, gy),
+                    (gx - 1, gy + 1), (gx, gy + 1), (gx + 1, gy + 1)):
+            seeds = grid.get(key)
+            if seeds is None:
+                continue
+            for j in seeds:
+                d = (xs[j] - x) ** 2 + (ys[j] - y) ** 2
+                if d < best_d or (d == best_d and best < 0):
+                    best, best_d = j, d
+        if best < 0:
+            best = i
+            seeds = grid.get((gx, gy))
+            if seeds is None:
+                grid[(gx, gy)] = [i]
+            else:
+                seeds.append(i)
+        seed_of[i] = best
+
+    # posición única -> vértice original semilla
+    seed_vertex = order[np.asarray(seed_of, dtype=np.int64)]
+    unique_rank = np.empty(len(first), dtype=np.int64)
+    unique_rank[np.argsort(first)] = np.arange(len(first))
+    return seed_vertex[unique_rank[inverse]]
+
+
+def snap_arrays(arrays: FeatureArrays, tolerance: float,
+                drop_duplicate_points: bool = True) -> tuple[FeatureArrays, dict]:
+    """
+    Ajusta los vértices a `tolerancia` metros y elimina duplicados.
+
+    Returns:
+        (arrays, informe). El informe es un dict con:
+            vertices_antes, vertices_despues,
+            vertices_ajustados: vértices movidos a la posición de otro (su semilla),
+            vertices_eliminados: vértices consecutivos repetidos eliminados,
+            puntos_eliminados: features Punto duplicados eliminados,
+            anillos_conservados: anillos que no se simplificaron por quedar degenerados.
+    """
+    xy = np.asarray(arrays.xy, dtype=np.float64)
+    reps = snap_clusters(xy, tolerance)
+    n = len(xy)
+    report = {"vertices_antes": n, "vertices_despues": n, "vertices_ajustados": 0,
+              "vertices_eliminados": 0, "puntos_eliminados": 0, "anillos_conservados": 0}
+    if not n:
+        return arrays, report
+
+    snapped = xy[reps]
+    moved = (snapped != xy).any(axis=1)
+
+    geoms, parts, rings = arrays.rings()
+    ring_counts = np.diff(rings)
+    ring_starts = rings[:-1]
+    ring_ends = rings[1:] - 1
+    n_rings = len(ring_counts)
+    ring_of_vertex = np.repeat(np.arange(n_rings), ring_counts)
+    feat_of_ring = np.repeat(np.arange(len(arrays)), np.diff(parts[geoms]))
+    ring_types = np.asarray(arrays.types)[feat_of_ring]
+
+    # Vértices que repiten la posición del anterior dentro del mismo anillo
+    keep = np.ones(n, dtype=bool)
+    keep[1:] = reps[1:] != reps[:-1]
+    keep[ring_starts] = True
+    # Cierre repetido de los anillos de polígono
+    poly_rings = np.flatnonzero((ring_types == GeometryType.CODES[GeometryType.POLIGONO]) & (ring_counts > 1))
+    closing = ring_ends[poly_rings][reps[ring_ends[poly_rings]] == reps[ring_starts[poly_rings]]]
+    keep[closing] = False
+
+    # Anillos que quedarían degenerados: se conservan tal cual
+    min_vertices = np.choose(ring_types, [1, 2, 3])
+    kept_counts = np.add.reduceat(keep.astype(np.int64), ring_starts) if n_rings else np.zeros(0, dtype=np.int64)
+    degenerate = (kept_counts < min_vertices) & (kept_counts < ring_counts)
+    if degenerate.any():
+        restore = degenerate[ring_of_vertex]
+        keep[restore] = True
+        snapped[restore] = xy[restore]
+        moved &= ~restore
+        report["anillos_conservados"] = int(degenerate.sum())
+    report["vertices_ajustados"] = int(moved.sum())
+
+    # Puntos duplicados: se conserva el primero de cada posición
+    feature_keep = np.ones(len(arrays), dtype=bool)
+    if drop_duplicate_points:
+        point_feats = np.flatnonzero(np.asarray(arrays.types) == GeometryType.CODES[GeometryType.PUNTO])
+        if len(point_feats):
+            point_reps = reps[np.asarray(arrays.offsets)[point_feats]]
+            _, first = np.unique(point_reps, return_index=True)
+            duplicate = np.ones(len(point_feats), dtype=bool)
+            duplicate[first] = False
+            feature_keep[point_feats[duplicate]] = False
+            report["puntos_eliminados"] = int(duplicate.sum())
+            keep &= np.repeat(feature_keep, np.diff(arrays.offsets))
+
+    report["vertices_eliminados"] = int(n - keep.sum()) - report["puntos_eliminados"]
+    report["vertices_despues"] = int(keep.sum())
+
+    # Reconstruir offsets con los anillos y features que quedan
+    ring_keep = feature_keep[feat_of_ring]
+    part_keep = np.repeat(feature_keep, np.diff(geoms))
+    new_ring_counts = np.add.reduceat(keep.astype(np.int64), ring_starts)[ring_keep]
+
+    def offsets_from(counts):
+        out = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=out[1:])
+        return out
+
+    new_rings = offsets_from(new_ring_counts)
+    new_parts = offsets_from(np.diff(parts)[part_keep])
+    new_geoms = offsets_from(np.diff(geoms)[feature_keep])
+    result = FeatureArrays(snapped[keep], new_rings[new_parts[new_geoms]],
+                           np.asarray(arrays.types)[feature_keep], np.asarray(arrays.ids)[feature_keep])
+    if arrays.has_rings:
+        result.geom_offsets, result.part_offsets, result.ring_offsets = new_geoms, new_parts, new_rings
+    return result, report
+
+
+def snap_features(features: list[dict], tolerance: float,
+                  drop_duplicate_points: bool = True) -> tuple[list[dict], dict]:
+    """snap_arrays sobre una lista de features (dicts), p. ej. la salida de un importador."""
+    arrays, report = snap_arrays(FeatureArrays.from_features(features), tolerance, drop_duplicate_points)
+    return arrays.to_features(), report
+
+
+def snap_manager(mgr: CoordinateManager, tolerance: float,
+                 drop_duplicate_points: bool = True) -> tuple[CoordinateManager, dict]:
+    """
+    snap_arrays sobre un CoordinateManager. Devuelve un manager nuevo con la
+    misma zona y precisión (en punto fijo si el original lo estaba).
+    """
+    arrays, report = snap_arrays(mgr.to_arrays(), tolerance, drop_duplicate_points)
+    snapped = CoordinateManager.from_arrays(mgr.hemisphere, mgr.zone, arrays,
+                                            precision=mgr.precision if mgr.is_quantized else None)
+    snapped.precision = mgr.precision
+    return snapped, report
+
+
+def format_report(report: dict, tolerance: float) -> str:
+    """Resumen de una línea por dato, para mostrar al usuario."""
+    lines = [
+        f"Tolerancia: {tolerance:g} m",
+        f"Vértices movidos a un vértice cercano: {report['vertices_ajustados']}",
+        f"Vértices repetidos eliminados: {report['vertices_eliminados']}",
+        f"Puntos duplicados eliminados: {report['puntos_eliminados']}",
+        f"Vértices: {report['vertices_antes']} -> {report['vertices_despues']}",
+    ]
+    if report["anillos_conservados"]:
+        lines.append(f"Geometrías que quedarían degeneradas (sin cambios): {report['anillos_conservados']}")
+    return "\n".join(lines)
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import time
+
+    # Traza GPS: 200k lecturas, cada posición registrada ~3 veces con ruido de
+    # unos centímetros y algunas repeticiones exactas
+    rng = np.random.default_rng(11)
+    base = np.cumsum(rng.normal(0, 2.0, (70_000, 2)), axis=0) + (500000, 4000000)
+    track = np.repeat(base, 3, axis=0)
+    track += rng.normal(0, 0.03, track.shape) * (rng.random(len(track)) < 0.7)[:, None]
+    n = len(track)
+    arrays = FeatureArrays(track, np.array([0, n]), np.array([1], dtype=np.uint8), np.array([1]))
+
+    t0 = time.perf_counter()
+    cleaned, report = snap_arrays(arrays, 0.1)
+    print(f"Polilínea de {n} vértices ({time.perf_counter() - t0:.2f} s):")
+    print(format_report(report, 0.1))
+
+    points = FeatureArrays(track, np.arange(n + 1), np.zeros(n, dtype=np.uint8), np.arange(1, n + 1))
+    t0 = time.perf_counter()
+    cleaned, report = snap_arrays(points, 0.1)
+    print(f"\n{n} puntos ({time.perf_counter() - t0:.2f} s):")
+    print(format_report(report, 0.1))
+
+    # Polígono con huecos: el cierre repetido y el vértice duplicado desaparecen
+    feats = [{"id": 1, "type": "Polígono", "coords": [(0, 0), (10, 0), (10, 0.01), (10, 10), (0, 10), (0, 0)],
+              "parts": [[[(0, 0), (10, 0), (10, 0.01), (10, 10), (0, 10), (0, 0)],
+                         [(4, 4), (6, 4), (6, 6), (4, 6)]]]}]
+    out, report = snap_features(feats, 0.05)
+    print("\nPolígono con hueco:", out[0]["parts"], report)
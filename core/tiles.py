@@ -0,0 +1,187 @@
+# core/tiles.py
+"""
+Utilidades para el mapa base en teselas (esquema XYZ / "slippy map" de OSM):
+cálculo de teselas visibles, selección de nivel de zoom y cachés LRU
+en memoria y en disco. No depende de Qt para poder usarse desde hilos.
+"""
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+
+TILE_SIZE = 256
+MAX_LAT = 85.05112878  # Límite de latitud de Web Mercator
+# Metros por píxel en el ecuador para el zoom 0 con teselas de 256 px
+EQUATOR_MPP_Z0 = 156543.03392804097
+
+DEFAULT_TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> tuple[float, float]:
+    """Devuelve las coordenadas de tesela (fraccionarias) de un punto lon/lat en el zoom z."""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    n = 2 ** z
+    tx = (lon + 180.0) / 360.0 * n
+    lat_rad = math.radians(lat)
+    ty = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return tx, ty
+
+
+def tile_to_lonlat(tx: float, ty: float, z: int) -> tuple[float, float]:
+    """Inversa de lonlat_to_tile: esquina noroeste de la tesela (tx, ty)."""
+    n = 2 ** z
+    lon = tx / n * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+    return lon, lat
+
+
+def zoom_for_resolution(meters_per_pixel: float, lat: float, min_zoom: int = 0, max_zoom: int = 19) -> int:
+    """Elige el zoom cuya resolución de tesela más se aproxima a la del lienzo."""
+    if meters_per_pixel <= 0:
+        return max_zoom
+    z = math.log2(EQUATOR_MPP_Z0 * math.cos(math.radians(lat)) / meters_per_pixel)
+    return max(min_zoom, min(max_zoom, int(round(z))))
+
+
+def tiles_for_bbox(west: float, south: float, east: float, north: float, z: int) -> list[tuple[int, int, int]]:
+    """
+    Lista de claves (z, x, y) de las teselas que cubren el bbox geográfico,
+    ordenadas desde el centro hacia afuera para que se pidan primero las más visibles.
+    """
+    n = 2 ** z
+    x0, y0 = lonlat_to_tile(west, north, z)
+    x1, y1 = lonlat_to_tile(east, south, z)
+    xs = range(max(0, int(x0)), min(n - 1, int(x1)) + 1)
+    ys = range(max(0, int(y0)), min(n - 1, int(y1)) + 1)
+    cx, cy = (x0 + x1) / 2.0, (y0 + y1) / 2.0
+    keys = [(z, x, y) for x in xs for y in ys]
+    keys.sort(key=lambda k: (k[1] + 0.5 - cx) ** 2 + (k[2] + 0.5 - cy) ** 2)
+    return keys
+
+
+class LRUCache:
+    """
+    Caché LRU en memoria acotada por tamaño total (en bytes estimados).
+    No es thread-safe: está pensada para usarse desde el hilo de la GUI.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._items = OrderedDict()  # key -> (value, nbytes)
+
+    def get(self, key):
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        self._items.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, nbytes: int):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old[1]
+        self._items[key] = (value, nbytes)
+        self.current_bytes += nbytes
+        while self.current_bytes > self.max_bytes and len(self._items) > 1:
+            _, (_, evicted_bytes) = self._items.popitem(last=False)
+            self.current_bytes -= evicted_bytes
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+        self.current_bytes = 0
+
+
+class DiskTileCache:
+    """
+    Caché LRU de teselas en disco, acotada por tamaño total.
+
+    Las teselas se guardan como <directorio>/<hash de la URL>/<z>/<x>/<y>.tile,
+    de modo que cambiar de servidor de teselas no mezcla imágenes.
+    El índice se reconstruye de forma perezosa (al primer uso) ordenando
+    por fecha de modificación, y cada acierto actualiza esa fecha.
+    Es thread-safe: los hilos de descarga la usan concurrentemente.
+    """
+
+    def __init__(self, directory: str, url_template: str, max_bytes: int = 200 * 1024 * 1024):
+        url_hash = hashlib.sha1(url_template.encode("utf-8")).hexdigest()[:12]
+        self.directory = os.path.join(directory, url_hash)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None  # OrderedDict path -> tamaño, del más antiguo al más reciente
+        self._total = 0
+
+    def _path(self, key: tuple[int, int, int]) -> str:
+        z, x, y = key
+        return os.path.join(self.directory, str(z), str(x), f"{y}.tile")
+
+    def _load_index(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                if not name.endswith(".tile"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, path, st.st_size))
+        entries.sort()
+        self._index = OrderedDict((path, size) for _, path, size in entries)
+        self._total = sum(size for _, _, size in entries)
+
+    def get(self, key: tuple[int, int, int]):
+        path = self._path(key)
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            if path not in self._index:
+                return None
+            self._index.move_to_end(path)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            with self._lock:
+                size = self._index.pop(path, 0)
+                self._total -= size
+            return None
+
+    def put(self, key: tuple[int, int, int], data: bytes):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Advertencia: No se pudo guardar la tesela {key} en caché: {e}")
+            return
+
+        to_delete = []
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            self._total -= self._index.pop(path, 0)
+            self._index[path] = len(data)
+            self._total += len(data)
+            while self._total > self.max_bytes and len(self._index) > 1:
+                old_path, old_size = self._index.popitem(last=False)
+                self._total -= old_size
+                to_delete.append(old_path)
+        for old_path in to_delete:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
@@ -0,0 +1,497 @@
+# core/validity.py
+"""
+Validación de polígonos antes de exportar.
+
+Para cada feature Polígono (todas sus partes y anillos) se detectan:
+
+    - autointersecciones: cruces o contactos entre segmentos no consecutivos
+      (del mismo anillo o de anillos distintos) y retrocesos sobre el mismo
+      segmento,
+    - vértices duplicados no consecutivos (el anillo se toca a sí mismo),
+    - segmentos de longitud cero (vértices consecutivos repetidos),
+    - orientación de los anillos exteriores y huecos mal orientados.
+
+La búsqueda de intersecciones usa rejillas jerárquicas sobre las cajas de
+los segmentos: cada segmento se registra en celdas de su tamaño (alargadas
+si él lo es) y solo se comparan los pares que comparten celda, una vez
+cada uno, con el test de orientación vectorizado. El coste crece con el
+número de segmentos más el de pares de cajas solapadas, no con cuántos
+segmentos corta una recta de barrido: un peine de dientes largos y finos,
+que llevaba al barrido en X a comparar casi todos los pares (O(n²)), se
+valida en tiempo lineal. Sigue siendo cuadrático si las cajas de muchos
+segmentos se solapan de verdad (p. ej. muchos radios largos que convergen
+en un mismo punto).
+"""
+import time
+
+import numpy as np
+
+from core.coordinate_manager import FeatureArrays, GeometryType
+
+_POLIGONO = GeometryType.CODES[GeometryType.POLIGONO]
+
+# Pares candidatos por lote (limita la memoria si muchas cajas comparten celda)
+_PAIRS_PER_BATCH = 4_000_000
+# Razón entre los lados de celda de niveles consecutivos
+_LEVEL_RATIO = 8
+# Percentil de la extensión de los segmentos que fija el lado de la celda más fina
+_BASE_PERCENTILE = 10
+# Ubicaciones de autointersección que se guardan por feature
+MAX_LOCATIONS = 5
+
+
+def _orient(ax, ay, bx, by, cx, cy):
+    """Signo del producto vectorial (b - a) x (c - a), vectorizado."""
+    return np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+
+
+def _on_segment(ax, ay, bx, by, px, py):
+    """p (colineal con a-b) está dentro de la caja del segmento a-b."""
+    return ((np.minimum(ax, bx) <= px) & (px <= np.maximum(ax, bx)) &
+            (np.minimum(ay, by) <= py) & (py <= np.maximum(ay, by)))
+
+
+def _polygon_rings(arrays: FeatureArrays):
+    """
+    Anillos de los features Polígono sin vértices consecutivos repetidos ni
+    cierre explícito. Devuelve (xy, ring_offsets, ring_feature, ring_is_outer,
+    zero_length_por_feature).
+    """
+    geoms, parts, rings = arrays.rings()
+    poly = np.flatnonzero(np.asarray(arrays.types) == _POLIGONO)
+    ring_counts = np.diff(rings)
+    feat_of_ring = np.repeat(np.arange(len(arrays)), np.diff(parts[geoms]))
+    ring_sel = np.isin(feat_of_ring, poly)
+    first_ring_of_part = np.zeros(len(ring_counts), dtype=bool)
+    first_ring_of_part[parts[:-1]] = True
+
+    xy = np.asarray(arrays.xy, dtype=np.float64)
+    vertex_sel = np.repeat(ring_sel, ring_counts)
+    ring_of_vertex = np.repeat(np.arange(len(ring_counts)), ring_counts)
+    starts = rings[:-1]
+
+    # Vértices consecutivos repetidos dentro del anillo
+    repeated = np.zeros(len(xy), dtype=bool)
+    repeated[1:] = (xy[1:] == xy[:-1]).all(axis=1)
+    repeated[starts] = False
+    # Cierre explícito (último vértice no repetido igual al primero): no es un segmento nulo
+    closing = np.zeros(len(xy), dtype=bool)
+    if len(xy):
+        nonempty = ring_counts > 0
+        last = np.maximum.reduceat(np.where(repeated, -1, np.arange(len(xy))), starts[nonempty])
+        has_closure = (last != starts[nonempty]) & (xy[last] == xy[starts[nonempty]]).all(axis=1)
+        closing[last[has_closure]] = True
+
+    zero_length = np.bincount(feat_of_ring[ring_of_vertex[repeated & vertex_sel]], minlength=len(arrays))
+
+    keep = vertex_sel & ~repeated & ~closing
+    kept_counts = np.bincount(ring_of_vertex[keep], minlength=len(ring_counts))[ring_sel]
+    offsets = np.zeros(len(kept_counts) + 1, dtype=np.int64)
+    np.cumsum(kept_counts, out=offsets[1:])
+    return xy[keep], offsets, feat_of_ring[ring_sel], first_ring_of_part[ring_sel], zero_length
+
+
+def _signed_areas(xy, offsets) -> np.ndarray:
+    """Área con signo de cada anillo (positiva = antihoraria), relativa a su primer vértice."""
+    counts = np.diff(offsets)
+    if not len(counts):
+        return np.zeros(0)
+    origin = np.repeat(xy[offsets[:-1]], counts, axis=0)
+    p = xy - origin
+    nxt = np.arange(len(xy)) + 1
+    nxt[offsets[1:] - 1] = offsets[:-1]
+    q = p[nxt] - np.repeat(p[offsets[:-1]], counts, axis=0)
+    cross = p[:, 0] * q[:, 1] - p[:, 1] * q[:, 0]
+    nonempty = counts > 0
+    areas = np.zeros(len(counts))
+    areas[nonempty] = np.add.reduceat(cross, offsets[:-1][nonempty]) / 2.0
+    return areas
+
+
+def _grid_cells(seg, xmin, ymin, xmax, ymax, size_x, size_y, x0, y0):
+    """
+    Celdas (de size_x por size_y) que cubre la caja de cada segmento de `seg`.
+
+    Returns:
+        (segmento, cx, cy, primera) de cada par segmento-celda; `primera`
+        vale 1 si es la primera columna de celdas de la caja y 2 si es la
+        primera fila (3 si ambas).
+    """
+    cx0 = np.floor((xmin[seg] - x0) / size_x).astype(np.int64)
+    cy0 = np.floor((ymin[seg] - y0) / size_y).astype(np.int64)
+    nx = np.floor((xmax[seg] - x0) / size_x).astype(np.int64) - cx0 + 1
+    ny = np.floor((ymax[seg] - y0) / size_y).astype(np.int64) - cy0 + 1
+    total = nx * ny
+    rep = np.repeat(np.arange(len(seg)), total)
+    local = np.arange(int(total.sum())) - np.repeat(np.cumsum(total) - total, total)
+    dx, dy = local % nx[rep], local // nx[rep]
+    first = (dx == 0).astype(np.uint8) + 2 * (dy == 0).astype(np.uint8)
+    return seg[rep], cx0[rep] + dx, cy0[rep] + dy, first
+
+
+def _cell_keys(reg, qry, feat):
+    """
+    Claves enteras exactas de (rejilla, lista, feature, celda) de registros y
+    consultas: mixed radix si caben en 62 bits y, si no, el número de grupo
+    tras ordenar las cinco columnas.
+    """
+    columns = [np.concatenate([r, q]) for r, q in
+               zip((reg[1], reg[2], feat[reg[0]], reg[4], reg[5]), (qry[1], qry[2], feat[qry[0]], qry[4], qry[5]))]
+    lows = [int(c.min()) if len(c) else 0 for c in columns]
+    radix = [int(c.max()) - low + 1 if len(c) else 1 for c, low in zip(columns, lows)]
+    if np.prod([float(r) for r in radix]) < 2.0 ** 62:
+        key = np.zeros(len(columns[0]), dtype=np.int64)
+        for c, low, r in zip(columns, lows, radix):
+            key = key * r + (c - low)
+    else:
+        order = np.lexsort(columns[::-1])
+        change = np.ones(len(order), dtype=bool)
+        change[1:] = np.any([c[order][1:] != c[order][:-1] for c in columns], axis=0)
+        key = np.empty(len(order), dtype=np.int64)
+        key[order] = np.cumsum(change)
+    return key[:len(reg[0])], key[len(reg[0]):]
+
+
+def _candidate_cells(xmin, ymin, xmax, ymax):
+    """
+    Rejillas jerárquicas sobre las cajas de los segmentos.
+
+    El nivel de un segmento en cada eje es el menor k tal que
+    base * _LEVEL_RATIO**k cubre su extensión en ese eje. Hay una rejilla
+    por combinación de niveles (gx, gy), con celdas alargadas como los
+    segmentos de ese nivel, y cada segmento se registra en las rejillas que
+    dominan sus niveles (ahí su caja cubre pocas celdas). Dos cajas
+    solapadas comparten celda en la rejilla (máximo de los niveles en x,
+    máximo en y), donde al menos uno de los dos alcanza el nivel de la
+    rejilla en cada eje; la máscara de cada registro (1: alcanza el de x,
+    2: el de y) decide quién consulta: uno de máscara 3 busca en la lista
+    de todos los registros de la celda (lista 0) y uno de máscara 1 solo en
+    la de los de máscara 2 (lista 1). Así cada par se prueba en una sola
+    rejilla y los segmentos largos y finos (dientes de un peine) no se
+    comparan con todo lo que cae bajo su caja.
+
+    Returns:
+        (registros, consultas), cada uno como columnas (segmento, rejilla,
+        lista, máscara, cx, cy, primera); ver _grid_cells.
+    """
+    extent = np.maximum(xmax - xmin, ymax - ymin)
+    positive = extent[extent > 0]
+    base = float(np.percentile(positive, _BASE_PERCENTILE)) if len(positive) else 1.0
+    levels = []
+    for span in (xmax - xmin, ymax - ymin):
+        with np.errstate(divide="ignore"):
+            # Tolerancia: un segmento apenas más largo que la celda no sube de nivel
+            lv = np.maximum(np.ceil(np.log(span / base) / np.log(_LEVEL_RATIO) - 1e-6), 0).astype(np.int64)
+        levels.append(lv)
+    lx, ly = levels
+    x0, y0 = xmin.min(), ymin.min()
+
+    reg = [[] for _ in range(7)]
+    qry = [[] for _ in range(7)]
+    grid = 0
+    for gx in np.unique(lx).tolist():
+        for gy in np.unique(ly).tolist():
+            dominated = (lx <= gx) & (ly <= gy)
+            mask = np.where(dominated, (lx == gx) + 2 * (ly == gy), 0)
+            has = np.bincount(mask, minlength=4)
+            if not has[3] and not (has[1] and has[2]):
+                continue  # ningún par alcanza aquí los dos niveles
+            seg, cx, cy, first = _grid_cells(np.flatnonzero(dominated), xmin, ymin, xmax, ymax,
+                                             base * float(_LEVEL_RATIO) ** gx, base * float(_LEVEL_RATIO) ** gy,
+                                             x0, y0)
+            m = mask[seg]
+            for out, sel, tag in ((reg, slice(None), 0), (reg, m == 2, 1), (qry, m == 3, 0), (qry, m == 1, 1)):
+                s = seg[sel]
+                for column, values in zip(out, (s, np.full(len(s), grid), np.full(len(s), tag),
+                                                m[sel], cx[sel], cy[sel], first[sel])):
+                    column.append(values)
+            grid += 1
+    return ([np.concatenate(c) for c in reg], [np.concatenate(c) for c in qry])
+
+
+def _intersections(xy, offsets, ring_feature):
+    """
+    Autointersecciones con rejillas jerárquicas sobre las cajas de los
+    segmentos (ver _candidate_cells): cada par de cajas solapadas del mismo
+    feature se prueba una sola vez, en la celda que contiene la esquina
+    inferior izquierda de su intersección.
+
+    Returns:
+        (feature de cada intersección, x, y) como arrays.
+    """
+    counts = np.diff(offsets)
+    n = len(xy)
+    if n < 3:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    ring_of = np.repeat(np.arange(len(counts)), counts)
+    pos = np.arange(n) - np.repeat(offsets[:-1], counts)
+    nxt = np.arange(n) + 1
+    nxt[offsets[1:][counts > 0] - 1] = offsets[:-1][counts > 0]
+    x1, y1 = xy[:, 0], xy[:, 1]
+    x2, y2 = x1[nxt], y1[nxt]
+    feat = ring_feature[ring_of]
+    xmin, xmax = np.minimum(x1, x2), np.maximum(x1, x2)
+    ymin, ymax = np.minimum(y1, y2), np.maximum(y1, y2)
+
+    reg, qry = _candidate_cells(xmin, ymin, xmax, ymax)
+    reg_key, q_key = _cell_keys(reg, qry, feat)
+    # Registros ordenados por clave; las consultas también, para que la
+    # búsqueda recorra reg_key en orden
+    order = np.argsort(reg_key, kind="stable")
+    reg_key = reg_key[order]
+    reg_seg, reg_mask, reg_first = reg[0][order], reg[3][order], reg[6][order]
+    q_order = np.argsort(q_key, kind="stable")
+    q_key = q_key[q_order]
+    q_seg, q_mask, q_first = qry[0][q_order], qry[3][q_order], qry[6][q_order]
+    lo = np.searchsorted(reg_key, q_key, side="left")
+    n_candidates = np.searchsorted(reg_key, q_key, side="right") - lo
+
+    out_feat, out_x, out_y = [], [], []
+    n_queries = len(q_seg)
+    start = 0
+    while start < n_queries:
+        # Lote de consultas cuyo total de pares candidatos cabe en memoria
+        stop = start + 1 + int(np.searchsorted(np.cumsum(n_candidates[start:]), _PAIRS_PER_BATCH))
+        stop = min(stop, n_queries)
+        c = n_candidates[start:stop]
+        total = int(c.sum())
+        start_batch, start = start, stop
+        if not total:
+            continue
+        a = np.repeat(np.arange(start_batch, stop), c)
+        r = np.repeat(lo[start_batch:stop], c) + (np.arange(total) - np.repeat(np.cumsum(c) - c, c))
+        i, j = q_seg[a], reg_seg[r]
+
+        # Cada par en la celda de la esquina inferior izquierda de la
+        # intersección de sus cajas (la primera columna y la primera fila de
+        # al menos uno de los dos), los de máscara 3 con 3 una sola vez y
+        # solo cajas solapadas
+        keep = (((q_first[a] | reg_first[r]) == 3) & ((q_mask[a] != 3) | (reg_mask[r] != 3) | (i < j)) &
+                (xmin[j] <= xmax[i]) & (xmin[i] <= xmax[j]) & (ymin[j] <= ymax[i]) & (ymin[i] <= ymax[j]))
+        i, j = i[keep], j[keep]
+
+        d1 = _orient(x1[j], y1[j], x2[j], y2[j], x1[i], y1[i])
+        d2 = _orient(x1[j], y1[j], x2[j], y2[j], x2[i], y2[i])
+        d3 = _orient(x1[i], y1[i], x2[i], y2[i], x1[j], y1[j])
+        d4 = _orient(x1[i], y1[i], x2[i], y2[i], x2[j], y2[j])
+
+        same_ring = ring_of[i] == ring_of[j]
+        last = counts[ring_of[i]] - 1
+        adjacent = same_ring & ((np.abs(pos[i] - pos[j]) == 1) |
+                                ((pos[i] == 0) & (pos[j] == last)) | ((pos[j] == 0) & (pos[i] == last)))
+
+        proper = (d1 * d2 < 0) & (d3 * d4 < 0)
+        t1 = (d1 == 0) & _on_segment(x1[j], y1[j], x2[j], y2[j], x1[i], y1[i])
+        t2 = (d2 == 0) & _on_segment(x1[j], y1[j], x2[j], y2[j], x2[i], y2[i])
+        t3 = (d3 == 0) & _on_segment(x1[i], y1[i], x2[i], y2[i], x1[j], y1[j])
+        t4 = (d4 == 0) & _on_segment(x1[i], y1[i], x2[i], y2[i], x2[j], y2[j])
+        touching = t1 | t2 | t3 | t4
+        # Segmentos consecutivos: comparten un vértice; solo es inválido que
+        # vuelvan sobre sí mismos (colineales en sentido contrario)
+        backtrack = adjacent & (d1 == 0) & (d2 == 0) & (
+            (x2[i] - x1[i]) * (x2[j] - x1[j]) + (y2[i] - y1[i]) * (y2[j] - y1[j]) < 0)
+        hit = (~adjacent & (proper | touching)) | backtrack
+        if not hit.any():
+            continue
+
+        i, j = i[hit], j[hit]
+        proper, t1, t2, t3 = proper[hit], t1[hit], t2[hit], t3[hit]
+        # Ubicación: punto de cruce, o el extremo que toca al otro segmento
+        ex, ey = x2[i] - x1[i], y2[i] - y1[i]
+        fx, fy = x2[j] - x1[j], y2[j] - y1[j]
+        denom = ex * fy - ey * fx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = ((x1[j] - x1[i]) * fy - (y1[j] - y1[i]) * fx) / denom
+        px = np.where(proper, x1[i] + t * ex, np.where(t1, x1[i], np.where(t2, x2[i], np.where(t3, x1[j], x2[j]))))
+        py = np.where(proper, y1[i] + t * ey, np.where(t1, y1[i], np.where(t2, y2[i], np.where(t3, y1[j], y2[j]))))
+        out_feat.append(feat[i])
+        out_x.append(px)
+        out_y.append(py)
+
+    if not out_feat:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    return np.concatenate(out_feat), np.concatenate(out_x), np.concatenate(out_y)
+
+
+def validate_polygons(arrays: FeatureArrays) -> dict:
+    """
+    Valida todos los features Polígono de `arrays`.
+
+    Returns:
+        Informe {"features": [...], "poligonos", "invalidos", "segundos": {etapa: s}}.
+        Cada elemento de "features" corresponde a un polígono:
+            id, valido,
+            autointersecciones: número de pares de segmentos que se cruzan o tocan,
+            ubicaciones: hasta MAX_LOCATIONS puntos (x, y) distintos de autointersección,
+            vertices_duplicados: vértices no consecutivos repetidos,
+            segmentos_cero: segmentos de longitud cero,
+            orientacion: "antihoraria", "horaria", "mixta" (varias partes) o "degenerada",
+            huecos_mal_orientados: huecos con la misma orientación que el exterior.
+        Un polígono es válido si no tiene autointersecciones, vértices
+        duplicados ni anillos de área nula; los segmentos de longitud cero y
+        la orientación solo se informan.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    xy, offsets, ring_feature, ring_outer, zero_length = _polygon_rings(arrays)
+    timings["anillos"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    areas = _signed_areas(xy, offsets)
+    timings["orientación"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    counts = np.diff(offsets)
+    vertex_feature = np.repeat(ring_feature, counts)
+    duplicates = np.zeros(len(arrays), dtype=np.int64)
+    if len(xy):
+        order = np.lexsort((xy[:, 1], xy[:, 0], vertex_feature))
+        f, x, y = vertex_feature[order], xy[order, 0], xy[order, 1]
+        repeated = (f[1:] == f[:-1]) & (x[1:] == x[:-1]) & (y[1:] == y[:-1])
+        duplicates = np.bincount(f[1:][repeated], minlength=len(arrays))
+    timings["vértices duplicados"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hit_feat, hit_x, hit_y = _intersections(xy, offsets, ring_feature)
+    timings["autointersecciones"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    n_hits = np.bincount(hit_feat, minlength=len(arrays))
+    hit_order = np.argsort(hit_feat, kind="stable")
+    hit_starts = np.searchsorted(hit_feat[hit_order], np.arange(len(arrays)))
+    hx, hy = hit_x[hit_order].tolist(), hit_y[hit_order].tolist()
+
+    # Signo del exterior de cada parte, propagado a sus huecos
+    outer_sign = np.sign(areas[ring_outer])[np.cumsum(ring_outer) - 1] if len(areas) else np.zeros(0)
+    bad_holes = np.bincount(ring_feature[~ring_outer & (np.sign(areas) == outer_sign) & (areas != 0)],
+                            minlength=len(arrays))
+    degenerate = np.bincount(ring_feature[areas == 0], minlength=len(arrays))
+    outer_features = ring_feature[ring_outer]
+    outer_signs = np.sign(areas[ring_outer])
+
+    ids = np.asarray(arrays.ids).tolist()
+    poly = np.flatnonzero(np.asarray(arrays.types) == _POLIGONO)
+    first_outer = np.searchsorted(outer_features, poly)
+    last_outer = np.searchsorted(outer_features, poly, side="right")
+    report_features = []
+    for f, lo, hi in zip(poly.tolist(), first_outer.tolist(), last_outer.tolist()):
+        signs = set(outer_signs[lo:hi].tolist())
+        if 0.0 in signs or not signs:
+            orientation = "degenerada"
+        elif len(signs) > 1:
+            orientation = "mixta"
+        else:
+            orientation = "antihoraria" if signs.pop() > 0 else "horaria"
+        k = int(n_hits[f])
+        s = int(hit_starts[f])
+        entry = {
+            "id": ids[f],
+            "autointersecciones": k,
+            "ubicaciones": list(dict.fromkeys(zip(hx[s:s + k], hy[s:s + k])))[:MAX_LOCATIONS],
+            "vertices_duplicados": int(duplicates[f]),
+            "segmentos_cero": int(zero_length[f]),
+            "orientacion": orientation,
+            "huecos_mal_orientados": int(bad_holes[f]),
+        }
+        entry["valido"] = not (k or entry["vertices_duplicados"] or degenerate[f])
+        report_features.append(entry)
+    timings["informe"] = time.perf_counter() - t0
+
+    return {
+        "features": report_features,
+        "poligonos": len(report_features),
+        "invalidos": sum(1 for e in report_features if not e["valido"]),
+        "segundos": timings,
+    }
+
+
+def format_report(report: dict, max_features: int = 20) -> str:
+    """Resumen de texto: polígonos con problemas (hasta max_features) y tiempos por etapa."""
+    lines = [f"Polígonos revisados: {report['poligonos']}, inválidos: {report['invalidos']}"]
+    shown = 0
+    for e in report["features"]:
+        issues = []
+        if e["autointersecciones"]:
+            where = ", ".join(f"({x:.2f}, {y:.2f})" for x, y in e["ubicaciones"])
+            issues.append(f"{e['autointersecciones']} autointersección(es) en {where}")
+        if e["vertices_duplicados"]:
+            issues.append(f"{e['vertices_duplicados']} vértice(s) duplicado(s)")
+        if e["segmentos_cero"]:
+            issues.append(f"{e['segmentos_cero']} segmento(s) de longitud cero")
+        if e["orientacion"] == "degenerada":
+            issues.append("anillo de área nula")
+        if e["huecos_mal_orientados"]:
+            issues.append(f"{e['huecos_mal_orientados']} hueco(s) con la orientación del exterior")
+        if not issues:
+            continue
+        if shown == max_features:
+            lines.append("  ...")
+            break
+        shown += 1
+        estado = "inválido" if not e["valido"] else "advertencia"
+        lines.append(f"  Feature {e['id']} ({estado}, exterior {e['orientacion']}): " + "; ".join(issues))
+    total = sum(report["segundos"].values())
+    lines.append("Tiempos: " + ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in report["segundos"].items())
+                 + f" (total {total * 1000:.0f} ms)")
+    return "\n".join(lines)
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    feats = [
+        {"id": 1, "type": "Polígono", "coords": [(0, 0), (10, 0), (10, 10), (0, 10)]},
+        {"id": 2, "type": "Polígono", "coords": [(0, 0), (10, 10), (10, 0), (0, 10)]},            # pajarita
+        {"id": 3, "type": "Polígono", "coords": [(0, 0), (0, 10), (10, 10), (10, 10), (10, 0), (0, 0)]},  # horario, repetido
+        {"id": 4, "type": "Polígono", "coords": [(0, 0), (10, 0), (10, 10), (5, 0), (0, 10)]},     # toca un vértice
+        {"id": 5, "type": "Polígono", "coords": [(0, 0), (10, 0), (10, 10), (0, 10)],
+         "parts": [[[(0, 0), (10, 0), (10, 10), (0, 10)], [(2, 2), (4, 2), (4, 4), (2, 4)]]]},  # hueco mal orientado
+        {"id": 6, "type": "Polilínea", "coords": [(0, 0), (10, 10), (10, 0), (0, 10)]},           # no se valida
+    ]
+    print(format_report(validate_polygons(FeatureArrays.from_features(feats))))
+
+    # Parcela de 100k vértices (estrella irregular) con un cruce introducido
+    import math
+    n = 100_000
+    ang = np.linspace(0, 2 * math.pi, n, endpoint=False)
+    r = 1000 + 200 * np.sin(ang * 37) + np.random.default_rng(1).uniform(0, 5, n)
+    ring = np.column_stack([500000 + r * np.cos(ang), 4000000 + r * np.sin(ang)])
+    big_ok = FeatureArrays(ring, np.array([0, n]), np.array([_POLIGONO], dtype=np.uint8), np.array([1]))
+    # Un vértice llevado al otro lado de la parcela: sus dos segmentos la cruzan
+    crossed = ring.copy()
+    crossed[5000] = (500000, 4000000) + (ring[55000] - (500000, 4000000)) * 1.1
+    big_bad = FeatureArrays(crossed, np.array([0, n]), np.array([_POLIGONO], dtype=np.uint8), np.array([2]))
+    for label, arrays in (("sin cruces", big_ok), ("con un vértice desplazado", big_bad)):
+        t0 = time.perf_counter()
+        report = validate_polygons(arrays)
+        print(f"\nParcela de {n} vértices {label} ({(time.perf_counter() - t0) * 1000:.0f} ms):")
+        print(format_report(report))
+
+    # 50k parcelas pequeñas
+    rng = np.random.default_rng(2)
+    centers = rng.uniform(0, 100000, (50_000, 2))
+    square = np.array([(0, 0), (10, 0), (10, 10), (0, 10)], dtype=float)
+    xy = (centers[:, None, :] + square[None]).reshape(-1, 2)
+    many = FeatureArrays(xy, np.arange(0, len(xy) + 1, 4), np.full(50_000, _POLIGONO, dtype=np.uint8),
+                         np.arange(1, 50_001))
+    t0 = time.perf_counter()
+    report = validate_polygons(many)
+    print(f"\n50000 parcelas ({(time.perf_counter() - t0) * 1000:.0f} ms): inválidas {report['invalidos']}")
+
+    # Caso patológico para un barrido: peine de dientes largos y finos, todos
+    # solapados en X. El tiempo debe crecer de forma lineal con los vértices.
+    def comb(teeth, length=1000.0):
+        pts = [(0.0, 0.0)]
+        for t in range(teeth):
+            pts += [(length, 2.0 * t), (length, 2.0 * t + 1), (1.0, 2.0 * t + 1), (1.0, 2.0 * t + 2)]
+        pts.append((0.0, 2.0 * teeth))
+        return np.array(pts)
+
+    print()
+    for teeth in (4_000, 8_000, 16_000, 32_000):
+        xy = comb(teeth)
+        xy[len(xy) // 2, 0] = -5.0  # un diente que atraviesa el lomo
+        arrays = FeatureArrays(xy, np.array([0, len(xy)]), np.array([_POLIGONO], dtype=np.uint8), np.array([3]))
+        t0 = time.perf_counter()
+        report = validate_polygons(arrays)
+        print(f"Peine de {len(xy)} vértices ({(time.perf_counter() - t0) * 1000:.0f} ms): "
+              f"{report['features'][0]['autointersecciones']} autointersección(es)")
@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QTableView, QHeaderView, QDialogButtonBox
+)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from importers.csv_importer import CSVImporter, sniff_csv
+
+
+class CSVPagedModel(QAbstractTableModel):
+    """
+    Modelo de solo lectura sobre un CSVRowReader: las filas se leen y parsean
+    por páginas a medida que la vista las pide, y solo se conservan las
+    últimas `max_pages` páginas. Con millones de filas, la vista solo hace
+    parsear las visibles.
+    """
+
+    def __init__(self, reader, column_count: int, headers: list = None,
+                 page_rows: int = 256, max_pages: int = 16, parent=None):
+        super().__init__(parent)
+        self._reader = reader
+        self._columns = column_count
+        self._headers = list(headers or [])
+        self.page_rows = page_rows
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self.rows_parsed = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._reader)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._columns
+
+    def _page(self, page: int) -> list:
+        rows = self._pages.get(page)
+        if rows is not None:
+            self._pages.move_to_end(page)
+            return rows
+        rows = self._reader.read_rows(page * self.page_rows, self.page_rows)
+        self.rows_parsed += len(rows)
+        self._pages[page] = rows
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = index.row()
+        rows = self._page(row // self.page_rows)
+        offset = row % self.page_rows
+        if offset >= len(rows):
+            return None
+        fields = rows[offset]
+        return fields[index.column()] if index.column() < len(fields) else ""
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Vertical:
+            return str(section + 1)
+        if section < len(self._headers) and self._headers[section]:
+            return self._headers[section]
+        return f"Columna {section + 1}"
+
+
+class CSVPreviewDialog(QDialog):
+    """
+    Vista previa de un CSV sin importarlo: se construye (o se carga del
+    sidecar .gwidx) el índice de filas y la tabla se pagina bajo demanda.
+    """
+
+    def __init__(self, filepath: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Vista previa CSV")
+        self.resize(720, 520)
+
+        delimiter, has_header = sniff_csv(filepath)
+        t0 = time.perf_counter()
+        self.reader = CSVImporter.open_rows(filepath, delimiter=delimiter, skip_header=int(has_header))
+        elapsed = time.perf_counter() - t0
+
+        headers = self.reader.header_row()
+        first = self.reader.read_rows(0, 100)
+        columns = max([len(headers)] + [len(r) for r in first]) if (headers or first) else 0
+        self.model = CSVPagedModel(self.reader, columns, headers, parent=self)
+        self._build_ui(filepath, delimiter, elapsed)
+
+    def _build_ui(self, filepath, delimiter, elapsed):
+        layout = QVBoxLayout(self)
+        shown = {"\t": "tabulador"}.get(delimiter, f"'{delimiter}'")
+        self.info_label = QLabel(
+            f"{filepath}\n{len(self.reader)} filas, delimitador {shown}; "
+            f"índice listo en {elapsed:.2f} s. Solo se leen las filas visibles."
+        )
+        self.info_label.setWordWrap(True)
+        layout.addWidget(self.info_label)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        vh = self.view.verticalHeader()
+        vh.setSectionResizeMode(QHeaderView.Fixed)
+        vh.setDefaultSectionSize(self.view.fontMetrics().height() + 6)
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        layout.addWidget(self.view)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def done(self, result):
+        self.reader.close()
+        super().done(result)
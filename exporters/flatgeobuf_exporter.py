@@ -0,0 +1,100 @@
+# exporters/flatgeobuf_exporter.py
+import os
+
+import fiona
+
+from core.diagnostics import Diagnostics
+from core.reprojection import utm_epsg
+from exporters.ogr_records import attribute_fields, copy_grouped, group_records
+
+FLATGEOBUF_EXTENSION = ".fgb"
+
+
+class FlatGeobufExporter:
+    """
+    Exporta a un único archivo FlatGeobuf con geometrías mixtas.
+
+    FlatGeobuf admite una sola capa, así que todos los tipos van juntos con
+    geometría 'Unknown' y un atributo 'tipo'. OGR escribe el índice espacial
+    (R-tree empaquetado en orden de Hilbert) al cerrar el archivo, lo que
+    permite leer solo los features de un bbox sin recorrer el archivo entero.
+    El formato no tiene campos de fecha: los atributos de fecha van como texto ISO.
+    """
+
+    @staticmethod
+    def export(features: list[dict], filename: str, hemisphere: str, zone: str,
+               grouped: dict = None, diagnostics: Diagnostics = None, attributes=None) -> int:
+        """
+        Escribe el archivo FlatGeobuf (se reemplaza si ya existe).
+
+        `grouped` permite pasar registros ya preparados con group_records
+        (se copian, no se modifican). Los features omitidos se registran en
+        `diagnostics`. `attributes` (core.attributes.AttributeTable, una fila
+        por feature) añade sus columnas como campos tipados; con `grouped`
+        solo se usa para el esquema (los registros ya traen los valores).
+
+        Returns:
+            Número de features escritos.
+
+        Raises:
+            ValueError: Si no hay geometrías exportables, o la zona/hemisferio/nombre no son válidos.
+            RuntimeError: Si ocurre un error al escribir el archivo.
+        """
+        if not filename.lower().endswith(FLATGEOBUF_EXTENSION):
+            raise ValueError(f"El nombre de archivo debe terminar en {FLATGEOBUF_EXTENSION}")
+        if not features:
+            raise ValueError("No hay geometrías para exportar.")
+        crs = f"EPSG:{utm_epsg(hemisphere, zone)}"
+        grouped = group_records(features, diagnostics, attributes) if grouped is None else copy_grouped(grouped)
+        if not grouped:
+            raise ValueError("No hay geometrías con tipos soportados para exportar a FlatGeobuf.")
+
+        fields = attribute_fields(attributes, date_as_text=True)
+        dates = [name for name, kind in zip(fields, attributes.kinds().values()) if kind == "date"] if fields else []
+        schema = {"geometry": "Unknown", "properties": {"id": "int", "tipo": "str", **fields}}
+        tmp_filename = filename[:-len(FLATGEOBUF_EXTENSION)] + ".tmp" + FLATGEOBUF_EXTENSION
+        written = 0
+        try:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            with fiona.open(tmp_filename, "w", driver="FlatGeobuf", schema=schema,
+                            crs=crs, SPATIAL_INDEX="YES") as dst:
+                for fiona_type, records in grouped.items():
+                    for record in records:
+                        properties = record["properties"]
+                        properties["tipo"] = fiona_type
+                        for name in dates:  # fechas en ISO 8601
+                            if properties[name] is not None:
+                                properties[name] = properties[name].isoformat()
+                    dst.writerecords(records)
+                    written += len(records)
+            os.replace(tmp_filename, filename)
+        except Exception as e:
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+            raise RuntimeError(f"Error al escribir el archivo FlatGeobuf '{filename}': {e}")
+        return written
+
+
+# Ejemplo de uso (opcional, para testing directo)
+# El benchmark comparativo con Shapefile y GeoPackage está en exporters/geopackage_exporter.py
+if __name__ == '__main__':
+    sample_features = [
+        {"id": 1, "type": "Punto", "coords": [(500000.0, 4000000.0)]},
+        {"id": 3, "type": "Polilínea", "coords": [(500000.0, 4000000.0), (500100.0, 4000100.0), (500200.0, 4000000.0)]},
+        {"id": 4, "type": "Polígono", "coords": [(500000.0, 4000000.0), (500100.0, 4000100.0), (500050.0, 4000050.0)]},
+        {"id": 8, "type": "Polilínea", "coords": [(100, 100)]}, # Polilínea inválida
+    ]
+
+    output_dir = "test_output_fgb"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    path = os.path.join(output_dir, "test_export.fgb")
+
+    count = FlatGeobufExporter.export(sample_features, path, "Norte", "18")
+    print(f"{count} features escritos en {path}")
+    with fiona.open(path) as src:
+        for feat in src.filter(bbox=(500090, 4000090, 500110, 4000110)):
+            print("  En bbox:", feat["properties"]["id"], feat["properties"]["tipo"])
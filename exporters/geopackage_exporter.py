@@ -0,0 +1,135 @@
+# exporters/geopackage_exporter.py
+import os
+
+import fiona
+
+from core.diagnostics import Diagnostics
+from core.reprojection import utm_epsg
+from exporters.ogr_records import attribute_fields, copy_grouped, group_records, promote_to_multi
+
+GEOPACKAGE_EXTENSION = ".gpkg"
+
+
+class GeoPackageExporter:
+    """
+    Exporta a un único GeoPackage con una capa por tipo de geometría
+    (puntos, polilineas, poligonos), en lugar de los tres .shp separados.
+
+    Cada capa se escribe con una sola llamada a writerecords (fiona la agrupa
+    en transacciones) y OGR construye el índice espacial R-tree al cerrar.
+    """
+    LAYER_NAMES = {
+        "Point": "puntos",
+        "LineString": "polilineas",
+        "Polygon": "poligonos",
+    }
+
+    @staticmethod
+    def export(features: list[dict], filename: str, hemisphere: str, zone: str,
+               grouped: dict = None, diagnostics: Diagnostics = None, attributes=None) -> list[str]:
+        """
+        Escribe el GeoPackage completo (se reemplaza si ya existe).
+
+        `grouped` permite pasar registros ya preparados con group_records
+        (se copian, no se modifican). Los features omitidos se registran en
+        `diagnostics`. `attributes` (core.attributes.AttributeTable, una fila
+        por feature) añade sus columnas como campos tipados; con `grouped`
+        solo se usa para el esquema (los registros ya traen los valores).
+
+        Returns:
+            Nombres de las capas escritas.
+
+        Raises:
+            ValueError: Si no hay geometrías exportables, o la zona/hemisferio/nombre no son válidos.
+            RuntimeError: Si ocurre un error al escribir el archivo.
+        """
+        if not filename.lower().endswith(GEOPACKAGE_EXTENSION):
+            raise ValueError(f"El nombre de archivo debe terminar en {GEOPACKAGE_EXTENSION}")
+        if not features:
+            raise ValueError("No hay geometrías para exportar.")
+        crs = f"EPSG:{utm_epsg(hemisphere, zone)}"
+        grouped = group_records(features, diagnostics, attributes) if grouped is None else copy_grouped(grouped)
+        if not grouped:
+            raise ValueError("No hay geometrías con tipos soportados para exportar a GeoPackage.")
+
+        # Se escribe en un archivo temporal y se reemplaza al final, para no
+        # dejar un GeoPackage a medias ni mezclar capas con uno anterior.
+        tmp_filename = filename[:-len(GEOPACKAGE_EXTENSION)] + ".tmp" + GEOPACKAGE_EXTENSION
+        layers = []
+        properties = {"id": "int", **attribute_fields(attributes)}
+        try:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+            for fiona_type, records in grouped.items():
+                layer = GeoPackageExporter.LAYER_NAMES[fiona_type]
+                schema = {"geometry": promote_to_multi(records), "properties": properties}
+                with fiona.open(tmp_filename, "w", driver="GPKG", layer=layer,
+                                schema=schema, crs=crs, SPATIAL_INDEX="YES") as dst:
+                    dst.writerecords(records)
+                layers.append(layer)
+            os.replace(tmp_filename, filename)
+        except Exception as e:
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+            raise RuntimeError(f"Error al escribir el GeoPackage '{filename}': {e}")
+        return layers
+
+
+# Benchmark (opcional, para testing directo): Shapefile vs GeoPackage vs FlatGeobuf
+if __name__ == '__main__':
+    import glob
+    import time
+
+    import numpy as np
+
+    from exporters.flatgeobuf_exporter import FlatGeobufExporter
+    from exporters.shapefile_exporter import ShapefileExporter
+
+    output_dir = "test_output_gpkg"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # 100k polígonos de 8 vértices y 100k puntos en un área de 100 x 100 km
+    rng = np.random.default_rng(7)
+    n = 100_000
+    centers = np.column_stack([rng.uniform(400000, 500000, n), rng.uniform(4000000, 4100000, n)])
+    ang = np.linspace(0, 2 * np.pi, 8, endpoint=False)
+    features = []
+    for i, (cx, cy) in enumerate(centers.tolist()):
+        r = 20 + (i % 50)
+        features.append({"id": i + 1, "type": "Polígono",
+                         "coords": [(cx + r * np.cos(a), cy + r * np.sin(a)) for a in ang]})
+        features.append({"id": n + i + 1, "type": "Punto", "coords": [(cx, cy)]})
+
+    targets = {
+        "Shapefile": (ShapefileExporter, os.path.join(output_dir, "bench.shp"),
+                      lambda: os.path.join(output_dir, "bench_polygons.shp"), {}),
+        "GeoPackage": (GeoPackageExporter, os.path.join(output_dir, "bench.gpkg"),
+                       lambda: os.path.join(output_dir, "bench.gpkg"), {"layer": "poligonos"}),
+        "FlatGeobuf": (FlatGeobufExporter, os.path.join(output_dir, "bench.fgb"),
+                       lambda: os.path.join(output_dir, "bench.fgb"), {}),
+    }
+
+    queries = [(x, y, x + 2000, y + 2000) for x, y in
+               zip(rng.uniform(400000, 498000, 200).tolist(), rng.uniform(4000000, 4098000, 200).tolist())]
+
+    print(f"{len(features)} features ({n} polígonos + {n} puntos), {len(queries)} consultas bbox de 2x2 km\n")
+    for name, (exporter, path, query_path, open_kwargs) in targets.items():
+        for old in glob.glob(os.path.join(output_dir, "bench*")):
+            os.remove(old)
+        t0 = time.perf_counter()
+        exporter.export(features, path, "Norte", "18")
+        t_write = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        hits = 0
+        with fiona.open(query_path(), **open_kwargs) as src:
+            for bbox in queries:
+                hits += sum(1 for _ in src.filter(bbox=bbox))
+        t_query = time.perf_counter() - t0
+        size = sum(os.path.getsize(p) for p in glob.glob(os.path.join(output_dir, "bench*")))
+        print(f"  {name:<10}  escritura {t_write:6.2f} s   consultas {t_query * 1000:8.1f} ms "
+              f"({hits} resultados)   {size / 1e6:5.1f} MB")
+    print("\n  (FlatGeobuf guarda puntos y polígonos en la misma capa, por eso devuelve más resultados)")
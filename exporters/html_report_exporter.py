@@ -0,0 +1,114 @@
+# exporters/html_report_exporter.py
+import io
+from html import escape
+from itertools import islice
+
+_HEAD = "<table border='1' cellpadding='4' cellspacing='0'>\n<tr><th>ID</th><th>Este (X)</th><th>Norte (Y)</th></tr>\n"
+_ROW = "<tr><td>{}</td><td>{:.2f}</td><td>{:.2f}</td></tr>\n"
+_CHUNK_ROWS = 50_000
+
+
+class HTMLReportExporter:
+    """
+    Genera el resumen HTML de coordenadas (tabla ID/X/Y más perímetro y área).
+
+    Las filas se formatean por bloques y se escriben de una sola vez por bloque
+    en el destino (archivo o buffer), sin concatenar strings fila a fila, de modo
+    que el coste es lineal y un informe de 1M de filas tarda unos segundos.
+    """
+    # Filas máximas que se muestran en el diálogo; el informe completo va a disco
+    PREVIEW_ROWS = 2000
+
+    @staticmethod
+    def write(out, ids, coords, perimetro: float, area: float = None, max_rows: int = None) -> int:
+        """
+        Escribe el informe en `out` (cualquier objeto con write()).
+
+        Args:
+            out: Destino de texto (archivo abierto, io.StringIO...).
+            ids: Secuencia de IDs (se escapan como texto HTML).
+            coords: Secuencia de pares (x, y) alineada con `ids`.
+            perimetro: Perímetro/longitud en metros.
+            area: Área en m², o None si no aplica.
+            max_rows: Si se indica, solo se escriben las primeras `max_rows` filas
+                      y se añade una fila indicando cuántas se omitieron.
+
+        Returns:
+            Número de filas de coordenadas escritas.
+        """
+        total = len(coords)
+        n_rows = total if max_rows is None else min(total, max_rows)
+
+        out.write(_HEAD)
+        row_fmt = _ROW.format
+        ids_iter = iter(ids)
+        coords_iter = iter(coords)
+        written = 0
+        while written < n_rows:
+            chunk = min(_CHUNK_ROWS, n_rows - written)
+            out.write("".join(
+                row_fmt(escape(str(fid)), x, y)
+                for fid, (x, y) in zip(islice(ids_iter, chunk), islice(coords_iter, chunk))
+            ))
+            written += chunk
+
+        if n_rows < total:
+            out.write(f"<tr><td colspan='3'><i>... {total - n_rows} filas más no mostradas.</i></td></tr>\n")
+
+        # Fila única combinada para Perímetro
+        out.write(f"<tr><td colspan='3'><b>Perímetro:</b> {perimetro:.2f} m</td></tr>\n")
+        # Fila única combinada para Área (si aplica)
+        if area is not None:
+            out.write(f"<tr><td colspan='3'><b>Área:</b> {area:.2f} m²</td></tr>\n")
+        out.write("</table>\n")
+        return written
+
+    @staticmethod
+    def render(ids, coords, perimetro: float, area: float = None, max_rows: int = None) -> str:
+        """Igual que write() pero devuelve el HTML como string (para la vista previa)."""
+        buf = io.StringIO()
+        HTMLReportExporter.write(buf, ids, coords, perimetro, area, max_rows)
+        return buf.getvalue()
+
+    @staticmethod
+    def export(ids, coords, filename: str, perimetro: float, area: float = None):
+        """
+        Escribe el informe completo en un archivo .html en streaming.
+
+        Raises:
+            ValueError: Si el nombre de archivo no termina en .html/.htm.
+            RuntimeError: Si ocurre un error al escribir.
+        """
+        if not filename.lower().endswith((".html", ".htm")):
+            raise ValueError("El nombre de archivo debe terminar en .html")
+        try:
+            with open(filename, "w", encoding="utf-8", buffering=1024 * 1024) as f:
+                f.write("<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+                        "<title>Resumen de Coordenadas</title></head><body>\n")
+                HTMLReportExporter.write(f, ids, coords, perimetro, area)
+                f.write("</body></html>\n")
+        except OSError as e:
+            raise RuntimeError(f"Error al escribir el informe HTML '{filename}': {e}")
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import os
+    import time
+
+    n = 1_000_000
+    ids = [str(i + 1) for i in range(n)]
+    coords = [(500000.0 + i * 0.5, 4000000.0 + i * 0.25) for i in range(n)]
+
+    output_dir = "test_output_html"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    path = os.path.join(output_dir, "informe.html")
+
+    t0 = time.perf_counter()
+    HTMLReportExporter.export(ids, coords, path, perimetro=123456.78, area=9876.5)
+    t1 = time.perf_counter()
+    preview = HTMLReportExporter.render(ids, coords, 123456.78, 9876.5, max_rows=HTMLReportExporter.PREVIEW_ROWS)
+    t2 = time.perf_counter()
+    print(f"Informe de {n} filas: {t1 - t0:.2f} s ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"Vista previa ({HTMLReportExporter.PREVIEW_ROWS} filas): {(t2 - t1) * 1000:.1f} ms, {len(preview)} caracteres")
@@ -1,17 +1,186 @@
 # exporters/kml_exporter.py
 from xml.etree.ElementTree import Element, SubElement, tostring
 from xml.dom import minidom
-from pyproj import Transformer, ProjError # Import ProjError for specific exception handling
+from pyproj import ProjError # Import ProjError for specific exception handling
+import numpy as np
+
+from core.diagnostics import DiagnosticCode, Diagnostics
+from core.reprojection import reproject_features, utm_epsg
 
 # Si se usaran constantes de GeometryType, se importarían aquí.
 # from core.coordinate_manager import GeometryType
 
 class KMLExporter:
+    # Tipo de geometría de la aplicación -> (elemento KML, mínimo de vértices por parte)
+    _PART_ELEMENTS = {
+        "Punto": ("Point", 1), "Point": ("Point", 1),
+        "Polilínea": ("LineString", 2), "LineString": ("LineString", 2),
+        "Polígono": ("Polygon", 3), "Polygon": ("Polygon", 3),
+    }
+
+    @staticmethod
+    def _coords_text(lonlat, close=False) -> str:
+        """Texto <coordinates> de un anillo ya reproyectado (array (n, 2) lon/lat)."""
+        if close and len(lonlat) and (lonlat[0] != lonlat[-1]).any():
+            lonlat = np.vstack([lonlat, lonlat[:1]])
+        return " ".join(f"{lon:.6f},{lat:.6f},0" for lon, lat in lonlat.tolist())
+
+    @staticmethod
+    def _finite_rows(lonlat, feat_id, label, diagnostics):
+        """Filas transformables de `lonlat`; avisa si pyproj no pudo transformar alguna."""
+        ok = np.isfinite(lonlat).all(axis=1)
+        if not ok.all():
+            diagnostics.warn(DiagnosticCode.ERROR_TRANSFORMACION, feat_id, f"{int((~ok).sum())} coordenada(s) ({label})")
+            return lonlat[ok]
+        return lonlat
+
+    @staticmethod
+    def feature_geometry(pm, feat: dict, lonlat, feat_id, diagnostics) -> bool:
+        """
+        Añade a la Placemark la geometría del feature a partir de sus vértices
+        ya reproyectados (ver core.reprojection.reproject_features). Las
+        geometrías omitidas se registran en `diagnostics`.
+
+        Returns:
+            False si la geometría no es válida (la Placemark debe descartarse).
+        """
+        geom_type = feat.get("type")
+        coords = feat.get("coords")
+        # Usar constantes/enum aquí sería mejor (ej. GeometryType.PUNTO)
+        # Los tipos de geometría deben coincidir con los definidos en GeometryType
+        # en core.coordinate_manager (Punto, Polilínea, Polígono)
+        if feat.get("parts"): # Multiparte y/o con huecos
+            return KMLExporter.append_parts_geometry(pm, geom_type, feat["parts"], lonlat, feat_id, diagnostics)
+
+        if geom_type == "Punto": # o GeometryType.PUNTO
+            if len(coords) != 1 or not isinstance(coords[0], (list, tuple)) or len(coords[0]) != 2 or lonlat is None:
+                diagnostics.warn(DiagnosticCode.COORDENADA_INVALIDA, feat_id, "Punto con formato de coordenadas inválido")
+                return False
+            if not np.isfinite(lonlat).all():
+                diagnostics.warn(DiagnosticCode.ERROR_TRANSFORMACION, feat_id, "Punto")
+                return False
+            geom_elem = SubElement(pm, "Point")
+            SubElement(geom_elem, "coordinates").text = KMLExporter._coords_text(lonlat)
+
+        elif geom_type == "Polilínea": # o GeometryType.POLILINEA
+            if len(coords) < 2:
+                diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feat_id, "Polilínea con menos de 2 coordenadas")
+                return False
+            valid = KMLExporter._finite_rows(lonlat, feat_id, "Polilínea", diagnostics) if lonlat is not None else ()
+            if len(valid) < 2:
+                diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feat_id,
+                                 "Polilínea sin 2 coordenadas válidas tras la reproyección")
+                return False
+            geom_elem = SubElement(pm, "LineString")
+            SubElement(geom_elem, "coordinates").text = KMLExporter._coords_text(valid)
+
+        elif geom_type == "Polígono": # o GeometryType.POLIGONO
+            if len(coords) < 3:
+                diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feat_id, "Polígono con menos de 3 coordenadas")
+                return False
+            valid = KMLExporter._finite_rows(lonlat, feat_id, "Polígono", diagnostics) if lonlat is not None else ()
+            # Un anillo cerrado necesita al menos 4 puntos (3 unicos + cierre)
+            if len(valid) < 3 or (len(valid) == 3 and (valid[0] == valid[-1]).all()):
+                diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feat_id,
+                                 "Polígono sin 3 coordenadas válidas tras la reproyección")
+                return False
+            poly_elem = SubElement(pm, "Polygon")
+            obb = SubElement(poly_elem, "outerBoundaryIs")
+            lr = SubElement(obb, "LinearRing")
+            SubElement(lr, "coordinates").text = KMLExporter._coords_text(valid, close=True)
+        else:
+            diagnostics.warn(DiagnosticCode.TIPO_NO_SOPORTADO, feat_id, f"'{geom_type}'")
+            return False
+        return True
+
+    @staticmethod
+    def append_parts_geometry(pm, geom_type: str, parts: list, lonlat, feat_id, diagnostics) -> bool:
+        """
+        Añade a la Placemark la geometría de un feature con "parts": un
+        Polygon con innerBoundaryIs por cada hueco y, si hay varias partes,
+        todas dentro de un MultiGeometry. `lonlat` son los vértices
+        reproyectados de todos los anillos, en orden. Las partes con vértices
+        insuficientes o no transformables se omiten con un aviso en `diagnostics`.
+
+        Returns:
+            False si no quedó ninguna parte válida (la Placemark debe descartarse).
+        """
+        element, min_vertices = KMLExporter._PART_ELEMENTS.get(geom_type, (None, 0))
+        if element is None:
+            diagnostics.warn(DiagnosticCode.TIPO_NO_SOPORTADO, feat_id, f"'{geom_type}'")
+            return False
+        if lonlat is None or len(lonlat) != sum(len(ring) for rings in parts for ring in rings):
+            diagnostics.warn(DiagnosticCode.COORDENADA_INVALIDA, feat_id, "pares inválidos en sus partes")
+            return False
+
+        # Repartir los vértices reproyectados entre partes y anillos
+        split = []
+        start = 0
+        for rings in parts:
+            part = []
+            for ring in rings:
+                part.append(lonlat[start:start + len(ring)])
+                start += len(ring)
+            split.append(part)
+
+        valid = [rings for rings in split if rings and len(rings[0]) >= min_vertices]
+        if len(valid) < len(parts):
+            diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feat_id,
+                             f"{len(parts) - len(valid)} parte(s) con menos de {min_vertices} coordenadas")
+        transformable = [rings for rings in valid if all(np.isfinite(ring).all() for ring in rings)]
+        if len(transformable) < len(valid):
+            diagnostics.warn(DiagnosticCode.ERROR_TRANSFORMACION, feat_id, f"{len(valid) - len(transformable)} parte(s)")
+        if not transformable:
+            return False
+
+        parent = SubElement(pm, "MultiGeometry") if len(transformable) > 1 else pm
+        for rings in transformable:
+            geom_elem = SubElement(parent, element)
+            if element == "Point":
+                SubElement(geom_elem, "coordinates").text = KMLExporter._coords_text(rings[0][:1])
+            elif element == "LineString":
+                SubElement(geom_elem, "coordinates").text = KMLExporter._coords_text(rings[0])
+            else:
+                for i, ring in enumerate(rings):
+                    if i and len(ring) < 3:
+                        continue
+                    boundary = SubElement(geom_elem, "innerBoundaryIs" if i else "outerBoundaryIs")
+                    lr = SubElement(boundary, "LinearRing")
+                    SubElement(lr, "coordinates").text = KMLExporter._coords_text(ring, close=True)
+        return True
+
+    @staticmethod
+    def attribute_texts(attributes, count: int):
+        """
+        (nombres, columnas de texto) de una AttributeTable para
+        append_extended_data; ([], []) si no hay atributos.
+        """
+        if attributes is None:
+            return [], []
+        if len(attributes) != count:
+            raise ValueError(f"Hay {len(attributes)} filas de atributos para {count} features.")
+        return attributes.names, [col.to_text() for col in attributes.columns.values()]
+
+    @staticmethod
+    def append_extended_data(pm, names: list, columns: list, i: int):
+        """Añade <ExtendedData> con los atributos no nulos de la fila `i` (ver attribute_texts)."""
+        data = None
+        for name, column in zip(names, columns):
+            value = column[i]
+            if value is None:
+                continue
+            if data is None:
+                data = SubElement(pm, "ExtendedData")
+            SubElement(SubElement(data, "Data", name=str(name)), "value").text = value
+
     @staticmethod
     def export(features: list[dict],
                filename: str,
                hemisphere: str,
-               zone: str):
+               zone: str,
+               lonlats: list = None,
+               diagnostics: Diagnostics = None,
+               attributes=None) -> Diagnostics:
         """
         Exporta features a un archivo KML.
 
@@ -20,6 +189,15 @@ class KMLExporter:
             filename: Nombre del archivo KML de salida.
             hemisphere: "Norte" o "Sur".
             zone: Número de zona UTM (string o int).
+            lonlats: Vértices ya reproyectados a WGS84 (salida de
+                     core.reprojection.reproject_features); si se omite, se calculan aquí.
+            diagnostics: Colector de avisos (features omitidos, etc.); si se
+                         omite, se crea uno.
+            attributes: core.attributes.AttributeTable con una fila por
+                        feature; se escribe como <ExtendedData> de cada Placemark.
+
+        Returns:
+            El colector con los avisos de la exportación.
 
         Raises:
             ValueError: Si los parámetros de entrada son inválidos (features vacíos, zona/hemisferio incorrectos, nombre de archivo).
@@ -31,6 +209,27 @@ class KMLExporter:
         if not filename.lower().endswith(".kml"):
             raise ValueError("El nombre de archivo debe terminar en .kml")
 
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
+        xml_str_pretty = KMLExporter.to_string(features, hemisphere, zone, lonlats, diagnostics, attributes)
+        try:
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(xml_str_pretty)
+        except Exception as e:
+            raise RuntimeError(f"Error al crear el archivo KML '{filename}': {e}")
+        return diagnostics
+
+    @staticmethod
+    def to_string(features: list[dict], hemisphere: str, zone: str, lonlats: list = None,
+                  diagnostics: Diagnostics = None, attributes=None) -> str:
+        """
+        Documento KML completo como texto (lo que export escribe en el
+        archivo). La exportación múltiple lo genera una vez para KML y KMZ.
+        Los avisos se registran en `diagnostics`; `attributes` como en export.
+
+        Raises:
+            ValueError: Si la zona/hemisferio son incorrectos.
+            RuntimeError: Si ocurre un error durante la generación del KML.
+        """
         try:
             zone_int = int(zone)
             if not (1 <= zone_int <= 60):
@@ -40,16 +239,20 @@ class KMLExporter:
         except ValueError as e: # Captura el error de int(zone) también
             raise ValueError(f"Error en parámetros de zona/hemisferio: {e}")
 
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
+        names, columns = KMLExporter.attribute_texts(attributes, len(features))
         try:
-            # 1) Definir transformación UTM -> WGS84
-            epsg_from = 32600 + zone_int if hemisphere.lower() == "norte" else 32700 + zone_int
-            transformer = Transformer.from_crs(f"EPSG:{epsg_from}", "EPSG:4326", always_xy=True)
+            # 1) Reproyectar UTM -> WGS84 todos los vértices de una vez (o
+            # reutilizar el resultado en caché si no han cambiado)
+            epsg_from = utm_epsg(hemisphere, zone_int)
+            if lonlats is None:
+                lonlats = reproject_features(features, epsg_from, diagnostics=diagnostics)
 
             # 2) Raíz KML
             kml_root = Element("kml", xmlns="http://www.opengis.net/kml/2.2")
             doc = SubElement(kml_root, "Document")
 
-            for feat in features:
+            for i, (feat, lonlat) in enumerate(zip(features, lonlats)):
                 feat_id = feat.get("id", "SinID")
                 geom_type = feat.get("type")
                 # Validaciones en CoordinateManager deberían asegurar que coords es una lista de tuplas numéricas.
@@ -57,7 +260,7 @@ class KMLExporter:
                 coords = feat.get("coords")
 
                 if not coords: # Si coords es None o lista vacía
-                    print(f"Advertencia: Feature ID {feat_id} (tipo {geom_type}) no tiene coordenadas. Se omitirá.")
+                    diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, feat_id, f"tipo {geom_type}")
                     continue
 
                 pm = SubElement(doc, "Placemark")
@@ -76,107 +279,36 @@ class KMLExporter:
                         desc_elem = SubElement(pm, "description")
                         desc_elem.text = f"<![CDATA[{desc_text}]]>"
                     else:
-                        print(f"Advertencia: Formato de coordenadas[0] incorrecto para descripción en Feature ID {feat_id}. Descripción omitida.")
+                        diagnostics.warn(DiagnosticCode.DESCRIPCION_OMITIDA, feat_id, "formato de la primera coordenada incorrecto")
                 except IndexError: # Si coords[0] no existe (aunque ya chequeamos 'if not coords')
-                    print(f"Advertencia: Coordenadas vacías para descripción en Feature ID {feat_id}. Descripción omitida.")
-
+                    diagnostics.warn(DiagnosticCode.DESCRIPCION_OMITIDA, feat_id, "coordenadas vacías")
+                KMLExporter.append_extended_data(pm, names, columns, i)
 
                 # Geometría
-                # Usar constantes/enum aquí sería mejor (ej. GeometryType.PUNTO)
-                # Los tipos de geometría deben coincidir con los definidos en GeometryType
-                # en core.coordinate_manager (Punto, Polilínea, Polígono)
-                if geom_type == "Punto": # o GeometryType.PUNTO
-                    if len(coords) != 1 or not isinstance(coords[0], (list, tuple)) or len(coords[0]) != 2:
-                        print(f"Advertencia: Feature ID {feat_id} tipo Punto tiene formato de coordenadas inválido. Se omitirá geometría.")
-                        doc.remove(pm)
-                        continue
-                    try:
-                        lon, lat = transformer.transform(coords[0][0], coords[0][1])
-                        geom_elem = SubElement(pm, "Point")
-                        SubElement(geom_elem, "coordinates").text = f"{lon:.6f},{lat:.6f},0"
-                    except ProjError as pe:
-                        print(f"Advertencia: Error de transformación para Feature ID {feat_id} (Punto): {pe}. Se omitirá geometría.")
-                        doc.remove(pm)
-                        continue
-
-                elif geom_type == "Polilínea": # o GeometryType.POLILINEA
-                    if len(coords) < 2:
-                        print(f"Advertencia: Feature ID {feat_id} tipo Polilínea tiene menos de 2 coordenadas. Se omitirá geometría.")
-                        doc.remove(pm)
-                        continue
-
-                    geom_elem = SubElement(pm, "LineString")
-                    coords_text_list = []
-                    for x,y_coord_pair in enumerate(coords): # Renombrar variable para claridad
-                        if not isinstance(y_coord_pair, (list, tuple)) or len(y_coord_pair) != 2:
-                             print(f"Advertencia: Par de coordenadas inválido {y_coord_pair} en Feature ID {feat_id} (Polilínea). Se omitirá este par.")
-                             continue
-                        try:
-                            lon, lat = transformer.transform(y_coord_pair[0], y_coord_pair[1])
-                            coords_text_list.append(f"{lon:.6f},{lat:.6f},0")
-                        except ProjError as pe:
-                            print(f"Advertencia: Error de transformación para una coordenada en Feature ID {feat_id} (Polilínea): {pe}. Se omitirá esta coordenada.")
-
-                    if len(coords_text_list) < 2 :
-                         print(f"Advertencia: No hay suficientes coordenadas válidas para Feature ID {feat_id} (Polilínea) tras transformación/validación. Se omitirá geometría.")
-                         doc.remove(pm)
-                         continue
-                    SubElement(geom_elem, "coordinates").text = " ".join(coords_text_list)
-
-                elif geom_type == "Polígono": # o GeometryType.POLIGONO
-                    if len(coords) < 3:
-                        print(f"Advertencia: Feature ID {feat_id} tipo Polígono tiene menos de 3 coordenadas. Se omitirá geometría.")
-                        doc.remove(pm)
-                        continue
-
-                    poly_elem = SubElement(pm, "Polygon")
-                    obb = SubElement(poly_elem, "outerBoundaryIs")
-                    lr = SubElement(obb, "LinearRing")
-                    coords_text_list = []
-
-                    current_ring = list(coords)
-                    if tuple(current_ring[0]) != tuple(current_ring[-1]): # Asegurar cierre del anillo
-                        current_ring.append(current_ring[0])
-
-                    for x,y_coord_pair in enumerate(current_ring): # Renombrar variable
-                        if not isinstance(y_coord_pair, (list, tuple)) or len(y_coord_pair) != 2:
-                             print(f"Advertencia: Par de coordenadas inválido {y_coord_pair} en Feature ID {feat_id} (Polígono). Se omitirá este par.")
-                             continue
-                        try:
-                            lon, lat = transformer.transform(y_coord_pair[0], y_coord_pair[1])
-                            coords_text_list.append(f"{lon:.6f},{lat:.6f},0")
-                        except ProjError as pe:
-                            print(f"Advertencia: Error de transformación para una coordenada en Feature ID {feat_id} (Polígono): {pe}. Se omitirá esta coordenada.")
-
-                    if len(coords_text_list) < 4: # Un anillo cerrado necesita al menos 4 puntos (3 unicos + cierre)
-                        print(f"Advertencia: No hay suficientes coordenadas válidas para Feature ID {feat_id} (Polígono) tras transformación/validación. Se omitirá geometría.")
-                        doc.remove(pm)
-                        continue
-                    SubElement(lr, "coordinates").text = " ".join(coords_text_list)
-                else:
-                    print(f"Advertencia: Tipo de geometría '{geom_type}' para Feature ID {feat_id} no soportado por KML. Se omitirá feature.")
+                if not KMLExporter.feature_geometry(pm, feat, lonlat, feat_id, diagnostics):
                     doc.remove(pm)
                     continue
 
-            # 3) Escribir
+            # 3) Serializar
             xml_bytes = tostring(kml_root, encoding="utf-8", method="xml")
             parsed_xml = minidom.parseString(xml_bytes)
-            xml_str_pretty = parsed_xml.toprettyxml(indent="  ")
-
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(xml_str_pretty)
+            return parsed_xml.toprettyxml(indent="  ")
 
         except ProjError as pe_crs:
              raise RuntimeError(f"Error de proyección al definir el transformador CRS para EPSG:{epsg_from}: {pe_crs}")
         except Exception as e:
-            raise RuntimeError(f"Error al crear el archivo KML '{filename}': {e}")
+            raise RuntimeError(f"Error al generar el documento KML: {e}")
 
 # Ejemplo de uso (opcional, para testing directo)
 if __name__ == '__main__':
     sample_features_ok = [
         {"id": 1, "type": "Punto", "coords": [(500000.0, 4000000.0)]},
         {"id": 2, "type": "Polilínea", "coords": [(500000.0, 4000000.0), (500100.0, 4000100.0)]},
-        {"id": 3, "type": "Polígono", "coords": [(500000.0, 4000000.0), (500100.0, 4000000.0), (500050.0, 4000100.0)]}
+        {"id": 3, "type": "Polígono", "coords": [(500000.0, 4000000.0), (500100.0, 4000000.0), (500050.0, 4000100.0)]},
+        {"id": 4, "type": "Polígono", "coords": [(501000.0, 4000000.0), (501100.0, 4000000.0), (501100.0, 4000100.0), (501000.0, 4000100.0)],
+         "parts": [[[(501000.0, 4000000.0), (501100.0, 4000000.0), (501100.0, 4000100.0), (501000.0, 4000100.0)],
+                    [(501040.0, 4000040.0), (501060.0, 4000040.0), (501060.0, 4000060.0)]],
+                   [[(502000.0, 4000000.0), (502050.0, 4000000.0), (502050.0, 4000050.0)]]]},
     ]
     sample_features_mixed = [
         {"id": "ok_point", "type": "Punto", "coords": [(500000.0, 4000000.0)]},
@@ -212,7 +344,9 @@ if __name__ == '__main__':
         full_path = os.path.join(output_dir, filename)
         print(f"\nIntentando exportar: {full_path} (Esperado: {expected_outcome})")
         try:
-            KMLExporter.export(features, full_path, hemisphere, zone)
+            diagnostics = KMLExporter.export(features, full_path, hemisphere, zone)
             print(f"Archivo {filename} generado exitosamente.")
+            if diagnostics:
+                print(diagnostics.summary())
         except (ValueError, RuntimeError) as e:
             print(f"Error ({expected_outcome} esperado para algunos tests): {e}")
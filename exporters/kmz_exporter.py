@@ -2,34 +2,36 @@ import zipfile
 import io # io is not strictly needed with the current _generate_kml_string, but good if we change it to use StringIO
 from xml.etree.ElementTree import Element, SubElement, tostring
 from xml.dom import minidom
-from pyproj import Transformer
+import numpy as np
+
+from core.diagnostics import DiagnosticCode, Diagnostics
+from core.reprojection import reproject_features, utm_epsg
+from exporters.kml_exporter import KMLExporter
 
 # from core.coordinate_manager import GeometryType # Si se usan constantes para geom_type
 
 class KMZExporter:
     @staticmethod
-    def _generate_kml_string(features: list[dict], hemisphere: str, zone: str) -> str:
+    def _generate_kml_string(features: list[dict], hemisphere: str, zone: str, lonlats: list = None,
+                             diagnostics: Diagnostics = None, attributes=None) -> str:
         # Esta lógica es una copia adaptada de KMLExporter.export,
         # pero devuelve el string KML en lugar de escribir a archivo.
         # Se podría refactorizar KMLExporter para exponer esta lógica.
 
-        # Validar zona como entero
-        try:
-            z = int(zone)
-        except ValueError:
-            raise ValueError(f"La zona UTM '{zone}' debe ser un número entero.")
-
-        epsg_from = 32600 + z if hemisphere.lower()=="norte" else 32700 + z
-        # always_xy=True asegura (lon, lat) para EPSG:4326
-        transformer = Transformer.from_crs(f"EPSG:{epsg_from}", "EPSG:4326", always_xy=True)
+        epsg_from = utm_epsg(hemisphere, zone)  # valida zona y hemisferio
+        # Todos los vértices a (lon, lat) en una sola consulta a la caché de reproyección
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
+        if lonlats is None:
+            lonlats = reproject_features(features, epsg_from, diagnostics=diagnostics)
+        names, columns = KMLExporter.attribute_texts(attributes, len(features))
 
         kml = Element("kml", xmlns="http://www.opengis.net/kml/2.2")
         doc = SubElement(kml, "Document")
 
-        for feat in features:
+        for i, (feat, lonlat) in enumerate(zip(features, lonlats)):
             if not feat.get("coords"): # Verificar si hay coordenadas
                 # Omitir este feature o manejar error como se prefiera
-                print(f"Advertencia: Feature ID {feat.get('id')} no tiene coordenadas. Se omitirá.")
+                diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, feat.get("id"))
                 continue
 
             pm = SubElement(doc, "Placemark")
@@ -45,39 +47,34 @@ class KMZExporter:
             )
             desc = SubElement(pm, "description")
             desc.text = f"<![CDATA[{desc_text}]]>"
+            KMLExporter.append_extended_data(pm, names, columns, i)
 
             geom_type = feat.get("type")
 
             # Usar constantes/enum aquí sería mejor (ej. GeometryType.PUNTO)
             # Mantengo los strings literales por ahora para que coincida con el input de gui.py
-            if geom_type == "Punto" or geom_type == "Point":
+            if feat.get("parts"): # Multiparte y/o con huecos
+                if not KMLExporter.append_parts_geometry(pm, geom_type, feat["parts"], lonlat, feat.get("id"), diagnostics):
+                    doc.remove(pm)
+                    continue
+            elif geom_type == "Punto" or geom_type == "Point":
                 if not feat["coords"]: continue # Saltear si no hay coords
                 geom = SubElement(pm, "Point")
                 # Point tiene una sola coordenada
-                lon, lat = transformer.transform(feat["coords"][0][0], feat["coords"][0][1])
-                SubElement(geom, "coordinates").text = f"{lon:.6f},{lat:.6f},0"
+                SubElement(geom, "coordinates").text = KMLExporter._coords_text(lonlat[:1])
             elif geom_type == "Polilínea" or geom_type == "LineString":
                 if len(feat["coords"]) < 2: continue # Saltear si no hay suficientes coords
                 geom = SubElement(pm, "LineString")
-                coords_text_list = []
-                for x,y in feat["coords"]:
-                    lon, lat = transformer.transform(x, y)
-                    coords_text_list.append(f"{lon:.6f},{lat:.6f},0")
-                SubElement(geom, "coordinates").text = " ".join(coords_text_list)
+                SubElement(geom, "coordinates").text = KMLExporter._coords_text(lonlat)
             elif geom_type == "Polígono" or geom_type == "Polygon":
                 if len(feat["coords"]) < 3: continue # Saltear si no hay suficientes coords
                 poly = SubElement(pm, "Polygon")
                 obb  = SubElement(poly, "outerBoundaryIs")
                 lr   = SubElement(obb, "LinearRing")
-                coords_text_list = []
                 # El cierre del anillo es manejado aquí
-                ring = feat["coords"] + [feat["coords"][0]]
-                for x,y in ring:
-                    lon, lat = transformer.transform(x, y)
-                    coords_text_list.append(f"{lon:.6f},{lat:.6f},0")
-                SubElement(lr, "coordinates").text = " ".join(coords_text_list)
+                SubElement(lr, "coordinates").text = KMLExporter._coords_text(np.vstack([lonlat, lonlat[:1]]))
             else:
-                print(f"Advertencia: Tipo de geometría '{geom_type}' para feature ID {feat.get('id')} no soportado por KMZExporter. Se omitirá.")
+                diagnostics.warn(DiagnosticCode.TIPO_NO_SOPORTADO, feat.get("id"), f"'{geom_type}'")
                 continue # Importante para no intentar acceder a 'geom' si no se creó
 
         xml_bytes = tostring(kml, encoding="utf-8", method="xml")
@@ -86,7 +83,11 @@ class KMZExporter:
         return parsed_xml.toprettyxml(indent="  ") # Devuelve string (UTF-8 por defecto en Python 3)
 
     @staticmethod
-    def export(features: list[dict], filename: str, hemisphere: str, zone: str):
+    def export(features: list[dict], filename: str, hemisphere: str, zone: str, lonlats: list = None,
+               diagnostics: Diagnostics = None, attributes=None) -> Diagnostics:
+        # Devuelve el colector con los avisos de la exportación (`diagnostics`
+        # o uno nuevo si no se indica). `attributes` (AttributeTable, una fila
+        # por feature) se escribe como <ExtendedData>, igual que en KMLExporter.
         if not features:
             raise ValueError("No hay geometrías para exportar.")
 
@@ -95,16 +96,27 @@ class KMZExporter:
 
         try:
             # Generar el contenido KML como string
-            kml_content_str = KMZExporter._generate_kml_string(features, hemisphere, zone)
+            diagnostics = Diagnostics() if diagnostics is None else diagnostics
+            kml_content_str = KMZExporter._generate_kml_string(features, hemisphere, zone, lonlats, diagnostics, attributes)
+        except ValueError as ve:
+            raise ve
+        except Exception as e:
+            raise RuntimeError(f"Error al crear el archivo KMZ '{filename}': {e}")
+        KMZExporter.write_kml_string(kml_content_str, filename)
+        return diagnostics
 
+    @staticmethod
+    def write_kml_string(kml_content_str: str, filename: str):
+        """Empaqueta un documento KML ya generado como 'doc.kml' dentro del KMZ."""
+        if not filename.lower().endswith(".kmz"):
+            raise ValueError("El nombre de archivo debe terminar en .kmz")
+        try:
             # El KML string debe ser encodeado a bytes para escribir en el archivo zip
             kml_content_bytes = kml_content_str.encode('utf-8')
 
             with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as kmz_file:
                 # Escribir el contenido KML (bytes) en 'doc.kml' dentro del archivo KMZ
                 kmz_file.writestr('doc.kml', kml_content_bytes)
-        except ValueError as ve:
-            raise ve
         except Exception as e:
             raise RuntimeError(f"Error al crear el archivo KMZ '{filename}': {e}")
 
@@ -141,7 +153,9 @@ if __name__ == '__main__':
         full_path = os.path.join(output_dir, filename)
         print(f"\nIntentando exportar: {full_path} (Esperado: {expected_outcome})")
         try:
-            KMZExporter.export(features, full_path, hemisphere, zone)
+            diagnostics = KMZExporter.export(features, full_path, hemisphere, zone)
             print(f"Archivo {filename} generado exitosamente.")
+            if diagnostics:
+                print(diagnostics.summary())
         except (ValueError, RuntimeError) as e:
             print(f"Error (esperado para algunos tests): {e}")
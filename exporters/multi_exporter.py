@@ -0,0 +1,243 @@
+# exporters/multi_exporter.py
+"""
+Exportación de un proyecto a varios formatos en una sola operación.
+
+En lugar de repetir por cada formato la lectura de la tabla, la validación y
+la reproyección, se preparan una vez los datos compartidos:
+
+    - la lista de features (dicts) que consumen todos los exportadores,
+    - los registros GeoJSON agrupados por tipo (Shapefile, GeoPackage, FlatGeobuf),
+    - los vértices reproyectados a WGS84 y el documento KML, que es el
+      mismo para el .kml y para el doc.kml del .kmz,
+
+y luego se escriben todos los formatos seleccionados a la vez, uno por hilo.
+La generación de KML y de los registros OGR es Python puro (comparte el GIL),
+así que el paralelismo se nota sobre todo en la escritura de GDAL/OGR y zip.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.diagnostics import Diagnostics
+from core.project_file import ProjectFile, PROJECT_EXTENSION
+from core.reprojection import reproject_features, utm_epsg
+from exporters.flatgeobuf_exporter import FlatGeobufExporter, FLATGEOBUF_EXTENSION
+from exporters.geopackage_exporter import GeoPackageExporter, GEOPACKAGE_EXTENSION
+from exporters.kml_exporter import KMLExporter
+from exporters.kmz_exporter import KMZExporter
+from exporters.ogr_records import group_records
+from exporters.shapefile_exporter import ShapefileExporter
+
+# Formatos que se escriben en coordenadas geográficas (necesitan reproyección)
+GEOGRAPHIC_FORMATS = (".kml", ".kmz")
+# Formatos fiona/OGR en UTM que comparten los registros de group_records
+OGR_FORMATS = (".shp", GEOPACKAGE_EXTENSION, FLATGEOBUF_EXTENSION)
+
+
+class MultiExporter:
+    """
+    Exporta un CoordinateManager a varios formatos con una sola preparación
+    de geometrías y una sola reproyección, escribiendo los archivos en paralelo.
+
+    Un formato que falla se registra como error y los demás continúan.
+    """
+    SUPPORTED_FORMATS = GEOGRAPHIC_FORMATS + OGR_FORMATS + (PROJECT_EXTENSION,)
+
+    @staticmethod
+    def export(mgr, base_path: str, formats: list[str], hemisphere: str, zone,
+               metadata: dict = None, max_workers: int = None, on_progress=None,
+               diagnostics: Diagnostics = None, attributes=None) -> dict:
+        """
+        Escribe `base_path + formato` para cada formato seleccionado.
+
+        Todo se lee de una instantánea de `mgr` (CoordinateManager.snapshot())
+        tomada al empezar: si on_progress deja a la GUI seguir editando el
+        manager, los hilos de escritura no lo ven cambiar.
+
+        Args:
+            mgr: CoordinateManager con las geometrías a exportar.
+            base_path: Ruta de salida sin extensión (carpeta + nombre del proyecto).
+            formats: Extensiones a escribir (ver SUPPORTED_FORMATS).
+            hemisphere: "Norte" o "Sur".
+            zone: Zona UTM (string o int).
+            metadata: Metadatos para el proyecto nativo (PROJECT_EXTENSION).
+            max_workers: Hilos de escritura (por defecto, uno por formato y otro
+                         para el documento KML).
+            on_progress: Callback opcional on_progress(hechos, total, formato, error)
+                         llamado al terminar cada formato (error es None si fue bien).
+                         Si devuelve False, se cancelan los formatos pendientes.
+            diagnostics: Colector de avisos compartido por todos los formatos
+                         (si se omite, se crea uno).
+            attributes: core.attributes.AttributeTable con una fila por feature
+                        de mgr.get_features(); se escribe en todos los formatos
+                        salvo el proyecto nativo.
+
+        Returns:
+            Informe {"etapas": {nombre: segundos}, "formatos": {formato: {"ruta",
+            "segundos", "error"}}, "avisos": Diagnostics, "total_segundos"}.
+            Los formatos cancelados no aparecen en "formatos". Un feature
+            omitido se avisa una vez en la preparación OGR y otra en la de KML.
+
+        Raises:
+            ValueError: Si no hay formatos o geometrías, algún formato no es
+                        soportado o la zona/hemisferio no son válidos.
+        """
+        formats = list(dict.fromkeys(formats))
+        if not formats:
+            raise ValueError("No se seleccionó ningún formato para exportar.")
+        unsupported = [f for f in formats if f not in MultiExporter.SUPPORTED_FORMATS]
+        if unsupported:
+            raise ValueError(f"Formato(s) no soportado(s): {', '.join(unsupported)}")
+        epsg_from = utm_epsg(hemisphere, zone)
+
+        t_start = time.perf_counter()
+        stages = {}
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
+
+        # 1) Preparación compartida (en el hilo que llama)
+        t0 = time.perf_counter()
+        mgr = mgr.snapshot()
+        features = mgr.get_features()
+        stages["features"] = time.perf_counter() - t0
+        if not features:
+            raise ValueError("No hay geometrías para exportar.")
+
+        grouped = None
+        if any(f in OGR_FORMATS for f in formats):
+            t0 = time.perf_counter()
+            grouped = group_records(features, diagnostics, attributes)
+            stages["geometrías OGR"] = time.perf_counter() - t0
+
+        lonlats = None
+        if any(f in GEOGRAPHIC_FORMATS for f in formats):
+            t0 = time.perf_counter()
+            lonlats = reproject_features(features, epsg_from, diagnostics=diagnostics)
+            stages["reproyección WGS84"] = time.perf_counter() - t0
+
+        def kml_document():
+            t0 = time.perf_counter()
+            text = KMLExporter.to_string(features, hemisphere, zone, lonlats, diagnostics, attributes)
+            stages["documento KML"] = time.perf_counter() - t0
+            return text
+
+        def write_kml(path):
+            text = kml_text.result()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+        writers = {
+            ".kml": write_kml,
+            ".kmz": lambda path: KMZExporter.write_kml_string(kml_text.result(), path),
+            ".shp": lambda path: ShapefileExporter.export(features, path, hemisphere, zone, grouped=grouped,
+                                                         diagnostics=diagnostics, attributes=attributes),
+            GEOPACKAGE_EXTENSION: lambda path: GeoPackageExporter.export(features, path, hemisphere, zone, grouped=grouped,
+                                                                         attributes=attributes),
+            FLATGEOBUF_EXTENSION: lambda path: FlatGeobufExporter.export(features, path, hemisphere, zone, grouped=grouped,
+                                                                         attributes=attributes),
+            PROJECT_EXTENSION: lambda path: ProjectFile.save(mgr, path, metadata),
+        }
+
+        def write(fmt):
+            path = base_path + fmt
+            if fmt in GEOGRAPHIC_FORMATS:
+                kml_text.result()   # el tiempo del documento se cuenta aparte
+            t0 = time.perf_counter()
+            writers[fmt](path)
+            return path, time.perf_counter() - t0
+
+        # 2) Escritura de todos los formatos en paralelo
+        results = {}
+        total = len(formats)
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(max_workers or total + 1, 2),
+                                thread_name_prefix="exportar") as pool:
+            # El documento KML se genera una vez en el pool, en paralelo con
+            # los formatos OGR; los escritores de KML/KMZ lo esperan.
+            kml_text = pool.submit(kml_document) if lonlats is not None else None
+            futures = {pool.submit(write, fmt): fmt for fmt in formats}
+            try:
+                for future in as_completed(futures):
+                    fmt = futures[future]
+                    error = None
+                    try:
+                        path, seconds = future.result()
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                        path, seconds = base_path + fmt, None
+                    results[fmt] = {"ruta": path, "segundos": seconds, "error": error}
+                    done += 1
+                    if on_progress is not None and on_progress(done, total, fmt, error) is False:
+                        break
+            finally:
+                for f in futures:
+                    f.cancel()
+
+        return {
+            "etapas": stages,
+            "formatos": {fmt: results[fmt] for fmt in formats if fmt in results},
+            "avisos": diagnostics,
+            "total_segundos": time.perf_counter() - t_start,
+        }
+
+    @staticmethod
+    def format_report(report: dict) -> str:
+        """Informe de texto con los tiempos de preparación y de cada formato."""
+        lines = ["Preparación compartida:"]
+        for name, seconds in report["etapas"].items():
+            lines.append(f"  {name:<22} {seconds:7.2f} s")
+        lines.append("Escritura (en paralelo):")
+        for fmt, result in report["formatos"].items():
+            if result["error"]:
+                lines.append(f"  {fmt:<22}   ERROR  {result['error']}")
+            else:
+                lines.append(f"  {fmt:<22} {result['segundos']:7.2f} s  {os.path.basename(result['ruta'])}")
+        lines.append(f"Total: {report['total_segundos']:.2f} s")
+        if report["avisos"]:
+            lines.append("Avisos:")
+            lines.append(report["avisos"].summary())
+        return "\n".join(lines)
+
+
+# Benchmark (opcional, para testing directo): un formato por llamada vs. MultiExporter
+if __name__ == '__main__':
+    import numpy as np
+
+    from core.coordinate_manager import CoordinateManager, FeatureArrays
+    from core.reprojection import default_cache
+
+    output_dir = "test_output_multi"
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # 20k polígonos de 8 vértices y 20k puntos
+    rng = np.random.default_rng(5)
+    n = 20_000
+    centers = np.column_stack([rng.uniform(400000, 500000, n), rng.uniform(4000000, 4100000, n)])
+    ang = np.linspace(0, 2 * np.pi, 8, endpoint=False)
+    features = []
+    for i, (cx, cy) in enumerate(centers.tolist()):
+        features.append({"id": i + 1, "type": "Polígono",
+                         "coords": [(cx + 30 * np.cos(a), cy + 30 * np.sin(a)) for a in ang]})
+        features.append({"id": n + i + 1, "type": "Punto", "coords": [(cx, cy)]})
+    mgr = CoordinateManager.from_arrays("Norte", 18, FeatureArrays.from_features(features))
+    formats = [".kml", ".kmz", ".shp", GEOPACKAGE_EXTENSION, FLATGEOBUF_EXTENSION]
+
+    default_cache.clear()
+    t0 = time.perf_counter()
+    for fmt in formats:
+        # Como la GUI al guardar formato por formato: features nuevos en cada llamada
+        feats = mgr.get_features()
+        path = os.path.join(output_dir, "uno_a_uno" + fmt)
+        {".kml": KMLExporter, ".kmz": KMZExporter, ".shp": ShapefileExporter,
+         GEOPACKAGE_EXTENSION: GeoPackageExporter, FLATGEOBUF_EXTENSION: FlatGeobufExporter}[fmt].export(
+            feats, path, "Norte", "18")
+    print(f"Formato por formato: {time.perf_counter() - t0:.2f} s\n")
+
+    default_cache.clear()
+
+    def progress(done, total, fmt, error):
+        print(f"  [{done}/{total}] {fmt}" + (f" -> ERROR: {error}" if error else ""))
+
+    report = MultiExporter.export(mgr, os.path.join(output_dir, "todos"), formats, "Norte", "18",
+                                  on_progress=progress)
+    print(MultiExporter.format_report(report))
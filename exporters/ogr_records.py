@@ -0,0 +1,172 @@
+# exporters/ogr_records.py
+"""
+Utilidades compartidas por los exportadores basados en fiona/OGR
+(GeoPackage, FlatGeobuf, Shapefile): conversión de los dicts de features de la aplicación a registros tipo GeoJSON y esquema de los
+atributos (core.attributes) que acompañan a los features.
+"""
+from collections import OrderedDict, defaultdict
+
+from core.attributes import AttributeTable
+from core.diagnostics import DiagnosticCode, Diagnostics
+
+# Tipos de geometría de la aplicación -> tipos de fiona
+GEOMETRY_TYPE_MAP = {
+    "Punto": "Point",
+    "Point": "Point",
+    "Polilínea": "LineString",
+    "LineString": "LineString",
+    "Polígono": "Polygon",
+    "Polygon": "Polygon",
+}
+
+# Tipos de columna de core.attributes -> tipos de campo de fiona
+FIELD_TYPE_MAP = {"int": "int", "float": "float", "date": "date", "str": "str"}
+# Campos que escriben los propios exportadores
+RESERVED_FIELDS = ("id", "tipo")
+
+
+def _closed(ring) -> list:
+    ring = [tuple(c) for c in ring]
+    if ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return ring
+
+
+def _part_geometry(fiona_type: str, rings: list, fid, diagnostics):
+    """Coordenadas GeoJSON de una parte, o None (con aviso) si no alcanzan."""
+    coords = rings[0] if rings else []
+    if fiona_type == "Point":
+        return tuple(coords[0]) if coords else None
+    if fiona_type == "LineString":
+        if len(coords) < 2:
+            diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, fid, "LineString con menos de 2 coordenadas")
+            return None
+        return [tuple(c) for c in coords]
+    if len(coords) < 3:
+        diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, fid, "Polygon con menos de 3 coordenadas")
+        return None
+    holes = [_closed(h) for h in rings[1:] if len(h) >= 3]
+    return [_closed(coords)] + holes
+
+
+def feature_geometry(feat: dict, diagnostics):
+    """
+    Geometría tipo GeoJSON de un feature, o None (con aviso en `diagnostics`)
+    si el tipo no es soportado o las coordenadas no alcanzan para ese tipo.
+
+    Si el feature trae "parts" (varias partes y/o anillos interiores), se
+    devuelve un Polygon con huecos o el Multi* correspondiente.
+    """
+    fiona_type = GEOMETRY_TYPE_MAP.get(feat.get("type"))
+    coords = feat.get("coords")
+    parts = feat.get("parts") or [[coords]]
+    fid = feat.get("id", "N/A")
+    if fiona_type is None:
+        diagnostics.warn(DiagnosticCode.TIPO_NO_SOPORTADO, fid, f"'{feat.get('type')}'")
+        return None
+    if not parts[0] or not parts[0][0]:
+        diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, fid)
+        return None
+
+    geoms = [_part_geometry(fiona_type, rings, fid, diagnostics) for rings in parts]
+    geoms = [g for g in geoms if g is not None]
+    if not geoms:
+        return None
+    if len(geoms) == 1:
+        return {"type": fiona_type, "coordinates": geoms[0]}
+    return {"type": "Multi" + fiona_type, "coordinates": geoms}
+
+
+def attribute_fields(attributes: AttributeTable, max_length: int = None,
+                     date_as_text: bool = False) -> OrderedDict:
+    """
+    {nombre de campo: tipo de fiona} para las columnas de `attributes`, en su
+    orden. Los nombres se recortan a `max_length` (10 en Shapefile) y se
+    desambiguan con un sufijo "_N" si chocan entre sí o con RESERVED_FIELDS
+    (sin distinguir mayúsculas, como OGR). Con `date_as_text` las fechas
+    se declaran como texto (FlatGeobuf no tiene campos de fecha).
+    """
+    fields = OrderedDict()
+    if attributes is None:
+        return fields
+    used = set(RESERVED_FIELDS)
+    for i, (name, kind) in enumerate(attributes.kinds().items()):
+        base = (str(name).strip() or f"campo_{i + 1}")[:max_length]
+        field = base
+        n = 1
+        while field.lower() in used:
+            n += 1
+            suffix = f"_{n}"
+            field = base[:max_length - len(suffix)] + suffix if max_length else base + suffix
+        used.add(field.lower())
+        fields[field] = "str" if date_as_text and kind == "date" else FIELD_TYPE_MAP[kind]
+    return fields
+
+
+def rename_fields(grouped: dict, names: list) -> dict:
+    """
+    Copia de un resultado de group_records con los campos de atributos
+    renombrados a `names` (p. ej. recortados para Shapefile); las geometrías
+    se comparten sin copiarse.
+    """
+    return {fiona_type: [{"geometry": r["geometry"],
+                          "properties": dict(zip(["id"] + list(names), r["properties"].values()))}
+                         for r in records]
+            for fiona_type, records in grouped.items()}
+
+
+def group_records(features: list[dict], diagnostics: Diagnostics = None,
+                  attributes: AttributeTable = None) -> dict:
+    """
+    Agrupa los registros {'geometry', 'properties': {'id', ...}} por tipo base
+    de fiona ('Point', 'LineString', 'Polygon'); un grupo puede mezclar simples y Multi*.
+    Los features omitidos se registran en `diagnostics`.
+
+    Si se indica `attributes` (una fila por feature), cada registro lleva
+    además sus valores con los nombres de attribute_fields(attributes).
+    """
+    diagnostics = Diagnostics() if diagnostics is None else diagnostics
+    fields = list(attribute_fields(attributes))
+    if attributes is not None and len(attributes) != len(features):
+        raise ValueError(f"Hay {len(attributes)} filas de atributos para {len(features)} features.")
+    rows = list(zip(*attributes.to_pylists())) if fields else None
+    grouped = defaultdict(list)
+    for i, feat in enumerate(features):
+        geometry = feature_geometry(feat, diagnostics)
+        if geometry is None:
+            continue
+        try:
+            fid = int(feat.get("id", 0))
+        except (TypeError, ValueError):
+            diagnostics.warn(DiagnosticCode.ID_NO_ENTERO, feat.get("id"), "se exporta como 0")
+            fid = 0
+        properties = {"id": fid}
+        if rows is not None:
+            properties.update(zip(fields, rows[i]))
+        grouped[geometry["type"].replace("Multi", "")].append({"geometry": geometry, "properties": properties})
+    return grouped
+
+
+def copy_grouped(grouped: dict) -> dict:
+    """
+    Copia de un resultado de group_records para otro exportador: los
+    exportadores modifican los registros (promote_to_multi, atributo 'tipo'),
+    pero las geometrías se comparten sin copiarse.
+    """
+    return {fiona_type: [{"geometry": r["geometry"], "properties": dict(r["properties"])} for r in records]
+            for fiona_type, records in grouped.items()}
+
+
+def promote_to_multi(records: list) -> str:
+    """
+    Tipo de capa para un grupo de group_records. Si el grupo mezcla simples y
+    Multi*, convierte los simples a Multi* (GeoPackage no admite la mezcla en una capa).
+    """
+    base = records[0]["geometry"]["type"].replace("Multi", "")
+    if not any(r["geometry"]["type"].startswith("Multi") for r in records):
+        return base
+    for r in records:
+        geometry = r["geometry"]
+        if not geometry["type"].startswith("Multi"):
+            r["geometry"] = {"type": "Multi" + base, "coordinates": [geometry["coordinates"]]}
+    return "Multi" + base
@@ -3,30 +3,35 @@ from fiona.crs import from_epsg
 from collections import OrderedDict, defaultdict
 import os
 
+from core.diagnostics import DiagnosticCode, Diagnostics
+from core.reprojection import utm_epsg
+from exporters.ogr_records import attribute_fields, feature_geometry, group_records, rename_fields
+
 # (Si se usaran constantes como GeometryType.PUNTO, se importarían aquí)
 # from core.coordinate_manager import GeometryType
 
 class ShapefileExporter:
     @staticmethod
-    def export(features: list[dict], filename: str, hemisphere: str, zone: str):
+    def export(features: list[dict], filename: str, hemisphere: str, zone: str, grouped: dict = None,
+               diagnostics: Diagnostics = None, attributes=None) -> Diagnostics:
+        # `grouped`: registros ya preparados con ogr_records.group_records
+        # (p. ej. por MultiExporter); se escriben tal cual, sin volver a
+        # convertir las coordenadas de cada feature.
+        # `attributes`: core.attributes.AttributeTable con una fila por
+        # feature; sus columnas se escriben como campos tipados, todos los
+        # registros de una capa con un solo writerecords. Los nombres se
+        # recortan a los 10 caracteres que admite el formato DBF.
+        # Los features omitidos y los archivos que no se pudieron escribir se
+        # registran en `diagnostics` (o en uno nuevo), que se devuelve.
         if not features:
             raise ValueError("No hay geometrías para exportar.")
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
 
         # No es necesario un try-except para ImportError aquí,
         # ya que gui.py lo maneja al llamar al exportador.
         # Si fiona no está, la importación al inicio del archivo fallará.
 
-        try:
-            zone_int = int(zone)
-        except ValueError:
-            raise ValueError(f"Zona UTM inválida: '{zone}'. Debe ser un número entero.")
-
-        if hemisphere.lower() == 'norte':
-            epsg_code = 32600 + zone_int
-        elif hemisphere.lower() == 'sur':
-            epsg_code = 32700 + zone_int
-        else:
-            raise ValueError(f"Hemisferio '{hemisphere}' no reconocido. Use 'Norte' o 'Sur'.")
+        epsg_code = utm_epsg(hemisphere, zone)
 
         try:
             crs = from_epsg(epsg_code)
@@ -48,14 +53,23 @@ class ShapefileExporter:
             "Polygon": "Polygon"
         }
 
-        for feat in features:
-            app_geom_type = feat.get("type")
-            fiona_geom_type = geometry_type_map.get(app_geom_type)
+        fields = attribute_fields(attributes, max_length=10)
+        if attributes is not None and grouped is None:
+            grouped = group_records(features, diagnostics, attributes)
+        if grouped is not None and list(fields) != list(attribute_fields(attributes)):
+            grouped = rename_fields(grouped, list(fields))
 
-            if fiona_geom_type:
-                grouped_features[fiona_geom_type].append(feat)
-            else:
-                print(f"Advertencia: Tipo de geometría '{app_geom_type}' para feature ID {feat.get('id', 'N/A')} no es soportado por ShapefileExporter y será omitido.")
+        if grouped is not None:
+            grouped_features = grouped
+        else:
+            for feat in features:
+                app_geom_type = feat.get("type")
+                fiona_geom_type = geometry_type_map.get(app_geom_type)
+
+                if fiona_geom_type:
+                    grouped_features[fiona_geom_type].append(feat)
+                else:
+                    diagnostics.warn(DiagnosticCode.TIPO_NO_SOPORTADO, feat.get('id', 'N/A'), f"'{app_geom_type}'")
 
         if not grouped_features:
             # Esto podría ocurrir si todos los features son de tipos no soportados
@@ -84,7 +98,7 @@ class ShapefileExporter:
 
             schema = {
                 'geometry': fiona_geom_type,
-                'properties': OrderedDict([('id', 'int')]) # Propiedad 'id' de tipo entero
+                'properties': OrderedDict([('id', 'int')] + list(fields.items())) # 'id' entero y los atributos
             }
 
             try:
@@ -94,48 +108,56 @@ class ShapefileExporter:
                                 crs=crs,
                                 encoding='utf-8') as collection:
 
-                    for feat_data in feats_in_group:
-                        # Convertir coordenadas al formato GeoJSON-like que fiona espera
-                        fiona_geometry_dict = None
-                        raw_coords = feat_data.get('coords')
-
-                        if not raw_coords:
-                            print(f"Advertencia: Feature ID {feat_data.get('id', 'N/A')} tipo '{fiona_geom_type}' no tiene coordenadas. Se omitirá.")
-                            continue
-
-                        if fiona_geom_type == 'Point':
-                            # Para Point, fiona espera una tupla (x, y)
-                            if len(raw_coords) == 1 and len(raw_coords[0]) == 2:
-                                fiona_geometry_dict = {'type': 'Point', 'coordinates': tuple(raw_coords[0])}
-                            else:
-                                print(f"Advertencia: Feature ID {feat_data.get('id', 'N/A')} tipo 'Point' tiene formato de coordenadas inválido. Se omitirá.")
-                                continue
-
-                        elif fiona_geom_type == 'LineString':
-                            # Para LineString, fiona espera una lista de tuplas [(x1,y1), (x2,y2), ...]
-                            if len(raw_coords) >= 2:
-                                fiona_geometry_dict = {'type': 'LineString', 'coordinates': [tuple(c) for c in raw_coords]}
-                            else:
-                                print(f"Advertencia: Feature ID {feat_data.get('id', 'N/A')} tipo 'LineString' tiene menos de 2 coordenadas. Se omitirá.")
-                                continue
-
-                        elif fiona_geom_type == 'Polygon':
-                            # Para Polygon, fiona espera una lista de anillos.
-                            # Cada anillo es una lista de tuplas. El primer anillo es el exterior.
-                            # El anillo debe estar cerrado (primer punto == último punto).
-                            if len(raw_coords) >= 3:
-                                closed_ring = raw_coords + [raw_coords[0]] if tuple(raw_coords[0]) != tuple(raw_coords[-1]) else raw_coords
-                                fiona_geometry_dict = {'type': 'Polygon', 'coordinates': [[tuple(c) for c in closed_ring]]}
-                            else:
-                                print(f"Advertencia: Feature ID {feat_data.get('id', 'N/A')} tipo 'Polygon' tiene menos de 3 coordenadas. Se omitirá.")
+                    if grouped is not None:
+                        collection.writerecords(feats_in_group)
+                    else:
+                        for feat_data in feats_in_group:
+                            # Convertir coordenadas al formato GeoJSON-like que fiona espera
+                            fiona_geometry_dict = None
+                            raw_coords = feat_data.get('coords')
+
+                            if feat_data.get('parts'):
+                                # Multiparte y/o con huecos: el Shapefile admite
+                                # Multi* y anillos interiores en la misma capa.
+                                fiona_geometry_dict = feature_geometry(feat_data, diagnostics)
+
+                            elif not raw_coords:
+                                diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, feat_data.get('id', 'N/A'), f"tipo '{fiona_geom_type}'")
                                 continue
 
-                        if fiona_geometry_dict:
-                            collection.write({
-                                'geometry': fiona_geometry_dict,
-                                'properties': OrderedDict([('id', int(feat_data.get('id', 0)))]) # Asegurar que ID es int
-                            })
-                        # else: el feature fue omitido por formato inválido
+                            elif fiona_geom_type == 'Point':
+                                # Para Point, fiona espera una tupla (x, y)
+                                if len(raw_coords) == 1 and len(raw_coords[0]) == 2:
+                                    fiona_geometry_dict = {'type': 'Point', 'coordinates': tuple(raw_coords[0])}
+                                else:
+                                    diagnostics.warn(DiagnosticCode.COORDENADA_INVALIDA, feat_data.get('id', 'N/A'), "Point con formato de coordenadas inválido")
+                                    continue
+
+                            elif fiona_geom_type == 'LineString':
+                                # Para LineString, fiona espera una lista de tuplas [(x1,y1), (x2,y2), ...]
+                                if len(raw_coords) >= 2:
+                                    fiona_geometry_dict = {'type': 'LineString', 'coordinates': [tuple(c) for c in raw_coords]}
+                                else:
+                                    diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feat_data.get('id', 'N/A'), "LineString con menos de 2 coordenadas")
+                                    continue
+
+                            elif fiona_geom_type == 'Polygon':
+                                # Para Polygon, fiona espera una lista de anillos.
+                                # Cada anillo es una lista de tuplas. El primer anillo es el exterior.
+                                # El anillo debe estar cerrado (primer punto == último punto).
+                                if len(raw_coords) >= 3:
+                                    closed_ring = raw_coords + [raw_coords[0]] if tuple(raw_coords[0]) != tuple(raw_coords[-1]) else raw_coords
+                                    fiona_geometry_dict = {'type': 'Polygon', 'coordinates': [[tuple(c) for c in closed_ring]]}
+                                else:
+                                    diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feat_data.get('id', 'N/A'), "Polygon con menos de 3 coordenadas")
+                                    continue
+
+                            if fiona_geometry_dict:
+                                collection.write({
+                                    'geometry': fiona_geometry_dict,
+                                    'properties': OrderedDict([('id', int(feat_data.get('id', 0)))]) # Asegurar que ID es int
+                                })
+                            # else: el feature fue omitido por formato inválido
 
                 print(f"Archivo {output_filename} exportado exitosamente.")
                 exported_files_count += 1
@@ -143,14 +165,11 @@ class ShapefileExporter:
             except Exception as e:
                 # Si un tipo de geometría falla, se informa y se intenta continuar con los otros.
                 # Esto es mejor que fallar toda la exportación si, por ejemplo, solo los polígonos tienen un problema.
-                print(f"Error al exportar el archivo Shapefile '{output_filename}': {e}")
-                # Considerar acumular errores en una lista y mostrarlos al final o relanzar una excepción agrupada.
+                diagnostics.warn(DiagnosticCode.ARCHIVO_NO_ESCRITO, None, f"'{output_filename}': {e}")
 
         if exported_files_count == 0:
             raise RuntimeError("No se pudo exportar ningún archivo Shapefile. Verifique los tipos de geometría y los datos.")
-
-        # La GUI puede necesitar ser informada de los múltiples archivos creados.
-        # Por ahora, el mensaje de éxito en gui.py es genérico.
+        return diagnostics
 
 # Ejemplo de uso (opcional, para testing directo)
 if __name__ == '__main__':
@@ -173,9 +192,28 @@ if __name__ == '__main__':
 
     print(f"Intentando exportar a la base: {base_shp_filename}")
     try:
-        ShapefileExporter.export(sample_features, base_shp_filename, "Norte", "18")
+        diagnostics = ShapefileExporter.export(sample_features, base_shp_filename, "Norte", "18")
         print(f"Exportación Shapefile completada (ver directorio '{output_dir_shp}').")
+        print(diagnostics.summary())
     except (ValueError, RuntimeError, fiona.errors.FionaError) as e:
         print(f"Error durante la exportación Shapefile: {e}")
     except ImportError:
         print("Error: Fiona no está instalado. La exportación a Shapefile no es posible.")
+
+    # Atributos tipados (core.attributes) como campos del DBF
+    from core.attributes import AttributeTable
+    attr_features = [f for f in sample_features if f["id"] in (1, "2", 3, 5)]
+    attributes = AttributeTable.from_text_columns({
+        "uso": ["urbano", "rural", "", "urbano"],
+        "superficie_m2": ["120.5", "80", "", "310.25"],
+        "fecha_alta": ["2024-01-15", "", "2023-11-02", "2024-02-01"],
+    })
+    try:
+        ShapefileExporter.export(attr_features, os.path.join(output_dir_shp, "test_atributos"), "Norte", "18",
+                                 attributes=attributes)
+        with fiona.open(os.path.join(output_dir_shp, "test_atributos_points.shp")) as src:
+            print("Esquema con atributos:", dict(src.schema["properties"]))
+            for rec in src:
+                print("  ", dict(rec["properties"]))
+    except (ValueError, RuntimeError, fiona.errors.FionaError) as e:
+        print(f"Error durante la exportación Shapefile con atributos: {e}")
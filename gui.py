@@ -1,8 +1,13 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
 from PySide6.QtWidgets import QTextEdit
-from PySide6.QtCore import Qt, QRegularExpression, QPointF, QItemSelectionModel
+from PySide6.QtCore import Qt, QRegularExpression, QPointF, QItemSelectionModel, QTimer
 from PySide6.QtGui import (
     QAction,
+    QKeySequence,
     QRegularExpressionValidator,
     QBrush,
     QPainterPath,
@@ -28,27 +33,61 @@ from PySide6.QtWidgets import (
     QHeaderView,
     QMenu,
     QStyledItemDelegate,
+    QProgressDialog,
     QTableWidget,
     QTableWidgetItem
 )
 
-from PySide6.QtWidgets import QDialog, QVBoxLayout
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QInputDialog
 from config_dialog import ConfigDialog
 from help_dialog import HelpDialog
-from core.coordinate_manager import CoordinateManager, GeometryType
+from core.coordinate_manager import CoordinateManager, GeometryType, FeatureArraysBuilder
+from core.attributes import AttributeBuilder
 from exporters.kml_exporter import KMLExporter
 from exporters.kmz_exporter import KMZExporter # Asumiendo que existe
 from exporters.shapefile_exporter import ShapefileExporter # Asumiendo que existe
+from exporters.geopackage_exporter import GeoPackageExporter, GEOPACKAGE_EXTENSION
+from exporters.flatgeobuf_exporter import FlatGeobufExporter, FLATGEOBUF_EXTENSION
+from exporters.html_report_exporter import HTMLReportExporter
+from exporters.multi_exporter import MultiExporter
 from importers.csv_importer import CSVImporter
 from importers.kml_importer import KMLImporter # Importar KMLImporter
+from importers.kmz_importer import KMZImporter
+from importers.shapefile_importer import ShapefileImporter
+from importers.batch_importer import BatchImporter
 from core.geometry import GeometryBuilder
+from core.tiles import DEFAULT_TILE_URL
+from core.project_file import ProjectFile, PROJECT_EXTENSION
+from core.fixed_point import FixedPointXY, MAX_PRECISION
+from core.metrics import compute_metrics, single_geometry_arrays
+from core.validity import validate_polygons, format_report as format_validity_report
+from core.diagnostics import Diagnostics
+from core.snapping import snap_features, snap_manager, format_report as format_snap_report
+from core.clipboard import parse_coordinate_text, format_tsv
+from core.memory_profile import MemoryProfiler, profiled_stage
+from core.journal import Journal, AUTOSAVE_DIR
+from core.history import (
+    CommandHistory, RowBlock, CellEditCommand, InsertRowsCommand,
+    DeleteRowsCommand, WriteRangeCommand, ReplaceAllCommand
+)
+from map_view import MapView
+from csv_preview import CSVPreviewDialog
+from importers.csv_importer import sniff_csv
 from PySide6.QtGui import QIcon
 from PySide6.QtSvg import QSvgRenderer
 from PySide6.QtGui import QPixmap, QPainter, QColor, QIcon, QPalette
 from PySide6.QtCore import QSize, Qt
 from PySide6.QtGui import QPalette
 
+# Cada cuánto se registra el estado de la GUI y se evalúa compactar el diario
+AUTOSAVE_INTERVAL_MS = 5000
+
 class UTMDelegate(QStyledItemDelegate):
+    def __init__(self, parent=None, on_edit=None):
+        super().__init__(parent)
+        # callback(row, col, old, new, apply) para registrar la edición en el historial
+        self.on_edit = on_edit
+
     def createEditor(self, parent, option, index):
         editor = super().createEditor(parent, option, index)
         # 6-7 dígitos + decimales opcionales
@@ -58,6 +97,14 @@ class UTMDelegate(QStyledItemDelegate):
 
     def setModelData(self, editor, model, index):
         text = editor.text()
+        old = model.data(index) or ""
+        if self.on_edit is not None and text != old:
+            self.on_edit(index.row(), index.column(), old, text,
+                         lambda: self._apply(editor, model, index, text))
+        else:
+            self._apply(editor, model, index, text)
+
+    def _apply(self, editor, model, index, text):
         model.setData(index, text)
         if not (model.flags(index) & Qt.ItemIsSelectable and
                 model.data(index, Qt.BackgroundRole)):
@@ -72,14 +119,88 @@ class CoordTable(QTableWidget):
             return
         super().keyPressEvent(event)
 
+class TableEditTarget:
+    """
+    Adaptador de CoordTable para CommandHistory (ver core/history.py).
+    Trabaja por bloques de filas para que deshacer/rehacer sea O(filas cambiadas).
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def _text(self, row, col):
+        itm = self.table.item(row, col)
+        return itm.text() if itm else ""
+
+    def _set_row(self, row, values):
+        id_text, x_text, y_text = values
+        id_it = QTableWidgetItem(id_text)
+        id_it.setFlags(Qt.ItemIsEnabled)
+        self.table.setItem(row, 0, id_it)
+        self.table.setItem(row, 1, QTableWidgetItem(x_text))
+        self.table.setItem(row, 2, QTableWidgetItem(y_text))
+
+    def get_rows(self, start, count):
+        rows = range(start, min(start + count, self.table.rowCount()))
+        return RowBlock((self._text(r, 0) for r in rows),
+                        (self._text(r, 1) for r in rows),
+                        (self._text(r, 2) for r in rows))
+
+    def set_cell(self, row, col, text):
+        if col == 0:
+            itm = QTableWidgetItem(text)
+            itm.setFlags(Qt.ItemIsEnabled)
+            self.table.setItem(row, col, itm)
+        else:
+            self.table.setItem(row, col, QTableWidgetItem(text))
+
+    def write_rows(self, start, block):
+        for i, values in enumerate(block.rows()):
+            self._set_row(start + i, values)
+
+    def insert_rows(self, start, block):
+        self.table.model().insertRows(start, len(block))
+        self.write_rows(start, block)
+
+    def remove_rows(self, start, count):
+        self.table.model().removeRows(start, count)
+
+    def replace_all(self, block):
+        self.table.setRowCount(0)
+        self.table.setRowCount(len(block))
+        self.write_rows(0, block)
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SIG: Gestión de Coordenadas")
+        self._config = {
+            "dark_mode":   False,
+            "precision":   "",
+            "default_dir": "",
+            "tile_url":    DEFAULT_TILE_URL,
+            "undo_budget_mb": 64,
+            "snap_tolerance": "",
+            "validate_before_export": False
+        }
+        self._history_suspended = 0
+        self._memory_profiler = MemoryProfiler()  # inactivo hasta activarlo en la barra
+        self._background = None  # ThreadPoolExecutor para escrituras largas (se crea al usarse)
+        self._journal = None  # diario de autoguardado (se abre tras ofrecer la recuperación)
+        # Atributos del último CSV/KML importado (AttributeTable) y su fila por ID de feature
+        self._attributes = None
+        self._attribute_rows = {}
+        # Partes y anillos de lo último importado/abierto con huecos o
+        # multipartes (ver _set_layout); None si la tabla es una sola geometría
+        self._layout = None
         self._build_ui()
         self._create_toolbar()
         self._modo_oscuro = False
         self._toggle_modo(False)
+        self._autosave_timer = QTimer(self)
+        self._autosave_timer.setInterval(AUTOSAVE_INTERVAL_MS)
+        self._autosave_timer.timeout.connect(self._on_autosave_tick)
+        QTimer.singleShot(0, self._start_autosave)
     
     def _icono(self, nombre, size=QSize(24, 24)):
         ruta = f"icons/{nombre}"
@@ -130,8 +251,14 @@ class MainWindow(QMainWindow):
         first = QTableWidgetItem("1")
         first.setFlags(Qt.ItemIsEnabled)
         self.table.setItem(0,0,first)
+        # historial de deshacer/rehacer sobre la tabla
+        self._history = CommandHistory(
+            TableEditTarget(self.table),
+            max_bytes=self._config["undo_budget_mb"] * 1024 * 1024
+        )
+        self._history.on_apply = self._on_history_applied
         # validación UTM
-        delegate = UTMDelegate(self.table)
+        delegate = UTMDelegate(self.table, on_edit=self._on_table_edit)
         self.table.setItemDelegateForColumn(1, delegate)
         self.table.setItemDelegateForColumn(2, delegate)
         # selección y menú contextual
@@ -156,6 +283,7 @@ class MainWindow(QMainWindow):
 
         # Mapa base
         self.chk_mapbase = QCheckBox("Usar mapa base (OSM)")
+        self.chk_mapbase.toggled.connect(self._on_toggle_mapbase)
         control.addWidget(self.chk_mapbase)
 
         # Proyecto / Formato
@@ -165,7 +293,7 @@ class MainWindow(QMainWindow):
         ff.addWidget(self.le_nombre)
         ff.addWidget(QLabel("Formato:"))
         self.cb_format = QComboBox()
-        self.cb_format.addItems([".kml",".kmz",".shp"])
+        self.cb_format.addItems([".kml",".kmz",".shp",GEOPACKAGE_EXTENSION,FLATGEOBUF_EXTENSION,PROJECT_EXTENSION])
         ff.addWidget(self.cb_format)
         control.addLayout(ff)
 
@@ -180,11 +308,15 @@ class MainWindow(QMainWindow):
         ##################
         # Lienzo (canvas)#
         ##################
-        self.canvas = QGraphicsView()
+        self.canvas = MapView()
         self.scene  = QGraphicsScene(self.canvas)
         self.canvas.setScene(self.scene)
         self.canvas.setMinimumSize(400,300)
         self.canvas.setStyleSheet("background-color:white; border:1px solid #ccc; padding:8px;")
+        self.canvas.set_tile_url(self._config["tile_url"])
+        self.canvas.set_utm(self.cb_hemisferio.currentText(), int(self.cb_zona.currentText()))
+        self.cb_hemisferio.currentTextChanged.connect(self._on_utm_changed)
+        self.cb_zona.currentTextChanged.connect(self._on_utm_changed)
 
         # ensamblar
         main_layout.addLayout(control,1)
@@ -201,6 +333,8 @@ class MainWindow(QMainWindow):
             ("folder-open-fill.svg","Abrir",    self._on_open),
             ("save-3-fill.svg",     "Guardar",  self._on_guardar),
             ("import-fill.svg",     "Importar", self._on_import),
+            ("folder-open-fill.svg","Importar carpeta", self._on_import_folder),
+            ("import-fill.svg",     "Importar por zonas", self._on_import_by_zone),
             ("export-fill.svg",     "Exportar", self._on_export)
         ]:
             a = QAction(self._icono(nombre_icono), text, self)
@@ -209,13 +343,16 @@ class MainWindow(QMainWindow):
 
         tb.addSeparator()
 
-        for nombre_icono, text, slot in [
-            ("arrow-left-box-fill.svg",  "Deshacer", self._on_undo),
-            ("arrow-right-box-fill.svg", "Rehacer",  self._on_redo),
-        ]:
-            a = QAction(self._icono(nombre_icono), text, self)
-            a.triggered.connect(slot)
-            tb.addAction(a)
+        self.action_undo = QAction(self._icono("arrow-left-box-fill.svg"), "Deshacer", self)
+        self.action_undo.setShortcut(QKeySequence.Undo)
+        self.action_undo.triggered.connect(self._on_undo)
+        tb.addAction(self.action_undo)
+        self.action_redo = QAction(self._icono("arrow-right-box-fill.svg"), "Rehacer", self)
+        self.action_redo.setShortcut(QKeySequence.Redo)
+        self.action_redo.triggered.connect(self._on_redo)
+        tb.addAction(self.action_redo)
+        self._history.on_change = self._update_undo_actions
+        self._update_undo_actions()
 
         tb.addSeparator()
 
@@ -228,6 +365,14 @@ class MainWindow(QMainWindow):
         btn_html.setToolTip("Generar resumen HTML con coordenadas, perímetro y área")
         btn_html.triggered.connect(self._on_export_html)
         tb.addAction(btn_html)
+        act_snap = QAction("Limpiar vértices", self)
+        act_snap.setToolTip("Unir vértices más cercanos que una tolerancia y eliminar duplicados")
+        act_snap.triggered.connect(self._on_snap_vertices)
+        tb.addAction(act_snap)
+        act_csv = QAction("Vista previa CSV", self)
+        act_csv.setToolTip("Explorar un CSV grande sin importarlo (solo se leen las filas visibles)")
+        act_csv.triggered.connect(self._on_preview_csv)
+        tb.addAction(act_csv)
 
         tb.addSeparator()
 
@@ -240,6 +385,14 @@ class MainWindow(QMainWindow):
 
         tb.addSeparator()
 
+        # perfil de memoria por etapas (opcional)
+        self.action_memoria = QAction("Perfil de memoria", self)
+        self.action_memoria.setCheckable(True)
+        self.action_memoria.setToolTip("Medir la memoria de cada etapa de importación, dibujo y exportación;\n"
+                                       "al desactivarlo se muestra el informe")
+        self.action_memoria.toggled.connect(self._on_toggle_memory_profile)
+        tb.addAction(self.action_memoria)
+
         # configuraciones y ayuda
         for nombre_icono, text, slot in [
             ("settings-2-fill.svg", "Configuraciones", self._on_settings),
@@ -281,6 +434,22 @@ class MainWindow(QMainWindow):
             self.action_modo.setIcon(self._icono("sun-fill.svg"))
             self.action_modo.setText("Modo claro")
 
+    def _on_toggle_mapbase(self, checked):
+        self.canvas.set_basemap_enabled(checked)
+
+    def _on_utm_changed(self, _text=None):
+        self.canvas.set_utm(self.cb_hemisferio.currentText(), int(self.cb_zona.currentText()))
+
+    def closeEvent(self, event):
+        self._autosave_timer.stop()
+        if self._journal is not None:
+            self._journal.close()  # cierre limpio: no hay nada que recuperar
+            self._journal = None
+        self.canvas.shutdown()
+        if self._background is not None:
+            self._background.shutdown(wait=True)
+        super().closeEvent(event)
+
     def _on_cell_changed(self, item):
         r, c = item.row(), item.column()
         # auto-agregar fila nueva
@@ -293,6 +462,7 @@ class MainWindow(QMainWindow):
                     id_it = QTableWidgetItem(str(nr+1))
                     id_it.setFlags(Qt.ItemIsEnabled)
                     self.table.setItem(nr,0,id_it)
+                    self._push_history(InsertRowsCommand(nr, RowBlock([str(nr+1)], [""], [""])))
         # refresca preview
         try:
             mgr = self._build_manager_from_table()
@@ -318,23 +488,62 @@ class MainWindow(QMainWindow):
         menu.addAction("Pegar", self._paste_to_table)
         menu.exec(self.table.viewport().mapToGlobal(pos))
 
+    # Selecciones mayores se ofrecen como exportación a archivo en vez del portapapeles
+    CLIPBOARD_MAX_ROWS = 200_000
+    _COPY_CHUNK_ROWS = 50_000
+
+    def _selection_chunks(self, ranges):
+        """
+        Recorre los rangos seleccionados por bloques de filas y genera, por
+        bloque, una lista de columnas de texto (una lectura por celda, sin
+        construir strings intermedios por fila).
+        """
+        item = self.table.item
+        for rng in ranges:
+            cols = range(rng.leftColumn(), rng.rightColumn() + 1)
+            for top in range(rng.topRow(), rng.bottomRow() + 1, self._COPY_CHUNK_ROWS):
+                rows = range(top, min(top + self._COPY_CHUNK_ROWS, rng.bottomRow() + 1))
+                yield [[itm.text() if itm else "" for itm in map(item, rows, repeat(col, len(rows)))]
+                       for col in cols]
+
     def _copy_selection(self):
         ranges = self.table.selectedRanges()
         if not ranges:
             return
-        text = ""
-        for r in ranges:
-            for row in range(r.topRow(), r.bottomRow()+1):
-                parts = []
-                for col in range(r.leftColumn(), r.rightColumn()+1):
-                    itm = self.table.item(row,col)
-                    parts.append(itm.text() if itm else "")
-                text += "\t".join(parts) + "\n"
-        QApplication.clipboard().setText(text)
+        n_rows = sum(r.rowCount() for r in ranges)
+        if n_rows > self.CLIPBOARD_MAX_ROWS:
+            answer = QMessageBox.question(
+                self, "Copiar selección grande",
+                f"La selección tiene {n_rows} filas. ¿Desea exportarla a un archivo de texto "
+                "en lugar de copiarla al portapapeles?",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Yes)
+            if answer == QMessageBox.Cancel:
+                return
+            if answer == QMessageBox.Yes:
+                self._export_selection(ranges)
+                return
+        QApplication.clipboard().setText("".join(format_tsv(cols) for cols in self._selection_chunks(ranges)))
+
+    def _export_selection(self, ranges):
+        """Escribe la selección como TSV en un archivo, por bloques."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Exportar selección", self._config.get("default_dir", ""),
+            "Texto separado por tabuladores (*.tsv *.txt);;Todos los archivos (*)")
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8", newline="", buffering=1024 * 1024) as f:
+                for cols in self._selection_chunks(ranges):
+                    f.write(format_tsv(cols))
+        except OSError as e:
+            QMessageBox.critical(self, "Error al exportar", f"No se pudo escribir '{path}': {e}")
+            return
+        QMessageBox.information(self, "Éxito", f"Selección exportada en:\n{path}")
 
     def _delete_row(self):
         r = self.table.currentRow()
         if r >= 0:
+            self._push_history(DeleteRowsCommand(r, self._history.target.get_rows(r, 1)))
             self.table.removeRow(r)
         try:
             mgr = self._build_manager_from_table()
@@ -344,44 +553,54 @@ class MainWindow(QMainWindow):
 
 
     def _paste_to_table(self):
-        lines = QApplication.clipboard().text().splitlines()
-        r = self.table.currentRow()
-        if r < 0:
-            r = 0
-            if self.table.item(r,0) and not (self.table.item(r,0).flags() & Qt.ItemIsEditable):
-                pass
-
-        for ln_idx, ln in enumerate(lines):
-            if not ln.strip():
-                continue
-
-            current_id_item = self.table.item(r, 0)
-            is_id_cell_uneditable = current_id_item and not (current_id_item.flags() & Qt.ItemIsEditable)
-
-            if r >= self.table.rowCount():
-                self.table.insertRow(r)
-                id_it = QTableWidgetItem(str(r+1))
-                id_it.setFlags(Qt.ItemIsEnabled)
-                self.table.setItem(r,0,id_it)
-            elif is_id_cell_uneditable and (self.table.item(r,1) and self.table.item(r,1).text() or \
-                                          self.table.item(r,2) and self.table.item(r,2).text()):
-                pass
-
-            pts = [p.strip() for p in ln.split(",")]
-            if len(pts) < 2:
-                pts = [p.strip() for p in ln.split("\t")]
-
-            if len(pts) >= 2:
-                try:
-                    float(pts[0].replace(',','.'))
-                    float(pts[1].replace(',','.'))
-                except ValueError:
-                    QMessageBox.warning(self, "Error de Pegado", f"Línea '{ln}' no contiene coordenadas X,Y numéricas válidas.")
-                    continue
+        """
+        Pega pares X,Y desde el portapapeles a partir de la fila actual.
+
+        Todo el texto se interpreta de una vez y las filas se escriben con las
+        señales de la tabla bloqueadas: la vista previa se actualiza una sola vez
+        al final en lugar de una por celda.
+        """
+        xs, ys, invalid = parse_coordinate_text(QApplication.clipboard().text())
+        if invalid:
+            shown = "\n".join(invalid[:5]) + (f"\n... y {len(invalid) - 5} más." if len(invalid) > 5 else "")
+            QMessageBox.warning(self, "Error de Pegado",
+                                f"{len(invalid)} líneas no contienen coordenadas X,Y numéricas válidas y se omitieron:\n{shown}")
+        if not xs:
+            return
+
+        r = max(self.table.currentRow(), 0)
+        n = len(xs)
 
-                self.table.setItem(r,1, QTableWidgetItem(pts[0].replace(',','.')))
-                self.table.setItem(r,2, QTableWidgetItem(pts[1].replace(',','.')))
-                r += 1
+        # Estado previo del rango que puede sobrescribirse, para el historial
+        start_row, old_count = r, self.table.rowCount()
+        old_block = self._history.target.get_rows(start_row, n)
+        # Si se llega a la última fila se deja una fila vacía al final, igual
+        # que al completar la última fila a mano (ver _on_cell_changed)
+        new_count = r + n + 1 if r + n >= old_count else old_count
+
+        self.table.blockSignals(True)
+        self.table.setUpdatesEnabled(False)
+        try:
+            if new_count > old_count:
+                self.table.setRowCount(new_count)
+                for row in range(old_count, new_count):
+                    id_it = QTableWidgetItem(str(row + 1))
+                    id_it.setFlags(Qt.ItemIsEnabled)
+                    self.table.setItem(row, 0, id_it)
+            for row, x_text, y_text in zip(range(r, r + n), xs, ys):
+                self.table.setItem(row, 1, QTableWidgetItem(x_text))
+                self.table.setItem(row, 2, QTableWidgetItem(y_text))
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.blockSignals(False)
+
+        # Bloque escrito, reconstruido sin releer la tabla: IDs existentes, IDs
+        # de las filas nuevas y la fila vacía final si se añadió
+        n_existing = min(n, old_count - r)
+        new_ids = old_block.column(0)[:n_existing] + [str(row + 1) for row in range(old_count, new_count)]
+        pad = [""] * (new_count - r - n) if new_count > old_count else []
+        self._record_range_write(start_row, old_count, old_block, n,
+                                 RowBlock(new_ids, xs + pad, ys + pad))
 
         try:
             mgr = self._build_manager_from_table()
@@ -390,21 +609,33 @@ class MainWindow(QMainWindow):
              print(f"Error al construir features para preview tras pegar: {e}")
 
 
-    def _build_manager_from_table(self):
-        coords = []
+    def _valid_rows(self):
+        """(coords, ids) de las filas con X e Y numéricos, en orden."""
+        coords, row_ids = [], []
         for r in range(self.table.rowCount()):
             xi = self.table.item(r,1); yi = self.table.item(r,2)
             if xi and yi and xi.text().strip() and yi.text().strip():
                 try:
                     x_val = float(xi.text())
                     y_val = float(yi.text())
-                    coords.append((x_val, y_val))
                 except ValueError:
-                    pass
+                    continue
+                coords.append((x_val, y_val))
+                id_item = self.table.item(r, 0)
+                row_ids.append(id_item.text().strip() if id_item else "")
+        return coords, row_ids
+
+    @profiled_stage("construir geometrías desde la tabla")
+    def _build_manager_from_table(self):
+        coords, row_ids = self._valid_rows()
+        layout = self._active_layout(row_ids)
+        if layout is not None:
+            return self._build_manager_from_layout(layout, coords)
 
         mgr = CoordinateManager(
             hemisphere=self.cb_hemisferio.currentText(),
-            zone=int(self.cb_zona.currentText())
+            zone=int(self.cb_zona.currentText()),
+            precision=self._configured_precision()
         )
         nid = 1
 
@@ -438,6 +669,92 @@ class MainWindow(QMainWindow):
                     QMessageBox.warning(self, "Datos insuficientes", "Se necesitan al menos 3 coordenadas para un Polígono.")
         return mgr
 
+    def _build_manager_from_layout(self, layout, coords):
+        """
+        Reconstruye los features importados (con sus partes y huecos) desde las
+        filas válidas de la tabla, que siguen el orden de `layout`. Los
+        checkboxes de tipo filtran qué features se incluyen.
+        """
+        checked = {
+            GeometryType.PUNTO: self.chk_punto.isChecked(),
+            GeometryType.POLILINEA: self.chk_polilinea.isChecked(),
+            GeometryType.POLIGONO: self.chk_poligono.isChecked(),
+        }
+        builder = FeatureArraysBuilder()
+        start = 0
+        for fid, geom_type, part_sizes in layout["features"]:
+            parts = []
+            for ring_sizes in part_sizes:
+                rings = []
+                for n in ring_sizes:
+                    ring = coords[start:start + n]
+                    start += n
+                    # Los anillos no repiten el vértice de cierre
+                    if geom_type == GeometryType.POLIGONO and len(ring) > 3 and ring[0] == ring[-1]:
+                        ring = ring[:-1]
+                    rings.append(ring)
+                parts.append(rings)
+            if checked.get(geom_type):
+                builder.add(fid, GeometryType.CODES[geom_type], parts)
+        return CoordinateManager.from_arrays(self.cb_hemisferio.currentText(), int(self.cb_zona.currentText()),
+                                             builder.build(), precision=self._configured_precision())
+
+    def _set_layout(self, entries, row_ids):
+        """
+        Guarda la estructura de los features volcados a la tabla (un vértice
+        por fila, en orden): `entries` es [(id, tipo, [[vértices por anillo]
+        por parte])]. Solo se guarda si algún feature tiene varias partes o
+        huecos; mientras las filas válidas de la tabla sean las mismas (mismos
+        IDs), _build_manager_from_table reconstruye esos features en vez de
+        unir todas las filas en una sola geometría.
+        """
+        if not any(len(parts) > 1 or len(parts[0]) > 1 for _, _, parts in entries):
+            self._layout = None
+            return
+        self._layout = {"ids": list(row_ids), "features": entries}
+
+    @staticmethod
+    def _layout_entries(features: list) -> list:
+        """Entradas de _set_layout de una lista de features (con "parts" si las tienen)."""
+        return [(feat["id"], feat["type"],
+                 [[len(ring) for ring in rings] for rings in (feat.get("parts") or [[feat["coords"]]])])
+                for feat in features]
+
+    def _active_layout(self, row_ids):
+        """El layout guardado si las filas válidas de la tabla son las que se volcaron."""
+        if self._layout is not None and self._layout["ids"] == row_ids:
+            return self._layout
+        return None
+
+    def _layout_in_use(self) -> bool:
+        return self._active_layout(self._valid_rows()[1]) is not None
+
+    def _confirm_layout_lost(self) -> bool:
+        """
+        Si la tabla tenía features con huecos o multipartes pero sus filas
+        cambiaron (se añadieron o borraron), avisa de que se exportará una
+        sola geometría con todas las filas. Devuelve False si el usuario
+        cancela.
+        """
+        if self._layout is None or self._layout_in_use():
+            return True
+        complex_count = sum(1 for _, _, parts in self._layout["features"] if len(parts) > 1 or len(parts[0]) > 1)
+        answer = QMessageBox.question(
+            self, "Estructura importada perdida",
+            f"Las filas de la tabla cambiaron desde la importación: los huecos y las partes de "
+            f"{complex_count} feature(s) ya no pueden reconstruirse y todas las filas se unirán en una "
+            "sola geometría por tipo.\n\n¿Exportar igualmente?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        return answer == QMessageBox.Yes
+
+    def _project_metadata(self) -> dict:
+        """Metadatos del proyecto nativo; "estructura" indica que se guardan features independientes."""
+        gui_state = self._gui_state()
+        if self._layout_in_use():
+            gui_state["estructura"] = True
+        return {"gui": gui_state}
+
+    @profiled_stage("dibujar escena")
     def _redraw_scene(self, mgr):
         self.scene.clear()
         if not mgr:
@@ -470,32 +787,61 @@ class MainWindow(QMainWindow):
 
         selected_format = self.cb_format.currentText()
 
-        features = mgr.get_features()
+        with self._memory_profiler.stage("features para exportar (dicts)"):
+            features = mgr.get_features()
         if not features:
             QMessageBox.warning(self, "Nada para exportar", "No hay geometrías definidas para exportar.")
             return
 
+        if not self._confirm_layout_lost():
+            return
+        proceed, validation_msg = self._validate_before_export(mgr)
+        if not proceed:
+            return
+
         hemisphere = self.cb_hemisferio.currentText()
         zone = self.cb_zona.currentText()
+        attributes = self._export_attributes(mgr)
 
+        # Los avisos de los exportadores se muestran juntos al final (no en la consola)
+        diagnostics = Diagnostics(echo_limit=0)
         try:
             export_successful = False
-            if selected_format == ".kml":
-                KMLExporter.export(features, full_path_filename, hemisphere, zone)
-                export_successful = True
-            elif selected_format == ".kmz":
-                KMZExporter.export(features, full_path_filename, hemisphere, zone)
-                export_successful = True
-            elif selected_format == ".shp":
-                ShapefileExporter.export(features, full_path_filename, hemisphere, zone)
-                export_successful = True
-            else:
-                QMessageBox.warning(self, "Formato no soportado",
-                                    f"La exportación al formato '{selected_format}' aún no está implementada.")
-                return
+            with self._memory_profiler.stage(f"exportar {selected_format}"):
+                if selected_format == ".kml":
+                    KMLExporter.export(features, full_path_filename, hemisphere, zone, diagnostics=diagnostics,
+                                       attributes=attributes)
+                    export_successful = True
+                elif selected_format == ".kmz":
+                    KMZExporter.export(features, full_path_filename, hemisphere, zone, diagnostics=diagnostics,
+                                       attributes=attributes)
+                    export_successful = True
+                elif selected_format == ".shp":
+                    ShapefileExporter.export(features, full_path_filename, hemisphere, zone, diagnostics=diagnostics,
+                                             attributes=attributes)
+                    export_successful = True
+                elif selected_format == GEOPACKAGE_EXTENSION:
+                    GeoPackageExporter.export(features, full_path_filename, hemisphere, zone, diagnostics=diagnostics,
+                                              attributes=attributes)
+                    export_successful = True
+                elif selected_format == FLATGEOBUF_EXTENSION:
+                    FlatGeobufExporter.export(features, full_path_filename, hemisphere, zone, diagnostics=diagnostics,
+                                              attributes=attributes)
+                    export_successful = True
+                elif selected_format == PROJECT_EXTENSION:
+                    ProjectFile.save(mgr, full_path_filename, self._project_metadata())
+                    export_successful = True
+                else:
+                    QMessageBox.warning(self, "Formato no soportado",
+                                        f"La exportación al formato '{selected_format}' aún no está implementada.")
+                    return
 
             if export_successful:
-                QMessageBox.information(self, "Éxito", f"Archivo guardado en:\n{full_path_filename}")
+                msg = f"Archivo guardado en:\n{full_path_filename}{validation_msg}{self._diagnostics_text(diagnostics)}"
+                if diagnostics:
+                    QMessageBox.warning(self, "Guardado con avisos", msg)
+                else:
+                    QMessageBox.information(self, "Éxito", msg)
 
         except ImportError as ie:
             QMessageBox.critical(self, "Error de dependencia",
@@ -505,13 +851,167 @@ class MainWindow(QMainWindow):
                                  f"Ocurrió un error al guardar en formato '{selected_format}':\n{str(e)}")
 
     def _on_export(self):
-        self._on_guardar()
+        """Exporta a varios formatos a la vez con una sola preparación de geometrías."""
+        formats = self._ask_export_formats()
+        if not formats:
+            return
+        dirp = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta de exportación")
+        if not dirp:
+            return
+        proj = self.le_nombre.text().strip() or "proyecto"
+
+        try:
+            mgr = self._build_manager_from_table()
+        except (ValueError, TypeError) as e:
+            QMessageBox.critical(self, "Error en datos de tabla", f"No se pueden generar las geometrías para exportar: {e}")
+            return
+        if mgr.feature_count() == 0:
+            QMessageBox.warning(self, "Nada para exportar", "No hay geometrías definidas para exportar.")
+            return
+        if not self._confirm_layout_lost():
+            return
+        proceed, validation_msg = self._validate_before_export(mgr)
+        if not proceed:
+            return
+
+        progress = QProgressDialog("Preparando geometrías...", "Cancelar", 0, len(formats), self)
+        progress.setWindowTitle("Exportación múltiple")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        QApplication.processEvents()
+
+        def on_progress(done, total, fmt, error):
+            progress.setValue(done)
+            progress.setLabelText(f"{done}/{total}: {proj}{fmt}" + (" (error)" if error else ""))
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        try:
+            with self._memory_profiler.stage("exportar varios formatos"):
+                report = MultiExporter.export(mgr, os.path.join(dirp, proj), formats,
+                                              self.cb_hemisferio.currentText(), self.cb_zona.currentText(),
+                                              metadata=self._project_metadata(), on_progress=on_progress,
+                                              diagnostics=Diagnostics(echo_limit=0),
+                                              attributes=self._export_attributes(mgr))
+        except ValueError as e:
+            QMessageBox.critical(self, "Error al exportar", str(e))
+            return
+        finally:
+            progress.close()
+
+        msg = f"Archivos en:\n{dirp}\n\n{MultiExporter.format_report(report)}{validation_msg}"
+        skipped = len(formats) - len(report["formatos"])
+        if skipped:
+            msg += f"\n\nExportación cancelada: {skipped} formato(s) no se escribieron."
+        if any(r["error"] for r in report["formatos"].values()):
+            QMessageBox.warning(self, "Exportación múltiple", msg)
+        else:
+            QMessageBox.information(self, "Exportación múltiple", msg)
+
+    def _export_attributes(self, mgr):
+        """
+        Atributos importados alineados con mgr.get_features(), o None si no
+        hay. Cada fila válida de la tabla se asocia a su feature de origen por
+        el ID ("7" o "7.3"): un punto toma los atributos de su fila y una
+        polilínea o polígono los del feature de origen solo si todas sus filas
+        vienen del mismo; si no, quedan nulos. Si la tabla conserva la
+        estructura importada (ver _set_layout), cada feature toma los de su ID.
+        """
+        if self._attributes is None or not self._attributes.names:
+            return None
+        _, row_ids = self._valid_rows()
+        if self._active_layout(row_ids) is not None:
+            # Features reconstruidos con su ID de origen
+            return self._attributes.take([self._attribute_rows.get(str(feat["id"]), -1)
+                                          for feat in mgr.get_features()])
+        sources = []
+        for key in row_ids:
+            source = self._attribute_rows.get(key)
+            if source is None:
+                source = self._attribute_rows.get(key.rsplit(".", 1)[0], -1)
+            sources.append(source)
+
+        single = sources[0] if sources and sources.count(sources[0]) == len(sources) else -1
+        indices = []
+        points = 0
+        for feat in mgr.get_features():
+            if feat["type"] == GeometryType.PUNTO:
+                indices.append(sources[points] if points < len(sources) else -1)
+                points += 1
+            else:
+                indices.append(single)
+        return self._attributes.take(indices)
+
+    def _keep_attributes(self, features: list, builder: AttributeBuilder):
+        """Guarda los atributos de una importación (features antes del ajuste de vértices)."""
+        table = builder.build()
+        self._attributes = table if table.names else None
+        self._attribute_rows = {str(feat.get("id")): i for i, feat in enumerate(features)} if table.names else {}
+
+    @staticmethod
+    def _diagnostics_text(diagnostics) -> str:
+        """Resumen de avisos de un importador/exportador para añadir a un mensaje ("" si no hay)."""
+        if not diagnostics:
+            return ""
+        return f"\n\nAvisos ({diagnostics.count()}):\n{diagnostics.summary()}"
+
+    def _validate_before_export(self, mgr):
+        """
+        Etapa opcional previa a exportar: valida los polígonos de `mgr` si
+        está activada en la configuración. Si hay polígonos inválidos muestra
+        el informe por feature y pregunta si exportar igualmente.
+        Devuelve (continuar, texto para el mensaje final).
+        """
+        if not self._config.get("validate_before_export"):
+            return True, ""
+        with self._memory_profiler.stage("validar polígonos"):
+            report = validate_polygons(mgr.to_arrays())
+        seconds = sum(report["segundos"].values())
+        summary = (f"\n\nValidación de polígonos: {report['poligonos']} revisados, "
+                   f"{report['invalidos']} inválidos ({seconds * 1000:.0f} ms).")
+        if report["invalidos"]:
+            answer = QMessageBox.question(
+                self, "Polígonos inválidos",
+                f"{format_validity_report(report)}\n\n¿Exportar de todos modos?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                return False, summary
+        return True, summary
+
+    def _ask_export_formats(self) -> list:
+        """Diálogo con una casilla por formato; devuelve los elegidos (vacío si se cancela)."""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Exportar a varios formatos")
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel("Formatos a exportar:", dialog))
+        checks = []
+        for i in range(self.cb_format.count()):
+            fmt = self.cb_format.itemText(i)
+            chk = QCheckBox(fmt, dialog)
+            chk.setChecked(fmt == self.cb_format.currentText())
+            layout.addWidget(chk)
+            checks.append(chk)
+
+        buttons = QHBoxLayout()
+        btn_ok = QPushButton("Exportar", dialog)
+        btn_cancel = QPushButton("Cancelar", dialog)
+        buttons.addStretch(1)
+        buttons.addWidget(btn_ok)
+        buttons.addWidget(btn_cancel)
+        layout.addLayout(buttons)
+        btn_ok.clicked.connect(dialog.accept)
+        btn_cancel.clicked.connect(dialog.reject)
+
+        if dialog.exec() != QDialog.Accepted:
+            return []
+        return [chk.text() for chk in checks if chk.isChecked()]
 
     def _on_new(self):
-        self.table.clearContents()
-        self.table.setRowCount(1)
-        first = QTableWidgetItem("1"); first.setFlags(Qt.ItemIsEnabled)
-        self.table.setItem(0,0,first)
+        with self._recording_replace_all():
+            self.table.clearContents()
+            self.table.setRowCount(1)
+            first = QTableWidgetItem("1"); first.setFlags(Qt.ItemIsEnabled)
+            self.table.setItem(0,0,first)
         if self.scene:
             self.scene.clear()
 
@@ -519,64 +1019,227 @@ class MainWindow(QMainWindow):
         self.chk_polilinea.setChecked(False)
         self.chk_poligono.setChecked(False)
         self.le_nombre.clear()
+        self._attributes = None
+        self._attribute_rows = {}
+        self._layout = None
 
     def _on_open(self):
-        filters = "Archivos de Proyecto SIG (*.kml *.kmz *.shp);;Todos los archivos (*)"
+        filters = f"Archivos de Proyecto SIG (*{PROJECT_EXTENSION} *.kml *.kmz *.shp);;Todos los archivos (*)"
         path, _ = QFileDialog.getOpenFileName(
             self, "Abrir Proyecto", "", filters
         )
-        if path:
+        if not path:
+            return
+        if os.path.splitext(path)[1].lower() == '.shp':
+            self._open_shapefile(path)
+            return
+        if os.path.splitext(path)[1].lower() != PROJECT_EXTENSION:
             QMessageBox.information(self, "Abrir Proyecto", f"Funcionalidad de abrir proyecto '{path}' aún no implementada.")
             print(f"Abrir proyecto: {path}")
+            return
+
+        try:
+            mgr, metadata = ProjectFile.load(path)
+        except FileNotFoundError:
+            QMessageBox.critical(self, "Error al abrir", f"Archivo no encontrado: {path}")
+            return
+        except RuntimeError as e:
+            QMessageBox.critical(self, "Error al abrir", str(e))
+            return
+
+        self._load_project(mgr, metadata.get("gui"))
+        if not self.le_nombre.text():
+            self.le_nombre.setText(os.path.splitext(os.path.basename(path))[0])
+
+    def _open_shapefile(self, path):
+        """Abre un Shapefile reproyectándolo a la zona UTM activa."""
+        zone_str = self.cb_zona.currentText()
+        if not zone_str:
+            QMessageBox.warning(self, "Zona no seleccionada", "Por favor, seleccione una zona UTM antes de abrir un Shapefile.")
+            return
+        try:
+            with self._memory_profiler.stage("importar Shapefile (arrays)"):
+                mgr = ShapefileImporter.import_file(path, self.cb_hemisferio.currentText(), int(zone_str))
+        except FileNotFoundError:
+            QMessageBox.critical(self, "Error al abrir", f"Archivo no encontrado: {path}")
+            return
+        except (RuntimeError, ValueError) as e:
+            QMessageBox.critical(self, "Error al abrir Shapefile", str(e))
+            return
+        if mgr.feature_count() == 0:
+            QMessageBox.information(self, "Abrir Shapefile", "El archivo no contiene geometrías soportadas.")
+            return
+        mgr, snap_msg = self._snap_on_import(mgr)
+
+        self._load_project(mgr)
+        if snap_msg:
+            QMessageBox.information(self, "Abrir Shapefile", snap_msg.strip())
+        if not self.le_nombre.text():
+            self.le_nombre.setText(os.path.splitext(os.path.basename(path))[0])
+
+    def _on_preview_csv(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Vista previa CSV", self._config.get("default_dir", ""),
+            "Archivos CSV (*.csv *.txt);;Todos los archivos (*)"
+        )
+        if not path:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            dialog = CSVPreviewDialog(path, self)
+        except (FileNotFoundError, RuntimeError, OSError) as e:
+            QMessageBox.critical(self, "Vista previa CSV", str(e))
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        dialog.exec()
+
+    def _gui_state(self):
+        """Estado de la GUI que se guarda junto al proyecto nativo."""
+        return {
+            "punto":     self.chk_punto.isChecked(),
+            "polilinea": self.chk_polilinea.isChecked(),
+            "poligono":  self.chk_poligono.isChecked(),
+            "nombre":    self.le_nombre.text().strip()
+        }
+
+    def _apply_gui_state(self, gui_state):
+        self.chk_punto.setChecked(bool(gui_state.get("punto")))
+        self.chk_polilinea.setChecked(bool(gui_state.get("polilinea")))
+        self.chk_poligono.setChecked(bool(gui_state.get("poligono")))
+        self.le_nombre.setText(gui_state.get("nombre", ""))
+
+    @profiled_stage("volcar proyecto a la tabla")
+    def _load_project(self, mgr, gui_state=None):
+        """
+        Vuelca un proyecto (CoordinateManager respaldado por arrays) a la tabla.
+
+        Si el proyecto se guardó desde la GUI, todos sus features salen de la
+        misma lista de coordenadas (la tabla): se recupera del primer feature
+        lineal/poligonal o, si solo hay puntos, de la secuencia de puntos.
+        En otro caso (o si se guardó con features independientes, "estructura")
+        se vuelca cada vértice como en la importación KML, todos los anillos de
+        cada feature seguidos, y si hay huecos o multipartes se guarda su
+        estructura para reconstruirlos (ver _set_layout).
+        """
+        arrays = mgr.to_arrays()
+        offsets = arrays.offsets.tolist()
+        types = arrays.types.tolist()
+        ids = arrays.ids.tolist()
+        point_code = GeometryType.CODES[GeometryType.PUNTO]
+        per_feature = gui_state is None or bool(gui_state.get("estructura"))
+
+        if not per_feature:
+            first_path = next((i for i, t in enumerate(types) if t != point_code), None)
+            if first_path is None:
+                xy = arrays.xy
+            else:
+                xy = arrays.xy[offsets[first_path]:offsets[first_path + 1]]
+            row_ids = [str(i + 1) for i in range(len(xy))]
+        else:
+            xy = arrays.xy
+            row_ids = []
+            for fid, start, end in zip(ids, offsets[:-1], offsets[1:]):
+                if end - start == 1:
+                    row_ids.append(str(fid))
+                else:
+                    row_ids.extend(f"{fid}.{j+1}" for j in range(end - start))
+
+        # Texto de X/Y generado en bloque desde enteros de punto fijo
+        xs_text, ys_text = FixedPointXY.from_float(xy, self._display_precision()).format_columns()
+        block = RowBlock.from_text_columns("\n".join(row_ids), xs_text, ys_text, len(row_ids))
+
+        self.cb_hemisferio.setCurrentText(mgr.hemisphere)
+        self.cb_zona.setCurrentText(str(mgr.zone))
+        self.table.blockSignals(True)
+        self.table.setUpdatesEnabled(False)
+        try:
+            with self._recording_replace_all():
+                self._on_new()
+                self._history.target.replace_all(block)
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.blockSignals(False)
+
+        if per_feature and arrays.has_rings:
+            geoms, parts, rings = (a.tolist() for a in arrays.rings())
+            sizes = [end - start for start, end in zip(rings[:-1], rings[1:])]
+            self._set_layout([(fid, GeometryType.FROM_CODE[code],
+                               [sizes[parts[p]:parts[p + 1]] for p in range(geoms[i], geoms[i + 1])])
+                              for i, (fid, code) in enumerate(zip(ids, types))], row_ids)
+
+        if gui_state is not None:
+            self._apply_gui_state(gui_state)
+        else:
+            present = set(types)
+            self.chk_punto.setChecked(point_code in present)
+            self.chk_polilinea.setChecked(GeometryType.CODES[GeometryType.POLILINEA] in present)
+            self.chk_poligono.setChecked(GeometryType.CODES[GeometryType.POLIGONO] in present)
+
+        try:
+            self._redraw_scene(self._build_manager_from_table())
+        except (ValueError, TypeError) as e:
+            print(f"Error al construir features para preview tras abrir proyecto: {e}")
 
     def _on_import(self):
-        filters = "Archivos de Coordenadas (*.csv *.txt);;Archivos KML (*.kml);;Todos los archivos (*)"
-        path, selected_filter = QFileDialog.getOpenFileName(
+        filters = ("Archivos importables (*.csv *.txt *.kml *.kmz);;Archivos de Coordenadas (*.csv *.txt);;"
+                   "Archivos KML/KMZ (*.kml *.kmz);;Todos los archivos (*)")
+        paths, selected_filter = QFileDialog.getOpenFileNames(
             self, "Importar Coordenadas o Geometrías", "", filters
         )
 
-        if not path:
+        if not paths:
+            return
+        if len(paths) > 1:
+            self._import_batch(paths)
             return
+        path = paths[0]
 
         file_ext = os.path.splitext(path)[1].lower()
 
         if file_ext in ['.csv', '.txt']:
             try:
-                imported_features = CSVImporter.import_file(path)
+                attributes = AttributeBuilder()
+                diagnostics = Diagnostics(echo_limit=0)
+                with self._memory_profiler.stage("importar CSV (parseo + features)"):
+                    delimiter, has_header = sniff_csv(path)
+                    imported_features = CSVImporter.import_file(path, delimiter=delimiter, skip_header=int(has_header),
+                                                                attributes=attributes, diagnostics=diagnostics)
 
                 if not imported_features:
-                    QMessageBox.information(self, "Importación CSV", "No se importaron geometrías válidas desde el archivo.")
+                    QMessageBox.information(self, "Importación CSV", "No se importaron geometrías válidas desde el archivo."
+                                            + self._diagnostics_text(diagnostics))
                     return
+                source_features = imported_features
+                imported_features, snap_msg = self._snap_on_import(imported_features)
 
-                self._on_new()
-
-                self.table.setRowCount(len(imported_features))
+                row_ids, xs, ys = [], [], []
                 for i, feat in enumerate(imported_features):
                     feat_id = feat.get("id", i + 1)
                     coords_list = feat.get("coords", [])
-
-                    id_item = QTableWidgetItem(str(feat_id))
-                    id_item.setFlags(Qt.ItemIsEnabled)
-                    self.table.setItem(i, 0, id_item)
-
+                    row_ids.append(str(feat_id))
                     if coords_list and isinstance(coords_list[0], (list, tuple)) and len(coords_list[0]) == 2:
                         x_coord, y_coord = coords_list[0]
-                        self.table.setItem(i, 1, QTableWidgetItem(str(x_coord if x_coord is not None else "")))
-                        self.table.setItem(i, 2, QTableWidgetItem(str(y_coord if y_coord is not None else "")))
+                        xs.append(str(x_coord if x_coord is not None else ""))
+                        ys.append(str(y_coord if y_coord is not None else ""))
                     else:
-                        self.table.setItem(i, 1, QTableWidgetItem(""))
-                        self.table.setItem(i, 2, QTableWidgetItem(""))
+                        xs.append("")
+                        ys.append("")
                         print(f"Advertencia: Feature ID {feat_id} importado sin coordenadas válidas.")
 
-                self.chk_punto.setChecked(True)
-                self.chk_polilinea.setChecked(False)
-                self.chk_poligono.setChecked(False)
+                with self._memory_profiler.stage("llenar tabla (QTableWidgetItem)"):
+                    self._fill_table(RowBlock(row_ids, xs, ys))
+                    self.chk_punto.setChecked(True)
+                    self.chk_polilinea.setChecked(False)
+                    self.chk_poligono.setChecked(False)
+                self._keep_attributes(source_features, attributes)
 
                 try:
                     mgr = self._build_manager_from_table()
                     self._redraw_scene(mgr)
                     QMessageBox.information(self, "Importación CSV Exitosa",
-                                            f"{len(imported_features)} puntos importados desde {os.path.basename(path)}.")
+                                            f"{len(imported_features)} puntos importados desde {os.path.basename(path)}.{snap_msg}"
+                                            + self._diagnostics_text(diagnostics))
                 except (ValueError, TypeError) as e:
                     QMessageBox.critical(self, "Error al procesar datos importados",
                                          f"Los datos CSV importados no pudieron ser procesados: {e}")
@@ -588,7 +1251,7 @@ class MainWindow(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Error Inesperado", f"Ocurrió un error inesperado durante la importación CSV: {e}")
 
-        elif file_ext == '.kml':
+        elif file_ext in ('.kml', '.kmz'):
             try:
                 hemisphere = self.cb_hemisferio.currentText()
                 zone_str = self.cb_zona.currentText()
@@ -597,46 +1260,55 @@ class MainWindow(QMainWindow):
                     return
                 zone = int(zone_str)
 
-                imported_features = KMLImporter.import_file(path, hemisphere, zone)
+                importer = KMZImporter if file_ext == '.kmz' else KMLImporter
+                diagnostics = Diagnostics(echo_limit=0)
+                attributes = AttributeBuilder()
+                with self._memory_profiler.stage(f"importar {file_ext[1:].upper()} (parseo + features)"):
+                    imported_features = importer.import_file(path, hemisphere, zone, diagnostics=diagnostics,
+                                                             attributes=attributes)
 
                 if not imported_features:
-                    QMessageBox.information(self, "Importación KML", "No se importaron geometrías válidas desde el archivo KML.")
+                    QMessageBox.information(self, "Importación KML", "No se importaron geometrías válidas desde el archivo KML."
+                                            + self._diagnostics_text(diagnostics))
                     return
-
-                self._on_new()
-
-                row_index = 0  # fila actual en la tabla
-
-                for feat in imported_features:
-                    feat_id = feat.get("id", row_index + 1)
-                    coords = feat.get("coords", [])
-                    geom_type = feat.get("type", "").lower()
-                    if "polígono" in geom_type and len(coords) >= 3:
-                        if coords[0] != coords[-1]:
-                            coords.append(coords[0])    
-
-                    if not coords:
-                        continue
-
-                    for j, (x, y) in enumerate(coords):
-                        if row_index >= self.table.rowCount():
-                            self.table.insertRow(row_index)
-                        id_str = f"{feat_id}.{j+1}" if len(coords) > 1 else str(feat_id)
-                        id_item = QTableWidgetItem(id_str)
-                        id_item.setFlags(Qt.ItemIsEnabled)
-                        self.table.setItem(row_index, 0, id_item)
-                        self.table.setItem(row_index, 1, QTableWidgetItem(f"{x:.2f}"))
-                        self.table.setItem(row_index, 2, QTableWidgetItem(f"{y:.2f}"))
-                        row_index += 1
-
+                source_features = imported_features
+                imported_features, snap_msg = self._snap_on_import(imported_features)
+
+                with self._memory_profiler.stage("llenar tabla (QTableWidgetItem)"):
+                    decimals = self._display_precision()
+                    row_ids, xs, ys = [], [], []
+                    present = set()
+
+                    for feat in imported_features:
+                        feat_id = feat.get("id", len(row_ids) + 1)
+                        coords = feat.get("coords", [])
+                        geom_type = feat.get("type", "").lower()
+                        if feat.get("parts"):
+                            # Todas las partes y anillos, uno tras otro (ver _set_layout)
+                            coords = [pt for rings in feat["parts"] for ring in rings for pt in ring]
+                        elif "polígono" in geom_type and len(coords) >= 3:
+                            if coords[0] != coords[-1]:
+                                coords.append(coords[0])    
+
+                        if not coords:
+                            continue
+
+                        if len(coords) > 1:
+                            row_ids.extend(f"{feat_id}.{j+1}" for j in range(len(coords)))
+                        else:
+                            row_ids.append(str(feat_id))
+                        xs.extend(f"{x:.{decimals}f}" for x, _ in coords)
+                        ys.extend(f"{y:.{decimals}f}" for _, y in coords)
+                        present.add(geom_type)
+
+                    self._fill_table(RowBlock(row_ids, xs, ys))
                     # Activar el checkbox adecuado
-                    if "punto" in geom_type:
-                        self.chk_punto.setChecked(True)
-                    if "polilínea" in geom_type or "linestring" in geom_type:
-                        self.chk_polilinea.setChecked(True)
-                    if "polígono" in geom_type or "polygon" in geom_type:
-                        self.chk_poligono.setChecked(True)
-
+                    self.chk_punto.setChecked(any("punto" in t for t in present))
+                    self.chk_polilinea.setChecked(any("polilínea" in t or "linestring" in t for t in present))
+                    self.chk_poligono.setChecked(any("polígono" in t or "polygon" in t for t in present))
+                    self._set_layout(self._layout_entries([f for f in imported_features if f.get("coords")]),
+                                     row_ids)
+                self._keep_attributes(source_features, attributes)
 
                 # No se cambian los checkboxes. El usuario debe seleccionar el tipo apropiado
                 # para que _build_manager_from_table construya las geometrías deseadas.
@@ -648,7 +1320,8 @@ class MainWindow(QMainWindow):
                     QMessageBox.information(self, "Importación KML Exitosa",
                                             f"{len(imported_features)} geometrías importadas desde {os.path.basename(path)}.\n"
                                             "Active los checkboxes de tipo de geometría (Punto, Polilínea, Polígono)\n"
-                                            "para visualizar y procesar los datos importados.")
+                                            "para visualizar y procesar los datos importados." + snap_msg
+                                            + self._diagnostics_text(diagnostics))
                 except (ValueError, TypeError) as e:
                      QMessageBox.critical(self, "Error al procesar datos KML importados",
                                           f"Los datos KML importados no pudieron ser procesados: {e}")
@@ -663,16 +1336,471 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Formato no Soportado",
                                 f"La importación del formato de archivo '{file_ext}' aún no está implementada.")
 
+    def _fill_table(self, block):
+        """
+        Reemplaza la tabla por `block` como un solo paso del historial, con las
+        señales bloqueadas: la vista previa se reconstruye una vez al final y
+        no una por celda (ver _on_cell_changed).
+        """
+        self.table.blockSignals(True)
+        self.table.setUpdatesEnabled(False)
+        try:
+            with self._recording_replace_all():
+                self._on_new()
+                self._history.target.replace_all(block)
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.blockSignals(False)
+
+    def _on_import_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Importar carpeta de CSV/KML")
+        if not folder:
+            return
+        paths = BatchImporter.collect_files(folder)
+        if not paths:
+            QMessageBox.information(self, "Importar carpeta", "La carpeta no contiene archivos CSV, TXT, KML ni KMZ.")
+            return
+        self._import_batch(paths)
+
+    def _on_import_by_zone(self):
+        """
+        Importa un KML/KMZ que abarca varias zonas UTM: cada feature se
+        reproyecta a su zona natural y cada zona se exporta por separado
+        (MultiExporter) como <proyecto>_<zona><N|S> en los formatos elegidos.
+        La tabla no se modifica.
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Importar KML/KMZ por zonas UTM", "",
+                                              "KML/KMZ (*.kml *.kmz)")
+        if not path:
+            return
+        formats = self._ask_export_formats()
+        if not formats:
+            return
+        dirp = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta de exportación")
+        if not dirp:
+            return
+        proj = self.le_nombre.text().strip() or os.path.splitext(os.path.basename(path))[0]
+
+        diagnostics = Diagnostics(echo_limit=0)
+        importer = KMZImporter if path.lower().endswith(".kmz") else KMLImporter
+        try:
+            with self._memory_profiler.stage("importar por zonas"):
+                by_zone = importer.import_file_by_zone(path, diagnostics=diagnostics)
+        except (FileNotFoundError, RuntimeError) as e:
+            QMessageBox.critical(self, "Error de Importación", f"Error al importar el archivo: {e}")
+            return
+        if not by_zone:
+            QMessageBox.warning(self, "Importar por zonas", "El archivo no contiene geometrías válidas."
+                                + self._diagnostics_text(diagnostics))
+            return
+
+        progress = QProgressDialog("Exportando zonas...", "Cancelar", 0, len(by_zone), self)
+        progress.setWindowTitle("Importar por zonas")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+
+        lines, failed, done = [], False, 0
+        try:
+            for (hemisphere, zone), mgr in by_zone.items():
+                name = f"{proj}_{zone}{hemisphere[0]}"
+                progress.setLabelText(f"{done + 1}/{len(by_zone)}: {name}")
+                QApplication.processEvents()
+                if progress.wasCanceled():
+                    break
+                with self._memory_profiler.stage("exportar por zonas"):
+                    report = MultiExporter.export(mgr, os.path.join(dirp, name), formats, hemisphere, zone,
+                                                  diagnostics=diagnostics)
+                errors = [f"{fmt}: {r['error']}" for fmt, r in report["formatos"].items() if r["error"]]
+                failed = failed or bool(errors)
+                lines.append(f"Zona {zone} {hemisphere}: {mgr.feature_count()} geometrías -> {name} "
+                             f"({report['total_segundos']:.2f} s)")
+                lines.extend(f"  ERROR {e}" for e in errors)
+                done += 1
+                progress.setValue(done)
+        except ValueError as e:
+            QMessageBox.critical(self, "Error al exportar", str(e))
+            return
+        finally:
+            progress.close()
+
+        msg = f"Archivos en:\n{dirp}\n\n" + "\n".join(lines)
+        if done < len(by_zone):
+            msg += f"\n\nExportación cancelada: {len(by_zone) - done} zona(s) no se escribieron."
+        msg += self._diagnostics_text(diagnostics)
+        if failed:
+            QMessageBox.warning(self, "Importar por zonas", msg)
+        else:
+            QMessageBox.information(self, "Importar por zonas", msg)
+
+    def _import_batch(self, paths):
+        """
+        Importa varios archivos en paralelo (BatchImporter) y vuelca el
+        resultado fusionado en la tabla. Los errores por archivo se informan
+        al final sin detener el lote.
+        """
+        hemisphere = self.cb_hemisferio.currentText()
+        zone_str = self.cb_zona.currentText()
+        if not zone_str:
+            QMessageBox.warning(self, "Zona no seleccionada", "Por favor, seleccione una zona UTM antes de importar.")
+            return
+
+        progress = QProgressDialog("Importando archivos...", "Cancelar", 0, len(paths), self)
+        progress.setWindowTitle("Importación múltiple")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+
+        processed = [0]
+
+        def on_progress(done, total, path, error):
+            processed[0] = done
+            progress.setValue(done)
+            progress.setLabelText(f"{done}/{total}: {os.path.basename(path)}")
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+
+        diagnostics = Diagnostics(echo_limit=0)
+        attributes = AttributeBuilder()
+        try:
+            mgr, errors = BatchImporter.import_files(paths, hemisphere, int(zone_str), on_progress=on_progress,
+                                                     diagnostics=diagnostics, attributes=attributes)
+        except (RuntimeError, ValueError) as e:
+            QMessageBox.critical(self, "Error de Importación", f"Error al importar los archivos: {e}")
+            return
+        finally:
+            progress.close()
+
+        snap_msg = ""
+        if mgr.feature_count():
+            source_features = mgr.get_features()
+            mgr, snap_msg = self._snap_on_import(mgr)
+            self._load_project(mgr)
+            self._keep_attributes(source_features, attributes)
+
+        n_ok = processed[0] - len(errors)
+        msg = f"{mgr.feature_count()} geometrías importadas desde {n_ok} de {len(paths)} archivos.{snap_msg}"
+        if processed[0] < len(paths):
+            msg += f"\nImportación cancelada: {len(paths) - processed[0]} archivos no se procesaron."
+        if errors:
+            shown = list(errors.items())[:10]
+            msg += "\n\nArchivos con errores:\n" + "\n".join(f"{os.path.basename(p)}: {e}" for p, e in shown)
+            if len(errors) > len(shown):
+                msg += f"\n... y {len(errors) - len(shown)} más."
+        msg += self._diagnostics_text(diagnostics)
+        if errors:
+            QMessageBox.warning(self, "Importación múltiple", msg)
+        else:
+            QMessageBox.information(self, "Importación múltiple", msg)
+
+    # ---- historial de deshacer/rehacer ----
+
+    def _push_history(self, command):
+        if self._history_suspended or self._history.is_applying:
+            return
+        if self._journal is not None:
+            self._journal.record(command)
+        if not self._history.push(command):
+            QMessageBox.warning(
+                self, "Historial de deshacer vaciado",
+                f"La última acción ocupa {command.nbytes / 2**20:.1f} MB y supera el presupuesto de deshacer "
+                f"({self._history.max_bytes / 2**20:.0f} MB).\n\n"
+                "No se puede deshacer y el historial anterior se ha vaciado. Puede aumentar el "
+                "presupuesto en Configuración.")
+
+    def _on_history_applied(self, command, undone):
+        if self._journal is not None:
+            self._journal.record(command, undo=undone)
+
+    def _on_table_edit(self, row, col, old, new, apply):
+        # La edición y la fila que _on_cell_changed pueda añadir se deshacen juntas
+        with self._history.group():
+            self._push_history(CellEditCommand(row, col, old, new))
+            apply()
+
+    @contextmanager
+    def _recording_replace_all(self):
+        """Registra como un solo paso un bloque que reemplaza toda la tabla."""
+        if self._history_suspended or self._history.is_applying:
+            yield
+            return
+        target = self._history.target
+        old_block = target.get_rows(0, self.table.rowCount())
+        self._history_suspended += 1
+        try:
+            yield
+        finally:
+            self._history_suspended -= 1
+        self._push_history(ReplaceAllCommand(old_block, target.get_rows(0, self.table.rowCount())))
+
+    def _record_range_write(self, start_row, old_count, old_block, written, new_block=None):
+        """
+        Registra una escritura contigua desde start_row (pegar). Las filas
+        nuevas solo pueden haberse añadido al final de la tabla. Si se conoce
+        el contenido escrito (`new_block`) no se vuelve a leer de la tabla.
+        """
+        n_old = min(written, old_count - start_row, len(old_block))
+        added = self.table.rowCount() - old_count
+        if written <= 0 and added <= 0:
+            return
+        old_rows = list(old_block.rows())[:n_old]
+        if new_block is None:
+            new_block = self._history.target.get_rows(start_row, n_old + max(0, added))
+        self._push_history(WriteRangeCommand(start_row, RowBlock.from_rows(old_rows), new_block))
+
+    def _apply_history(self, step):
+        self.table.blockSignals(True)
+        self.table.setUpdatesEnabled(False)
+        try:
+            done = step()
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.blockSignals(False)
+        if done:
+            try:
+                self._redraw_scene(self._build_manager_from_table())
+            except (ValueError, TypeError) as e:
+                print(f"Error al construir features para preview tras deshacer/rehacer: {e}")
+
+    def _update_undo_actions(self):
+        self.action_undo.setEnabled(self._history.can_undo())
+        self.action_redo.setEnabled(self._history.can_redo())
+
     def _on_undo(self):
-        QMessageBox.information(self, "Deshacer", "Funcionalidad de Deshacer aún no implementada.")
-        print("Deshacer acción")
+        self._apply_history(self._history.undo)
 
     def _on_redo(self):
-        QMessageBox.information(self, "Rehacer", "Funcionalidad de Rehacer aún no implementada.")
-        print("Rehacer acción")
+        self._apply_history(self._history.redo)
+
+    # ---- autoguardado ----
+
+    def _autosave_state(self):
+        return dict(self._gui_state(),
+                    hemisferio=self.cb_hemisferio.currentText(),
+                    zona=self.cb_zona.currentText())
+
+    def _table_block(self):
+        return self._history.target.get_rows(0, self.table.rowCount())
+
+    def _start_autosave(self):
+        """
+        Ofrece recuperar una sesión interrumpida (de otra ejecución, nunca la
+        de otra ventana abierta) y abre el diario propio de esta ventana. La
+        sesión recuperada se borra cuando su contenido ya está en el diario
+        nuevo.
+        """
+        orphan = Journal.claim_orphan(AUTOSAVE_DIR)
+        if orphan is not None and not self._offer_recovery(orphan):
+            orphan.discard()
+            orphan = None
+        journal = Journal(AUTOSAVE_DIR)
+        try:
+            journal.open(self._table_block(), self._autosave_state())
+        except OSError as e:
+            print(f"Advertencia: No se pudo iniciar el autoguardado: {e}")
+            if orphan is not None:
+                orphan.release()  # se volverá a ofrecer
+            return
+        self._journal = journal
+        self._autosave_timer.start()
+        if orphan is not None:
+            journal.flush()
+            orphan.discard()
+
+    def _offer_recovery(self, orphan):
+        """Pregunta si recuperar `orphan` y, si se acepta, la vuelca a la tabla. Devuelve True si se recuperó."""
+        try:
+            recovery = orphan.recover()
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Recuperar sesión", f"{e}\nSe descartará el autoguardado.")
+            return False
+        when = time.strftime("%d/%m/%Y %H:%M", time.localtime(recovery.modified))
+        msg = (f"La sesión anterior no se cerró correctamente (último autoguardado: {when}, "
+               f"{len(recovery.block)} filas y {len(recovery.operations)} ediciones posteriores).\n\n"
+               "¿Desea recuperarla?")
+        if recovery.truncated:
+            msg += "\n\nLa última edición quedó incompleta y se descartará."
+        answer = QMessageBox.question(self, "Recuperar sesión", msg,
+                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if answer != QMessageBox.Yes:
+            return False
+
+        state = recovery.state or {}
+        if state.get("hemisferio"):
+            self.cb_hemisferio.setCurrentText(state["hemisferio"])
+        if state.get("zona"):
+            self.cb_zona.setCurrentText(str(state["zona"]))
+        self.table.blockSignals(True)
+        self.table.setUpdatesEnabled(False)
+        try:
+            with self._recording_replace_all():
+                recovery.apply(self._history.target)
+        finally:
+            self.table.setUpdatesEnabled(True)
+            self.table.blockSignals(False)
+        self._apply_gui_state(state)
+        try:
+            self._redraw_scene(self._build_manager_from_table())
+        except (ValueError, TypeError) as e:
+            print(f"Error al construir features para preview tras recuperar la sesión: {e}")
+        return True
+
+    def _on_autosave_tick(self):
+        journal = self._journal
+        if journal is None:
+            return
+        journal.record_state(self._autosave_state())
+        if journal.needs_compaction:
+            journal.compact(self._table_block(), self._autosave_state())
+
+    def _configured_precision(self):
+        """Decimales configurados por el usuario, o None si no se indicó (o no es válido)."""
+        text = str(self._config.get("precision", "")).strip()
+        if not text:
+            return None
+        try:
+            value = int(text)
+        except ValueError:
+            return None
+        return value if 0 <= value <= MAX_PRECISION else None
+
+    def _configured_snap_tolerance(self):
+        """Tolerancia de ajuste al importar (metros), o None si está desactivada (o no es válida)."""
+        text = str(self._config.get("snap_tolerance", "")).strip().replace(",", ".")
+        if not text:
+            return None
+        try:
+            value = float(text)
+        except ValueError:
+            return None
+        return value if value >= 0 else None
+
+    def _snap_on_import(self, imported):
+        """
+        Aplica el ajuste de vértices configurado a lo importado (lista de
+        features o CoordinateManager). Devuelve (resultado, texto para el
+        mensaje de importación, vacío si el ajuste está desactivado).
+        """
+        tolerance = self._configured_snap_tolerance()
+        if tolerance is None:
+            return imported, ""
+        with self._memory_profiler.stage("ajustar vértices"):
+            if isinstance(imported, CoordinateManager):
+                imported, report = snap_manager(imported, tolerance)
+            else:
+                imported, report = snap_features(imported, tolerance)
+        removed = report["vertices_eliminados"] + report["puntos_eliminados"]
+        return imported, (f"\n\nAjuste de vértices al importar ({tolerance:g} m): "
+                          f"{report['vertices_ajustados']} vértices movidos, {removed} eliminados.")
+
+    def _on_snap_vertices(self):
+        """Une los vértices de la tabla más cercanos que una tolerancia y elimina duplicados."""
+        tolerance = self._configured_snap_tolerance()
+        tolerance, ok = QInputDialog.getDouble(
+            self, "Limpiar vértices", "Tolerancia (m):",
+            0.5 if tolerance is None else tolerance, 0.0, 1e6, 3)
+        if not ok:
+            return
+        try:
+            mgr = self._build_manager_from_table()
+        except (ValueError, TypeError) as e:
+            QMessageBox.critical(self, "Error en datos de tabla", f"No se pueden generar las geometrías: {e}")
+            return
+        if mgr.feature_count() == 0:
+            QMessageBox.information(self, "Limpiar vértices", "No hay geometrías definidas en la tabla.")
+            return
+        # La tabla es una sola lista de vértices: si forma una línea o un
+        # polígono se limpia como tal (sin contar también sus puntos)
+        arrays = mgr.to_arrays()
+        point_code = GeometryType.CODES[GeometryType.PUNTO]
+        first_path = next((i for i, t in enumerate(arrays.types.tolist()) if t != point_code), None)
+        if first_path is not None:
+            start, end = arrays.offsets[first_path], arrays.offsets[first_path + 1]
+            mgr = CoordinateManager.from_arrays(
+                mgr.hemisphere, mgr.zone,
+                single_geometry_arrays(arrays.xy[start:end], closed=not self.chk_polilinea.isChecked()))
+
+        with self._memory_profiler.stage("ajustar vértices"):
+            snapped, report = snap_manager(mgr, tolerance)
+        if report["vertices_ajustados"] or report["vertices_eliminados"] or report["puntos_eliminados"]:
+            self._load_project(snapped, self._gui_state())
+        QMessageBox.information(self, "Limpiar vértices", format_snap_report(report, tolerance))
+
+    def _display_precision(self) -> int:
+        """Decimales con que se escriben las coordenadas en la tabla (2 por defecto)."""
+        precision = self._configured_precision()
+        return 2 if precision is None else precision
 
     def _on_settings(self):
-        dialog = ConfigDialog(self)
+        dialog = ConfigDialog(self, self._config)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        self._config.update(dialog.get_values())
+        try:
+            budget_mb = int(self._config["undo_budget_mb"])
+            if budget_mb <= 0:
+                raise ValueError
+            self._history.max_bytes = budget_mb * 1024 * 1024
+        except (TypeError, ValueError):
+            QMessageBox.warning(self, "Configuración inválida",
+                                "La memoria para deshacer debe ser un número entero positivo de MB.")
+        if str(self._config["precision"]).strip() and self._configured_precision() is None:
+            QMessageBox.warning(self, "Configuración inválida",
+                                f"Los decimales (precisión) deben ser un número entero entre 0 y {MAX_PRECISION}.")
+            self._config["precision"] = ""
+        if str(self._config["snap_tolerance"]).strip() and self._configured_snap_tolerance() is None:
+            QMessageBox.warning(self, "Configuración inválida",
+                                "La tolerancia de ajuste debe ser un número de metros mayor o igual que 0.")
+            self._config["snap_tolerance"] = ""
+        if not self._config["tile_url"]:
+            self._config["tile_url"] = DEFAULT_TILE_URL
+        if self._config["tile_url"] != self.canvas.tile_url():
+            self.canvas.set_tile_url(self._config["tile_url"])
+
+    def _on_toggle_memory_profile(self, checked):
+        if checked:
+            detail = QMessageBox.question(
+                self, "Perfil de memoria",
+                "¿Incluir las líneas de código que más memoria retienen en cada etapa?\n"
+                "Es más lento: cada etapa compara instantáneas de todas las asignaciones.",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes
+            self._memory_profiler.detail = detail
+            self._memory_profiler.start()
+            return
+        self._memory_profiler.stop()
+        self._show_memory_report()
+
+    def _show_memory_report(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Perfil de memoria por etapa")
+        layout = QVBoxLayout(dialog)
+        text = QTextEdit(dialog)
+        text.setReadOnly(True)
+        text.setLineWrapMode(QTextEdit.NoWrap)
+        text.setFontFamily("monospace")
+        text.setPlainText(self._memory_profiler.format_report())
+        layout.addWidget(text)
+
+        buttons = QHBoxLayout()
+        btn_json = QPushButton("Guardar JSON…", dialog)
+        btn_close = QPushButton("Cerrar", dialog)
+        buttons.addStretch(1)
+        buttons.addWidget(btn_json)
+        buttons.addWidget(btn_close)
+        layout.addLayout(buttons)
+
+        def save_json():
+            path, _ = QFileDialog.getSaveFileName(dialog, "Guardar informe de memoria",
+                                                  self._config.get("default_dir", ""), "JSON (*.json)")
+            if not path:
+                return
+            try:
+                self._memory_profiler.dump_json(path)
+            except OSError as e:
+                QMessageBox.critical(dialog, "Error al guardar", f"No se pudo guardar el informe:\n{e}")
+
+        btn_json.clicked.connect(save_json)
+        btn_close.clicked.connect(dialog.accept)
+        btn_json.setEnabled(bool(self._memory_profiler.stages))
+        dialog.resize(900, 500)
         dialog.exec()
 
     def _on_help(self):
@@ -680,7 +1808,7 @@ class MainWindow(QMainWindow):
         dialog.exec()
 
     def _on_export_html(self):
-        coords = []
+        ids, coords = [], []
         for r in range(self.table.rowCount()):
             xi = self.table.item(r, 1)
             yi = self.table.item(r, 2)
@@ -688,42 +1816,41 @@ class MainWindow(QMainWindow):
                 try:
                     x = float(xi.text())
                     y = float(yi.text())
-                    coords.append((x, y))
                 except ValueError:
                     continue
+                coords.append((x, y))
+                id_it = self.table.item(r, 0)
+                ids.append(id_it.text() if id_it else str(r+1))
 
         if len(coords) < 2:
             QMessageBox.warning(self, "Geometría insuficiente", "Se necesitan al menos 2 puntos para calcular perímetro.")
             return
 
-        def distancia(a, b):
-            return ((a[0] - b[0])**2 + (a[1] - b[1])**2) ** 0.5
-
-        perimetro = sum(distancia(coords[i], coords[i+1]) for i in range(len(coords)-1))
-        if self.chk_poligono.isChecked() and len(coords) >= 3:
-            perimetro += distancia(coords[-1], coords[0])
-
-        area = 0
-        if self.chk_poligono.isChecked() and len(coords) >= 3:
-            area = 0.5 * abs(sum(coords[i][0]*coords[i+1][1] - coords[i+1][0]*coords[i][1] for i in range(-1, len(coords)-1)))
-
-        # HTML visual
-        html = "<table border='1' cellpadding='4' cellspacing='0'>"
-        html += "<tr><th>ID</th><th>Este (X)</th><th>Norte (Y)</th></tr>"
-        for r in range(len(coords)):
-            id_val = self.table.item(r, 0).text() if self.table.item(r, 0) else str(r+1)
-            html += f"<tr><td>{id_val}</td><td>{coords[r][0]:.2f}</td><td>{coords[r][1]:.2f}</td></tr>"
-
-        # Fila única combinada para Perímetro
-        html += f"<tr><td colspan='3'><b>Perímetro:</b> {perimetro:.2f} m</td></tr>"
-
-        # Fila única combinada para Área (si aplica)
-        if self.chk_poligono.isChecked() and len(coords) >= 3:
-            html += f"<tr><td colspan='3'><b>Área:</b> {area:.2f} m²</td></tr>"
-
-        html += "</table>"
-
+        es_poligono = self.chk_poligono.isChecked() and len(coords) >= 3
+        metricas = compute_metrics(single_geometry_arrays(coords, closed=es_poligono))
+        perimetro = float(metricas.perimeter[0])
+        area = float(metricas.area[0]) if es_poligono else None
+
+        # Tablas grandes: el informe completo se escribe a disco en segundo plano
+        # y el diálogo solo muestra las primeras filas.
+        grande = len(coords) > HTMLReportExporter.PREVIEW_ROWS
+        ruta_informe = None
+        if grande:
+            ruta_informe, _ = QFileDialog.getSaveFileName(
+                self, "Guardar informe HTML completo",
+                (self.le_nombre.text().strip() or "proyecto") + ".html",
+                "Documentos HTML (*.html)"
+            )
+            if not ruta_informe:
+                return
+            if not ruta_informe.lower().endswith((".html", ".htm")):
+                ruta_informe += ".html"
+            if self._background is None:
+                self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="informes")
+            escritura = self._background.submit(HTMLReportExporter.export, ids, coords, ruta_informe, perimetro, area)
 
+        html = HTMLReportExporter.render(ids, coords, perimetro, area,
+                                         max_rows=HTMLReportExporter.PREVIEW_ROWS if grande else None)
 
         # Diálogo modal visual
         dlg = QDialog(self)
@@ -734,15 +1861,32 @@ class MainWindow(QMainWindow):
         view = QTextEdit()
         view.setReadOnly(True)
         view.setHtml(html)
+        layout.addWidget(view)
 
-        btn_copiar = QPushButton("Copiar código HTML")
-        btn_copiar.clicked.connect(lambda: QApplication.clipboard().setText(html))
+        if grande:
+            estado = QLabel(f"Escribiendo informe completo ({len(coords)} filas) en:\n{ruta_informe}")
+            layout.addWidget(estado)
+
+            def _comprobar_escritura():
+                if not escritura.done():
+                    return
+                timer.stop()
+                try:
+                    escritura.result()
+                    estado.setText(f"Informe completo ({len(coords)} filas) guardado en:\n{ruta_informe}")
+                except (ValueError, RuntimeError) as e:
+                    estado.setText(f"Error al escribir el informe completo: {e}")
+
+            timer = QTimer(dlg)
+            timer.timeout.connect(_comprobar_escritura)
+            timer.start(200)
+        else:
+            btn_copiar = QPushButton("Copiar código HTML")
+            btn_copiar.clicked.connect(lambda: QApplication.clipboard().setText(html))
+            layout.addWidget(btn_copiar)
 
         btn_cerrar = QPushButton("Cerrar")
         btn_cerrar.clicked.connect(dlg.close)
-
-        layout.addWidget(view)
-        layout.addWidget(btn_copiar)
         layout.addWidget(btn_cerrar)
 
         dlg.setLayout(layout)
@@ -0,0 +1,192 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from core.attributes import AttributeBuilder
+from core.coordinate_manager import CoordinateManager, FeatureArrays
+from core.diagnostics import Diagnostics
+from importers.csv_importer import CSVImporter, sniff_csv
+from importers.kml_importer import KMLImporter
+from importers.kmz_importer import KMZImporter
+
+# Extensiones que sabe importar BatchImporter y el importador de cada una
+_IMPORTERS = {
+    ".csv": CSVImporter,
+    ".txt": CSVImporter,
+    ".kml": KMLImporter,
+    ".kmz": KMZImporter,
+}
+
+
+def _import_one(path: str, hemisphere: str, zone: int):
+    """
+    Trabajo de un proceso: importa un archivo igual que la importación de un
+    solo archivo (CSV con delimitador y encabezado detectados) y devuelve
+    (arrays, avisos, atributos): los features en forma columnar, su
+    Diagnostics y su AttributeBuilder (una fila por feature).
+    """
+    importer = _IMPORTERS[os.path.splitext(path)[1].lower()]
+    diagnostics = Diagnostics(echo_limit=0)  # se resumen en el proceso principal
+    attributes = AttributeBuilder()
+    if importer is CSVImporter:
+        delimiter, has_header = sniff_csv(path)
+        features = importer.import_file(path, delimiter=delimiter, skip_header=int(has_header),
+                                        attributes=attributes, diagnostics=diagnostics)
+    else:
+        features = importer.import_file(path, hemisphere, zone, diagnostics=diagnostics, attributes=attributes)
+    # Los arrays numpy se envían de vuelta al proceso principal mucho más
+    # rápido que una lista de dicts con tuplas.
+    return FeatureArrays.from_features(features), diagnostics, attributes
+
+
+class BatchImporter:
+    """
+    Importa muchos archivos CSV/KML/KMZ en paralelo (un proceso por núcleo) y
+    los fusiona en un único CoordinateManager.
+
+    Los IDs de cada archivo se desplazan para que no choquen con los de los
+    archivos ya fusionados, conservando el orden relativo dentro del archivo.
+    Un archivo que falla se registra como error y el lote continúa.
+    """
+    SUPPORTED_EXTENSIONS = tuple(_IMPORTERS)
+
+    @staticmethod
+    def collect_files(folder: str) -> list[str]:
+        """Archivos importables de una carpeta (sin recursión), ordenados por nombre."""
+        try:
+            names = sorted(os.listdir(folder))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Carpeta no encontrada: {folder}")
+        return [os.path.join(folder, n) for n in names
+                if n.lower().endswith(BatchImporter.SUPPORTED_EXTENSIONS)
+                and os.path.isfile(os.path.join(folder, n))]
+
+    @staticmethod
+    def import_files(paths: list[str], target_hemisphere: str, target_zone: int,
+                     max_workers: int = None, on_progress=None, diagnostics: Diagnostics = None,
+                     attributes: AttributeBuilder = None) -> tuple[CoordinateManager, dict]:
+        """
+        Importa y fusiona los archivos indicados.
+
+        Args:
+            paths: Rutas a importar (CSV/TXT en UTM; KML/KMZ se reproyectan a la zona indicada).
+            target_hemisphere: Hemisferio de destino ("Norte" o "Sur").
+            target_zone: Zona UTM de destino (entero, 1-60).
+            max_workers: Procesos del pool (por defecto, uno por núcleo).
+            on_progress: Callback opcional on_progress(hechos, total, ruta, error)
+                         llamado al terminar cada archivo (error es None si fue bien).
+                         Si devuelve False, se cancelan los archivos pendientes.
+            diagnostics: Colector opcional donde se suman los avisos de cada archivo.
+            attributes: AttributeBuilder opcional donde se añaden los atributos
+                        de cada archivo (columnas extra del CSV, ExtendedData),
+                        alineados con los features del manager fusionado.
+
+        Returns:
+            (manager, errores): el CoordinateManager fusionado y un dict
+            {ruta: mensaje} con los archivos que no se pudieron importar.
+
+        Raises:
+            ValueError: Si la zona/hemisferio no son válidos.
+        """
+        # Validar zona/hemisferio una sola vez antes de lanzar los procesos
+        KMLImporter._make_transformer(target_hemisphere, target_zone)
+
+        errors = {}
+        parts = []
+        next_id = 1
+        total = len(paths)
+        done = 0
+
+        pending = []
+        for path in paths:
+            if os.path.splitext(path)[1].lower() in _IMPORTERS:
+                pending.append(path)
+            else:
+                errors[path] = "Formato de archivo no soportado."
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total, path, errors[path])
+
+        if pending:
+            # 'spawn' evita heredar por fork los hilos del proceso principal (GUI, descargas)
+            ctx = multiprocessing.get_context("spawn")
+            workers = min(max_workers or os.cpu_count() or 1, len(pending))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                futures = {pool.submit(_import_one, p, target_hemisphere, int(target_zone)): p for p in pending}
+                try:
+                    for future in as_completed(futures):
+                        path = futures[future]
+                        error = None
+                        try:
+                            arrays, file_diagnostics, file_attributes = future.result()
+                        except Exception as e:
+                            error = errors[path] = str(e) or type(e).__name__
+                        else:
+                            if diagnostics is not None:
+                                diagnostics.merge(file_diagnostics)
+                            if len(arrays):
+                                if attributes is not None:
+                                    attributes.extend(file_attributes)
+                                # Desplazar IDs para no chocar con lo ya fusionado
+                                ids = arrays.ids - arrays.ids.min() + next_id
+                                next_id = int(ids.max()) + 1
+                                parts.append(arrays.with_ids(ids))
+                        done += 1
+                        if on_progress is not None and on_progress(done, total, path, error) is False:
+                            for f in futures:
+                                f.cancel()
+                            break
+                finally:
+                    for f in futures:
+                        f.cancel()
+
+        return CoordinateManager.from_arrays(target_hemisphere, int(target_zone),
+                                             FeatureArrays.concatenate(parts)), errors
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import time
+
+    test_dir = "test_batch_imports"
+    if not os.path.exists(test_dir):
+        os.makedirs(test_dir)
+
+    # 200 CSV pequeños (la mitad con encabezado, una columna extra y una fila mala), 100 KML y un archivo roto
+    for i in range(200):
+        with open(os.path.join(test_dir, f"puntos_{i:03d}.csv"), "w") as f:
+            if i % 2:
+                f.write("X,Y,lote\n")
+                f.writelines(f"{500000 + i * 10 + k},{4000000 + k},L{i}\n" for k in range(499))
+                f.write("sin,coordenadas,L0\n")
+            else:
+                f.writelines(f"{500000 + i * 10 + k},{4000000 + k}\n" for k in range(500))
+    for i in range(100):
+        placemarks = "".join(
+            f"<Placemark><name>{k + 1}</name><LineString><coordinates>"
+            f"{-75 + i * 0.001:.5f},{4 + k * 0.001:.5f},0 {-75 + i * 0.001 + 0.0005:.5f},{4 + k * 0.001:.5f},0"
+            f"</coordinates></LineString></Placemark>" for k in range(200))
+        with open(os.path.join(test_dir, f"lineas_{i:03d}.kml"), "w") as f:
+            f.write(f'<kml xmlns="http://www.opengis.net/kml/2.2"><Document>{placemarks}</Document></kml>')
+    with open(os.path.join(test_dir, "roto.kml"), "w") as f:
+        f.write("<kml><Document><Placemark>")
+
+    paths = BatchImporter.collect_files(test_dir)
+
+    def progress(done, total, path, error):
+        if error or done == total:
+            print(f"  [{done}/{total}] {os.path.basename(path)}" + (f" -> ERROR: {error}" if error else ""))
+
+    t0 = time.perf_counter()
+    diagnostics, attributes = Diagnostics(echo_limit=0), AttributeBuilder()
+    mgr, errors = BatchImporter.import_files(paths, "Norte", 18, on_progress=progress,
+                                             diagnostics=diagnostics, attributes=attributes)
+    elapsed = time.perf_counter() - t0
+    arrays = mgr.to_arrays()
+    print(f"{len(paths)} archivos en {elapsed:.2f} s: {len(arrays)} features, {arrays.n_vertices} vértices, {len(errors)} errores")
+    table = attributes.build()
+    print(f"Atributos: {len(table)} filas, columnas {table.kinds()}")
+    print(f"Avisos:\n{diagnostics.summary()}")
+    print("IDs únicos:", len(np.unique(arrays.ids)) == len(arrays))
@@ -1,7 +1,34 @@
 import csv
 import os # Para el bloque de pruebas
+from core.attributes import AttributeBuilder
+from core.diagnostics import DiagnosticCode, Diagnostics
+from importers.csv_index import CSVRowIndex, CSVRowReader, DEFAULT_STRIDE
 # from core.coordinate_manager import GeometryType # Descomentar si se usan constantes de tipo
 
+# Bytes del inicio del archivo usados para detectar delimitador y encabezado
+SNIFF_BYTES = 64 * 1024
+
+
+def sniff_csv(filepath: str):
+    """(delimitador, tiene_encabezado) según el inicio del archivo; (',', False) si no se puede deducir."""
+    with open(filepath, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        sample = f.read(SNIFF_BYTES)
+    # Descartar la última línea, que puede estar cortada
+    if len(sample) == SNIFF_BYTES and "\n" in sample:
+        sample = sample[:sample.rindex("\n") + 1]
+    sniffer = csv.Sniffer()
+    try:
+        delimiter = sniffer.sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        delimiter = ","
+    try:
+        has_header = sniffer.has_header(sample)
+    except csv.Error:
+        has_header = False
+    return delimiter, has_header
+
+
+
 class CSVImporter:
     @staticmethod
     def import_file(filepath: str,
@@ -10,7 +37,9 @@ class CSVImporter:
                     id_col_idx: int = None,
                     # type_col_idx: int = None, # Futura mejora: permitir tipo desde CSV
                     delimiter: str = ',',
-                    skip_header: int = 0) -> list[dict]:
+                    skip_header: int = 0,
+                    attributes: AttributeBuilder = None,
+                    diagnostics: Diagnostics = None) -> list[dict]:
         """
         Importa coordenadas desde un archivo CSV, tratando cada fila como un feature de tipo Punto.
 
@@ -21,6 +50,13 @@ class CSVImporter:
             id_col_idx: Índice (base 0) opcional de la columna para el ID del feature.
             delimiter: Delimitador de columnas en el CSV.
             skip_header: Número de filas de encabezado a omitir.
+            attributes: AttributeBuilder opcional donde se guardan las demás
+                        columnas (una fila por feature importado). Los nombres
+                        salen de la última fila de encabezado o son "campo_N".
+            diagnostics: Colector donde se registran las filas omitidas y los
+                         IDs reemplazados, identificados por "línea N" (si se
+                         omite, se usa uno propio que solo escribe los primeros
+                         avisos en la consola).
 
         Returns:
             Una lista de diccionarios, donde cada diccionario representa un feature.
@@ -30,8 +66,19 @@ class CSVImporter:
             RuntimeError: Para otros errores de importación.
         """
 
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
         features = []
         current_id_counter = 1 # Para generar IDs secuenciales si no se provee id_col_idx
+        header = []
+        used_cols = {x_col_idx, y_col_idx, id_col_idx}
+        attribute_names = {}  # índice de columna -> nombre del atributo
+
+        def attribute_name(col):
+            name = attribute_names.get(col)
+            if name is None:
+                name = header[col].strip() if col < len(header) and header[col].strip() else f"campo_{col + 1}"
+                attribute_names[col] = name
+            return name
 
         try:
             # Usar encoding='utf-8-sig' para manejar correctamente el BOM (Byte Order Mark)
@@ -43,7 +90,7 @@ class CSVImporter:
                 # Saltar filas de encabezado
                 for i_skip in range(skip_header):
                     try:
-                        next(reader)
+                        header = next(reader)
                     except StopIteration:
                         print(f"Advertencia: Se intentó saltar {skip_header} filas de encabezado, pero el archivo tiene menos. No se leerán datos.")
                         return []
@@ -51,16 +98,18 @@ class CSVImporter:
                 # Procesar cada fila de datos
                 for line_num, row in enumerate(reader, start=skip_header + 1): # line_num es el número de línea real en el archivo
                     if not row: # Omitir filas completamente vacías
-                        print(f"Advertencia (Línea {line_num}): Fila vacía. Omitiendo.")
+                        diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, f"línea {line_num}", "fila vacía")
                         continue
 
                     try:
                         # Validar que las columnas X e Y existan y no estén vacías
                         if not (0 <= x_col_idx < len(row) and row[x_col_idx].strip()):
-                            print(f"Advertencia (Línea {line_num}): Columna X ({x_col_idx}) fuera de rango o vacía. Omitiendo fila: {row}")
+                            diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, f"línea {line_num}",
+                                             f"columna X ({x_col_idx}) fuera de rango o vacía")
                             continue
                         if not (0 <= y_col_idx < len(row) and row[y_col_idx].strip()):
-                            print(f"Advertencia (Línea {line_num}): Columna Y ({y_col_idx}) fuera de rango o vacía. Omitiendo fila: {row}")
+                            diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, f"línea {line_num}",
+                                             f"columna Y ({y_col_idx}) fuera de rango o vacía")
                             continue
 
                         x_str = row[x_col_idx].strip()
@@ -71,7 +120,8 @@ class CSVImporter:
                             x = float(x_str.replace(',', '.'))
                             y = float(y_str.replace(',', '.'))
                         except ValueError:
-                            print(f"Advertencia (Línea {line_num}): Coordenadas X ('{x_str}') o Y ('{y_str}') no son numéricas válidas. Omitiendo fila.")
+                            diagnostics.warn(DiagnosticCode.COORDENADA_INVALIDA, f"línea {line_num}",
+                                             f"X ('{x_str}') o Y ('{y_str}') no son numéricas")
                             continue
 
                         # Manejar ID del feature
@@ -82,11 +132,13 @@ class CSVImporter:
                                 try:
                                     feature_id_val = int(id_str)
                                 except ValueError:
-                                    print(f"Advertencia (Línea {line_num}): ID '{id_str}' no es un entero válido. Usando ID secuencial.")
+                                    diagnostics.warn(DiagnosticCode.ID_NO_ENTERO, f"línea {line_num}",
+                                                     f"ID '{id_str}'; se usa un ID secuencial")
                                     feature_id_val = current_id_counter
                                     current_id_counter += 1
                             else:
-                                print(f"Advertencia (Línea {line_num}): Columna ID ({id_col_idx}) fuera de rango o vacía. Usando ID secuencial.")
+                                diagnostics.warn(DiagnosticCode.ID_NO_ENTERO, f"línea {line_num}",
+                                                 f"columna ID ({id_col_idx}) fuera de rango o vacía; se usa un ID secuencial")
                                 feature_id_val = current_id_counter
                                 current_id_counter += 1
                         else:
@@ -102,9 +154,12 @@ class CSVImporter:
                             "type": geom_type,
                             "coords": [(x, y)]
                         })
+                        if attributes is not None:
+                            attributes.add_row({attribute_name(i): v for i, v in enumerate(row) if i not in used_cols})
 
                     except IndexError:
-                        print(f"Advertencia (Línea {line_num}): Fila con menos columnas de las esperadas. Omitiendo fila: {row}")
+                        diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, f"línea {line_num}",
+                                         "fila con menos columnas de las esperadas")
                         continue
 
         except FileNotFoundError:
@@ -114,6 +169,53 @@ class CSVImporter:
 
         return features
 
+    @staticmethod
+    def build_index(filepath: str,
+                    skip_header: int = 0,
+                    stride: int = DEFAULT_STRIDE,
+                    persist: bool = True) -> CSVRowIndex:
+        """
+        Índice de desplazamientos de filas del CSV (ver importers/csv_index.py).
+
+        Si `persist` es True se reutiliza el sidecar `<csv>.gwidx` cuando sigue
+        siendo válido y, si hubo que construir el índice, se guarda ahí. No
+        poder escribir el sidecar no es un error.
+
+        Raises:
+            FileNotFoundError: Si el archivo no se encuentra.
+            RuntimeError: Para otros errores al recorrer el archivo.
+        """
+        sidecar = CSVRowIndex.sidecar_path(filepath)
+        if persist:
+            index = CSVRowIndex.load(sidecar, filepath, skip_header)
+            if index is not None and index.stride == stride:
+                return index
+        try:
+            index = CSVRowIndex.build(filepath, stride, skip_header)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Error al indexar el archivo CSV '{filepath}': {e}")
+        if persist:
+            try:
+                index.save(sidecar)
+            except OSError as e:
+                print(f"Advertencia: No se pudo guardar el índice '{sidecar}': {e}")
+        return index
+
+    @staticmethod
+    def open_rows(filepath: str,
+                  delimiter: str = ',',
+                  skip_header: int = 0,
+                  persist_index: bool = True) -> CSVRowReader:
+        """
+        Abre el CSV para leer rangos de filas bajo demanda (sin importarlo):
+        `reader.read_rows(inicio, cantidad)` devuelve las filas ya separadas
+        en campos. Cerrar con `reader.close()` o usar como context manager.
+        """
+        index = CSVImporter.build_index(filepath, skip_header, persist=persist_index)
+        return CSVRowReader(filepath, index, delimiter)
+
 if __name__ == '__main__':
     test_dir = "test_csv_imports"
     if not os.path.exists(test_dir):
@@ -177,6 +279,16 @@ INVALID,40.1,B
         except Exception as e:
             print(f"  Error: {e}")
 
+    print(f"\n--- Atributos de {test_csv_path_errors} ---")
+    attrs = AttributeBuilder()
+    features = importer.import_file(test_csv_path_errors, x_col_idx=0, y_col_idx=1, skip_header=1, attributes=attrs)
+    table = attrs.build()
+    print(f"  {len(features)} features, columnas {table.kinds()}: {table.to_pylists()}")
+
+    print(f"\n--- Lectura por rangos de {test_csv_path_custom_delim} ---")
+    with CSVImporter.open_rows(test_csv_path_custom_delim, delimiter=';', skip_header=1) as reader:
+        print(f"  {len(reader)} filas, encabezado {reader.header_row()}, filas 1-2: {reader.read_rows(1, 2)}")
+
     # Considerar limpieza si se desea, pero omitido para inspección en este entorno.
     # import shutil
     # if os.path.exists(test_dir):
@@ -0,0 +1,252 @@
+# importers/csv_index.py
+"""
+Índice de desplazamientos de filas para acceso aleatorio a CSV enormes.
+
+En lugar de importar un CSV de decenas de millones de filas para mirarlo, se
+guarda el desplazamiento en bytes de una de cada `stride` filas de datos. Con
+el archivo mapeado en memoria (mmap), leer cualquier rango de filas cuesta
+saltar a la fila indexada anterior, avanzar como mucho `stride - 1` saltos de
+línea y parsear solo las filas pedidas.
+
+El índice se construye buscando saltos de línea con numpy por bloques y se
+puede guardar junto al CSV (archivo `<csv>.gwidx`); se descarta si el CSV
+cambió de tamaño o de fecha de modificación.
+
+Cada línea física es una fila: los campos entrecomillados con saltos de
+línea dentro no se soportan (se verían como filas separadas).
+"""
+import csv
+import mmap
+import os
+import struct
+
+import numpy as np
+
+INDEX_EXTENSION = ".gwidx"
+DEFAULT_STRIDE = 1024
+
+_MAGIC = b"GWCSVIDX"
+_VERSION = 1
+# magic, versión, stride, filas de encabezado, filas de datos, inicio de datos,
+# tamaño y fecha de modificación (ns) del CSV, cantidad de offsets
+_HEADER = struct.Struct("<8sIIqqqqqq")
+_BOM = b"\xef\xbb\xbf"
+_SCAN_CHUNK = 64 * 1024 * 1024
+
+
+class CSVRowIndex:
+    """
+    Desplazamientos (int64) del inicio de las filas de datos 0, stride, 2*stride, ...
+
+    Atributos:
+        offsets: np.ndarray int64 con un desplazamiento por bloque de `stride` filas.
+        row_count: Filas de datos (sin encabezado).
+        stride: Filas por entrada del índice.
+        skip_header: Filas de encabezado omitidas al construirlo.
+        data_start: Byte donde empieza la primera fila de datos.
+        size, mtime_ns: Tamaño y fecha del CSV indexado (para validar el sidecar).
+    """
+
+    def __init__(self, offsets, row_count: int, stride: int, skip_header: int,
+                 data_start: int, size: int, mtime_ns: int):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.row_count = int(row_count)
+        self.stride = int(stride)
+        self.skip_header = int(skip_header)
+        self.data_start = int(data_start)
+        self.size = int(size)
+        self.mtime_ns = int(mtime_ns)
+
+    @staticmethod
+    def sidecar_path(filepath: str) -> str:
+        return filepath + INDEX_EXTENSION
+
+    @classmethod
+    def build(cls, filepath: str, stride: int = DEFAULT_STRIDE, skip_header: int = 0) -> "CSVRowIndex":
+        """
+        Recorre el CSV una vez y guarda el inicio de una de cada `stride` filas.
+
+        Raises:
+            ValueError: Si `stride` o `skip_header` no son válidos.
+            FileNotFoundError: Si el archivo no existe.
+        """
+        if stride < 1 or skip_header < 0:
+            raise ValueError(f"Parámetros de índice inválidos: stride={stride}, skip_header={skip_header}.")
+        st = os.stat(filepath)
+        size = st.st_size
+        if size == 0:
+            return cls(np.zeros(0, dtype=np.int64), 0, stride, skip_header, 0, 0, st.st_mtime_ns)
+
+        with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = len(_BOM) if mm[:len(_BOM)] == _BOM else 0
+            for _ in range(skip_header):
+                nl = mm.find(b"\n", pos)
+                pos = size if nl < 0 else nl + 1
+            data_start = pos
+
+            parts = [np.array([data_start], dtype=np.int64)] if data_start < size else []
+            lines = 0  # saltos de línea vistos desde data_start
+            for chunk_start in range(data_start, size, _SCAN_CHUNK):
+                n = min(_SCAN_CHUNK, size - chunk_start)
+                buf = np.frombuffer(mm, dtype=np.uint8, count=n, offset=chunk_start)
+                newlines = np.flatnonzero(buf == 10)
+                del buf  # la vista numpy debe liberarse antes de cerrar el mmap
+                # El salto de línea número k (global) inicia la fila k + 1
+                first = (-(lines + 1)) % stride
+                parts.append(newlines[first::stride].astype(np.int64) + (chunk_start + 1))
+                lines += len(newlines)
+            ends_with_newline = mm[size - 1:size] == b"\n"
+
+        offsets = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        if len(offsets) and offsets[-1] >= size:
+            offsets = offsets[:-1]  # salto de línea final: no inicia ninguna fila
+        row_count = 0 if data_start >= size else lines + (0 if ends_with_newline else 1)
+        return cls(offsets, row_count, stride, skip_header, data_start, size, st.st_mtime_ns)
+
+    def save(self, path: str):
+        """Guarda el índice en un archivo binario (normalmente el sidecar `.gwidx`)."""
+        header = _HEADER.pack(_MAGIC, _VERSION, self.stride, self.skip_header, self.row_count,
+                              self.data_start, self.size, self.mtime_ns, len(self.offsets))
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(self.offsets.astype("<i8").tobytes())
+
+    @classmethod
+    def load(cls, path: str, filepath: str = None, skip_header: int = None):
+        """
+        Carga un índice guardado. Devuelve None si el archivo no es un índice
+        válido o, cuando se indica `filepath`, si ya no corresponde a ese CSV
+        (o a `skip_header`).
+        """
+        try:
+            with open(path, "rb") as f:
+                raw = f.read(_HEADER.size)
+                if len(raw) < _HEADER.size:
+                    return None
+                magic, version, stride, skip, rows, data_start, size, mtime_ns, n = _HEADER.unpack(raw)
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                offsets = np.fromfile(f, dtype="<i8", count=n)
+        except OSError:
+            return None
+        if len(offsets) != n:
+            return None
+        if filepath is not None:
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                return None
+            if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                return None
+        if skip_header is not None and skip != skip_header:
+            return None
+        return cls(offsets.astype(np.int64), rows, stride, skip, data_start, size, mtime_ns)
+
+
+class CSVRowReader:
+    """
+    Lector de rangos de filas sobre un CSV mapeado en memoria.
+
+    Args:
+        filepath: Ruta al CSV.
+        index: CSVRowIndex del archivo.
+        delimiter: Delimitador de columnas.
+    """
+
+    def __init__(self, filepath: str, index: CSVRowIndex, delimiter: str = ','):
+        self.filepath = filepath
+        self.index = index
+        self.delimiter = delimiter
+        self._file = open(filepath, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if index.size else None
+        if self._mm is not None and len(self._mm) != index.size:
+            self.close()
+            raise RuntimeError(f"El índice no corresponde al archivo '{filepath}' (cambió de tamaño).")
+
+    def __len__(self):
+        return self.index.row_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _row_offset(self, row: int) -> int:
+        """Byte de inicio de `row` (o el fin del archivo si row == row_count)."""
+        if row >= self.index.row_count:
+            return self.index.size
+        stride = self.index.stride
+        pos = int(self.index.offsets[row // stride])
+        find = self._mm.find
+        for _ in range(row % stride):
+            pos = find(b"\n", pos) + 1
+        return pos
+
+    def _parse(self, data: bytes) -> list[list[str]]:
+        lines = data.decode("utf-8", errors="replace").split("\n")
+        if lines and lines[-1] == "":
+            lines.pop()
+        return list(csv.reader((l[:-1] if l.endswith("\r") else l for l in lines), delimiter=self.delimiter))
+
+    def read_rows(self, start: int, count: int) -> list[list[str]]:
+        """Filas de datos [start, start + count) ya separadas en campos (recortado al final del archivo)."""
+        start = max(0, start)
+        stop = min(start + max(0, count), self.index.row_count)
+        if start >= stop or self._mm is None:
+            return []
+        return self._parse(self._mm[self._row_offset(start):self._row_offset(stop)])
+
+    def header_row(self) -> list[str]:
+        """Última fila de encabezado (nombres de columna), o [] si no se omitió ninguna."""
+        if not self.index.skip_header or self._mm is None:
+            return []
+        begin = len(_BOM) if self._mm[:len(_BOM)] == _BOM else 0
+        header = self._mm[begin:self.index.data_start]
+        rows = self._parse(header.rstrip(b"\r\n").rsplit(b"\n", 1)[-1])
+        return rows[0] if rows else []
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    n = 2_000_000
+    path = os.path.join(tempfile.mkdtemp(prefix="geowizard_csv_"), "puntos.csv")
+    rng = np.random.default_rng(3)
+    xy = rng.uniform((400000, 4000000), (600000, 4200000), (n, 2))
+    t0 = time.perf_counter()
+    with open(path, "w", newline="") as f:
+        f.write("X,Y,ID\n")
+        f.write("\n".join(f"{x:.2f},{y:.2f},{i + 1}" for i, (x, y) in enumerate(xy.tolist())))
+        f.write("\n")
+    print(f"CSV de {n} filas: {os.path.getsize(path) / 1e6:.0f} MB ({time.perf_counter() - t0:.1f} s para generarlo)")
+
+    t0 = time.perf_counter()
+    index = CSVRowIndex.build(path, skip_header=1)
+    print(f"Índice: {len(index.offsets)} entradas para {index.row_count} filas en {time.perf_counter() - t0:.2f} s")
+    index.save(CSVRowIndex.sidecar_path(path))
+    t0 = time.perf_counter()
+    index = CSVRowIndex.load(CSVRowIndex.sidecar_path(path), path, skip_header=1)
+    print(f"Sidecar cargado en {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    with CSVRowReader(path, index) as reader:
+        print("Encabezado:", reader.header_row())
+        t0 = time.perf_counter()
+        for start in rng.integers(0, n, 1000).tolist():
+            rows = reader.read_rows(start, 50)
+            assert rows[0][2] == str(start + 1)
+        print(f"1000 ventanas aleatorias de 50 filas: {(time.perf_counter() - t0) * 1000:.0f} ms")
+        print("Últimas filas:", reader.read_rows(n - 2, 10))
+    os.remove(CSVRowIndex.sidecar_path(path))
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
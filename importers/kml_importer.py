@@ -2,17 +2,40 @@ import xml.etree.ElementTree as ET
 from pyproj import Transformer, ProjError
 import os # Para el bloque de pruebas
 import re
+import threading
 
+import numpy as np
+
+from core.coordinate_manager import CoordinateManager, FeatureArrays, FeatureArraysBuilder, GeometryType
+from core.attributes import AttributeBuilder
+from core.diagnostics import DiagnosticCode, Diagnostics
+from core.reprojection import utm_epsg
+
+
+# Transformadores WGS84 -> UTM cacheados por código EPSG. La caché es por hilo
+# porque los objetos Transformer de pyproj no deben compartirse entre hilos.
+_transformers = threading.local()
+
+
+def _utm_transformer(target_epsg: int) -> Transformer:
+    cache = getattr(_transformers, "by_epsg", None)
+    if cache is None:
+        cache = _transformers.by_epsg = {}
+    transformer = cache.get(target_epsg)
+    if transformer is None:
+        transformer = cache[target_epsg] = Transformer.from_crs("EPSG:4326", f"EPSG:{target_epsg}", always_xy=True)
+    return transformer
 
-# from core.coordinate_manager import GeometryType # Para usar constantes de tipo GeometryType.PUNTO etc.
 
 class KMLImporter:
     @staticmethod
-    def _parse_coordinates(coord_string: str, geom_type_str_for_ring_check: str) -> list[tuple[float, float]]:
+    def _parse_coordinates(coord_string: str, geom_type_str_for_ring_check: str,
+                           diagnostics: Diagnostics, feature_id=None) -> list[tuple[float, float]]:
         """
         Parsea la cadena de coordenadas KML (ej. "lon,lat,alt lon,lat,alt ...").
         Devuelve una lista de tuplas (lon, lat), ignorando la altitud.
         Para Polígonos, elimina el último punto si es idéntico al primero.
+        Las coordenadas malformadas se omiten con un aviso en `diagnostics`.
         """
         points = []
         if not coord_string:
@@ -27,7 +50,7 @@ class KMLImporter:
                 lat = float(lat_str)
                 points.append((lon, lat))
             except ValueError:
-                print(f"Advertencia: Coordenada KML malformada o no numérica '{part}' omitida.")
+                diagnostics.warn(DiagnosticCode.COORDENADA_INVALIDA, feature_id, f"'{part}'")
                 continue
 
         # Para polígonos KML, el LinearRing usualmente está cerrado.
@@ -40,63 +63,176 @@ class KMLImporter:
         return points
 
     @staticmethod
-    def import_file(filepath: str, target_hemisphere: str, target_zone: int) -> list[dict]:
+    def _make_transformer(target_hemisphere: str, target_zone: int) -> Transformer:
+        """Valida zona/hemisferio y devuelve el transformador WGS84 -> UTM (cacheado)."""
+        target_epsg = utm_epsg(target_hemisphere, target_zone)
+        try:
+            return _utm_transformer(target_epsg)
+        except ProjError as e:
+            raise RuntimeError(f"Error al inicializar el transformador de coordenadas para zona {target_zone}{target_hemisphere}: {e}")
+
+    @staticmethod
+    def _placemark_geometry(placemark_elem, ns: dict, feature_id: int, diagnostics: Diagnostics):
         """
-        Importa geometrías desde un archivo KML, transformándolas al sistema UTM especificado.
+        Extrae la geometría de un elemento <Placemark> ya parseado.
+        Devuelve (tipo de geometría de la aplicación, partes) o None (con un
+        aviso en `diagnostics`) si la geometría no es soportada o válida.
+
+        `partes` es una lista de partes y cada parte una lista de anillos
+        [(lon, lat), ...]: un solo anillo para Punto/Polilínea; para Polígono, el
+        exterior seguido de los huecos (innerBoundaryIs). Un <MultiGeometry>
+        produce varias partes; su tipo es el del primer hijo soportado y los
+        hijos de otro tipo se omiten con aviso.
+        """
+        # Función auxiliar para encontrar elementos con o sin namespace
+        def find_element(parent, tag, namespace_dict):
+            if namespace_dict and namespace_dict.get('kml'): # Si hay un namespace kml definido
+                return parent.find(f"kml:{tag}", namespace_dict)
+            return parent.find(tag) # Buscar sin namespace
+
+        def find_all(parent, tag, namespace_dict):
+            if namespace_dict and namespace_dict.get('kml'):
+                return parent.findall(f"kml:{tag}", namespace_dict)
+            return parent.findall(tag)
+
+        node_options_map = {
+            "Point": "Punto",
+            "LineString": "Polilínea",
+            "Polygon": "Polígono"
+        }
+        prefix = f"{{{ns['kml']}}}" if ns and ns.get('kml') else ""
+        tag_to_type = {prefix + kml_type: app_type for kml_type, app_type in node_options_map.items()}
+
+        geom_nodes = []
+        for kml_type, app_type in node_options_map.items():
+            node = find_element(placemark_elem, kml_type, ns)
+            if node is not None:
+                geom_nodes = [(node, app_type)]
+                break
+        else:
+            multi = find_element(placemark_elem, 'MultiGeometry', ns)
+            if multi is not None:
+                geom_nodes = [(child, tag_to_type[child.tag]) for child in multi.iter() if child.tag in tag_to_type]
+
+        if not geom_nodes:
+            diagnostics.warn(DiagnosticCode.SIN_GEOMETRIA, feature_id, "Placemark sin geometría KML soportada")
+            return None
+
+        app_geom_type = geom_nodes[0][1]
+        skipped = sum(1 for _, app_type in geom_nodes if app_type != app_geom_type)
+        if skipped:
+            diagnostics.warn(DiagnosticCode.GEOMETRIA_MIXTA, feature_id,
+                             f"se omiten {skipped} geometría(s) que no son {app_geom_type}")
+
+        min_vertices = {"Punto": 1, "Polilínea": 2, "Polígono": 3}[app_geom_type]
+        parts = []
+        for geom_node, app_type in geom_nodes:
+            if app_type != app_geom_type:
+                continue
+            if app_geom_type == "Polígono":
+                ring_nodes = []
+                outer_boundary = find_element(geom_node, 'outerBoundaryIs', ns)
+                if outer_boundary is not None:
+                    ring_nodes.append(outer_boundary)
+                ring_nodes.extend(find_all(geom_node, 'innerBoundaryIs', ns))
+                coord_nodes = []
+                for boundary in ring_nodes:
+                    linear_ring = find_element(boundary, 'LinearRing', ns)
+                    coord_nodes.append(find_element(linear_ring, 'coordinates', ns) if linear_ring is not None else None)
+            else:
+                coord_nodes = [find_element(geom_node, 'coordinates', ns)]
+
+            if not coord_nodes or coord_nodes[0] is None or coord_nodes[0].text is None:
+                diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, feature_id, "<coordinates> ausente o vacío")
+                continue
 
-        Args:
-            filepath: Ruta al archivo KML.
-            target_hemisphere: Hemisferio de destino ("Norte" o "Sur").
-            target_zone: Zona UTM de destino (entero, 1-60).
+            rings = []
+            for i, coord_text_node in enumerate(coord_nodes):
+                ring = KMLImporter._parse_coordinates(coord_text_node.text if coord_text_node is not None else "",
+                                                      app_geom_type, diagnostics, feature_id)
+                if i == 0:
+                    rings.append(ring)
+                elif len(ring) >= 3:
+                    rings.append(ring)
+                else:
+                    diagnostics.warn(DiagnosticCode.HUECO_OMITIDO, feature_id)
 
-        Returns:
-            Una lista de diccionarios de features.
+            lon_lat_coords = rings[0]
+            if not lon_lat_coords:
+                diagnostics.warn(DiagnosticCode.SIN_COORDENADAS, feature_id, "ninguna coordenada válida")
+                continue
 
-        Raises:
-            FileNotFoundError: Si el archivo KML no se encuentra.
-            RuntimeError: Para errores de parseo KML, transformación de coordenadas, u otros.
-            ValueError: Para parámetros de zona/hemisferio inválidos.
-        """
-        features = []
-        sequential_id_counter = 1
+            if app_geom_type == "Punto" and len(lon_lat_coords) != 1:
+                diagnostics.warn(DiagnosticCode.COORDENADA_INVALIDA, feature_id,
+                                 f"Punto con {len(lon_lat_coords)} coordenadas")
+                continue
+            elif len(lon_lat_coords) < min_vertices:
+                base = " base" if app_geom_type == "Polígono" else ""
+                diagnostics.warn(DiagnosticCode.COORDENADAS_INSUFICIENTES, feature_id,
+                                 f"{app_geom_type} con menos de {min_vertices} coordenadas{base}")
+                continue
+            parts.append(rings)
 
-        try:
-            zone_int = int(target_zone) # Asegurar que target_zone sea int
-            if not (1 <= zone_int <= 60):
-                raise ValueError(f"Zona UTM '{target_zone}' inválida. Debe estar entre 1 y 60.")
-            if target_hemisphere.lower() not in ['norte', 'sur']:
-                raise ValueError(f"Hemisferio '{target_hemisphere}' no reconocido. Debe ser 'Norte' o 'Sur'.")
-
-            target_epsg = 32600 + zone_int if target_hemisphere.lower() == 'norte' else 32700 + zone_int
-            transformer = Transformer.from_crs("EPSG:4326", f"EPSG:{target_epsg}", always_xy=True)
-        except ValueError as e:
-            raise e
-        except ProjError as e:
-            raise RuntimeError(f"Error al inicializar el transformador de coordenadas para zona {target_zone}{target_hemisphere}: {e}")
+        if not parts:
+            return None
+        return app_geom_type, parts
 
-        try:
-            tree = ET.parse(filepath)
-            root = tree.getroot()
+    @staticmethod
+    def _extended_data(placemark_elem, prefix: str) -> dict:
+        """
+        Atributos de <ExtendedData> como {nombre: texto}: tanto <Data name><value>
+        como <SchemaData><SimpleData name>.
+        """
+        extended = placemark_elem.find(f"{prefix}ExtendedData")
+        if extended is None:
+            return {}
+        values = {}
+        for data in extended.iter(f"{prefix}Data"):
+            name = data.get("name")
+            if name:
+                value = data.find(f"{prefix}value")
+                values[name] = value.text if value is not None and value.text else ""
+        for data in extended.iter(f"{prefix}SimpleData"):
+            name = data.get("name")
+            if name:
+                values[name] = data.text or ""
+        return values
 
-            root_tag = root.tag
-            ns_uri_match = re.match(r'\{(.*)\}kml', root_tag)
-            ns_uri = ns_uri_match.group(1) if ns_uri_match else ''
-            ns = {'kml': ns_uri} if ns_uri else {} # Diccionario de namespace vacío si no hay namespace
+    @staticmethod
+    def _iter_placemarks(source, source_name: str, diagnostics: Diagnostics, with_data: bool = False):
+        """
+        Recorre un flujo KML de forma incremental con iterparse y genera
+        (feature_id, tipo, partes, datos) por cada Placemark válido (partes como
+        en _placemark_geometry; datos es el dict de _extended_data si
+        `with_data`, o None). Los Placemarks omitidos se registran en `diagnostics`.
 
-            # Función auxiliar para encontrar elementos con o sin namespace
-            def find_element(parent, tag, namespace_dict):
-                if namespace_dict and namespace_dict.get('kml'): # Si hay un namespace kml definido
-                    return parent.find(f"kml:{tag}", namespace_dict)
-                return parent.find(tag) # Buscar sin namespace
+        Cada Placemark se elimina del árbol tras procesarlo, de modo que la
+        memoria usada por el parseo no crece con el tamaño del archivo.
+        """
+        sequential_id_counter = 1
+        ns = None
+        placemark_tag = name_tag = None
+        prefix = ""
+        stack = []
 
-            def findall_elements(parent, tag, namespace_dict):
-                if namespace_dict and namespace_dict.get('kml'):
-                    return parent.findall(f".//kml:{tag}", namespace_dict) # .// para búsqueda global
-                return parent.findall(f".//{tag}")
+        try:
+            for event, elem in ET.iterparse(source, events=("start", "end")):
+                if event == "start":
+                    if ns is None:
+                        # El primer elemento es la raíz <kml>: de ella sale el namespace
+                        ns_uri_match = re.match(r'\{(.*)\}kml', elem.tag)
+                        ns_uri = ns_uri_match.group(1) if ns_uri_match else ''
+                        ns = {'kml': ns_uri} if ns_uri else {} # Diccionario de namespace vacío si no hay namespace
+                        prefix = f"{{{ns_uri}}}" if ns_uri else ""
+                        placemark_tag, name_tag = f"{prefix}Placemark", f"{prefix}name"
+                    stack.append(elem)
+                    continue
 
+                stack.pop()
+                if elem.tag != placemark_tag:
+                    continue
 
-            for placemark_elem in findall_elements(root, 'Placemark', ns):
-                feature_id_text_elem = find_element(placemark_elem, 'name', ns)
+                feature_id_text_elem = elem.find(name_tag)
                 feature_id_text = feature_id_text_elem.text if feature_id_text_elem is not None else None
 
                 feature_id = sequential_id_counter
@@ -104,87 +240,202 @@ class KMLImporter:
                     try:
                         feature_id = int(feature_id_text.strip())
                     except ValueError:
-                        print(f"Advertencia: Nombre de Placemark '{feature_id_text}' no es un entero. Usando ID secuencial {sequential_id_counter}.")
+                        diagnostics.warn(DiagnosticCode.ID_NO_ENTERO, feature_id_text.strip(),
+                                         f"se usa el ID secuencial {sequential_id_counter}")
                 sequential_id_counter += 1
 
-                geom_node = None
-                app_geom_type = None
+                geometry = KMLImporter._placemark_geometry(elem, ns, feature_id, diagnostics)
+                data = KMLImporter._extended_data(elem, prefix) if with_data and geometry is not None else None
 
-                node_options_map = {
-                    "Point": "Punto",
-                    "LineString": "Polilínea",
-                    "Polygon": "Polígono"
-                }
+                # Liberar el Placemark ya procesado
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
 
-                for kml_type, app_type in node_options_map.items():
-                    node = find_element(placemark_elem, kml_type, ns)
-                    if node is not None:
-                        geom_node = node
-                        app_geom_type = app_type
-                        break
+                if geometry is not None:
+                    yield (feature_id,) + geometry + (data,)
 
-                if geom_node is None or app_geom_type is None:
-                    print(f"Advertencia: Placemark ID {feature_id} no contiene geometría KML soportada. Omitiendo.")
-                    continue
+        except ET.ParseError as e:
+            raise RuntimeError(f"Error al parsear el archivo KML: {source_name}. Archivo malformado o no es KML. Detalle: {e}")
+        except (RuntimeError, ValueError):
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Error inesperado al importar el archivo KML '{source_name}': {e}")
 
-                coord_text_node = None
-                if app_geom_type == "Polígono":
-                    outer_boundary = find_element(geom_node, 'outerBoundaryIs', ns)
-                    if outer_boundary is not None:
-                        linear_ring = find_element(outer_boundary, 'LinearRing', ns)
-                        if linear_ring is not None:
-                            coord_text_node = find_element(linear_ring, 'coordinates', ns)
-                else:
-                    coord_text_node = find_element(geom_node, 'coordinates', ns)
+    @staticmethod
+    def import_stream(source, target_hemisphere: str, target_zone: int, source_name: str = "<stream>",
+                      diagnostics: Diagnostics = None, attributes: AttributeBuilder = None) -> list[dict]:
+        """
+        Importa geometrías desde un flujo KML (archivo binario abierto, miembro de un zip...).
 
-                if coord_text_node is None or coord_text_node.text is None:
-                    print(f"Advertencia: Geometría en Placemark ID {feature_id} no tiene etiqueta <coordinates> o está vacía. Omitiendo.")
-                    continue
+        El documento se recorre de forma incremental (ver _iter_placemarks) y los
+        vértices de cada Placemark se transforman en una sola llamada.
 
-                lon_lat_coords = KMLImporter._parse_coordinates(coord_text_node.text, app_geom_type)
+        Args:
+            source: Ruta u objeto tipo archivo en modo binario.
+            target_hemisphere: Hemisferio de destino ("Norte" o "Sur").
+            target_zone: Zona UTM de destino (entero, 1-60).
+            source_name: Nombre usado en los mensajes de error.
+            diagnostics: Colector donde se registran los Placemarks y
+                         coordenadas omitidos (si se omite, se usa uno propio
+                         que solo escribe los primeros avisos en la consola).
+            attributes: AttributeBuilder opcional donde se guarda el
+                        ExtendedData de cada feature importado (una fila por feature).
 
-                if not lon_lat_coords:
-                    print(f"Advertencia: No se pudieron parsear coordenadas para Placemark ID {feature_id}. Omitiendo.")
-                    continue
+        Returns:
+            Una lista de diccionarios de features.
 
-                transformed_coords_utm = []
-                valid_geometry_after_transform = True
-                for lon, lat in lon_lat_coords:
-                    try:
-                        utm_x, utm_y = transformer.transform(lon, lat)
-                        transformed_coords_utm.append((utm_x, utm_y))
-                    except ProjError as pe:
-                        print(f"Advertencia: Error al transformar coordenada ({lon},{lat}) para Placemark ID {feature_id}. Error: {pe}. Omitiendo feature completo.")
-                        valid_geometry_after_transform = False
-                        break
-
-                if not valid_geometry_after_transform or not transformed_coords_utm:
-                    continue
+        Raises:
+            RuntimeError: Para errores de parseo KML, transformación de coordenadas, u otros.
+            ValueError: Para parámetros de zona/hemisferio inválidos.
+        """
+        transformer = KMLImporter._make_transformer(target_hemisphere, target_zone)
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
 
-                if app_geom_type == "Punto" and len(transformed_coords_utm) != 1:
-                    print(f"Advertencia: Feature Punto ID {feature_id} no resultó en 1 coordenada. Omitiendo.")
-                    continue
-                elif app_geom_type == "Polilínea" and len(transformed_coords_utm) < 2:
-                    print(f"Advertencia: Feature Polilínea ID {feature_id} resultó en <2 coordenadas. Omitiendo.")
-                    continue
-                elif app_geom_type == "Polígono" and len(transformed_coords_utm) < 3: # 3 puntos base para un polígono
-                    print(f"Advertencia: Feature Polígono ID {feature_id} resultó en <3 coordenadas base. Omitiendo.")
-                    continue
+        features = []
+        placemarks = KMLImporter._iter_placemarks(source, source_name, diagnostics, with_data=attributes is not None)
+        for feature_id, app_geom_type, parts, data in placemarks:
+            ring_sizes = [len(ring) for rings in parts for ring in rings]
+            lons, lats = zip(*(pt for rings in parts for ring in rings for pt in ring))
+            try:
+                xs, ys = transformer.transform(lons, lats, errcheck=True)
+            except ProjError as pe:
+                diagnostics.warn(DiagnosticCode.ERROR_TRANSFORMACION, feature_id, f"{pe}; se omite el feature completo")
+                continue
+            utm = list(zip(xs, ys))
+            feature = {
+                "id": feature_id,
+                "type": app_geom_type,
+                "coords": utm[:ring_sizes[0]]
+            }
+            if len(ring_sizes) > 1:
+                # Repartir los vértices transformados entre partes y anillos
+                start = 0
+                utm_parts = []
+                for rings in parts:
+                    utm_rings = []
+                    for ring in rings:
+                        utm_rings.append(utm[start:start + len(ring)])
+                        start += len(ring)
+                    utm_parts.append(utm_rings)
+                feature["parts"] = utm_parts
+            features.append(feature)
+            if attributes is not None:
+                attributes.add_row(data)
+        return features
 
-                features.append({
-                    "id": feature_id,
-                    "type": app_geom_type,
-                    "coords": transformed_coords_utm
-                })
+    @staticmethod
+    def natural_zone(lon: float, lat: float) -> tuple[str, int]:
+        """Hemisferio ("Norte"/"Sur") y zona UTM estándar (1-60) que contienen (lon, lat)."""
+        zone = int((lon + 180.0) // 6.0) + 1
+        return ("Norte" if lat >= 0 else "Sur"), min(max(zone, 1), 60)
 
-        except ET.ParseError as e:
-            raise RuntimeError(f"Error al parsear el archivo KML: {filepath}. Archivo malformado o no es KML. Detalle: {e}")
+    @staticmethod
+    def import_stream_by_zone(source, source_name: str = "<stream>", diagnostics: Diagnostics = None) -> dict:
+        """
+        Importa un flujo KML asignando cada feature a su zona UTM natural.
+
+        La zona de cada Placemark se calcula a partir del centroide (promedio) del
+        anillo exterior de su primera parte. Los features se agrupan por
+        (hemisferio, zona) y cada grupo se reproyecta en una única llamada
+        vectorizada con el transformador cacheado de esa zona. Los Placemarks
+        omitidos y los features con algún vértice que no se puede transformar
+        (se descartan completos, como en import_stream) se registran en
+        `diagnostics`.
+
+        Returns:
+            Dict {(hemisferio, zona): CoordinateManager}, uno por zona con algún
+            feature válido, listo para exportarse de forma independiente (p. ej.
+            en paralelo).
+
+        Raises:
+            RuntimeError: Para errores de parseo KML.
+        """
+        # Por zona: un FeatureArraysBuilder que acumula los anillos en (lon, lat)
+        diagnostics = Diagnostics() if diagnostics is None else diagnostics
+        builders = {}
+        for feature_id, app_geom_type, parts, _ in KMLImporter._iter_placemarks(source, source_name, diagnostics):
+            key = KMLImporter.natural_zone(*np.asarray(parts[0][0], dtype=np.float64).mean(axis=0))
+            builder = builders.get(key)
+            if builder is None:
+                builder = builders[key] = FeatureArraysBuilder()
+            builder.add(feature_id, GeometryType.CODES[app_geom_type], parts)
+
+        managers = {}
+        for (hemisphere, zone), builder in sorted(builders.items()):
+            arrays = builder.build()
+            transformer = KMLImporter._make_transformer(hemisphere, zone)
+            xs, ys = transformer.transform(arrays.xy[:, 0], arrays.xy[:, 1])
+            arrays.xy = np.column_stack([xs, ys])
+            arrays = KMLImporter._drop_untransformed(arrays, diagnostics)
+            if len(arrays):
+                managers[(hemisphere, zone)] = CoordinateManager.from_arrays(hemisphere, zone, arrays)
+        return managers
+
+    @staticmethod
+    def _drop_untransformed(arrays: FeatureArrays, diagnostics: Diagnostics) -> FeatureArrays:
+        """
+        Quita los features con algún vértice no finito tras reproyectar (pyproj
+        sin errcheck devuelve inf fuera del dominio) y registra cada uno.
+        """
+        bad_vertex = ~np.isfinite(arrays.xy).all(axis=1)
+        if not bad_vertex.any():
+            return arrays
+        offsets = np.asarray(arrays.offsets, dtype=np.int64)
+        owner = np.repeat(np.arange(len(arrays)), np.diff(offsets))
+        bad = np.bincount(owner[bad_vertex], minlength=len(arrays)) > 0
+        for fid in arrays.ids[bad].tolist():
+            diagnostics.warn(DiagnosticCode.ERROR_TRANSFORMACION, fid,
+                             "coordenadas fuera del dominio de la proyección; se omite el feature completo")
+        # Tramos contiguos de features válidos
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], (~bad).astype(np.int8), [0]])))
+        return FeatureArrays.concatenate([arrays.feature_range(int(start), int(stop))
+                                          for start, stop in zip(edges[::2], edges[1::2])])
+
+    @staticmethod
+    def import_file_by_zone(filepath: str, diagnostics: Diagnostics = None) -> dict:
+        """
+        Igual que import_stream_by_zone() pero a partir de una ruta de archivo KML.
+
+        Raises:
+            FileNotFoundError: Si el archivo KML no se encuentra.
+            RuntimeError: Para errores de parseo KML o de transformación.
+        """
+        try:
+            kml_file = open(filepath, 'rb')
         except FileNotFoundError:
             raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
-        except Exception as e:
-            raise RuntimeError(f"Error inesperado al importar el archivo KML '{filepath}': {e}")
+        with kml_file:
+            return KMLImporter.import_stream_by_zone(kml_file, source_name=filepath, diagnostics=diagnostics)
 
-        return features
+    @staticmethod
+    def import_file(filepath: str, target_hemisphere: str, target_zone: int,
+                    diagnostics: Diagnostics = None, attributes: AttributeBuilder = None) -> list[dict]:
+        """
+        Importa geometrías desde un archivo KML, transformándolas al sistema UTM especificado.
+
+        Args:
+            filepath: Ruta al archivo KML.
+            target_hemisphere: Hemisferio de destino ("Norte" o "Sur").
+            target_zone: Zona UTM de destino (entero, 1-60).
+            diagnostics: Colector de avisos (ver import_stream).
+            attributes: AttributeBuilder opcional para el ExtendedData (ver import_stream).
+
+        Returns:
+            Una lista de diccionarios de features.
+
+        Raises:
+            FileNotFoundError: Si el archivo KML no se encuentra.
+            RuntimeError: Para errores de parseo KML, transformación de coordenadas, u otros.
+            ValueError: Para parámetros de zona/hemisferio inválidos.
+        """
+        try:
+            kml_file = open(filepath, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
+        with kml_file:
+            return KMLImporter.import_stream(kml_file, target_hemisphere, target_zone, source_name=filepath,
+                                             diagnostics=diagnostics, attributes=attributes)
 
 if __name__ == '__main__':
     test_dir_kml = "test_kml_imports"
@@ -266,9 +517,11 @@ if __name__ == '__main__':
 
     print(f"--- Importando {test_kml_file} (a Zona 19S) ---")
     try:
-        feats = importer.import_file(test_kml_file, target_hemisphere='Sur', target_zone=19)
+        diagnostics = Diagnostics(echo_limit=0)
+        feats = importer.import_file(test_kml_file, target_hemisphere='Sur', target_zone=19, diagnostics=diagnostics)
         for f_idx, f_val in enumerate(feats):
             print(f"  Feature {f_idx}: ID={f_val['id']}, Tipo={f_val['type']}, Coords UTM Count={len(f_val['coords'])}")
+        print("  Avisos:\n" + diagnostics.summary())
     except Exception as e:
         print(f"  Error: {e}")
 
@@ -286,6 +539,58 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"  Error (esperado): {e}")
 
+    print(f"\n--- Atributos desde ExtendedData ---")
+    import io
+    ext_kml = b"""<kml xmlns="http://www.opengis.net/kml/2.2"><Document>
+<Placemark><name>1</name><ExtendedData><Data name="uso"><value>urbano</value></Data>
+<Data name="area"><value>12.5</value></Data></ExtendedData><Point><coordinates>-70.6,-33.4,0</coordinates></Point></Placemark>
+<Placemark><name>2</name><ExtendedData><SchemaData schemaUrl="#s"><SimpleData name="uso">rural</SimpleData>
+<SimpleData name="alta">2024-03-01</SimpleData></SchemaData></ExtendedData><Point><coordinates>-70.5,-33.4,0</coordinates></Point></Placemark>
+</Document></kml>"""
+    attributes = AttributeBuilder()
+    importer.import_stream(io.BytesIO(ext_kml), 'Sur', 19, attributes=attributes)
+    table = attributes.build()
+    print(f"  Tipos: {table.kinds()}")
+    print(f"  Filas: {[table.row(i) for i in range(len(table))]}")
+
+    print(f"\n--- Importación multizona (cada feature en su zona UTM natural) ---")
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from exporters.kml_exporter import KMLExporter
+
+    # 60k puntos y polilíneas repartidos entre las zonas 17 a 20 de ambos hemisferios
+    placemarks = []
+    for i in range(60_000):
+        lon, lat = -84.0 + (i % 240) * 0.1, -30.0 + (i // 240) * 0.2
+        if i % 3:
+            coords = f"{lon:.5f},{lat:.5f},0"
+            placemarks.append(f"<Placemark><name>{i + 1}</name><Point><coordinates>{coords}</coordinates></Point></Placemark>")
+        else:
+            coords = " ".join(f"{lon + 0.01 * k:.5f},{lat:.5f},0" for k in range(5))
+            placemarks.append(f"<Placemark><name>{i + 1}</name><LineString><coordinates>{coords}</coordinates></LineString></Placemark>")
+    kml_bytes = ('<kml xmlns="http://www.opengis.net/kml/2.2"><Document>' + "".join(placemarks) + "</Document></kml>").encode("utf-8")
+
+    t0 = time.perf_counter()
+    by_zone = importer.import_stream_by_zone(io.BytesIO(kml_bytes))
+    t1 = time.perf_counter()
+    for (hemisphere, zone), mgr in by_zone.items():
+        print(f"  Zona {zone} {hemisphere}: {mgr.feature_count()} features")
+    print(f"  Agrupado y reproyectado en {(t1 - t0) * 1000:.0f} ms")
+
+    t0 = time.perf_counter()
+    importer.import_stream(io.BytesIO(kml_bytes), 'Norte', 17)
+    print(f"  (Referencia: importar todo a una sola zona: {(time.perf_counter() - t0) * 1000:.0f} ms)")
+
+    def export_zone(item):
+        (hemisphere, zone), mgr = item
+        out = os.path.join(test_dir_kml, f"zona_{zone}{hemisphere[0]}.kml")
+        KMLExporter.export(mgr.get_features(), out, hemisphere, str(zone))
+        return out
+
+    with ThreadPoolExecutor() as pool:
+        outputs = list(pool.map(export_zone, by_zone.items()))
+    print(f"  Exportados en paralelo: {', '.join(os.path.basename(o) for o in outputs)}")
+
     # Considerar limpieza
     # import shutil
     # if os.path.exists(test_dir_kml):
@@ -0,0 +1,137 @@
+import os # Para el bloque de pruebas
+import posixpath
+import zipfile
+
+from core.attributes import AttributeBuilder
+from core.diagnostics import Diagnostics
+from importers.kml_importer import KMLImporter
+
+
+class KMZImporter:
+    @staticmethod
+    def _find_main_kml(zf: zipfile.ZipFile) -> zipfile.ZipInfo:
+        """
+        Localiza el KML principal dentro del KMZ: 'doc.kml' en la raíz si existe,
+        si no el primer .kml de la raíz y, en último caso, cualquier .kml del archivo.
+        """
+        kml_entries = [info for info in zf.infolist()
+                       if not info.is_dir() and info.filename.lower().endswith(".kml")]
+        if not kml_entries:
+            return None
+        root_entries = [info for info in kml_entries if posixpath.dirname(info.filename) == ""]
+        for info in root_entries:
+            if info.filename.lower() == "doc.kml":
+                return info
+        return root_entries[0] if root_entries else kml_entries[0]
+
+    @staticmethod
+    def import_file(filepath: str, target_hemisphere: str, target_zone: int,
+                    diagnostics: Diagnostics = None, attributes: AttributeBuilder = None) -> list[dict]:
+        """
+        Importa geometrías desde un archivo KMZ, transformándolas al sistema UTM especificado.
+
+        El KML principal se lee directamente desde el miembro comprimido y se pasa
+        al parser incremental de KMLImporter, sin extraerlo a disco ni cargarlo
+        completo en memoria.
+
+        Args:
+            filepath: Ruta al archivo KMZ.
+            target_hemisphere: Hemisferio de destino ("Norte" o "Sur").
+            target_zone: Zona UTM de destino (entero, 1-60).
+            diagnostics: Colector de avisos (ver KMLImporter.import_stream).
+            attributes: AttributeBuilder opcional para el ExtendedData (ver KMLImporter.import_stream).
+
+        Returns:
+            Una lista de diccionarios de features.
+
+        Raises:
+            FileNotFoundError: Si el archivo KMZ no se encuentra.
+            RuntimeError: Si el archivo no es un KMZ válido, no contiene KML o falla el parseo.
+            ValueError: Para parámetros de zona/hemisferio inválidos.
+        """
+        try:
+            zf = zipfile.ZipFile(filepath, "r")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
+        except zipfile.BadZipFile as e:
+            raise RuntimeError(f"El archivo '{filepath}' no es un KMZ válido: {e}")
+
+        with zf:
+            info = KMZImporter._find_main_kml(zf)
+            if info is None:
+                raise RuntimeError(f"El archivo KMZ '{filepath}' no contiene ningún archivo .kml.")
+            with zf.open(info) as kml_stream:
+                return KMLImporter.import_stream(kml_stream, target_hemisphere, target_zone,
+                                                 source_name=f"{filepath}:{info.filename}", diagnostics=diagnostics,
+                                                 attributes=attributes)
+
+    @staticmethod
+    def import_file_by_zone(filepath: str, diagnostics: Diagnostics = None) -> dict:
+        """
+        Igual que KMLImporter.import_file_by_zone() pero leyendo el KML principal
+        del KMZ en streaming.
+
+        Returns:
+            Dict {(hemisferio, zona): CoordinateManager}, uno por zona presente.
+
+        Raises:
+            FileNotFoundError: Si el archivo KMZ no se encuentra.
+            RuntimeError: Si el archivo no es un KMZ válido, no contiene KML o falla el parseo.
+        """
+        try:
+            zf = zipfile.ZipFile(filepath, "r")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
+        except zipfile.BadZipFile as e:
+            raise RuntimeError(f"El archivo '{filepath}' no es un KMZ válido: {e}")
+
+        with zf:
+            info = KMZImporter._find_main_kml(zf)
+            if info is None:
+                raise RuntimeError(f"El archivo KMZ '{filepath}' no contiene ningún archivo .kml.")
+            with zf.open(info) as kml_stream:
+                return KMLImporter.import_stream_by_zone(kml_stream, source_name=f"{filepath}:{info.filename}",
+                                                         diagnostics=diagnostics)
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import time
+    import tracemalloc
+
+    test_dir_kmz = "test_kmz_imports"
+    if not os.path.exists(test_dir_kmz):
+        os.makedirs(test_dir_kmz)
+    test_kmz_file = os.path.join(test_dir_kmz, "test_import.kmz")
+
+    # KMZ generado en streaming: 20k polígonos de 10 vértices
+    n_placemarks = 20_000
+    with zipfile.ZipFile(test_kmz_file, "w", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("doc.kml", "w") as out:
+            out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                      b'<kml xmlns="http://www.opengis.net/kml/2.2"><Document>\n')
+            for i in range(n_placemarks):
+                lon0, lat0 = -70.9 + (i % 500) * 0.001, -33.6 + (i // 500) * 0.001
+                ring = " ".join(f"{lon0 + 0.0005 * (k % 5):.6f},{lat0 + 0.0005 * (k // 5):.6f},0" for k in range(10))
+                out.write(f"<Placemark><name>{i + 1}</name><Polygon><outerBoundaryIs><LinearRing>"
+                          f"<coordinates>{ring}</coordinates></LinearRing></outerBoundaryIs></Polygon></Placemark>\n".encode("utf-8"))
+            out.write(b"</Document></kml>\n")
+    print(f"KMZ de prueba: {os.path.getsize(test_kmz_file) / 1e6:.1f} MB comprimido")
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    features = KMZImporter.import_file(test_kmz_file, "Sur", 19)
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Importados {len(features)} features en {elapsed:.1f} s; pico de memoria {peak / 1e6:.1f} MB (incluye los features resultantes)")
+    print("Primer feature:", features[0]["id"], features[0]["type"], features[0]["coords"][0])
+
+    print("\n--- Probando con archivo que no es KMZ ---")
+    bad_file = os.path.join(test_dir_kmz, "no_es_kmz.kmz")
+    with open(bad_file, "w") as f:
+        f.write("esto no es un zip")
+    try:
+        KMZImporter.import_file(bad_file, "Sur", 19)
+    except RuntimeError as e:
+        print(f"  Error (esperado): {e}")
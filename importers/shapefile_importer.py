@@ -0,0 +1,204 @@
+import os # Para el bloque de pruebas
+
+import fiona
+import numpy as np
+from pyproj import CRS, Transformer, ProjError
+
+from core.coordinate_manager import CoordinateManager, FeatureArrays, FeatureArraysBuilder, GeometryType
+from core.reprojection import utm_epsg
+
+_PUNTO = GeometryType.CODES[GeometryType.PUNTO]
+_POLILINEA = GeometryType.CODES[GeometryType.POLILINEA]
+_POLIGONO = GeometryType.CODES[GeometryType.POLIGONO]
+
+# Tipos de geometría de fiona -> código de la aplicación (las variantes Multi se guardan como partes)
+_TYPE_CODES = {
+    "Point": _PUNTO, "MultiPoint": _PUNTO,
+    "LineString": _POLILINEA, "MultiLineString": _POLILINEA,
+    "Polygon": _POLIGONO, "MultiPolygon": _POLIGONO,
+}
+
+
+class ShapefileImporter:
+    """
+    Lee Shapefiles (u otra fuente OGR) con fiona, registro a registro.
+
+    Los filtros por bbox y por atributos se delegan a OGR, de modo que solo se
+    leen los registros necesarios. Los vértices se acumulan en arrays numpy y se
+    reproyectan por lotes a la zona UTM activa (FeatureArraysBuilder),
+    rellenando directamente un FeatureArrays sin construir tuplas por vértice.
+    Las geometrías Multi* y los huecos de los polígonos se conservan como
+    partes y anillos.
+    """
+
+    @staticmethod
+    def _parts(geometry):
+        """
+        Devuelve (código, partes) o (None, []). Cada parte es una lista de
+        anillos (arrays (n, 2)); en polígonos, el exterior seguido de los huecos.
+        """
+        geom_type = geometry.get("type") if geometry is not None else None
+        code = _TYPE_CODES.get(geom_type)
+        if code is None:
+            return None, []
+        coords = geometry["coordinates"]
+        if geom_type == "Point":
+            parts = [[[coords]]]
+        elif geom_type == "MultiPoint":
+            parts = [[[c]] for c in coords]
+        elif geom_type == "LineString":
+            parts = [[coords]]
+        elif geom_type == "MultiLineString":
+            parts = [[line] for line in coords]
+        elif geom_type == "Polygon":
+            parts = [coords] if coords else []
+        else:
+            parts = [poly for poly in coords if poly]
+
+        out = []
+        for rings in parts:
+            arrays = []
+            for i, ring in enumerate(rings):
+                xy = np.asarray(ring, dtype=np.float64)
+                if xy.ndim != 2 or len(xy) == 0:
+                    if i == 0:
+                        break
+                    continue
+                xy = xy[:, :2]
+                # Los polígonos de la aplicación no repiten el vértice de cierre
+                if code == _POLIGONO and len(xy) > 1 and (xy[0] == xy[-1]).all():
+                    xy = xy[:-1]
+                if i and len(xy) < 3:
+                    continue    # hueco degenerado
+                arrays.append(xy)
+            if arrays:
+                out.append(arrays)
+        return code, out
+
+    @staticmethod
+    def read_arrays(filepath: str, target_hemisphere: str, target_zone: int,
+                    bbox: tuple = None, where: str = None, id_field: str = "id") -> FeatureArrays:
+        """
+        Lee el archivo y devuelve sus geometrías en UTM como FeatureArrays.
+
+        Args:
+            filepath: Ruta al .shp (o cualquier formato vectorial que abra fiona).
+            target_hemisphere: Hemisferio de destino ("Norte" o "Sur").
+            target_zone: Zona UTM de destino (entero, 1-60).
+            bbox: (minx, miny, maxx, maxy) en coordenadas UTM de destino; solo se
+                  leen los registros que lo intersectan.
+            where: Filtro de atributos en SQL de OGR (p. ej. "tipo = 'pozo'").
+            id_field: Atributo usado como ID; si falta o no es entero se usa un
+                      ID secuencial.
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe.
+            ValueError: Para zona/hemisferio o filtros inválidos.
+            RuntimeError: Si el archivo no se puede leer o reproyectar.
+        """
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
+        dst_crs = CRS.from_epsg(utm_epsg(target_hemisphere, target_zone))
+
+        try:
+            with fiona.open(filepath, "r") as src:
+                src_wkt = src.crs_wkt
+                if src_wkt:
+                    src_crs = CRS.from_wkt(src_wkt)
+                else:
+                    print(f"Advertencia: '{os.path.basename(filepath)}' no tiene sistema de referencia (.prj). Se asume la zona UTM activa.")
+                    src_crs = dst_crs
+                transformer = None if src_crs == dst_crs else Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+                filter_kwargs = {}
+                if bbox is not None:
+                    if transformer is not None:
+                        bbox = Transformer.from_crs(dst_crs, src_crs, always_xy=True).transform_bounds(*bbox)
+                    filter_kwargs["bbox"] = tuple(bbox)
+                if where:
+                    filter_kwargs["where"] = where
+                try:
+                    records = src.filter(**filter_kwargs)
+                except TypeError:
+                    raise ValueError("El filtro de atributos 'where' requiere fiona 1.9 o superior.")
+
+                builder = FeatureArraysBuilder(transform=transformer.transform if transformer is not None else None)
+                skipped = 0
+                seq = 0
+
+                for record in records:
+                    seq += 1
+                    geometry = record["geometry"]
+                    code, parts = ShapefileImporter._parts(geometry)
+                    if not parts:
+                        skipped += 1
+                        continue
+
+                    fid = seq
+                    value = record["properties"].get(id_field) if id_field else None
+                    if value is not None:
+                        try:
+                            fid = int(value)
+                        except (TypeError, ValueError):
+                            pass
+
+                    builder.add(fid, code, parts)
+                arrays = builder.build()
+
+        except (ValueError, FileNotFoundError):
+            raise
+        except ProjError as e:
+            raise RuntimeError(f"Error al reproyectar '{filepath}': {e}")
+        except Exception as e:
+            raise RuntimeError(f"Error al leer el archivo '{filepath}': {e}")
+
+        if skipped:
+            print(f"Advertencia: {skipped} registros sin geometría soportada fueron omitidos.")
+        if not np.isfinite(arrays.xy).all():
+            raise RuntimeError(f"La reproyección de '{filepath}' produjo coordenadas no válidas (¿zona UTM incorrecta?).")
+        return arrays
+
+    @staticmethod
+    def import_file(filepath: str, target_hemisphere: str, target_zone: int,
+                    bbox: tuple = None, where: str = None, id_field: str = "id") -> CoordinateManager:
+        """
+        Igual que read_arrays() pero devuelve un CoordinateManager respaldado
+        por los arrays leídos (ver read_arrays para los argumentos).
+        """
+        arrays = ShapefileImporter.read_arrays(filepath, target_hemisphere, target_zone,
+                                               bbox=bbox, where=where, id_field=id_field)
+        return CoordinateManager.from_arrays(target_hemisphere, int(target_zone), arrays)
+
+
+# Ejemplo de uso (opcional, para testing directo)
+if __name__ == '__main__':
+    import time
+    from collections import OrderedDict
+
+    output_dir_shp = "test_import_shp"
+    if not os.path.exists(output_dir_shp):
+        os.makedirs(output_dir_shp)
+    path = os.path.join(output_dir_shp, "parcelas.shp")
+
+    # Shapefile de prueba en WGS84: 50k cuadrados con atributo 'clase'
+    n = 50_000
+    schema = {"geometry": "Polygon", "properties": OrderedDict([("id", "int"), ("clase", "str")])}
+    with fiona.open(path, "w", driver="ESRI Shapefile", schema=schema, crs="EPSG:4326") as dst:
+        for i in range(n):
+            lon, lat = -75.5 + (i % 250) * 0.004, 4.0 + (i // 250) * 0.004
+            ring = [(lon, lat), (lon + 0.002, lat), (lon + 0.002, lat + 0.002), (lon, lat + 0.002), (lon, lat)]
+            dst.write({"geometry": {"type": "Polygon", "coordinates": [ring]},
+                       "properties": OrderedDict([("id", i + 1), ("clase", "A" if i % 2 else "B")])})
+
+    t0 = time.perf_counter()
+    mgr = ShapefileImporter.import_file(path, "Norte", 18)
+    t1 = time.perf_counter()
+    arrays = mgr.to_arrays()
+    print(f"Completo: {len(arrays)} features, {arrays.n_vertices} vértices en {(t1 - t0) * 1000:.0f} ms")
+
+    x0, y0 = arrays.xy[0]
+    bbox = (x0 - 1000, y0 - 1000, x0 + 5000, y0 + 5000)
+    t0 = time.perf_counter()
+    sub = ShapefileImporter.read_arrays(path, "Norte", 18, bbox=bbox, where="clase = 'A'")
+    t1 = time.perf_counter()
+    print(f"bbox + where: {len(sub)} features en {(t1 - t0) * 1000:.0f} ms, IDs {sub.ids[:5].tolist()}...")
@@ -0,0 +1,315 @@
+# map_view.py
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QRectF, QTimer, Signal
+from PySide6.QtGui import QImage, QPixmap, QTransform
+from PySide6.QtWidgets import QGraphicsView
+from pyproj import Transformer, ProjError
+
+from core.reprojection import utm_epsg
+from core.tiles import (
+    DEFAULT_TILE_URL, TILE_SIZE, LRUCache, DiskTileCache,
+    tile_to_lonlat, tiles_for_bbox, zoom_for_resolution
+)
+
+TILE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".geowizard", "tiles")
+MAX_VISIBLE_TILES = 64
+# Reintento de teselas fallidas: espera inicial que se duplica en cada fallo hasta el máximo
+TILE_RETRY_SECONDS = 15
+TILE_RETRY_MAX_SECONDS = 600
+
+
+class TileLoader(QObject):
+    """
+    Descarga teselas en segundo plano (hilos) y las decodifica a QImage.
+
+    Primero busca en la caché de disco y, si no está, la pide al servidor
+    configurado. El resultado llega a la GUI mediante señales (conexión en cola),
+    por lo que el hilo principal nunca espera por E/S.
+    """
+    tileLoaded = Signal(str, object, QImage)  # plantilla de URL, clave (z, x, y), imagen
+    tileFailed = Signal(str, object, str)     # plantilla de URL, clave (z, x, y), mensaje
+
+    def __init__(self, parent=None, url_template: str = DEFAULT_TILE_URL,
+                 cache_dir: str = TILE_CACHE_DIR, max_workers: int = 4):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tiles")
+        self._cache_dir = cache_dir
+        self._pending = {}  # clave -> Future
+        self.set_url_template(url_template)
+
+    def set_url_template(self, url_template: str):
+        """Cambia el servidor de teselas; las peticiones pendientes se descartan."""
+        self.url_template = url_template or DEFAULT_TILE_URL
+        self._disk_cache = DiskTileCache(self._cache_dir, self.url_template)
+        self.cancel_all()
+
+    def cancel_all(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    def request(self, keys: list[tuple[int, int, int]]):
+        """
+        Pide las teselas indicadas. Las pendientes que ya no estén en `keys`
+        se cancelan si aún no han empezado, así al desplazar el mapa no se
+        acumulan descargas de zonas que ya no se ven.
+        """
+        wanted = set(keys)
+        for key in [k for k in self._pending if k not in wanted]:
+            if self._pending[key].cancel():
+                del self._pending[key]
+
+        for key in keys:
+            if key in self._pending:
+                continue
+            future = self._executor.submit(self._load, key, self.url_template, self._disk_cache)
+            # Registrar antes del callback: si la descarga ya terminó (p. ej. sin
+            # conexión) se ejecuta aquí mismo y forget() debe encontrar la clave
+            self._pending[key] = future
+            future.add_done_callback(lambda f, k=key, t=self.url_template: self._on_done(t, k, f))
+
+    def is_pending(self, key) -> bool:
+        return key in self._pending
+
+    def forget(self, key):
+        """Se llama desde la GUI cuando la tesela ya fue recibida o falló."""
+        self._pending.pop(key, None)
+
+    @staticmethod
+    def _load(key, url_template, disk_cache) -> QImage:
+        # Se ejecuta en un hilo del pool
+        data = disk_cache.get(key)
+        if data is None:
+            z, x, y = key
+            url = url_template.format(z=z, x=x, y=y)
+            req = urllib.request.Request(url, headers={"User-Agent": "GeoWizard/1.0"})
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                data = resp.read()
+            image = QImage.fromData(data)
+            if image.isNull():
+                raise ValueError(f"Respuesta de '{url}' no es una imagen válida.")
+            disk_cache.put(key, data)
+            return image
+        image = QImage.fromData(data)
+        if image.isNull():
+            raise ValueError(f"Tesela {key} en caché corrupta.")
+        return image
+
+    def _on_done(self, url_template, key, future):
+        # Se ejecuta en el hilo del pool: solo se emiten señales
+        if future.cancelled():
+            return
+        try:
+            image = future.result()
+        except Exception as e:
+            self.tileFailed.emit(url_template, key, str(e))
+            return
+        self.tileLoaded.emit(url_template, key, image)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class MapView(QGraphicsView):
+    """
+    Lienzo con el norte hacia arriba, zoom con la rueda y desplazamiento
+    arrastrando. Opcionalmente dibuja un mapa base en teselas (OSM u otro
+    servidor XYZ) como fondo, debajo de las geometrías de la escena.
+
+    El fondo se pinta en drawBackground() usando solo teselas que ya están
+    en memoria; las que faltan se piden de forma asíncrona y la vista se
+    repinta al llegar.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # La escena usa coordenadas UTM (Y = Norte), se invierte Y para dibujar con el norte arriba
+        self.setTransform(QTransform.fromScale(1, -1))
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+
+        self._basemap_enabled = False
+        self._hemisphere = "Norte"
+        self._zone = 1
+        self._to_wgs84 = None
+        self._to_utm = None
+        self._tile_rects = {}  # clave -> (oeste, norte, ancho, alto) en UTM
+        self._failed = {}  # clave -> (instante de reintento (time.monotonic), fallos seguidos)
+        self._pixmaps = LRUCache(max_bytes=96 * 1024 * 1024)
+
+        self._tile_loader = TileLoader(self)
+        self._tile_loader.tileLoaded.connect(self._on_tile_loaded)
+        self._tile_loader.tileFailed.connect(self._on_tile_failed)
+
+        # Agrupa cambios rápidos (scroll, zoom, resize) en un único cálculo de teselas
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(50)
+        self._update_timer.timeout.connect(self._request_visible_tiles)
+        # Vuelve a pedir las teselas visibles cuando vence la espera de alguna fallida
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._schedule_tile_update)
+        self.horizontalScrollBar().valueChanged.connect(self._schedule_tile_update)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_tile_update)
+
+        self.set_utm(self._hemisphere, self._zone)
+
+    # ---- configuración ----
+
+    def set_utm(self, hemisphere: str, zone: int):
+        """Sistema UTM en el que están expresadas las coordenadas de la escena."""
+        try:
+            epsg = utm_epsg(hemisphere, zone)
+            self._to_wgs84 = Transformer.from_crs(f"EPSG:{epsg}", "EPSG:4326", always_xy=True)
+            self._to_utm = Transformer.from_crs("EPSG:4326", f"EPSG:{epsg}", always_xy=True)
+        except (ValueError, ProjError) as e:
+            print(f"Advertencia: No se pudo configurar el mapa base para zona {zone} {hemisphere}: {e}")
+            self._to_wgs84 = self._to_utm = None
+        self._hemisphere, self._zone = hemisphere, zone
+        self._tile_rects.clear()
+        self._schedule_tile_update()
+        self.viewport().update()
+
+    def set_tile_url(self, url_template: str):
+        self._tile_loader.set_url_template(url_template)
+        self._pixmaps.clear()
+        self._failed.clear()
+        self._schedule_tile_update()
+        self.viewport().update()
+
+    def tile_url(self) -> str:
+        return self._tile_loader.url_template
+
+    def set_basemap_enabled(self, enabled: bool):
+        self._basemap_enabled = bool(enabled)
+        if self._basemap_enabled:
+            self._failed.clear()  # reactivar el mapa reintenta ya las teselas fallidas
+            # Permite desplazarse por toda la zona UTM aunque no haya geometrías
+            self.setSceneRect(0, 0, 1_000_000, 10_000_000)
+            self._schedule_tile_update()
+        else:
+            self.setSceneRect(QRectF())  # Vuelve al rectángulo automático de la escena
+            self._tile_loader.cancel_all()
+        self.viewport().update()
+
+    def shutdown(self):
+        self._tile_loader.shutdown()
+
+    # ---- eventos ----
+
+    def wheelEvent(self, event):
+        factor = 1.25 ** (event.angleDelta().y() / 120.0)
+        self.scale(factor, factor)
+        self._schedule_tile_update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_tile_update()
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if not self._basemap_enabled or not self._tile_rects:
+            return
+        for key, (west, north, width, height) in self._tile_rects.items():
+            if west > rect.right() or west + width < rect.left() \
+                    or north < rect.top() or north - height > rect.bottom():
+                continue
+            pixmap = self._pixmaps.get(key)
+            if pixmap is None:
+                continue
+            painter.save()
+            # La fila 0 de la imagen es el borde norte de la tesela
+            painter.translate(west, north)
+            painter.scale(width / pixmap.width(), -height / pixmap.height())
+            painter.drawPixmap(0, 0, pixmap)
+            painter.restore()
+
+    # ---- teselas ----
+
+    def _schedule_tile_update(self):
+        if self._basemap_enabled:
+            self._update_timer.start()
+
+    def _request_visible_tiles(self):
+        if not self._basemap_enabled or self._to_wgs84 is None:
+            return
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        if visible.isEmpty():
+            return
+
+        xs = [visible.left(), visible.right(), visible.left(), visible.right()]
+        ys = [visible.top(), visible.top(), visible.bottom(), visible.bottom()]
+        try:
+            lons, lats = self._to_wgs84.transform(xs, ys)
+        except ProjError:
+            return
+        lons = [v for v in lons if v == v and abs(v) != float("inf")]
+        lats = [v for v in lats if v == v and abs(v) != float("inf")]
+        if not lons or not lats:
+            return
+        west, east, south, north = min(lons), max(lons), min(lats), max(lats)
+
+        meters_per_pixel = visible.width() / max(1, self.viewport().width())
+        z = zoom_for_resolution(meters_per_pixel, (south + north) / 2.0)
+        keys = tiles_for_bbox(west, south, east, north, z)
+        while len(keys) > MAX_VISIBLE_TILES and z > 0:
+            z -= 1
+            keys = tiles_for_bbox(west, south, east, north, z)
+
+        self._tile_rects = self._compute_tile_rects(keys)
+        now = time.monotonic()
+        missing = [k for k in keys if k not in self._pixmaps
+                   and (k not in self._failed or self._failed[k][0] <= now)]
+        waiting = [self._failed[k][0] for k in keys if k in self._failed and self._failed[k][0] > now]
+        if waiting:
+            self._retry_timer.start(int((min(waiting) - now) * 1000) + 1)
+        self._tile_loader.request(missing)
+        self.viewport().update()
+
+    def _compute_tile_rects(self, keys):
+        """Proyecta las esquinas de todas las teselas a UTM en una sola llamada."""
+        if not keys:
+            return {}
+        lons, lats = [], []
+        for z, x, y in keys:
+            lon_w, lat_n = tile_to_lonlat(x, y, z)
+            lon_e, lat_s = tile_to_lonlat(x + 1, y + 1, z)
+            lons.extend((lon_w, lon_e))
+            lats.extend((lat_n, lat_s))
+        try:
+            utm_x, utm_y = self._to_utm.transform(lons, lats)
+        except ProjError:
+            return {}
+        rects = {}
+        for i, key in enumerate(keys):
+            west, north = utm_x[2 * i], utm_y[2 * i]
+            east, south = utm_x[2 * i + 1], utm_y[2 * i + 1]
+            rects[key] = (west, north, east - west, north - south)
+        return rects
+
+    def _on_tile_loaded(self, url_template, key, image):
+        if url_template != self._tile_loader.url_template:
+            return  # Respuesta de un servidor anterior
+        self._tile_loader.forget(key)
+        self._failed.pop(key, None)
+        pixmap = QPixmap.fromImage(image)
+        self._pixmaps.put(key, pixmap, pixmap.width() * pixmap.height() * 4 or TILE_SIZE * TILE_SIZE * 4)
+        if key in self._tile_rects:
+            self.viewport().update()
+
+    def _on_tile_failed(self, url_template, key, message):
+        if url_template != self._tile_loader.url_template:
+            return
+        self._tile_loader.forget(key)
+        failures = self._failed[key][1] + 1 if key in self._failed else 1
+        delay = min(TILE_RETRY_SECONDS * 2 ** (failures - 1), TILE_RETRY_MAX_SECONDS)
+        self._failed[key] = (time.monotonic() + delay, failures)
+        if failures == 1:
+            print(f"Advertencia: No se pudo cargar la tesela {key}: {message}")
+        self._schedule_tile_update()  # programa el reintento (ver _request_visible_tiles)